@@ -0,0 +1,17 @@
+from .fake_redis import FakeRedis, FakeRedisServer
+from .fixtures import Fixtures
+from .loadgen import build_targets, run_open_loop, summarize
+from .origin import build_corpus, build_origin_app
+from .processing_stub import ProcessingStub
+
+__all__ = [
+    'FakeRedis',
+    'FakeRedisServer',
+    'Fixtures',
+    'build_targets',
+    'run_open_loop',
+    'summarize',
+    'build_corpus',
+    'build_origin_app',
+    'ProcessingStub'
+]
@@ -0,0 +1,406 @@
+"""
+Redis falso en memoria que habla RESP2 por TCP
+
+Implementa solo los comandos que usan RedisCache, RateLimiter,
+TenantQuotas y ChangeTracker (strings con TTL, hashes, sorted sets,
+pipelines, MULTI/EXEC y PUBLISH), así el Servidor A corre sin cambios con
+--redis-host/--redis-port apuntando acá. No persiste nada y los TTL se
+evalúan al leer (no hay expiración activa).
+"""
+import asyncio
+import fnmatch
+import time
+from typing import Dict, List, Optional
+
+
+class RedisError(Exception):
+    """Error devuelto al cliente como '-ERR ...'"""
+
+
+class _Status(bytes):
+    """Simple string ('+OK')"""
+
+
+class _ScoredMembers(list):
+    """ZRANGE ... WITHSCORES: [(member, score)] (RESP2 lo aplana, RESP3 no)"""
+
+
+OK = _Status(b'OK')
+QUEUED = _Status(b'QUEUED')
+
+
+def encode(value, resp3: bool = False) -> bytes:
+    """
+    Respuesta en RESP2 o RESP3
+    
+    bytes/str = bulk, int = integer, float = double (bulk en RESP2),
+    list = array, dict = map (array plano en RESP2), None = nil
+    """
+    if isinstance(value, _Status):
+        return b'+%s\r\n' % value
+    if isinstance(value, RedisError):
+        return b'-ERR %s\r\n' % str(value).encode('utf-8')
+    if value is None:
+        return b'_\r\n' if resp3 else b'$-1\r\n'
+    if isinstance(value, bool):
+        return b':%d\r\n' % int(value)
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, float):
+        return b',%s\r\n' % repr(value).encode('ascii') if resp3 else encode(_format_score(value))
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if isinstance(value, (bytes, bytearray)):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    if isinstance(value, _ScoredMembers) and not resp3:
+        value = [item for pair in value for item in pair]
+    if isinstance(value, dict):
+        if resp3:
+            return b'%%%d\r\n' % len(value) + b''.join(
+                encode(key, resp3) + encode(item, resp3) for key, item in value.items()
+            )
+        value = [item for pair in value.items() for item in pair]
+    if isinstance(value, (list, tuple)):
+        return b'*%d\r\n' % len(value) + b''.join(encode(item, resp3) for item in value)
+    raise TypeError(f"Tipo no soportado: {type(value)}")
+
+
+def _format_score(score: float) -> bytes:
+    if score == int(score) and abs(score) < 1e17:
+        return b'%d' % int(score)
+    return repr(score).encode('ascii')
+
+
+def _parse_bound(raw: bytes):
+    """Límite de ZREMRANGEBYSCORE: '-inf', '+inf', 'x' o '(x' (exclusivo)"""
+    text = raw.decode('ascii')
+    exclusive = text.startswith('(')
+    if exclusive:
+        text = text[1:]
+    return float(text), exclusive
+
+
+class FakeRedis:
+    """Datos y comandos (independiente del transporte)"""
+    
+    def __init__(self):
+        self.data: Dict[bytes, object] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.commands = 0
+        
+        # PUBLISH: (canal, mensaje) en orden (no hay suscriptores)
+        self.published: List[tuple] = []
+    
+    # ------------------------------------------------------------------
+    # Keys y TTL
+    # ------------------------------------------------------------------
+    
+    def _alive(self, key: bytes) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+    
+    def _get(self, key: bytes, kind: type, create: bool = False):
+        if not self._alive(key):
+            if not create:
+                return None
+            self.data[key] = kind()
+        value = self.data[key]
+        if type(value) is not kind:
+            raise RedisError('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return value
+    
+    def _delete(self, key: bytes) -> int:
+        self.expires.pop(key, None)
+        return int(self.data.pop(key, None) is not None)
+    
+    # ------------------------------------------------------------------
+    # Comandos
+    # ------------------------------------------------------------------
+    
+    def execute(self, args: List[bytes]):
+        """Ejecutar un comando (args[0] = nombre) y devolver la respuesta"""
+        self.commands += 1
+        name = args[0].upper().decode('ascii')
+        handler = getattr(self, f'cmd_{name.lower()}', None)
+        
+        if handler is None:
+            return RedisError(f"unknown command '{name}'")
+        
+        try:
+            return handler(*args[1:])
+        except RedisError as e:
+            return e
+        except (TypeError, ValueError, IndexError) as e:
+            return RedisError(f"wrong arguments for '{name}': {e}")
+    
+    def cmd_ping(self, message: bytes = None):
+        return message if message is not None else _Status(b'PONG')
+    
+    def cmd_client(self, *args):
+        # CLIENT SETINFO / SETNAME del handshake de redis-py
+        return OK
+    
+    def cmd_select(self, db: bytes):
+        return OK
+    
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return OK
+    
+    cmd_flushdb = cmd_flushall
+    
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._alive(key))
+    
+    def cmd_get(self, key: bytes):
+        return self._get(key, bytes)
+    
+    def cmd_mget(self, *keys: bytes):
+        return [self.data[key] if self._alive(key) and type(self.data[key]) is bytes else None for key in keys]
+    
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes):
+        options = [option.upper() for option in options]
+        ttl = None
+        
+        if b'NX' in options and self._alive(key):
+            return None
+        if b'EX' in options:
+            ttl = float(options[options.index(b'EX') + 1])
+        if b'PX' in options:
+            ttl = float(options[options.index(b'PX') + 1]) / 1000
+        
+        self._delete(key)
+        self.data[key] = bytes(value)
+        if ttl is not None:
+            self.expires[key] = time.monotonic() + ttl
+        return OK
+    
+    def cmd_setex(self, key: bytes, seconds: bytes, value: bytes):
+        self._delete(key)
+        self.data[key] = bytes(value)
+        self.expires[key] = time.monotonic() + int(seconds)
+        return OK
+    
+    def cmd_del(self, *keys: bytes):
+        return sum(self._delete(key) for key in keys if self._alive(key))
+    
+    def cmd_exists(self, *keys: bytes):
+        return sum(1 for key in keys if self._alive(key))
+    
+    def cmd_expire(self, key: bytes, seconds: bytes):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+    
+    def cmd_ttl(self, key: bytes):
+        if not self._alive(key):
+            return -2
+        deadline = self.expires.get(key)
+        if deadline is None:
+            return -1
+        return max(0, round(deadline - time.monotonic()))
+    
+    def cmd_keys(self, pattern: bytes):
+        pattern = pattern.decode('utf-8')
+        return [
+            key for key in list(self.data)
+            if self._alive(key) and fnmatch.fnmatchcase(key.decode('utf-8', 'replace'), pattern)
+        ]
+    
+    # Hashes
+    
+    def cmd_hset(self, key: bytes, *pairs: bytes):
+        if not pairs or len(pairs) % 2:
+            raise RedisError("wrong number of arguments for 'hset'")
+        mapping = self._get(key, dict, create=True)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in mapping
+            mapping[field] = bytes(value)
+        return added
+    
+    def cmd_hget(self, key: bytes, field: bytes):
+        mapping = self._get(key, dict)
+        return mapping.get(field) if mapping else None
+    
+    def cmd_hmget(self, key: bytes, *fields: bytes):
+        mapping = self._get(key, dict) or {}
+        return [mapping.get(field) for field in fields]
+    
+    def cmd_hgetall(self, key: bytes):
+        return dict(self._get(key, dict) or {})
+    
+    def cmd_hincrby(self, key: bytes, field: bytes, amount: bytes):
+        mapping = self._get(key, dict, create=True)
+        value = int(mapping.get(field, b'0')) + int(amount)
+        mapping[field] = b'%d' % value
+        return value
+    
+    # Sorted sets (member -> score)
+    
+    def _zset(self, key: bytes, create: bool = False) -> Optional[Dict[bytes, float]]:
+        # Los sorted sets son _ZSet para distinguirlos de los hashes
+        return self._get(key, _ZSet, create=create)
+    
+    def cmd_zadd(self, key: bytes, *pairs: bytes):
+        zset = self._zset(key, create=True)
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in zset
+            zset[member] = float(score)
+        return added
+    
+    def cmd_zrem(self, key: bytes, *members: bytes):
+        zset = self._zset(key)
+        if not zset:
+            return 0
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+    
+    def cmd_zcard(self, key: bytes):
+        zset = self._zset(key)
+        return len(zset) if zset else 0
+    
+    def cmd_zrange(self, key: bytes, start: bytes, stop: bytes, *options: bytes):
+        zset = self._zset(key) or {}
+        items = sorted(zset.items(), key=lambda item: (item[1], item[0]))
+        start, stop = int(start), int(stop)
+        
+        if start < 0:
+            start = max(0, len(items) + start)
+        if stop < 0:
+            stop = len(items) + stop
+        items = items[start:stop + 1]
+        
+        if any(option.upper() == b'WITHSCORES' for option in options):
+            return _ScoredMembers(items)
+        return [member for member, _ in items]
+    
+    def cmd_zremrangebyscore(self, key: bytes, low: bytes, high: bytes):
+        zset = self._zset(key)
+        if not zset:
+            return 0
+        
+        (low, low_open), (high, high_open) = _parse_bound(low), _parse_bound(high)
+        removed = [
+            member for member, score in zset.items()
+            if (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+        ]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+    
+    # ------------------------------------------------------------------
+    # Pub/sub
+    # ------------------------------------------------------------------
+    
+    def cmd_publish(self, channel: bytes, message: bytes):
+        self.published.append((channel, message))
+        return 0
+
+
+class _ZSet(dict):
+    pass
+
+
+class FakeRedisServer:
+    """Servidor TCP (asyncio) sobre un FakeRedis"""
+    
+    def __init__(self, store: FakeRedis = None):
+        self.store = store or FakeRedis()
+        self.server: Optional[asyncio.AbstractServer] = None
+    
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 0):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self
+    
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+    
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        
+        if not line.startswith(b'*'):
+            # Comando inline ('PING\r\n', redis-cli con telnet)
+            return line.split()
+        
+        args = []
+        for _ in range(int(line[1:])):
+            header = await reader.readline()
+            size = int(header[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+    
+    @staticmethod
+    def _hello(args: List[bytes], version: int):
+        """HELLO [protover ...]: redis-py 5+ negocia RESP3 al conectar"""
+        if len(args) > 1:
+            version = int(args[1])
+            if version not in (2, 3):
+                return RedisError('NOPROTO unsupported protocol version'), None
+        
+        return {
+            'server': 'redis',
+            'version': '7.2.0',
+            'proto': version,
+            'id': 1,
+            'mode': 'standalone',
+            'role': 'master',
+            'modules': []
+        }, version
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        queued = None
+        version = 2
+        
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                
+                name = args[0].upper()
+                
+                if name == b'HELLO':
+                    reply, negotiated = self._hello(args, version)
+                    version = negotiated or version
+                # MULTI/EXEC: los comandos se encolan y se ejecutan juntos
+                elif name == b'MULTI':
+                    queued = []
+                    reply = OK
+                elif name == b'EXEC':
+                    if queued is None:
+                        reply = RedisError('EXEC without MULTI')
+                    else:
+                        reply = [self.store.execute(command) for command in queued]
+                        queued = None
+                elif name == b'DISCARD':
+                    queued = None
+                    reply = OK
+                elif queued is not None:
+                    queued.append(args)
+                    reply = QUEUED
+                else:
+                    reply = self.store.execute(args)
+                
+                writer.write(encode(reply, resp3=version == 3))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,95 @@
+"""
+Entorno de la prueba de carga en un proceso aparte
+
+El origen sintético, el Redis falso y el Servidor B de mentira corren en un
+mismo event loop, en un proceso separado del generador de carga: lo que
+cuesta servirlos no se mezcla con la medición de latencias.
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import signal
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from .fake_redis import FakeRedisServer
+from .origin import build_corpus, build_origin_app
+from .processing_stub import ProcessingStub
+
+
+async def _serve(config: Dict, ready):
+    corpus = build_corpus(seed=config.get('seed', 2024), slow_delay=config.get('slow_delay', 2.0))
+    
+    runner = web.AppRunner(
+        build_origin_app(corpus, huge_image_bytes=config.get('huge_image_bytes', 8 * 1024 * 1024)),
+        access_log=None
+    )
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    
+    redis = await FakeRedisServer().start()
+    stub = await ProcessingStub(
+        latency=config.get('processing_latency', 0.3),
+        jitter=config.get('processing_jitter', 0.1),
+        error_rate=config.get('processing_error_rate', 0.0),
+        result_bytes=config.get('processing_result_bytes', 50 * 1024)
+    ).start()
+    
+    ready.put({
+        'origin_port': runner.addresses[0][1],
+        'redis_port': redis.port,
+        'processing_port': stub.port,
+        'pages': {name: len(page.body) for name, page in corpus.items()}
+    })
+    
+    stop = asyncio.Event()
+    asyncio.get_event_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    await stop.wait()
+    
+    await stub.close()
+    await redis.close()
+    await runner.cleanup()
+
+
+def _main(config: Dict, ready):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_serve(config, ready))
+
+
+class Fixtures:
+    """Proceso con origen, Redis y Servidor B falsos (start() devuelve los puertos)"""
+    
+    def __init__(self, config: Dict = None):
+        self.config = dict(config or {})
+        self.process: Optional[mp.Process] = None
+        self.info: Dict = {}
+    
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+    
+    def start(self, timeout: float = 30) -> Dict:
+        ctx = mp.get_context('spawn')
+        ready = ctx.Queue()
+        self.process = ctx.Process(target=_main, args=(self.config, ready), name='LoadFixtures', daemon=True)
+        self.process.start()
+        self.info = ready.get(timeout=timeout)
+        return self.info
+    
+    def stop(self, timeout: float = 10):
+        if self.process is None or not self.process.is_alive():
+            return
+        os.kill(self.process.pid, signal.SIGTERM)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
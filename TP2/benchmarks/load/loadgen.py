@@ -0,0 +1,237 @@
+"""
+Generador de carga de lazo abierto (open loop)
+
+Las requests salen a una tasa fija según un horario calculado de antemano,
+sin esperar a que terminen las anteriores: si el servidor se frena, la
+latencia crece en vez de bajar la carga (sin "coordinated omission"). La
+latencia se mide desde el momento en que la request debía salir.
+"""
+import asyncio
+import random
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class Target:
+    """Request del horario: qué página y con qué parámetros"""
+    
+    __slots__ = ('page', 'full', 'url')
+    
+    def __init__(self, page: str, full: bool, url: str):
+        self.page = page
+        self.full = full
+        self.url = url
+    
+    @property
+    def label(self) -> str:
+        return f"{self.page}{' (full)' if self.full else ''}"
+
+
+class Sample:
+    """Resultado de una request"""
+    
+    __slots__ = ('target', 'intended', 'sent', 'finished', 'status', 'error', 'cache', 'bytes')
+    
+    def __init__(self, target: Target, intended: float):
+        self.target = target
+        self.intended = intended
+        self.sent: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.cache: Optional[str] = None
+        self.bytes = 0
+    
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and 200 <= self.status < 400
+    
+    @property
+    def outcome(self) -> str:
+        return str(self.status) if self.status is not None else self.error
+
+
+def build_targets(
+    origin: str,
+    mix: Dict[str, float],
+    count: int,
+    full_ratio: float = 0.2,
+    unique_urls: int = 1000,
+    seed: int = 1
+) -> List[Target]:
+    """
+    Horario de páginas a pedir
+    
+    Args:
+        origin: URL base del origen (ej: http://127.0.0.1:8081)
+        mix: nombre de página -> peso
+        count: Cantidad de requests
+        full_ratio: Fracción con full=true (pasan por el Servidor B)
+        unique_urls: Variantes distintas por página (?v=N): controla
+                     cuántas requests pueden salir de la caché
+        seed: Semilla del horario (mismo orden en cada corrida)
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    targets = []
+    
+    for _ in range(count):
+        page = rng.choices(names, weights)[0]
+        variant = rng.randrange(max(1, unique_urls))
+        targets.append(Target(page, rng.random() < full_ratio, f"{origin}/pages/{page}?v={variant}"))
+    
+    return targets
+
+
+async def run_open_loop(
+    base_url: str,
+    targets: Sequence[Target],
+    rps: float,
+    timeout: float = 30,
+    max_in_flight: int = 10000
+) -> List[Sample]:
+    """
+    Disparar targets contra /scrape a rps requests por segundo
+    
+    Args:
+        base_url: URL del Servidor A
+        targets: Horario (build_targets)
+        rps: Requests por segundo
+        timeout: Segundos máximos por request
+        max_in_flight: Requests simultáneas antes de descartar (el propio
+                       generador quedó saturado: se cuentan como 'dropped')
+    
+    Returns:
+        Lista de Sample en el orden del horario
+    """
+    loop = asyncio.get_event_loop()
+    connector = aiohttp.TCPConnector(limit=0, force_close=False)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    in_flight = 0
+    samples = []
+    tasks = []
+    
+    async def fire(session: aiohttp.ClientSession, sample: Sample):
+        nonlocal in_flight
+        params = {'url': sample.target.url}
+        if sample.target.full:
+            params['full'] = 'true'
+        
+        in_flight += 1
+        sample.sent = loop.time()
+        
+        try:
+            async with session.get(f'{base_url}/scrape', params=params) as response:
+                body = await response.read()
+                sample.status = response.status
+                sample.cache = response.headers.get('X-Cache')
+                sample.bytes = len(body)
+        except asyncio.TimeoutError:
+            sample.error = 'timeout'
+        except aiohttp.ClientError as e:
+            sample.error = type(e).__name__
+        finally:
+            sample.finished = loop.time()
+            in_flight -= 1
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        start = loop.time()
+        interval = 1.0 / rps
+        
+        for i, target in enumerate(targets):
+            intended = start + i * interval
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            sample = Sample(target, intended)
+            samples.append(sample)
+            
+            if in_flight >= max_in_flight:
+                sample.error = 'dropped'
+                sample.sent = sample.finished = loop.time()
+                continue
+            
+            tasks.append(asyncio.ensure_future(fire(session, sample)))
+        
+        await asyncio.gather(*tasks)
+    
+    return samples
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> Optional[float]:
+    """Percentil por rango más cercano sobre valores ya ordenados"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict:
+    """Percentiles, media y máximo en ms"""
+    values = sorted(latencies)
+    summary = {'count': len(values)}
+    
+    for pct in PERCENTILES:
+        value = percentile(values, pct)
+        summary[f'p{pct:g}'] = round(value * 1000, 3) if value is not None else None
+    
+    summary['mean'] = round(sum(values) / len(values) * 1000, 3) if values else None
+    summary['max'] = round(values[-1] * 1000, 3) if values else None
+    return summary
+
+
+def summarize(samples: Sequence[Sample], elapsed: float) -> Dict:
+    """
+    Resumen de la corrida
+    
+    Returns:
+        dict con requests, ok, errores por tipo, error_rate, throughput,
+        latencia (desde el horario y de servicio) y desglose por página
+    """
+    ok = [sample for sample in samples if sample.ok]
+    outcomes: Dict[str, int] = {}
+    cache: Dict[str, int] = {}
+    by_page: Dict[str, List[Sample]] = {}
+    
+    for sample in samples:
+        outcomes[sample.outcome] = outcomes.get(sample.outcome, 0) + 1
+        by_page.setdefault(sample.target.label, []).append(sample)
+        if sample.cache:
+            cache[sample.cache] = cache.get(sample.cache, 0) + 1
+    
+    return {
+        'requests': len(samples),
+        'ok': len(ok),
+        'errors': len(samples) - len(ok),
+        'error_rate': round((len(samples) - len(ok)) / len(samples), 6) if samples else 0.0,
+        'elapsed_seconds': round(elapsed, 3),
+        'offered_rps': round(len(samples) / elapsed, 3) if elapsed else None,
+        'throughput_rps': round(len(ok) / elapsed, 3) if elapsed else None,
+        'response_bytes': sum(sample.bytes for sample in ok),
+        'outcomes': dict(sorted(outcomes.items())),
+        'cache': cache,
+        'latency_ms': latency_summary([sample.finished - sample.intended for sample in ok]),
+        'service_time_ms': latency_summary([sample.finished - sample.sent for sample in ok]),
+        'by_page': {
+            label: {
+                'requests': len(page_samples),
+                'errors': sum(1 for sample in page_samples if not sample.ok),
+                'latency_ms': latency_summary([
+                    sample.finished - sample.intended for sample in page_samples if sample.ok
+                ])
+            }
+            for label, page_samples in sorted(by_page.items())
+        }
+    }
+
+
+def measure_elapsed(samples: Sequence[Sample]) -> float:
+    """Desde la primera request programada hasta la última respuesta"""
+    if not samples:
+        return 0.0
+    return max(sample.finished for sample in samples) - min(sample.intended for sample in samples)
@@ -0,0 +1,88 @@
+"""
+Comparar modos de ejecución del Servidor A con la misma carga
+
+Corre la prueba de carga una vez por modo (mismo horario de requests y
+mismo entorno falso; ver run.py) y muestra lado a lado latencia,
+throughput y CPU del Servidor A por request:
+
+    python -m benchmarks.load.modes --rps 200 --duration 20
+    python -m benchmarks.load.modes --mode base= --mode 'async-log=--async-logging' --rps 100
+
+Cada --mode es 'nombre=argumentos de server_scraping.py'. Los demás
+argumentos son los de python -m benchmarks.load.
+"""
+import argparse
+import copy
+import json
+import shlex
+import sys
+from typing import Dict, List, Tuple
+
+from .run import parse_arguments, run_benchmark
+
+DEFAULT_MODES = (
+    ('standard', []),
+    ('performance', ['--performance-mode'])
+)
+
+
+def parse_mode(value: str) -> Tuple[str, List[str]]:
+    """'perf=--performance-mode --backlog 512' -> ('perf', [...])"""
+    name, sep, server_args = value.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"Modo inválido (nombre=argumentos): {value!r}")
+    return name, shlex.split(server_args)
+
+
+def cpu_ms_per_request(result: Dict) -> float:
+    requests = result['summary']['ok'] or 1
+    return round(result['resources']['server_a']['cpu_seconds'] * 1000 / requests, 3)
+
+
+def print_table(results: Dict[str, Dict]):
+    print("\n" + "=" * 70)
+    print(f"   {'modo':<14} {'p50 ms':>8} {'p99 ms':>8} {'rps':>8} {'errores':>8} {'CPU ms/req':>11} {'RSS MB':>7}")
+    
+    for name, result in results.items():
+        summary = result['summary']
+        server = result['resources']['server_a']
+        print(
+            f"   {name:<14} {summary['latency_ms']['p50'] or 0:>8.1f} {summary['latency_ms']['p99'] or 0:>8.1f} "
+            f"{summary['throughput_rps']:>8.1f} {summary['error_rate']:>8.2%} "
+            f"{cpu_ms_per_request(result):>11.2f} {server['rss_peak_mb']:>7.1f}"
+        )
+    
+    print("=" * 70)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--mode', action='append', type=parse_mode, help="nombre=argumentos del Servidor A (repetible)")
+    parser.add_argument('--output', default=None, help='Guardar los resultados de todos los modos en este JSON')
+    options, rest = parser.parse_known_args(argv)
+    
+    if '-h' in rest or '--help' in rest:
+        print(__doc__)
+    
+    args = parse_arguments(rest)
+    modes = options.mode or DEFAULT_MODES
+    results = {}
+    
+    for name, server_args in modes:
+        print(f"\n⚙️  Modo {name}: {' '.join(server_args) or '(sin argumentos extra)'}")
+        mode_args = copy.copy(args)
+        mode_args.server_arg = (args.server_arg or []) + server_args
+        results[name] = dict(run_benchmark(mode_args), server_args=server_args)
+    
+    print_table(results)
+    
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump({'modes': results}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados en {options.output}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
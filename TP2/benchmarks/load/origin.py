@@ -0,0 +1,222 @@
+"""
+Sitio de origen sintético para las pruebas de carga
+
+Sirve un corpus fijo (generado con semilla) de páginas parecidas a las
+reales: tamaños de 4 KB a ~1 MB, distintos charsets (declarado en el header,
+solo en <meta> o sin declarar), respuestas lentas y páginas con imágenes
+enormes. Las páginas son las mismas en cada corrida, así los resultados de
+dos corridas son comparables.
+"""
+import asyncio
+import random
+import struct
+from typing import Dict, Optional
+
+from aiohttp import web
+
+# Palabras para el texto de relleno (con acentos para los charsets latinos)
+WORDS = (
+    'análisis rendimiento página servidor información búsqueda producto '
+    'categoría envío política privacidad configuración navegación artículo '
+    'descripción precio opinión año niño acción también según'
+).split()
+
+JAPANESE = 'ウェブサイトの性能分析と検索エンジン最適化についての記事です'
+
+# Mezcla por defecto de páginas pedidas (nombre -> peso)
+DEFAULT_MIX = {
+    'small': 30,
+    'article': 35,
+    'large': 5,
+    'latin1': 10,
+    'meta-charset': 5,
+    'no-charset': 5,
+    'slow': 5,
+    'huge-images': 5
+}
+
+
+class Page:
+    """Página del corpus: body ya codificado y headers"""
+    
+    __slots__ = ('name', 'body', 'content_type', 'delay')
+    
+    def __init__(self, name: str, body: bytes, content_type: str, delay: float = 0.0):
+        self.name = name
+        self.body = body
+        self.content_type = content_type
+        self.delay = delay
+
+
+def _paragraphs(rng: random.Random, count: int, words: int = 60) -> str:
+    return '\n'.join(
+        '<p>' + ' '.join(rng.choice(WORDS) for _ in range(words)) + '.</p>'
+        for _ in range(count)
+    )
+
+
+def _links(rng: random.Random, count: int) -> str:
+    return '\n'.join(
+        f'<li><a href="/pages/article?ref={i}">{rng.choice(WORDS)} {i}</a></li>'
+        for i in range(count)
+    )
+
+
+def _images(count: int, src: str = '/images/photo-{i}.jpg', size: str = 'width="640" height="480"') -> str:
+    return '\n'.join(
+        f'<img src="{src.format(i=i)}" alt="imagen {i}" {size} loading="lazy">'
+        for i in range(count)
+    )
+
+
+def _document(title: str, body: str, head: str = '') -> str:
+    nav = ''.join(f'<li><a href="/pages/small?nav={i}">Sección {i}</a></li>' for i in range(12))
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+{head}<title>{title}</title>
+<meta name="description" content="Página sintética para pruebas de carga: {title}">
+<meta property="og:title" content="{title}">
+<link rel="canonical" href="/pages/{title}">
+<link rel="stylesheet" href="/static/site.css">
+<script src="/static/app.js" defer></script>
+</head>
+<body>
+<header><nav><ul>{nav}</ul></nav></header>
+<main>
+<h1>{title}</h1>
+{body}
+</main>
+<footer><p>© Sitio de prueba</p></footer>
+</body>
+</html>
+"""
+
+
+def build_corpus(seed: int = 2024, slow_delay: float = 2.0) -> Dict[str, Page]:
+    """
+    Generar las páginas del corpus
+    
+    Args:
+        seed: Semilla del texto (mismo corpus en cada corrida)
+        slow_delay: Segundos que tarda en responder la página 'slow'
+    
+    Returns:
+        dict nombre -> Page
+    """
+    rng = random.Random(seed)
+    html = 'text/html; charset=utf-8'
+    
+    latin1_text = _document(
+        'latin1',
+        '<h2>Información en ISO-8859-1</h2>' + _paragraphs(rng, 40) + '<ul>' + _links(rng, 60) + '</ul>'
+    )
+    
+    meta_text = _document(
+        'meta-charset',
+        f'<h2>{JAPANESE}</h2>' + ''.join(f'<p>{JAPANESE} {i}</p>' for i in range(200)) + '<ul>' + _links(rng, 40) + '</ul>',
+        head='<meta charset="shift_jis">\n'
+    )
+    
+    no_charset_text = _document(
+        'no-charset',
+        '<h2>Sin charset declarado (windows-1252)</h2>' + _paragraphs(rng, 30) + '<p>Precio: 10 € – “oferta”</p>'
+    )
+    
+    pages = [
+        Page('small', _document('small', _paragraphs(rng, 6)).encode('utf-8'), html),
+        Page(
+            'article',
+            _document(
+                'article',
+                _paragraphs(rng, 120) + '<ul>' + _links(rng, 120) + '</ul>' + _images(20)
+            ).encode('utf-8'),
+            html
+        ),
+        Page(
+            'large',
+            _document(
+                'large',
+                _paragraphs(rng, 1200) + '<ul>' + _links(rng, 2500) + '</ul>' + _images(150)
+            ).encode('utf-8'),
+            html
+        ),
+        Page('latin1', latin1_text.encode('iso-8859-1', 'replace'), 'text/html; charset=iso-8859-1'),
+        Page('meta-charset', meta_text.encode('shift_jis', 'replace'), 'text/html'),
+        Page('no-charset', no_charset_text.encode('cp1252', 'replace'), 'text/html'),
+        Page('slow', _document('slow', _paragraphs(rng, 20)).encode('utf-8'), html, delay=slow_delay),
+        Page(
+            'huge-images',
+            _document(
+                'huge-images',
+                _paragraphs(rng, 10) + _images(12, src='/images/huge-{i}.jpg', size='')
+            ).encode('utf-8'),
+            html
+        )
+    ]
+    
+    return {page.name: page for page in pages}
+
+
+def fake_jpeg(size: int, width: int = 8000, height: int = 6000) -> bytes:
+    """JPEG con SOI + SOF0 válidos (las dimensiones se leen del header) y relleno"""
+    sof = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    header = b'\xff\xd8' + sof
+    return header + b'\x00' * max(0, size - len(header) - 2) + b'\xff\xd9'
+
+
+def build_origin_app(
+    corpus: Dict[str, Page],
+    huge_image_bytes: int = 8 * 1024 * 1024,
+    chunk_size: int = 64 * 1024
+) -> web.Application:
+    """
+    Aplicación aiohttp del origen
+    
+    Rutas:
+        /pages/{name}   → página del corpus (query string ignorada)
+        /images/{name}  → 'huge-*' de huge_image_bytes, el resto ~40 KB
+        /robots.txt     → todo permitido
+    """
+    photo = fake_jpeg(40 * 1024, 640, 480)
+    huge = fake_jpeg(huge_image_bytes)
+    stats = {'pages': 0, 'images': 0, 'bytes': 0}
+    
+    async def page_handler(request):
+        page: Optional[Page] = corpus.get(request.match_info['name'])
+        if page is None:
+            raise web.HTTPNotFound()
+        
+        if page.delay:
+            await asyncio.sleep(page.delay)
+        
+        stats['pages'] += 1
+        stats['bytes'] += len(page.body)
+        return web.Response(body=page.body, headers={'Content-Type': page.content_type})
+    
+    async def image_handler(request):
+        data = huge if request.match_info['name'].startswith('huge-') else photo
+        stats['images'] += 1
+        stats['bytes'] += len(data)
+        
+        response = web.StreamResponse(headers={'Content-Type': 'image/jpeg', 'Content-Length': str(len(data))})
+        await response.prepare(request)
+        
+        for start in range(0, len(data), chunk_size):
+            await response.write(data[start:start + chunk_size])
+        
+        await response.write_eof()
+        return response
+    
+    async def robots_handler(request):
+        return web.Response(text='User-agent: *\nAllow: /\n')
+    
+    async def stats_handler(request):
+        return web.json_response(stats)
+    
+    app = web.Application()
+    app.router.add_get('/pages/{name}', page_handler)
+    app.router.add_get('/images/{name}', image_handler)
+    app.router.add_get('/robots.txt', robots_handler)
+    app.router.add_get('/_stats', stats_handler)
+    return app
@@ -0,0 +1,136 @@
+"""
+Servidor B de mentira para las pruebas de carga
+
+Habla el protocolo real (REQUEST, STATUS y CANCEL) pero en vez de correr
+Selenium y PIL espera una latencia configurable y responde un resultado
+fijo del tamaño pedido. Así se mide el Servidor A (fetch, parseo, caché,
+balanceador, serialización) sin que el costo del navegador tape todo.
+"""
+import asyncio
+import base64
+import random
+import time
+from typing import Dict
+
+from common.protocol import Protocol, MessageType, TaskType
+
+
+class ProcessingStub:
+    """Servidor B falso (asyncio)"""
+    
+    def __init__(
+        self,
+        latency: float = 0.3,
+        jitter: float = 0.1,
+        error_rate: float = 0.0,
+        result_bytes: int = 50 * 1024,
+        seed: int = 7
+    ):
+        """
+        Args:
+            latency: Segundos de procesamiento por request
+            jitter: Variación uniforme (+/-) de la latencia
+            error_rate: Fracción de requests que responden ERROR
+            result_bytes: Tamaño aproximado del screenshot (base64) del resultado
+            seed: Semilla de la latencia y los errores
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.server = None
+        self.started_at = time.time()
+        
+        self.active: Dict[str, asyncio.Task] = {}
+        self.stats = {'requests': 0, 'errors': 0, 'cancelled': 0, 'status_checks': 0}
+        
+        screenshot = base64.b64encode(bytes(result_bytes * 3 // 4)).decode('ascii')
+        self.results = {
+            TaskType.SCREENSHOT.value: {'format': 'png', 'width': 1920, 'height': 1080, 'data': screenshot},
+            TaskType.PERFORMANCE.value: {'load_time_ms': 850, 'total_size_kb': 1200, 'num_requests': 45},
+            TaskType.IMAGES.value: {'thumbnails': [], 'skipped': 0},
+            TaskType.TECHNOLOGIES.value: {'technologies': ['nginx', 'jQuery']},
+            TaskType.SEO.value: {'score': 87, 'issues': []}
+        }
+    
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 0):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self
+    
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+    
+    def load_report(self) -> dict:
+        """Mismo formato que ProcessingServer.load_report()"""
+        return {
+            'active_requests': len(self.active),
+            'active_tasks': len(self.active),
+            'queued_tasks': 0,
+            'queued_by_tenant': {},
+            'pool_size': 0,
+            'completed_requests': self.stats['requests'],
+            'cancelled_requests': self.stats['cancelled'],
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'ready': True,
+            'draining': False,
+            'workers': []
+        }
+    
+    def _result(self, task_type: str, params: dict = None):
+        if task_type == TaskType.ALL.value:
+            tasks = (params or {}).get('tasks')
+            return {name: result for name, result in self.results.items() if tasks is None or name in tasks}
+        return self.results.get(task_type, {})
+    
+    async def _process(self, message: dict) -> dict:
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(delay)
+        
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return Protocol.create_error('Synthetic processing error', task_type=message.get('task_type'))
+        
+        return Protocol.create_response(message.get('task_type'), self._result(message.get('task_type'), message.get('params')))
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            message = await Protocol.receive_message(reader)
+            if not message:
+                return
+            
+            if message['type'] == MessageType.STATUS.value:
+                self.stats['status_checks'] += 1
+                response = Protocol.create_status(self.load_report())
+            
+            elif message['type'] == MessageType.CANCEL.value:
+                task = self.active.pop(message['request_id'], None)
+                if task is not None:
+                    task.cancel()
+                    self.stats['cancelled'] += 1
+                response = Protocol.create_cancel(message['request_id'], cancelled=int(task is not None))
+            
+            else:
+                self.stats['requests'] += 1
+                request_id = message.get('request_id') or f'anon-{id(message)}'
+                task = asyncio.ensure_future(self._process(message))
+                self.active[request_id] = task
+                
+                try:
+                    response = await task
+                except asyncio.CancelledError:
+                    response = Protocol.create_error('Request cancelled', task_type=message.get('task_type'))
+                finally:
+                    self.active.pop(request_id, None)
+            
+            writer.write(Protocol.encode_message(response))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,108 @@
+"""
+Uso de recursos de procesos durante una corrida (CPU, RSS, threads, fds)
+
+Lee /proc/<pid> en un thread cada interval segundos. Fuera de Linux no hay
+/proc: los valores quedan en None y la corrida sigue.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def read_process(pid: int) -> Optional[Dict]:
+    """CPU acumulada (s), RSS (bytes), threads y fds abiertos de pid (None si no hay /proc)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # El nombre del comando va entre paréntesis y puede tener espacios
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    
+    try:
+        fds = len(os.listdir(f'/proc/{pid}/fd'))
+    except OSError:
+        fds = None
+    
+    return {
+        # utime y stime son los campos 14 y 15 de stat (fields arranca en el 3)
+        'cpu_seconds': (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS,
+        'rss_bytes': rss_pages * _PAGE_SIZE,
+        'threads': int(fields[17]),
+        'fds': fds
+    }
+
+
+class ProcessMonitor:
+    """Muestreo periódico de varios procesos (nombre -> pid)"""
+    
+    def __init__(self, pids: Dict[str, int], interval: float = 0.5):
+        self.pids = dict(pids)
+        self.interval = interval
+        self.first: Dict[str, Dict] = {}
+        self.last: Dict[str, Dict] = {}
+        self.peak_rss: Dict[str, int] = {}
+        self.peak_threads: Dict[str, int] = {}
+        self.peak_fds: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = self._stopped = None
+    
+    def _sample(self):
+        for name, pid in self.pids.items():
+            snapshot = read_process(pid)
+            if snapshot is None:
+                continue
+            
+            self.first.setdefault(name, snapshot)
+            self.last[name] = snapshot
+            self.peak_rss[name] = max(self.peak_rss.get(name, 0), snapshot['rss_bytes'])
+            self.peak_threads[name] = max(self.peak_threads.get(name, 0), snapshot['threads'])
+            if snapshot['fds'] is not None:
+                self.peak_fds[name] = max(self.peak_fds.get(name, 0), snapshot['fds'])
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def start(self):
+        self._started = time.monotonic()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name='ProcessMonitor', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> Dict:
+        """Detener el muestreo y devolver el resumen por proceso"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        self._stopped = time.monotonic()
+        return self.report()
+    
+    def report(self) -> Dict:
+        elapsed = (self._stopped or time.monotonic()) - (self._started or time.monotonic())
+        result = {}
+        
+        for name in self.pids:
+            if name not in self.last:
+                result[name] = None
+                continue
+            
+            cpu = self.last[name]['cpu_seconds'] - self.first[name]['cpu_seconds']
+            result[name] = {
+                'cpu_seconds': round(cpu, 3),
+                'cpu_percent': round(cpu / elapsed * 100, 1) if elapsed > 0 else None,
+                'rss_peak_mb': round(self.peak_rss[name] / (1024 * 1024), 1),
+                'rss_end_mb': round(self.last[name]['rss_bytes'] / (1024 * 1024), 1),
+                'threads_peak': self.peak_threads[name],
+                'fds_peak': self.peak_fds.get(name)
+            }
+        
+        return result
@@ -0,0 +1,351 @@
+"""
+Prueba de carga de punta a punta del Servidor A
+
+Levanta el entorno falso (origen, Redis y Servidor B; ver fixtures.py),
+arranca server_scraping.py real como subproceso apuntando a ese entorno,
+hace un calentamiento y después dispara /scrape en lazo abierto a una tasa
+fija. El resultado (latencias, throughput, errores y recursos) se guarda
+en JSON y se puede comparar contra una corrida anterior:
+
+    python -m benchmarks.load --rps 50 --duration 30 --output actual.json
+    python -m benchmarks.load --rps 50 --duration 30 --baseline actual.json
+
+Con --baseline el proceso termina con código 1 si hubo una regresión
+mayor a --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fixtures import Fixtures
+from .loadgen import build_targets, measure_elapsed, run_open_loop, summarize
+from .origin import DEFAULT_MIX
+from .resources import ProcessMonitor
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Versión del formato del JSON de resultados
+RESULT_VERSION = 1
+
+# Métricas comparadas con la corrida base: (ruta, mayor es peor)
+COMPARED_METRICS = (
+    (('summary', 'latency_ms', 'p50'), True),
+    (('summary', 'latency_ms', 'p99'), True),
+    (('summary', 'throughput_rps'), False),
+    (('resources', 'server_a', 'cpu_seconds'), True),
+    (('resources', 'server_a', 'rss_peak_mb'), True)
+)
+
+# Diferencia de error_rate (absoluta) que cuenta como regresión
+ERROR_RATE_TOLERANCE = 0.01
+
+
+def free_port() -> int:
+    import socket
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'small=3,article=5' -> {'small': 3.0, 'article': 5.0}"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def start_server_a(args, info: Dict, port: int, log_file) -> subprocess.Popen:
+    """Arrancar server_scraping.py contra el entorno falso"""
+    command = [
+        sys.executable, str(PROJECT_ROOT / 'server_scraping.py'),
+        '--ip', '127.0.0.1',
+        '--port', str(port),
+        '--processing-host', '127.0.0.1',
+        '--processing-port', str(info['processing_port']),
+        '--redis-host', '127.0.0.1',
+        '--redis-port', str(info['redis_port']),
+        # El origen es un solo host: sin límite real el rate limiter igual
+        # hace su ida y vuelta a Redis en cada request
+        '--max-requests', str(args.max_requests)
+    ]
+    
+    if args.no_cache:
+        command.append('--no-cache')
+    if args.no_rate_limit:
+        command.append('--no-rate-limit')
+    
+    command.extend(args.server_arg or [])
+    
+    return subprocess.Popen(command, cwd=str(PROJECT_ROOT), stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El Servidor A terminó al arrancar (código {process.returncode})")
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    
+    raise TimeoutError(f"El Servidor A no respondió en {timeout}s")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=str(PROJECT_ROOT), capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(args) -> Dict:
+    """
+    Corrida completa
+    
+    Returns:
+        dict de resultados (ver RESULT_VERSION)
+    """
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    fixtures = Fixtures({
+        'slow_delay': args.slow_delay,
+        'huge_image_bytes': int(args.huge_image_mb * 1024 * 1024),
+        'processing_latency': args.processing_latency,
+        'processing_jitter': args.processing_jitter,
+        'processing_error_rate': args.processing_error_rate,
+        'processing_result_bytes': args.processing_result_kb * 1024
+    })
+    
+    info = fixtures.start()
+    unknown = set(mix) - set(info['pages'])
+    if unknown:
+        fixtures.stop()
+        raise ValueError(f"Páginas desconocidas en --mix: {', '.join(sorted(unknown))}")
+    
+    port = args.port or free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    origin = f"http://127.0.0.1:{info['origin_port']}"
+    log_path = args.server_log or os.path.join(tempfile.mkdtemp(prefix='load-'), 'server_a.log')
+    
+    with open(log_path, 'wb') as log_file:
+        server = start_server_a(args, info, port, log_file)
+        
+        try:
+            wait_ready(f'{base_url}/health', server)
+            print(f"🚀 Servidor A en {base_url} (log: {log_path})")
+            
+            if args.warmup > 0:
+                print(f"🔥 Calentamiento: {args.warmup:g}s a {args.rps:g} rps")
+                warmup = build_targets(
+                    origin, mix, int(args.rps * args.warmup), args.full_ratio, args.unique_urls, seed=args.seed + 1
+                )
+                asyncio.run(run_open_loop(base_url, warmup, args.rps, timeout=args.timeout))
+            
+            targets = build_targets(
+                origin, mix, int(args.rps * args.duration), args.full_ratio, args.unique_urls, seed=args.seed
+            )
+            monitor = ProcessMonitor({'server_a': server.pid, 'fixtures': fixtures.pid, 'load_generator': os.getpid()})
+            
+            print(f"📈 Carga: {len(targets)} requests a {args.rps:g} rps ({args.duration:g}s)")
+            monitor.start()
+            samples = asyncio.run(run_open_loop(
+                base_url, targets, args.rps, timeout=args.timeout, max_in_flight=args.max_in_flight
+            ))
+            resources = monitor.stop()
+        finally:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            fixtures.stop()
+    
+    return {
+        'benchmark': 'load',
+        'version': RESULT_VERSION,
+        'timestamp': time.time(),
+        'revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'config': {
+            'rps': args.rps,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'mix': mix,
+            'full_ratio': args.full_ratio,
+            'unique_urls': args.unique_urls,
+            'cache': not args.no_cache,
+            'rate_limit': not args.no_rate_limit,
+            'processing_latency': args.processing_latency,
+            'processing_jitter': args.processing_jitter,
+            'processing_error_rate': args.processing_error_rate,
+            'slow_delay': args.slow_delay,
+            'huge_image_mb': args.huge_image_mb,
+            'server_args': args.server_arg or [],
+            'page_bytes': info['pages']
+        },
+        'summary': summarize(samples, measure_elapsed(samples)),
+        'resources': resources
+    }
+
+
+def _lookup(data: Dict, path) -> Optional[float]:
+    for key in path:
+        if not isinstance(data, dict) or data.get(key) is None:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.15) -> List[str]:
+    """
+    Regresiones de current respecto de baseline
+    
+    Args:
+        current: Resultado de esta corrida
+        baseline: Resultado de una corrida anterior (mismo formato)
+        tolerance: Empeoramiento relativo tolerado (0.15 = 15%)
+    
+    Returns:
+        Lista de regresiones (vacía si no hay)
+    """
+    regressions = []
+    
+    for path, higher_is_worse in COMPARED_METRICS:
+        now, before = _lookup(current, path), _lookup(baseline, path)
+        if now is None or not before:
+            continue
+        
+        change = (now - before) / before
+        if (change if higher_is_worse else -change) > tolerance:
+            regressions.append(f"{'.'.join(path)}: {before:g} → {now:g} ({change:+.1%})")
+    
+    now = _lookup(current, ('summary', 'error_rate')) or 0.0
+    before = _lookup(baseline, ('summary', 'error_rate')) or 0.0
+    if now - before > ERROR_RATE_TOLERANCE:
+        regressions.append(f"summary.error_rate: {before:.2%} → {now:.2%}")
+    
+    return regressions
+
+
+def print_summary(result: Dict):
+    summary = result['summary']
+    latency = summary['latency_ms']
+    
+    print("\n" + "=" * 70)
+    print(f"📊 {summary['requests']} requests en {summary['elapsed_seconds']:.1f}s")
+    print(f"   Throughput: {summary['throughput_rps']} rps (ofrecido {summary['offered_rps']} rps)")
+    print(f"   Errores: {summary['errors']} ({summary['error_rate']:.2%}) {summary['outcomes']}")
+    print(f"   Caché: {summary['cache']}")
+    print(
+        f"   Latencia (ms): p50={latency['p50']} p90={latency['p90']} "
+        f"p99={latency['p99']} p99.9={latency['p99.9']} max={latency['max']}"
+    )
+    
+    print("\n   Por página (p50 / p99 ms):")
+    for label, page in summary['by_page'].items():
+        print(
+            f"   - {label:<24} {page['requests']:>6} req  "
+            f"{page['latency_ms']['p50']} / {page['latency_ms']['p99']}  errores={page['errors']}"
+        )
+    
+    print("\n   Recursos:")
+    for name, usage in result['resources'].items():
+        if usage:
+            print(
+                f"   - {name:<15} CPU {usage['cpu_seconds']}s ({usage['cpu_percent']}%)  "
+                f"RSS pico {usage['rss_peak_mb']} MB  threads {usage['threads_peak']}  fds {usage['fds_peak']}"
+            )
+    print("=" * 70)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Prueba de carga de lazo abierto del Servidor A contra un entorno falso',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument('--rps', type=float, default=20, help='Requests por segundo (default: 20)')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos de medición (default: 30)')
+    parser.add_argument('--warmup', type=float, default=5, help='Segundos de calentamiento sin medir (default: 5)')
+    parser.add_argument('--mix', default=None, help="Páginas y pesos, ej: 'small=3,article=5,slow=1' (default: corpus completo)")
+    parser.add_argument('--full-ratio', type=float, default=0.2, help='Fracción de requests con full=true (default: 0.2)')
+    parser.add_argument('--unique-urls', type=int, default=1000, help='Variantes por página; menos = más HITs de caché (default: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla del horario de requests')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout por request (default: 30)')
+    parser.add_argument('--max-in-flight', type=int, default=10000, help='Requests simultáneas antes de descartar')
+    
+    parser.add_argument('--processing-latency', type=float, default=0.3, help='Latencia del Servidor B falso (default: 0.3)')
+    parser.add_argument('--processing-jitter', type=float, default=0.1, help='Variación de esa latencia (default: 0.1)')
+    parser.add_argument('--processing-error-rate', type=float, default=0.0, help='Fracción de ERROR del Servidor B falso')
+    parser.add_argument('--processing-result-kb', type=int, default=50, help='Tamaño del screenshot de mentira (default: 50)')
+    parser.add_argument('--slow-delay', type=float, default=2.0, help="Demora de la página 'slow' (default: 2)")
+    parser.add_argument('--huge-image-mb', type=float, default=8, help="Tamaño de las imágenes 'huge-*' (default: 8)")
+    
+    parser.add_argument('--port', type=int, default=None, help='Puerto del Servidor A (default: uno libre)')
+    parser.add_argument('--no-cache', action='store_true', help='Servidor A sin caché')
+    parser.add_argument('--no-rate-limit', action='store_true', help='Servidor A sin rate limiting')
+    parser.add_argument('--max-requests', type=int, default=10 ** 9, help='--max-requests del Servidor A')
+    parser.add_argument(
+        '--server-arg',
+        action='append',
+        help='Argumento extra para server_scraping.py (repetible), ej: --server-arg=--hedge-after=1'
+    )
+    parser.add_argument('--server-log', default=None, help='Archivo de log del Servidor A (default: temporal)')
+    
+    parser.add_argument('--output', default=None, help='Guardar el resultado en este JSON')
+    parser.add_argument('--baseline', default=None, help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Empeoramiento relativo tolerado (default: 0.15)')
+    
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_arguments(argv)
+    result = run_benchmark(args)
+    print_summary(result)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultado en {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ Regresiones respecto de {args.baseline} (tolerancia {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        
+        print(f"✅ Sin regresiones respecto de {args.baseline}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+from .harness import BenchmarkResult, compare_results, run_benchmark
+from .suite import BENCHMARKS, select
+
+__all__ = [
+    'BenchmarkResult',
+    'compare_results',
+    'run_benchmark',
+    'BENCHMARKS',
+    'select'
+]
@@ -0,0 +1,211 @@
+"""
+Medición de microbenchmarks (estilo pyperf, sin dependencias)
+
+Cada benchmark es una función sin argumentos. Se calibra cuántas veces
+llamarla para que cada muestra dure al menos min_time, se descartan las
+muestras de calentamiento y se reporta el tiempo por operación (mediana,
+media y desvío) y las operaciones por segundo. La memoria se mide aparte,
+con tracemalloc en una sola llamada, para no inflar los tiempos.
+"""
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+
+class BenchmarkResult:
+    """Tiempos y memoria de un benchmark"""
+    
+    def __init__(self, name: str, loops: int, samples: List[float]):
+        self.name = name
+        self.loops = loops
+        # Segundos por operación de cada muestra
+        self.samples = samples
+        self.peak_kb: Optional[float] = None
+        self.retained_kb: Optional[float] = None
+        self.allocated_blocks: Optional[int] = None
+    
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+    
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.samples)
+    
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+    
+    @property
+    def ops_per_sec(self) -> float:
+        return 1.0 / self.median if self.median else float('inf')
+    
+    def to_dict(self) -> Dict:
+        return {
+            'loops': self.loops,
+            'samples': len(self.samples),
+            'median_us': round(self.median * 1e6, 3),
+            'mean_us': round(self.mean * 1e6, 3),
+            'stdev_us': round(self.stdev * 1e6, 3),
+            'min_us': round(min(self.samples) * 1e6, 3),
+            'ops_per_sec': round(self.ops_per_sec, 3),
+            'peak_kb': self.peak_kb,
+            'retained_kb': self.retained_kb,
+            'allocated_blocks': self.allocated_blocks
+        }
+
+
+def calibrate(func: Callable, min_time: float) -> int:
+    """Llamadas por muestra para que una muestra dure al menos min_time"""
+    loops = 1
+    
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        
+        if elapsed >= min_time or loops >= 1_000_000:
+            return loops
+        
+        # Apuntar un poco por encima para no iterar de a dobles
+        loops = max(loops * 2, int(loops * min_time * 1.2 / max(elapsed, 1e-9)))
+
+
+def measure_memory(func: Callable) -> Dict:
+    """
+    Memoria de una llamada con tracemalloc
+    
+    Returns:
+        dict con peak_kb (pico durante la llamada), retained_kb (lo que
+        sigue vivo al terminar) y allocated_blocks (bloques vivos nuevos)
+    """
+    gc.collect()
+    tracemalloc.start()
+    
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        
+        result = func()
+        
+        current, peak = tracemalloc.get_traced_memory()
+        blocks_after = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        del result
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'peak_kb': round((peak - before) / 1024, 1),
+        'retained_kb': round((current - before) / 1024, 1),
+        'allocated_blocks': blocks_after - blocks_before
+    }
+
+
+def run_benchmark(
+    name: str,
+    func: Callable,
+    samples: int = 10,
+    warmup: int = 1,
+    min_time: float = 0.1,
+    memory: bool = True
+) -> BenchmarkResult:
+    """
+    Medir func
+    
+    Args:
+        name: Nombre del benchmark
+        func: Operación a medir (sin argumentos)
+        samples: Muestras que se reportan
+        warmup: Muestras descartadas al principio (cachés, imports perezosos)
+        min_time: Segundos mínimos por muestra
+        memory: Medir memoria con tracemalloc
+    """
+    loops = calibrate(func, min_time)
+    times = []
+    
+    # El GC se corre entre muestras, no en medio de una
+    gc_was_enabled = gc.isenabled()
+    
+    try:
+        for index in range(warmup + samples):
+            gc.collect()
+            gc.disable()
+            
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            elapsed = time.perf_counter() - start
+            
+            if gc_was_enabled:
+                gc.enable()
+            
+            if index >= warmup:
+                times.append(elapsed / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    
+    result = BenchmarkResult(name, loops, times)
+    
+    if memory:
+        usage = measure_memory(func)
+        result.peak_kb = usage['peak_kb']
+        result.retained_kb = usage['retained_kb']
+        result.allocated_blocks = usage['allocated_blocks']
+    
+    return result
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float = 0.10) -> List[Dict]:
+    """
+    Comparar dos corridas (dicts nombre -> to_dict())
+    
+    Un cambio cuenta solo si supera tolerance y además el ruido de ambas
+    corridas (2 desvíos relativos): así una máquina ruidosa no reporta
+    regresiones que no existen.
+    
+    Returns:
+        Lista de {name, before_us, after_us, change, status} con status
+        'faster', 'slower', 'same', 'new' o 'missing'
+    """
+    rows = []
+    
+    for name in sorted(set(current) | set(baseline)):
+        after, before = current.get(name), baseline.get(name)
+        
+        if before is None or after is None:
+            rows.append({
+                'name': name,
+                'before_us': before and before['median_us'],
+                'after_us': after and after['median_us'],
+                'change': None,
+                'status': 'new' if before is None else 'missing'
+            })
+            continue
+        
+        change = (after['median_us'] - before['median_us']) / before['median_us']
+        noise = 2 * max(
+            before['stdev_us'] / before['median_us'] if before['median_us'] else 0,
+            after['stdev_us'] / after['median_us'] if after['median_us'] else 0
+        )
+        threshold = max(tolerance, noise)
+        
+        if change > threshold:
+            status = 'slower'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'same'
+        
+        rows.append({
+            'name': name,
+            'before_us': before['median_us'],
+            'after_us': after['median_us'],
+            'change': round(change, 4),
+            'status': status
+        })
+    
+    return rows
@@ -0,0 +1,188 @@
+"""
+Microbenchmarks de los componentes calientes
+
+Mide parser, analizadores (SEO y tecnologías), codec del protocolo,
+serialización, procesamiento de imágenes y caché sobre el corpus de
+benchmarks/micro/corpus. Reporta operaciones por segundo y memoria (pico y
+retenida) por benchmark; el resultado se guarda en JSON y se puede comparar
+contra una corrida anterior:
+
+    python -m benchmarks.micro --output base.json
+    python -m benchmarks.micro --filter parser --filter protocol --baseline base.json
+
+Con --baseline el proceso termina con código 1 si algún benchmark quedó más
+lento que --tolerance (y que el ruido medido).
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.load.run import git_revision
+
+from .harness import compare_results, run_benchmark
+from .suite import select
+
+# Versión del formato del JSON de resultados
+RESULT_VERSION = 1
+
+
+def run_suite(
+    patterns: List[str] = None,
+    samples: int = 10,
+    warmup: int = 1,
+    min_time: float = 0.1,
+    memory: bool = True,
+    verbose: bool = True
+) -> Dict:
+    """
+    Correr los benchmarks seleccionados
+    
+    Returns:
+        dict con metadatos de la corrida y 'benchmarks' (nombre -> resultado)
+    """
+    results = {}
+    
+    for name, setup in select(patterns):
+        func = setup()
+        result = run_benchmark(name, func, samples=samples, warmup=warmup, min_time=min_time, memory=memory)
+        results[name] = result.to_dict()
+        
+        if verbose:
+            print_row(name, results[name])
+    
+    return {
+        'benchmark': 'micro',
+        'version': RESULT_VERSION,
+        'timestamp': time.time(),
+        'revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'config': {
+            'samples': samples,
+            'warmup': warmup,
+            'min_time': min_time,
+            'memory': memory
+        },
+        'benchmarks': results
+    }
+
+
+def _format_time(us: float) -> str:
+    if us >= 1000:
+        return f'{us / 1000:.2f} ms'
+    return f'{us:.1f} µs'
+
+
+def print_row(name: str, result: Dict):
+    spread = result['stdev_us'] / result['median_us'] if result['median_us'] else 0
+    line = (
+        f"   {name:<40} {result['ops_per_sec']:>12,.1f} ops/s  "
+        f"{_format_time(result['median_us']):>10} ±{spread:>4.0%}"
+    )
+    
+    if result['peak_kb'] is not None:
+        line += f"  pico {result['peak_kb']:>9,.1f} KB  retenido {result['retained_kb']:>7,.1f} KB"
+    
+    print(line)
+
+
+def print_comparison(rows: List[Dict]) -> List[Dict]:
+    """Tabla antes/después; devuelve las filas más lentas"""
+    icons = {'faster': '🚀', 'slower': '🐢', 'same': '  ', 'new': '🆕', 'missing': '❔'}
+    
+    print("\n   Comparación con la corrida base (mediana):")
+    for row in rows:
+        before = _format_time(row['before_us']) if row['before_us'] is not None else '-'
+        after = _format_time(row['after_us']) if row['after_us'] is not None else '-'
+        change = f"{row['change']:+.1%}" if row['change'] is not None else ''
+        print(f"   {icons[row['status']]} {row['name']:<40} {before:>10} → {after:>10}  {change}")
+    
+    return [row for row in rows if row['status'] == 'slower']
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Microbenchmarks de parser, analizadores, protocolo, serialización, imágenes y caché',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '--filter',
+        action='append',
+        help="Correr solo los benchmarks cuyo nombre contiene el texto (repetible), ej: --filter parser"
+    )
+    parser.add_argument('--list', action='store_true', help='Listar los benchmarks y salir')
+    parser.add_argument('--samples', type=int, default=10, help='Muestras por benchmark (default: 10)')
+    parser.add_argument('--warmup', type=int, default=1, help='Muestras de calentamiento descartadas (default: 1)')
+    parser.add_argument('--min-time', type=float, default=0.1, help='Segundos mínimos por muestra (default: 0.1)')
+    parser.add_argument('--no-memory', action='store_true', help='No medir memoria con tracemalloc')
+    
+    parser.add_argument('--output', default=None, help='Guardar el resultado en este JSON')
+    parser.add_argument('--baseline', default=None, help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Empeoramiento relativo tolerado (default: 0.10)')
+    
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_arguments(argv)
+    
+    if args.list:
+        for name, _ in select(args.filter):
+            print(name)
+        return 0
+    
+    print(f"⏱️  Microbenchmarks ({args.samples} muestras, ≥{args.min_time}s cada una)")
+    
+    # Los componentes loguean errores/advertencias que acá son ruido (los
+    # benchmarks de logging usan loggers propios, con su nivel)
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.CRITICAL + 1)
+    try:
+        result = run_suite(
+            args.filter,
+            samples=args.samples,
+            warmup=args.warmup,
+            min_time=args.min_time,
+            memory=not args.no_memory
+        )
+    finally:
+        root.setLevel(level)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultado en {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        
+        # Solo se comparan los benchmarks que se corrieron
+        before = {
+            name: data for name, data in baseline.get('benchmarks', {}).items()
+            if not args.filter or any(pattern in name for pattern in args.filter)
+        }
+        slower = print_comparison(compare_results(result['benchmarks'], before, args.tolerance))
+        
+        if slower:
+            print(f"❌ {len(slower)} benchmark(s) más lentos que {args.baseline} (tolerancia {args.tolerance:.0%})")
+            return 1
+        
+        print(f"✅ Sin regresiones respecto de {args.baseline}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
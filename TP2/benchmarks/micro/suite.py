@@ -0,0 +1,331 @@
+"""
+Benchmarks de los componentes calientes
+
+Cada entrada de BENCHMARKS es (nombre, setup). setup() prepara los datos
+fuera de la medición y devuelve la función a medir, así el costo de leer el
+corpus o de levantar el Redis falso no entra en los tiempos. Los nombres
+son 'componente.caso' para poder filtrar por componente.
+"""
+import asyncio
+import base64
+import logging
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from common import compression, json_codec
+from common.protocol import Protocol, TaskType
+from common.serialization import Serializer
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Módulos cuyo import se mide (arranque de los servidores y de cada tarea)
+IMPORTED_MODULES = (
+    'server_processing',
+    'server_scraping',
+    'processor.screenshot',
+    'processor.performance',
+    'processor.image_processor',
+    'processor.technology_detector',
+    'processor.seo_analyzer'
+)
+
+# Página -> (archivo, encoding declarado por el servidor)
+PAGES = {
+    'blog': ('blog.html', 'utf-8'),
+    'shop': ('shop.html', 'utf-8'),
+    'spa': ('spa.html', 'utf-8'),
+    'latin1': ('news-latin1.html', 'iso-8859-1')
+}
+
+IMAGES = {
+    'jpeg': 'photo.jpg',
+    'png': 'logo.png',
+    'webp': 'banner.webp'
+}
+
+HEADERS = {
+    'Server': 'nginx/1.24.0',
+    'X-Powered-By': 'PHP/8.2.7',
+    'Content-Type': 'text/html; charset=UTF-8'
+}
+
+
+def load(name: str) -> bytes:
+    """Bytes de un archivo del corpus"""
+    return (CORPUS_DIR / name).read_bytes()
+
+
+def page(name: str) -> Tuple[bytes, str, str]:
+    """(bytes, encoding, url) de una página del corpus"""
+    filename, encoding = PAGES[name]
+    return load(filename), encoding, f'https://example.com/{name}'
+
+
+class BufferSocket:
+    """Socket en memoria: recv() entrega un mensaje ya codificado"""
+    
+    def __init__(self, data: bytes):
+        self.view = memoryview(data)
+        self.offset = 0
+    
+    def rewind(self):
+        self.offset = 0
+        return self
+    
+    def recv(self, size: int) -> bytes:
+        chunk = self.view[self.offset:self.offset + size].tobytes()
+        self.offset += len(chunk)
+        return chunk
+
+
+def scraping_result() -> dict:
+    """Resultado completo representativo (parseo + procesamiento del Servidor B)"""
+    html, encoding, url = page('blog')
+    
+    from scraper.html_parser import HtmlParser
+    
+    parsed = HtmlParser().parse(html, url, encoding)
+    screenshot = load(IMAGES['jpeg'])
+    
+    return {
+        'url': url,
+        'scraping_data': parsed,
+        'processing_data': {
+            TaskType.SCREENSHOT.value: {'format': 'png', 'width': 1920, 'height': 1080, 'data': screenshot},
+            TaskType.PERFORMANCE.value: {'load_time_ms': 850, 'total_size_kb': 1200, 'num_requests': 45},
+            TaskType.IMAGES.value: {
+                'thumbnails': [
+                    {'url': image['url'], 'data': screenshot[:4096]} for image in parsed['images'][:10]
+                ]
+            }
+        },
+        'status': 'success'
+    }
+
+
+# --- Parser y analizadores -------------------------------------------------
+
+def _parser(name: str, fingerprint: bool = False) -> Callable[[], Callable]:
+    def setup():
+        from scraper.html_parser import HtmlParser
+        
+        parser = HtmlParser()
+        html, encoding, url = page(name)
+        return lambda: parser.parse(html, url, encoding, fingerprint=fingerprint)
+    return setup
+
+
+def _change_compare():
+    from scraper.change_detection import compare
+    from scraper.html_parser import HtmlParser
+    
+    html, encoding, url = page('blog')
+    data = HtmlParser().parse(html, url, encoding, fingerprint=True)
+    old = HtmlParser().parse(html.replace(b'<p>', b'<p>Actualizado ', 1), url, encoding, fingerprint=True)
+    return lambda: compare(old['fingerprint'], data['fingerprint'], data)
+
+
+def _seo(name: str) -> Callable[[], Callable]:
+    def setup():
+        from processor.seo_analyzer import SEOAnalyzer
+        
+        analyzer = SEOAnalyzer()
+        html, encoding, url = page(name)
+        return lambda: analyzer.analyze(html, url, encoding=encoding)
+    return setup
+
+
+def _tech(name: str) -> Callable[[], Callable]:
+    def setup():
+        from processor.technology_detector import TechnologyDetector
+        
+        detector = TechnologyDetector()
+        html, encoding, _ = page(name)
+        return lambda: detector.analyze(html, HEADERS, encoding)
+    return setup
+
+
+def _image(kind: str, thumbnail: bool) -> Callable[[], Callable]:
+    def setup():
+        from processor.image_processor import ImageProcessor
+        
+        processor = ImageProcessor()
+        data = load(IMAGES[kind])
+        url = f'https://example.com/{IMAGES[kind]}'
+        return lambda: processor._process_single_image(url, data, thumbnail)
+    return setup
+
+
+# --- Protocolo y serialización ---------------------------------------------
+
+def _encode_request():
+    html, _, url = page('blog')
+    message = Protocol.create_request(TaskType.ALL, url, {'html': html.decode('utf-8'), 'timeout': 30})
+    return lambda: Protocol.encode_message(message)
+
+
+def _encode_response():
+    message = Protocol.create_response(TaskType.ALL.value, Serializer.prepare_for_json(scraping_result()))
+    return lambda: Protocol.encode_message(message)
+
+
+def _encode_attachments():
+    screenshot = load(IMAGES['jpeg'])
+    message = Protocol.create_response(TaskType.SCREENSHOT.value, {'format': 'jpeg', 'width': 1600, 'height': 1067})
+    return lambda: Protocol.encode_message(message, {'screenshot': screenshot})
+
+
+def _decode(setup_message: Callable[[], bytes]) -> Callable[[], Callable]:
+    def setup():
+        sock = BufferSocket(setup_message())
+        return lambda: Protocol.decode_message(sock.rewind())
+    return setup
+
+
+def _response_bytes() -> bytes:
+    message = Protocol.create_response(TaskType.ALL.value, Serializer.prepare_for_json(scraping_result()))
+    return Protocol.encode_message(message)
+
+
+def _attachments_bytes() -> bytes:
+    message = Protocol.create_response(TaskType.SCREENSHOT.value, {'format': 'jpeg'})
+    return Protocol.encode_message(message, {'screenshot': load(IMAGES['jpeg'])})
+
+
+def _prepare_for_json():
+    result = scraping_result()
+    return lambda: Serializer.prepare_for_json(result)
+
+
+def _base64_screenshot():
+    screenshot = load(IMAGES['jpeg'])
+    return lambda: base64.b64encode(screenshot).decode('ascii')
+
+
+# --- Caché -----------------------------------------------------------------
+
+def _cache_encode():
+    result = Serializer.prepare_for_json(scraping_result())
+    
+    def encode():
+        body = json_codec.dumps(result)
+        return compression.build_variants(body), compression.make_etag(body)
+    
+    return encode
+
+
+def _cache_decode():
+    body = json_codec.dumps(Serializer.prepare_for_json(scraping_result()))
+    return lambda: json_codec.loads(body)
+
+
+_redis_server = None
+
+
+def _fake_redis_port() -> int:
+    """Redis falso en un hilo (uno por proceso, se reutiliza entre benchmarks)"""
+    global _redis_server
+    
+    if _redis_server is None:
+        from benchmarks.load.fake_redis import FakeRedisServer
+        
+        loop = asyncio.new_event_loop()
+        _redis_server = loop.run_until_complete(FakeRedisServer().start())
+        threading.Thread(target=loop.run_forever, name='FakeRedis', daemon=True).start()
+    
+    return _redis_server.port
+
+
+def _cache_roundtrip():
+    from common.cache import RedisCache
+    
+    cache = RedisCache(redis_port=_fake_redis_port(), key_prefix='microbench')
+    body = json_codec.dumps(Serializer.prepare_for_json(scraping_result()))
+    variants, etag = compression.build_variants(body), compression.make_etag(body)
+    url = 'https://example.com/blog'
+    
+    def roundtrip():
+        cache.set_variants(url, variants, etag)
+        return cache.get_variant(url, 'gzip' if 'gzip' in variants else 'identity')
+    
+    return roundtrip
+
+
+# --- Logging ---------------------------------------------------------------
+
+class _FormatOnlyHandler(logging.Handler):
+    """Formatea como el handler real pero no escribe (mide solo el costo de CPU)"""
+    
+    def emit(self, record):
+        self.format(record)
+
+
+def _log(enabled: bool, lazy: bool) -> Callable[[], Callable]:
+    """Una línea por request como las de server_scraping.py, con nivel activo o no"""
+    def setup():
+        bench_logger = logging.getLogger(f'microbench.{enabled}.{lazy}')
+        bench_logger.propagate = False
+        bench_logger.handlers = [_FormatOnlyHandler()]
+        bench_logger.handlers[0].setFormatter(
+            logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        )
+        bench_logger.setLevel(logging.INFO if enabled else logging.WARNING)
+        
+        url, full = 'https://example.com/products/123?ref=home', True
+        
+        if lazy:
+            return lambda: bench_logger.info("📥 Request recibido: %s (full=%s)", url, full)
+        return lambda: bench_logger.info(f"📥 Request recibido: {url} (full={full})")
+    return setup
+
+
+# --- Tiempo de import --------------------------------------------------------
+
+def _import(module: Optional[str]) -> Callable[[], Callable]:
+    """
+    Intérprete nuevo que importa module (None = solo arrancar Python: la
+    base a restar). Es lo que paga un proceso que arranca sin heredar nada.
+    """
+    def setup():
+        command = [sys.executable, '-c', f'import {module}' if module else 'pass']
+        return lambda: subprocess.run(command, cwd=str(PROJECT_ROOT), check=True)
+    return setup
+
+
+BENCHMARKS: List[Tuple[str, Callable[[], Callable]]] = [
+    *[(f'parser.{name}', _parser(name)) for name in PAGES],
+    ('change.fingerprint', _parser('blog', fingerprint=True)),
+    ('change.compare', _change_compare),
+    ('seo.blog', _seo('blog')),
+    ('seo.shop', _seo('shop')),
+    ('tech.blog', _tech('blog')),
+    ('tech.spa', _tech('spa')),
+    ('protocol.encode_request', _encode_request),
+    ('protocol.encode_response', _encode_response),
+    ('protocol.encode_attachments', _encode_attachments),
+    ('protocol.decode_response', _decode(_response_bytes)),
+    ('protocol.decode_attachments', _decode(_attachments_bytes)),
+    ('serialization.prepare_for_json', _prepare_for_json),
+    ('serialization.base64_screenshot', _base64_screenshot),
+    *[(f'images.{kind}', _image(kind, True)) for kind in IMAGES],
+    ('images.jpeg_no_thumbnail', _image('jpeg', False)),
+    ('cache.encode', _cache_encode),
+    ('cache.decode', _cache_decode),
+    ('cache.redis_roundtrip', _cache_roundtrip),
+    ('logging.fstring_disabled', _log(enabled=False, lazy=False)),
+    ('logging.lazy_disabled', _log(enabled=False, lazy=True)),
+    ('logging.lazy_enabled', _log(enabled=True, lazy=True)),
+    ('imports.python', _import(None)),
+    *[(f'imports.{module}', _import(module)) for module in IMPORTED_MODULES]
+]
+
+
+def select(patterns: List[str] = None) -> List[Tuple[str, Callable[[], Callable]]]:
+    """Benchmarks cuyo nombre contiene alguno de los patrones (todos si no hay)"""
+    if not patterns:
+        return list(BENCHMARKS)
+    return [(name, setup) for name, setup in BENCHMARKS if any(p in name for p in patterns)]
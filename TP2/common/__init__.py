@@ -1,8 +1,23 @@
-from .protocol import Protocol, MessageType, TaskType
-from .serialization import Serializer, SerializationFormat
-from .async_client import ProcessingClient
-from .cache import RedisCache
-from .rate_limiter import RateLimiter
+"""
+Módulos compartidos por los dos servidores
+
+Las clases de abajo se importan recién al usarlas: importar common.protocol
+(lo único que necesita el Servidor B de este paquete al arrancar) no carga
+aiohttp ni el cliente de Redis.
+"""
+import importlib
+
+_LAZY = {
+    'Protocol': 'common.protocol',
+    'MessageType': 'common.protocol',
+    'TaskType': 'common.protocol',
+    'Serializer': 'common.serialization',
+    'SerializationFormat': 'common.serialization',
+    'ProcessingClient': 'common.async_client',
+    'RedisCache': 'common.cache',
+    'RateLimiter': 'common.rate_limiter',
+    'BloomFilter': 'common.bloom_filter'
+}
 
 __all__ = [
     'Protocol',
@@ -12,5 +27,15 @@ __all__ = [
     'SerializationFormat',
     'ProcessingClient',
     'RedisCache',
-    'RateLimiter'
-]
\ No newline at end of file
+    'RateLimiter',
+    'BloomFilter'
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
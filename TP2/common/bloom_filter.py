@@ -0,0 +1,79 @@
+"""
+Bloom filter para conjuntos de URLs visitadas (crawl)
+
+Ocupa ~1.2 bytes por elemento con 1% de falsos positivos, contra los
+~100+ bytes por URL de un set de strings. Un falso positivo solo hace que
+una URL no se visite: nunca se visita dos veces la misma.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Bloom filter con doble hashing sobre un digest blake2b"""
+    
+    def __init__(self, capacity: int = 10000, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: Cantidad esperada de elementos
+            error_rate: Tasa de falsos positivos aceptada a esa capacidad
+        """
+        if capacity <= 0:
+            raise ValueError("capacity debe ser mayor a 0")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate debe estar entre 0 y 1")
+        
+        self.capacity = capacity
+        self.error_rate = error_rate
+        
+        # m = -n ln(p) / (ln 2)^2 ; k = m/n ln 2
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item: str):
+        """Posiciones de bits del elemento (h1 + i*h2)"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+    
+    def add(self, item: str) -> bool:
+        """
+        Agregar un elemento
+        
+        Returns:
+            True si el elemento no estaba (según el filtro)
+        """
+        added = False
+        
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        
+        if added:
+            self.count += 1
+        
+        return added
+    
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7))
+            for pos in self._positions(item)
+        )
+    
+    def __len__(self) -> int:
+        """Elementos agregados (aproximado: no cuenta falsos positivos)"""
+        return self.count
+    
+    @property
+    def size_bytes(self) -> int:
+        """Memoria usada por el arreglo de bits"""
+        return len(self.bits)
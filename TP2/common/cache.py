@@ -5,9 +5,11 @@ import redis
 import json
 import hashlib
 import logging
-from typing import Optional, Any
+from typing import Dict, Optional, Any
 from datetime import datetime, timedelta
 
+from . import json_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,6 +45,14 @@ class RedisCache:
             socket_connect_timeout=5
         )
         
+        # Cliente sin decode para valores binarios (grafos, blobs comprimidos)
+        self.binary_client = redis.Redis(
+            host=redis_host,
+            port=redis_port,
+            decode_responses=False,
+            socket_connect_timeout=5
+        )
+        
         self.default_ttl = default_ttl
         self.key_prefix = key_prefix
         
@@ -96,7 +106,7 @@ class RedisCache:
                 # Cache HIT
                 self._increment_stat('hits')
                 
-                result = json.loads(data)
+                result = json_codec.loads(data)
                 
                 # Agregar metadata de caché
                 result['cache'] = {
@@ -105,13 +115,13 @@ class RedisCache:
                     'ttl_seconds': self.redis_client.ttl(key)
                 }
                 
-                logger.info(f"✅ Cache HIT para {url} (TTL: {result['cache']['ttl_seconds']}s)")
+                logger.info("✅ Cache HIT para %s (TTL: %ss)", url, result['cache']['ttl_seconds'])
                 
                 return result
             else:
                 # Cache MISS
                 self._increment_stat('misses')
-                logger.debug(f"❌ Cache MISS para {url}")
+                logger.debug("❌ Cache MISS para %s", url)
                 return None
         
         except json.JSONDecodeError:
@@ -142,26 +152,52 @@ class RedisCache:
         Returns:
             True si se guardó exitosamente
         """
-        key = self._generate_key(url, full)
-        ttl = ttl or self.default_ttl
-        
         try:
             # Agregar timestamp si no existe
             if 'timestamp' not in data:
                 data['timestamp'] = datetime.utcnow().isoformat() + 'Z'
             
-            # Serializar a JSON
-            json_data = json.dumps(data, ensure_ascii=False)
-            
+            # Serializar a JSON (bytes UTF-8)
+            json_data = json_codec.dumps(data)
+        except Exception as e:
+            logger.error(f"⚠️  Error guardando caché para {url}: {e}")
+            return False
+        
+        return self.set_raw(url, json_data, full, ttl)
+    
+    def set_raw(
+        self,
+        url: str,
+        body: bytes,
+        full: bool = False,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Guarda datos ya serializados (evita volver a codificar un JSON que
+        el llamador ya tiene en bytes)
+        
+        Args:
+            url: URL a cachear
+            body: Objeto JSON serializado (con 'timestamp')
+            full: Si es scraping completo
+            ttl: TTL custom en segundos (None = default)
+        
+        Returns:
+            True si se guardó exitosamente
+        """
+        key = self._generate_key(url, full)
+        ttl = ttl or self.default_ttl
+        
+        try:
             # Guardar con TTL
             success = self.redis_client.setex(
                 key,
                 ttl,
-                json_data
+                body
             )
             
             if success:
-                logger.info(f"💾 Datos cacheados para {url} (TTL: {ttl}s)")
+                logger.info("💾 Datos cacheados para %s (TTL: %ss)", url, ttl)
                 self._increment_stat('writes')
                 return True
             
@@ -171,6 +207,36 @@ class RedisCache:
             logger.error(f"⚠️  Error guardando caché para {url}: {e}")
             return False
     
+    def get_raw(self, url: str, full: bool = False) -> Optional[dict]:
+        """
+        Obtiene la entrada tal como está guardada (bytes JSON, sin parsear)
+        
+        Args:
+            url: URL a buscar
+            full: Si es scraping completo
+        
+        Returns:
+            dict con 'body' (bytes) y 'ttl_seconds', o None si no existe
+        """
+        key = self._generate_key(url, full)
+        
+        try:
+            pipe = self.binary_client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            body, ttl = pipe.execute()
+        except Exception as e:
+            logger.error(f"⚠️  Error obteniendo caché para {url}: {e}")
+            return None
+        
+        if body is None:
+            self._increment_stat('misses')
+            return None
+        
+        self._increment_stat('hits')
+        
+        return {'body': body, 'ttl_seconds': ttl}
+    
     def delete(self, url: str, full: bool = False) -> bool:
         """
         Elimina entrada de caché para una URL
@@ -184,7 +250,7 @@ class RedisCache:
         """
         key = self._generate_key(url, full)
         
-        deleted = self.redis_client.delete(key)
+        deleted = self.redis_client.delete(key, self._variants_key(url, full))
         
         if deleted:
             logger.info(f"🗑️  Caché eliminado para {url}")
@@ -219,6 +285,183 @@ class RedisCache:
         key = self._generate_key(url, full)
         return self.redis_client.ttl(key)
     
+    def _variants_key(self, url: str, full: bool = False) -> str:
+        # Bajo 'cache:' para que clear_all() también las borre
+        return f"{self._generate_key(url, full)}:variants"
+    
+    def set_variants(
+        self,
+        url: str,
+        variants: Dict[str, bytes],
+        etag: str,
+        full: bool = False,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Guarda la respuesta HTTP ya serializada y comprimida (un hash con
+        un campo por content-coding más el ETag)
+        
+        Args:
+            url: URL cacheada
+            variants: dict coding -> bytes ('identity', 'gzip', 'br', ...)
+            etag: ETag del body sin comprimir
+            full: Si es scraping completo
+            ttl: TTL custom en segundos (None = default)
+        
+        Returns:
+            True si se guardó exitosamente
+        """
+        key = self._variants_key(url, full)
+        
+        try:
+            pipe = self.binary_client.pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping=dict(variants, etag=etag.encode('ascii')))
+            pipe.expire(key, ttl or self.default_ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"⚠️  Error guardando variantes para {url}: {e}")
+            return False
+    
+    def get_variant(self, url: str, coding: Optional[str], full: bool = False) -> Optional[dict]:
+        """
+        Obtiene el ETag y, si se pide, el body en un content-coding
+        
+        Args:
+            url: URL cacheada
+            coding: Coding a leer (None = solo ETag, para validar
+                    If-None-Match sin traer el body; no cuenta como hit:
+                    si se responde 304 el llamador usa record_hit())
+            full: Si es scraping completo
+        
+        Returns:
+            dict con 'etag', 'ttl_seconds', 'coding' y 'body' (None si no se
+            pidió), o None si no hay variantes guardadas
+        """
+        key = self._variants_key(url, full)
+        fields = ['etag'] + ([coding] if coding else [])
+        
+        try:
+            pipe = self.binary_client.pipeline(transaction=False)
+            pipe.hmget(key, fields)
+            pipe.ttl(key)
+            values, ttl = pipe.execute()
+            
+            if values[0] is None:
+                return None
+            
+            body = values[1] if coding else None
+            
+            # Respuestas chicas solo tienen 'identity'
+            if coding and body is None and coding != 'identity':
+                coding = 'identity'
+                body = self.binary_client.hget(key, 'identity')
+                
+                if body is None:
+                    return None
+        
+        except Exception as e:
+            logger.error(f"⚠️  Error obteniendo variantes para {url}: {e}")
+            return None
+        
+        if coding:
+            self._increment_stat('hits')
+        
+        return {
+            'etag': values[0].decode('ascii'),
+            'ttl_seconds': ttl,
+            'coding': coding,
+            'body': body
+        }
+    
+    def set_blob(self, name: str, data: bytes, ttl: Optional[int] = None) -> bool:
+        """
+        Guarda un valor binario (sin pasar por JSON)
+        
+        Args:
+            name: Nombre lógico (ej: 'crawl:graph:<hash>')
+            data: Bytes a guardar
+            ttl: TTL custom en segundos (None = default)
+        
+        Returns:
+            True si se guardó exitosamente
+        """
+        key = f"{self.key_prefix}:blob:{name}"
+        
+        try:
+            return bool(self.binary_client.setex(key, ttl or self.default_ttl, data))
+        except Exception as e:
+            logger.error(f"⚠️  Error guardando blob {name}: {e}")
+            return False
+    
+    def get_blob(self, name: str) -> Optional[bytes]:
+        """
+        Obtiene un valor binario guardado con set_blob()
+        
+        Returns:
+            Bytes o None si no existe
+        """
+        try:
+            return self.binary_client.get(f"{self.key_prefix}:blob:{name}")
+        except Exception as e:
+            logger.error(f"⚠️  Error obteniendo blob {name}: {e}")
+            return None
+    
+    def _link_key(self, url: str) -> str:
+        return f"{self.key_prefix}:links:{hashlib.md5(url.encode()).hexdigest()}"
+    
+    def get_link_statuses(self, urls: list) -> dict:
+        """
+        Obtiene el status cacheado de varios links (un solo MGET)
+        
+        Args:
+            urls: URLs a consultar
+        
+        Returns:
+            dict url -> resultado (solo las URLs presentes en caché)
+        """
+        if not urls:
+            return {}
+        
+        try:
+            values = self.redis_client.mget([self._link_key(url) for url in urls])
+        except Exception as e:
+            logger.error(f"⚠️  Error obteniendo status de links: {e}")
+            return {}
+        
+        return {
+            url: json_codec.loads(value)
+            for url, value in zip(urls, values)
+            if value is not None
+        }
+    
+    def set_link_statuses(self, results: dict, ttl: int):
+        """
+        Guarda el status de varios links (pipeline)
+        
+        Args:
+            results: dict url -> resultado
+            ttl: TTL en segundos (los errores de red se guardan menos tiempo)
+        """
+        if not results:
+            return
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            
+            for url, result in results.items():
+                entry_ttl = ttl if result.get('status') is not None else min(ttl, 300)
+                pipe.setex(self._link_key(url), entry_ttl, json_codec.dumps(result))
+            
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"⚠️  Error guardando status de links: {e}")
+    
+    def record_hit(self):
+        """Contar un hit servido sin leer el body (ej: 304 Not Modified)"""
+        self._increment_stat('hits')
+    
     def _increment_stat(self, stat_type: str):
         """Incrementa contador de estadísticas"""
         try:
@@ -275,6 +518,7 @@ class RedisCache:
     def close(self):
         """Cierra la conexión a Redis"""
         self.redis_client.close()
+        self.binary_client.close()
         logger.info("🔌 Conexión a Redis cerrada")
 
 
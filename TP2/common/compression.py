@@ -0,0 +1,166 @@
+"""
+Compresión negociada de respuestas HTTP y ETags
+
+gzip siempre está disponible; brotli y zstd se usan si están instaladas las
+librerías (`brotli` / `zstandard`). Las respuestas cacheadas se guardan ya
+comprimidas en cada encoding (ver RedisCache.set_variants), así un hit no
+vuelve a comprimir el mismo JSON.
+"""
+import gzip
+import hashlib
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Respuestas más chicas no se comprimen (el overhead no compensa)
+MIN_COMPRESS_SIZE = 1024
+
+# Niveles pensados para comprimir una vez por escritura en caché sin
+# frenar el event loop más de la cuenta
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 6
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime fijo: mismo input, mismos bytes
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+CODECS = {'gzip': _gzip}
+
+if brotli is not None:
+    CODECS['br'] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+
+if zstandard is not None:
+    CODECS['zstd'] = lambda data: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+# Preferencia del servidor cuando el cliente acepta varios con igual q
+PREFERENCE = [name for name in ('zstd', 'br', 'gzip') if name in CODECS]
+
+
+def negotiate(accept_encoding: Optional[str]) -> str:
+    """
+    Elegir el content-coding según Accept-Encoding
+    
+    Args:
+        accept_encoding: Header del cliente (None = no acepta compresión)
+    
+    Returns:
+        Nombre del coding ('zstd', 'br', 'gzip') o 'identity'
+    """
+    if not accept_encoding:
+        return 'identity'
+    
+    weights = {}
+    
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        
+        if name:
+            weights[name] = q
+    
+    wildcard = weights.get('*')
+    best, best_q = 'identity', 0.0
+    
+    for name in PREFERENCE:
+        q = weights.get(name, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = name, q
+    
+    return best
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    """Comprimir con un coding de CODECS ('identity' devuelve el body)"""
+    if coding == 'identity':
+        return body
+    return CODECS[coding](body)
+
+
+def build_variants(body: bytes) -> Dict[str, bytes]:
+    """
+    Body original más una versión por cada coding disponible
+    
+    Returns:
+        dict coding -> bytes (siempre incluye 'identity'; se omiten las
+        versiones que no achican el body)
+    """
+    variants = {'identity': body}
+    
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+    
+    for name, codec in CODECS.items():
+        try:
+            data = codec(body)
+        except Exception as e:
+            logger.warning(f"⚠️  Error comprimiendo con {name}: {e}")
+            continue
+        
+        if len(data) < len(body):
+            variants[name] = data
+    
+    return variants
+
+
+def make_etag(body: bytes) -> str:
+    """ETag fuerte del body sin comprimir"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def variant_etag(etag: str, coding: str) -> str:
+    """
+    ETag de una representación comprimida (cada coding es una
+    representación distinta: '"hash"' -> '"hash-gzip"')
+    """
+    if coding == 'identity':
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comparación débil de If-None-Match contra el ETag base (acepta las
+    versiones comprimidas y el prefijo W/)
+    """
+    if not if_none_match or not etag:
+        return False
+    
+    base = etag.strip('"')
+    
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        
+        if candidate == '*':
+            return True
+        
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        
+        candidate = candidate.strip('"')
+        if candidate == base or candidate.rsplit('-', 1)[0] == base:
+            return True
+    
+    return False
@@ -0,0 +1,67 @@
+"""
+Codec JSON compartido (orjson si está instalado, json de la stdlib si no)
+
+Todo trabaja con bytes UTF-8: el protocolo, Redis y las respuestas HTTP
+mandan bytes, así que no hace falta pasar por str en el medio.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializar a JSON (bytes UTF-8)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Tipos que orjson no soporta (ej: enteros de más de 64 bits)
+            pass
+    
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Deserializar JSON desde bytes o str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    
+    return json.loads(data)
+
+
+def splice_object(body: bytes, key: str, value: Any) -> bytes:
+    """
+    Agregar una clave a un objeto JSON ya serializado sin parsearlo
+    
+    Args:
+        body: Objeto JSON serializado (b'{...}') que no tiene la clave
+        key: Clave a agregar al final
+        value: Valor (se serializa solo este)
+    
+    Returns:
+        Bytes del objeto con la clave agregada
+    
+    Raises:
+        ValueError: Si body no es un objeto JSON
+    """
+    body = body.rstrip()
+    
+    if not body.startswith(b'{') or not body.endswith(b'}'):
+        raise ValueError("body no es un objeto JSON")
+    
+    # Último carácter significativo antes de la '}' final
+    last = len(body) - 2
+    while body[last] in b' \t\r\n':
+        last -= 1
+    
+    separator = b'' if body[last] == ord('{') else b','
+    member = dumps(key) + b':' + dumps(value)
+    
+    # Una sola copia del body (memoryview evita el slice intermedio)
+    return b''.join([memoryview(body)[:last + 1], separator, member, b'}'])
@@ -0,0 +1,447 @@
+"""
+Balanceo de carga del Servidor A hacia varios Servidores B
+
+Cada tarea se envía a un nodo elegido por menor cantidad de requests en
+vuelo ('least-outstanding') o por rendezvous hashing de la URL ('hash':
+la misma URL cae siempre en el mismo nodo mientras esté sano, y agregar o
+sacar un nodo solo mueve las URLs de ese nodo). Los nodos que fallan se
+expulsan por un tiempo y los health checks periódicos (mensaje STATUS del
+protocolo) los reincorporan. Opcionalmente, si un nodo tarda más de
+hedge_after segundos se lanza la misma tarea en otro nodo y gana la
+primera respuesta.
+
+Toda la llamada comparte un único presupuesto: el deadline que viaja en
+el sobre del mensaje. Cada intento (reintento o copia del hedging) espera
+solo el tiempo que queda, así B nunca recibe una tarea con el deadline ya
+vencido.
+
+Si la espera se cancela (el cliente HTTP se desconectó, o perdió el
+hedging) se manda un mensaje CANCEL con el request_id al nodo, que libera
+los workers que estaban procesando la tarea.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .protocol import Protocol
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('least-outstanding', 'hash')
+
+# Peso de la última latencia en el promedio móvil
+LATENCY_ALPHA = 0.3
+
+
+class NodeUnavailable(Exception):
+    """El nodo no respondió (conexión, timeout o respuesta cortada)"""
+
+
+def parse_nodes(value: str) -> List[Tuple[str, int]]:
+    """
+    Parsear 'host:port,host:port' (IPv6 entre corchetes: '[::1]:9000')
+    
+    Raises:
+        ValueError: Si algún nodo no tiene puerto válido
+    """
+    nodes = []
+    
+    for item in value.split(','):
+        item = item.strip()
+        
+        if not item:
+            continue
+        
+        host, sep, port = item.rpartition(':')
+        
+        if not sep or not port.isdigit():
+            raise ValueError(f"Nodo inválido (se espera host:puerto): {item}")
+        
+        nodes.append((host.strip('[]'), int(port)))
+    
+    return nodes
+
+
+class ProcessingNode:
+    """Estado de un Servidor B visto desde el Servidor A"""
+    
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.latency_ewma: Optional[float] = None
+        
+        # False mientras el nodo precalienta o se detiene (STATUS o error
+        # retryable): solo se usa si no hay otro
+        self.accepting = True
+        
+        # Último reporte STATUS del nodo
+        self.load: Dict = {}
+        
+        self.requests = 0
+        self.errors = 0
+    
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+    
+    def available(self, now: float) -> bool:
+        return self.accepting and now >= self.ejected_until
+    
+    def record_success(self, elapsed: float):
+        self.failures = 0
+        
+        if self.latency_ewma is None:
+            self.latency_ewma = elapsed
+        else:
+            self.latency_ewma = LATENCY_ALPHA * elapsed + (1 - LATENCY_ALPHA) * self.latency_ewma
+    
+    def to_dict(self) -> Dict:
+        return {
+            'address': self.address,
+            'healthy': self.available(time.time()),
+            'accepting': self.accepting,
+            'outstanding': self.outstanding,
+            'failures': self.failures,
+            'requests': self.requests,
+            'errors': self.errors,
+            'latency_ms': round(self.latency_ewma * 1000, 2) if self.latency_ewma else None,
+            'load': self.load
+        }
+
+
+class LoadBalancer:
+    """Reparte requests entre Servidores B con health checks y reintentos"""
+    
+    def __init__(
+        self,
+        nodes: Sequence[Tuple[str, int]],
+        strategy: str = 'least-outstanding',
+        max_failures: int = 3,
+        eject_seconds: float = 30,
+        health_interval: float = 10,
+        hedge_after: Optional[float] = None,
+        max_attempts: int = 2,
+        timeout: float = 180,
+        connect_timeout: float = 5
+    ):
+        """
+        Args:
+            nodes: Lista (host, port) de Servidores B
+            strategy: 'least-outstanding' o 'hash' (afinidad por URL)
+            max_failures: Fallos seguidos para expulsar un nodo
+            eject_seconds: Tiempo que un nodo queda expulsado
+            health_interval: Segundos entre health checks
+            hedge_after: Segundos antes de duplicar la request en otro nodo
+                         (None = sin hedging)
+            max_attempts: Nodos a probar si el elegido no responde
+            timeout: Timeout total de una tarea en un nodo
+            connect_timeout: Timeout de conexión
+        """
+        if not nodes:
+            raise ValueError("Se necesita al menos un nodo de procesamiento")
+        
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estrategia desconocida: {strategy}")
+        
+        self.nodes = [ProcessingNode(host, port) for host, port in nodes]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.hedge_after = hedge_after
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.cancels_sent = 0
+        
+        # CANCEL en vuelo (referencia para que no los junte el GC)
+        self._cancel_tasks = set()
+    
+    # ------------------------------------------------------------------
+    # Selección de nodo
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _hash_score(node: ProcessingNode, url: str) -> int:
+        digest = hashlib.blake2b(f"{node.address}|{url}".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+    
+    def pick(self, url: str, exclude: Sequence[ProcessingNode] = ()) -> Optional[ProcessingNode]:
+        """
+        Elegir nodo para una URL
+        
+        Si todos los nodos están expulsados se elige igual entre ellos
+        (mejor intentar que rechazar todo).
+        
+        Returns:
+            ProcessingNode o None si no quedan nodos sin probar
+        """
+        now = time.time()
+        remaining = [node for node in self.nodes if node not in exclude]
+        candidates = [node for node in remaining if node.available(now)] or remaining
+        
+        if not candidates:
+            return None
+        
+        if self.strategy == 'hash':
+            return max(candidates, key=lambda node: self._hash_score(node, url))
+        
+        return min(candidates, key=lambda node: (
+            node.outstanding,
+            node.load.get('active_tasks', 0),
+            node.latency_ewma or 0.0
+        ))
+    
+    def _record_failure(self, node: ProcessingNode, error: Exception):
+        node.failures += 1
+        node.errors += 1
+        
+        if node.failures >= self.max_failures and time.time() >= node.ejected_until:
+            node.ejected_until = time.time() + self.eject_seconds
+            logger.warning(
+                f"⛔ Nodo {node.address} expulsado por {self.eject_seconds}s "
+                f"({node.failures} fallos seguidos: {error})"
+            )
+    
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+    
+    async def _exchange(self, node: ProcessingNode, message_bytes: bytes, timeout: float) -> dict:
+        """Enviar un mensaje ya codificado y esperar la respuesta"""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(node.host, node.port),
+                timeout=min(self.connect_timeout, timeout)
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise NodeUnavailable(f"{node.address}: {str(e) or type(e).__name__}")
+        
+        try:
+            writer.write(message_bytes)
+            await writer.drain()
+            
+            response = await asyncio.wait_for(Protocol.receive_message(reader), timeout=timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise NodeUnavailable(f"{node.address}: {str(e) or type(e).__name__}")
+        finally:
+            writer.close()
+        
+        if response is None:
+            raise NodeUnavailable(f"{node.address}: conexión cerrada sin respuesta")
+        
+        return response
+    
+    async def _send(
+        self,
+        node: ProcessingNode,
+        message_bytes: bytes,
+        request_id: str = None,
+        deadline: float = None
+    ) -> dict:
+        """_exchange con contabilidad de carga, latencia y fallos, esperando hasta deadline"""
+        if deadline is None:
+            deadline = time.time() + self.timeout
+        
+        remaining = deadline - time.time()
+        
+        if remaining <= 0:
+            raise NodeUnavailable(f"{node.address}: deadline vencido antes de enviar")
+        
+        node.outstanding += 1
+        node.requests += 1
+        start = time.perf_counter()
+        
+        try:
+            response = await self._exchange(node, message_bytes, remaining)
+        except NodeUnavailable as e:
+            self._record_failure(node, e)
+            raise
+        except asyncio.CancelledError:
+            # Nadie espera ya la respuesta: que el nodo deje de procesarla
+            if request_id is not None:
+                self.cancel_on(node, request_id)
+            raise
+        finally:
+            node.outstanding -= 1
+        
+        # El nodo no la procesó (se está deteniendo): que la tome otro
+        if response.get('retryable'):
+            node.accepting = False
+            logger.info(f"🚦 Nodo {node.address} no acepta tareas: {response.get('error')}")
+            raise NodeUnavailable(f"{node.address}: {response.get('error')}")
+        
+        node.record_success(time.perf_counter() - start)
+        return response
+    
+    async def _send_hedged(
+        self,
+        url: str,
+        node: ProcessingNode,
+        message_bytes: bytes,
+        tried: list,
+        request_id: str = None,
+        deadline: float = None
+    ) -> dict:
+        """Enviar a node y, si tarda más de hedge_after, también a otro nodo"""
+        primary = asyncio.ensure_future(self._send(node, message_bytes, request_id, deadline))
+        pending = {primary}
+        
+        try:
+            if self.hedge_after is None:
+                return await primary
+            
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            
+            backup_node = None if done else self.pick(url, exclude=tried)
+            
+            if backup_node is not None:
+                tried.append(backup_node)
+                self.hedged += 1
+                logger.info(f"🪁 Hedging: {url} también a {backup_node.address} (tras {self.hedge_after}s)")
+                
+                backup = asyncio.ensure_future(self._send(backup_node, message_bytes, request_id, deadline))
+                pending.add(backup)
+            
+            # Gana la primera respuesta; si una falla se espera la otra
+            error = None
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            
+            raise error
+        finally:
+            # Cancelar la request perdedora (o todas si nos cancelan)
+            for task in pending:
+                task.cancel()
+    
+    async def call(
+        self,
+        url: str,
+        message_bytes: bytes,
+        request_id: str = None,
+        deadline: float = None
+    ) -> dict:
+        """
+        Enviar una tarea eligiendo nodo, con reintento en otro nodo si no
+        responde
+        
+        Args:
+            url: URL de la tarea (clave de afinidad para 'hash')
+            message_bytes: Mensaje ya codificado con Protocol.encode_message
+            request_id: request_id del mensaje; si la llamada se cancela se
+                        manda CANCEL a los nodos que la estaban procesando
+            deadline: Momento (time.time()) límite de toda la llamada, el
+                      mismo que lleva el sobre del mensaje (None = ahora +
+                      timeout). Los reintentos esperan solo lo que queda
+        
+        Returns:
+            Mensaje de respuesta decodificado (RESPONSE o ERROR)
+        
+        Raises:
+            ConnectionError: Si ningún nodo respondió
+        """
+        if deadline is None:
+            deadline = time.time() + self.timeout
+        
+        tried: List[ProcessingNode] = []
+        last_error = None
+        
+        for _ in range(self.max_attempts):
+            if time.time() >= deadline:
+                last_error = last_error or NodeUnavailable('deadline vencido')
+                break
+            
+            node = self.pick(url, exclude=tried)
+            
+            if node is None:
+                break
+            
+            tried.append(node)
+            logger.info("🔀 Tarea de %s → nodo %s", url, node.address)
+            
+            try:
+                return await self._send_hedged(url, node, message_bytes, tried, request_id, deadline)
+            except NodeUnavailable as e:
+                last_error = e
+                logger.warning(f"⚠️  Nodo sin respuesta ({e}), reintentando en otro nodo")
+        
+        raise ConnectionError(f"Ningún servidor de procesamiento respondió: {last_error}")
+    
+    def cancel_on(self, node: ProcessingNode, request_id: str):
+        """Mandar CANCEL al nodo en segundo plano (se llama desde tareas canceladas)"""
+        task = asyncio.ensure_future(self._send_cancel(node, request_id))
+        self._cancel_tasks.add(task)
+        task.add_done_callback(self._cancel_tasks.discard)
+    
+    async def _send_cancel(self, node: ProcessingNode, request_id: str):
+        message_bytes = Protocol.encode_message(Protocol.create_cancel(request_id))
+        self.cancels_sent += 1
+        
+        try:
+            response = await self._exchange(node, message_bytes, self.connect_timeout)
+        except NodeUnavailable as e:
+            logger.warning(f"⚠️  No se pudo cancelar {request_id} en {node.address}: {e}")
+            return
+        
+        logger.info(
+            f"🛑 Request {request_id} cancelada en {node.address} "
+            f"({response.get('cancelled', 0)} tareas detenidas)"
+        )
+    
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+    
+    async def check_node(self, node: ProcessingNode) -> bool:
+        """Pedir el reporte STATUS de un nodo"""
+        message_bytes = Protocol.encode_message(Protocol.create_status())
+        
+        try:
+            response = await self._exchange(node, message_bytes, self.connect_timeout)
+        except NodeUnavailable as e:
+            self._record_failure(node, e)
+            return False
+        
+        node.load = response.get('load', {})
+        accepting = node.load.get('ready', True) and not node.load.get('draining', False)
+        
+        if accepting and (not node.available(time.time()) or node.failures):
+            logger.info(f"✅ Nodo {node.address} respondió al health check: reincorporado")
+        
+        node.accepting = accepting
+        node.failures = 0
+        node.ejected_until = 0.0
+        return True
+    
+    async def run_health_checks(self):
+        """Loop de health checks (correr como task)"""
+        while True:
+            await asyncio.gather(*(self.check_node(node) for node in self.nodes))
+            await asyncio.sleep(self.health_interval)
+    
+    def stats(self) -> Dict:
+        return {
+            'strategy': self.strategy,
+            'hedge_after': self.hedge_after,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'cancels_sent': self.cancels_sent,
+            'nodes': [node.to_dict() for node in self.nodes]
+        }
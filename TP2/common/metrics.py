@@ -0,0 +1,415 @@
+"""
+Métricas en formato de exposición de Prometheus (texto 0.0.4)
+
+Implementación mínima sin dependencias: contadores, gauges (fijos o
+calculados al exportar) e histogramas con buckets fijos. observe() solo
+busca el bucket con bisect y suma bajo un lock, así que se puede llamar en
+cada etapa de cada request. Cada servidor tiene su propio MetricsRegistry
+y lo expone en /metrics; con varios procesos (prefork) cada uno exporta un
+snapshot() y merge_snapshots() los junta en un solo registro.
+"""
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Segundos: de 5 ms (caché, parseo) a 2 minutos (tareas con navegador)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Bytes: de 1 KB a 64 MB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """Base: nombre, ayuda y valores por combinación de labels"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+    
+    def _key(self, labels: Dict) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera los labels {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+    
+    def _header(self) -> List[str]:
+        help_text = self.help.replace('\\', '\\\\').replace('\n', '\\n')
+        return [f'# HELP {self.name} {help_text}', f'# TYPE {self.name} {self.kind}']
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in items
+        ]
+    
+    def _snapshot_values(self) -> List:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+    
+    def snapshot(self) -> Dict:
+        """Estado serializable en JSON (para sumar el de varios procesos)"""
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'help': self.help,
+            'labelnames': list(self.labelnames),
+            'values': self._snapshot_values()
+        }
+
+
+class Counter(_Metric):
+    """Valor que solo crece (requests, rechazos, errores)"""
+    
+    kind = 'counter'
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+    
+    def total(self) -> float:
+        """Suma de todas las combinaciones de labels"""
+        with self._lock:
+            return sum(self._values.values())
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja (requests en vuelo)"""
+    
+    kind = 'gauge'
+    
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+    
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+    
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class CallbackGauge(_Metric):
+    """
+    Gauge calculado al exportar (cola del pool, workers ocupados): el
+    callback devuelve un número o un dict tupla-de-labels -> número
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Union[float, Dict[Tuple, float]]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+    
+    def render(self) -> List[str]:
+        value = self.callback()
+        values = value if isinstance(value, dict) else {(): value}
+        
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(val)}'
+            for key, val in sorted(values.items())
+        ]
+    
+    def _snapshot_values(self) -> List:
+        value = self.callback()
+        values = value if isinstance(value, dict) else {(): value}
+        return [[list(key), val] for key, val in values.items()]
+
+
+class Histogram(_Metric):
+    """Distribución de latencias o tamaños en buckets fijos"""
+    
+    kind = 'histogram'
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        
+        with self._lock:
+            state = self._values.get(key)
+            
+            if state is None:
+                # [conteo por bucket (no acumulado, +Inf al final), suma, total]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    @contextmanager
+    def time(self, **labels):
+        """Observar la duración del bloque (sirve también con await adentro)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+    
+    def _snapshot_values(self) -> List:
+        with self._lock:
+            return [[list(key), [list(state[0]), state[1], state[2]]] for key, state in self._values.items()]
+    
+    def snapshot(self) -> Dict:
+        data = super().snapshot()
+        data['buckets'] = list(self.buckets)
+        return data
+    
+    def merge(self, key: Tuple, state: List):
+        """Sumar el estado de otro histograma con los mismos buckets"""
+        counts, total, count = state
+        
+        with self._lock:
+            current = self._values.get(key)
+            
+            if current is None:
+                current = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+            current[2] += count
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        
+        lines = self._header()
+        bounds = list(self.buckets) + [float('inf')]
+        
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de un servidor"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+    
+    def gauge_callback(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable,
+        labelnames: Sequence[str] = ()
+    ) -> CallbackGauge:
+        return self._register(CallbackGauge(name, help_text, callback, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+    
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+    
+    def render(self) -> bytes:
+        """Todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+    
+    def snapshot(self) -> List[Dict]:
+        """Todas las métricas como datos serializables en JSON"""
+        return [metric.snapshot() for metric in self._metrics.values()]
+
+
+def merge_snapshots(
+    snapshots: Iterable[Tuple[Union[str, Tuple[str, ...]], List[Dict]]],
+    labels: Sequence[str] = ('worker',)
+) -> MetricsRegistry:
+    """
+    Juntar las métricas de varios procesos del mismo servidor
+    
+    Los contadores y los histogramas se suman. Los gauges (en vuelo, nodos
+    sanos) no tienen sentido sumados: se conservan por proceso con labels
+    extra.
+    
+    Args:
+        snapshots: (identificador del proceso, MetricsRegistry.snapshot());
+                   el identificador es un valor por cada label de labels
+                   (un str si hay uno solo)
+        labels: Labels que identifican al proceso en los gauges
+    
+    Returns:
+        MetricsRegistry listo para render()
+    """
+    registry = MetricsRegistry()
+    
+    for process, metrics in snapshots:
+        process = tuple(str(value) for value in process) if isinstance(process, tuple) else (str(process),)
+        
+        for data in metrics:
+            name, kind = data['name'], data['kind']
+            metric = registry._metrics.get(name)
+            
+            if metric is None:
+                if kind == 'histogram':
+                    metric = registry.histogram(name, data['help'], data['labelnames'], data['buckets'])
+                elif kind == 'counter':
+                    metric = registry.counter(name, data['help'], data['labelnames'])
+                else:
+                    metric = registry.gauge(name, data['help'], list(data['labelnames']) + list(labels))
+            
+            for key, value in data['values']:
+                key = tuple(key)
+                
+                if kind == 'histogram':
+                    metric.merge(key, value)
+                elif kind == 'counter':
+                    metric._values[key] = metric._values.get(key, 0) + value
+                else:
+                    metric._values[key + process] = value
+    
+    return registry
+
+
+def cumulative(metrics: List[Dict]) -> List[Dict]:
+    """Solo contadores e histogramas de un snapshot (lo que se sigue sumando cuando el proceso ya no está)"""
+    return [data for data in metrics if data['kind'] in ('counter', 'histogram')]
+
+
+def serve_metrics(registry: MetricsRegistry, host: str, port: int, checks: Dict[str, Callable] = None):
+    """
+    Exportar GET /metrics por HTTP en un thread aparte (para servidores que
+    no hablan HTTP, como el Servidor B)
+    
+    Args:
+        registry: Métricas a exportar
+        host: Dirección de escucha
+        port: Puerto (0 = cualquiera libre)
+        checks: Rutas extra (ej: '/ready') -> función sin argumentos que
+                devuelve (ok, dict); se responde el dict en JSON con 200 o 503
+    
+    Returns:
+        ThreadingHTTPServer ya escuchando (shutdown() para detenerlo)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    checks = checks or {}
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            
+            if path in checks:
+                ok, state = checks[path]()
+                self._send(200 if ok else 503, json.dumps(state).encode('utf-8'), 'application/json')
+                return
+            
+            if path != '/metrics':
+                self.send_error(404)
+                return
+            
+            self._send(200, registry.render(), CONTENT_TYPE)
+        
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            # Prometheus scrapea cada pocos segundos: no llenar el log
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='MetricsExporter', daemon=True).start()
+    return server
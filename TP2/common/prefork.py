@@ -0,0 +1,450 @@
+"""
+Pre-fork: N procesos con su propio event loop escuchando el mismo puerto
+
+Cada worker abre su propio socket con SO_REUSEPORT y el kernel reparte las
+conexiones entrantes entre ellos, así el parseo, la serialización y la
+compresión de cada request usan todos los núcleos. El supervisor no
+atiende requests: arranca los workers, los reemplaza si mueren y hace
+reinicios escalonados (SIGHUP) sin cerrar el puerto: primero arranca el
+worker nuevo, espera a que esté escuchando y recién ahí le manda SIGTERM al
+viejo, que termina las requests en curso.
+
+Al cerrarse un socket con SO_REUSEPORT el kernel descarta las conexiones
+que quedaron en su cola de accept; con net.ipv4.tcp_migrate_req=1 (Linux
+5.14+) las pasa a otro worker y el reinicio no pierde ninguna.
+
+Cada worker también escucha en un socket Unix propio dentro de run_dir
+(worker-<slot>-<pid>.sock). Por ahí cualquier worker consulta el estado de
+los demás para responder /health y /metrics con todos los procesos.
+
+Para que los contadores agregados no retrocedan cuando un worker se
+reemplaza (SIGHUP, reinicio tras una caída), cada worker deja en run_dir
+sus contadores cada vez que los reporta y al terminar
+(worker-<slot>-<pid>.metrics.json). Cuando el proceso ya terminó, el
+supervisor suma ese archivo al total de los retirados
+(retired-metrics.json), que /metrics sigue sumando.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import signal
+import tempfile
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .metrics import MetricsRegistry, cumulative, merge_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Un worker que muere antes de esto se considera un fallo de arranque
+MIN_UPTIME = 5.0
+
+# Espera máxima entre reintentos de un slot que falla al arrancar
+MAX_BACKOFF = 30.0
+
+# Contadores acumulados de los workers que ya terminaron
+RETIRED_METRICS = 'retired-metrics.json'
+
+
+def worker_socket(run_dir: str, slot: int, pid: int = None) -> str:
+    """Ruta del socket Unix de control de un worker"""
+    return os.path.join(run_dir, f'worker-{slot}-{pid or os.getpid()}.sock')
+
+
+def worker_sockets(run_dir: str) -> List[str]:
+    """Sockets de control presentes en run_dir (uno por worker vivo)"""
+    try:
+        names = os.listdir(run_dir)
+    except OSError:
+        return []
+    return sorted(os.path.join(run_dir, name) for name in names if name.endswith('.sock'))
+
+
+def worker_metrics_file(run_dir: str, slot: int, pid: int = None) -> str:
+    """Ruta del último snapshot de contadores de un worker"""
+    return os.path.join(run_dir, f'worker-{slot}-{pid or os.getpid()}.metrics.json')
+
+
+def _write_json(path: str, data):
+    # Escritura atómica: quien lee nunca ve un archivo a medias
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_worker_metrics(run_dir: str, slot: int, metrics: List[Dict], pid: int = None):
+    """Guardar los contadores e histogramas de un worker (default: este proceso)"""
+    _write_json(worker_metrics_file(run_dir, slot, pid), cumulative(metrics))
+
+
+def retire_worker_metrics(run_dir: str, slot: int, pid: int):
+    """
+    Sumar el último snapshot de un worker que ya terminó al total de los
+    retirados (lo llama el supervisor; es el único que escribe ese total)
+    """
+    path = worker_metrics_file(run_dir, slot, pid)
+    metrics = _read_json(path)
+    
+    if metrics is None:
+        return
+    
+    retired = _read_json(os.path.join(run_dir, RETIRED_METRICS)) or {'pids': [], 'metrics': []}
+    
+    # Primero el total (con el PID) y después se borra el archivo: quien
+    # lea en el medio descarta el archivo porque el PID ya está en el total
+    _write_json(os.path.join(run_dir, RETIRED_METRICS), {
+        'pids': retired['pids'] + [pid],
+        'metrics': merge_snapshots([('', retired['metrics']), ('', metrics)]).snapshot()
+    })
+    
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def aggregate_metrics(run_dir: str, answers: List[dict]) -> MetricsRegistry:
+    """
+    Métricas de todos los procesos: los workers que respondieron más los
+    que ya no (su último snapshot o el total de los retirados)
+    
+    Los gauges quedan con los labels worker (slot) y pid: durante un
+    reemplazo el viejo y el nuevo del mismo slot conviven.
+    
+    Args:
+        run_dir: Directorio de control
+        answers: Respuestas de /_worker/metrics ({'worker', 'pid', 'metrics'})
+    
+    Returns:
+        MetricsRegistry listo para render()
+    """
+    # Archivos antes que el total: si el supervisor retira un worker en el
+    # medio, su PID ya aparece en el total leído después
+    files = {}
+    for name in os.listdir(run_dir):
+        if name.startswith('worker-') and name.endswith('.metrics.json'):
+            pid = int(name[:-len('.metrics.json')].rsplit('-', 1)[1])
+            files[pid] = _read_json(os.path.join(run_dir, name))
+    
+    retired = _read_json(os.path.join(run_dir, RETIRED_METRICS)) or {'pids': [], 'metrics': []}
+    retired_pids = set(retired['pids'])
+    
+    # Un worker que respondió y terminó antes de leer el total ya está sumado ahí
+    live = [answer for answer in answers if answer['pid'] not in retired_pids]
+    live_pids = {answer['pid'] for answer in live}
+    
+    snapshots = [((answer['worker'], answer['pid']), answer['metrics']) for answer in live]
+    snapshots.append(('', retired['metrics']))
+    snapshots.extend(
+        ('', metrics) for pid, metrics in files.items()
+        if metrics and pid not in live_pids and pid not in retired_pids
+    )
+    
+    return merge_snapshots(snapshots, labels=('worker', 'pid'))
+
+
+async def query_workers(run_dir: str, path: str, timeout: float = 2.0) -> Dict[str, Optional[dict]]:
+    """
+    GET path en todos los workers (por sus sockets Unix)
+    
+    Args:
+        run_dir: Directorio con los sockets de control
+        path: Ruta a pedir (ej: '/_worker/metrics')
+        timeout: Timeout por worker
+    
+    Returns:
+        dict socket -> JSON de la respuesta (None si el worker no respondió)
+    """
+    async def query(socket_path: str) -> Optional[dict]:
+        connector = aiohttp.UnixConnector(path=socket_path)
+        try:
+            async with aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as session:
+                async with session.get(f'http://worker{path}') as response:
+                    if response.status != 200:
+                        return None
+                    return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            logger.warning(f"⚠️  Worker {os.path.basename(socket_path)} no respondió {path}: {e}")
+            return None
+    
+    sockets = worker_sockets(run_dir)
+    results = await asyncio.gather(*(query(socket_path) for socket_path in sockets))
+    return dict(zip(sockets, results))
+
+
+def migrate_req_enabled() -> Optional[bool]:
+    """net.ipv4.tcp_migrate_req (None si el kernel no lo tiene)"""
+    try:
+        with open('/proc/sys/net/ipv4/tcp_migrate_req') as f:
+            return f.read().strip() == '1'
+    except OSError:
+        return None
+
+
+def _worker_main(target: Callable, args: Tuple, slot: int, run_dir: str, ready):
+    # Ctrl+C llega a todo el grupo de procesos: el supervisor decide
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    target(*args, slot=slot, run_dir=run_dir, ready=ready)
+
+
+class _Worker:
+    """Proceso de un slot"""
+    
+    def __init__(self, slot: int, process, ready):
+        self.slot = slot
+        self.process = process
+        self.ready = ready
+        self.started_at = time.time()
+    
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+
+class PreforkSupervisor:
+    """
+    Supervisor de workers pre-fork
+    
+    target(*args, slot=, run_dir=, ready=) corre en cada worker: debe
+    escuchar con SO_REUSEPORT, llamar ready.set() cuando acepte conexiones
+    y terminar ordenadamente (drenando requests) al recibir SIGTERM.
+    
+    Señales al supervisor:
+    - SIGTERM / SIGINT: detener todos los workers (con grace segundos)
+    - SIGHUP: reinicio escalonado, un worker a la vez
+    """
+    
+    def __init__(
+        self,
+        target: Callable,
+        args: Tuple = (),
+        workers: int = 2,
+        grace: float = 30.0,
+        ready_timeout: float = 60.0,
+        run_dir: str = None
+    ):
+        """
+        Args:
+            target: Función que corre cada worker (importable: se usa spawn)
+            args: Argumentos posicionales de target
+            workers: Cantidad de procesos
+            grace: Segundos que tiene un worker para drenar antes del SIGKILL
+            ready_timeout: Segundos para que un worker nuevo esté escuchando
+            run_dir: Directorio de los sockets de control (default: temporal)
+        """
+        self.target = target
+        self.args = args
+        self.size = workers
+        self.grace = grace
+        self.ready_timeout = ready_timeout
+        self.run_dir = run_dir or tempfile.mkdtemp(prefix='prefork-')
+        self._own_run_dir = run_dir is None
+        os.makedirs(self.run_dir, exist_ok=True)
+        
+        # Sin fork: el padre puede tener threads o un loop de asyncio
+        self.ctx = mp.get_context('spawn')
+        self.workers: Dict[int, _Worker] = {}
+        self.failures: Dict[int, int] = {}
+        self.restarts = 0
+        
+        self._stopping = False
+        self._reload = False
+    
+    def _spawn(self, slot: int) -> _Worker:
+        ready = self.ctx.Event()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(self.target, self.args, slot, self.run_dir, ready),
+            name=f'Worker-{slot}'
+        )
+        process.start()
+        logger.info(f"🔧 Worker {slot} iniciado (PID {process.pid})")
+        return _Worker(slot, process, ready)
+    
+    def _wait_ready(self, worker: _Worker) -> bool:
+        """Esperar a que el worker escuche (False si muere o tarda demasiado)"""
+        deadline = time.time() + self.ready_timeout
+        
+        while time.time() < deadline and not self._stopping:
+            if worker.ready.wait(0.2):
+                return True
+            if not worker.process.is_alive():
+                return False
+        
+        return False
+    
+    def _cleanup(self, worker: _Worker):
+        """Borrar el socket de control de un worker que ya terminó y retirar sus contadores"""
+        try:
+            os.unlink(worker_socket(self.run_dir, worker.slot, worker.pid))
+        except OSError:
+            pass
+        
+        try:
+            retire_worker_metrics(self.run_dir, worker.slot, worker.pid)
+        except Exception as e:
+            logger.error(f"❌ Error retirando las métricas del worker {worker.slot}: {e}")
+    
+    def _stop_worker(self, worker: _Worker):
+        """SIGTERM, esperar grace segundos y SIGKILL si sigue vivo"""
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(self.grace)
+        
+        if worker.process.is_alive():
+            logger.warning(f"⚠️  Worker {worker.slot} (PID {worker.pid}) no terminó en {self.grace}s: SIGKILL")
+            worker.process.kill()
+            worker.process.join()
+        
+        self._cleanup(worker)
+    
+    def _replace(self, slot: int) -> bool:
+        """Arrancar el reemplazo de un slot y recién después detener al viejo"""
+        old = self.workers.get(slot)
+        new = self._spawn(slot)
+        
+        if not self._wait_ready(new):
+            logger.error(f"❌ El reemplazo del worker {slot} no arrancó: se conserva el anterior")
+            self._stop_worker(new)
+            return False
+        
+        self.workers[slot] = new
+        
+        if old is not None:
+            self._stop_worker(old)
+        
+        return True
+    
+    def rolling_restart(self):
+        """Reemplazar los workers de a uno (el puerto nunca queda sin atender)"""
+        logger.info("🔄 Reinicio escalonado de workers")
+        
+        for slot in sorted(self.workers):
+            if self._stopping:
+                return
+            if not self._replace(slot):
+                return
+            self.restarts += 1
+        
+        logger.info("✅ Reinicio escalonado completo")
+    
+    def _reap(self):
+        """Reemplazar los workers que murieron (con espera si fallan al arrancar)"""
+        for slot, worker in list(self.workers.items()):
+            if worker.process.is_alive():
+                continue
+            
+            worker.process.join()
+            self._cleanup(worker)
+            
+            if time.time() - worker.started_at < MIN_UPTIME:
+                self.failures[slot] = self.failures.get(slot, 0) + 1
+            else:
+                self.failures[slot] = 0
+            
+            delay = min(MAX_BACKOFF, 2 ** self.failures[slot] - 1)
+            logger.error(
+                f"💀 Worker {slot} (PID {worker.pid}) terminó con código {worker.process.exitcode}"
+                + (f"; reintento en {delay}s" if delay else "")
+            )
+            
+            if delay:
+                time.sleep(delay)
+            if not self._stopping:
+                self.workers[slot] = self._spawn(slot)
+    
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+    
+    def _on_reload(self, signum, frame):
+        self._reload = True
+    
+    def start(self) -> bool:
+        """Arrancar todos los workers (False si alguno no llegó a escuchar)"""
+        for slot in range(self.size):
+            self.workers[slot] = self._spawn(slot)
+        
+        return all(self._wait_ready(worker) for worker in self.workers.values())
+    
+    def run(self) -> int:
+        """
+        Arrancar los workers y supervisarlos hasta SIGTERM/SIGINT
+        
+        Returns:
+            Código de salida (1 si los workers no pudieron arrancar)
+        """
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        
+        if migrate_req_enabled() is False:
+            logger.warning(
+                "⚠️  net.ipv4.tcp_migrate_req=0: un reinicio puede cortar las conexiones "
+                "que esperan en la cola del worker que se detiene"
+            )
+        
+        try:
+            if not self.start():
+                logger.error("❌ No arrancaron todos los workers")
+                return 1
+            
+            logger.info(f"✅ {self.size} workers escuchando (PIDs {', '.join(str(w.pid) for w in self.workers.values())})")
+            
+            while not self._stopping:
+                wait([worker.process.sentinel for worker in self.workers.values()], timeout=0.5)
+                
+                if self._stopping:
+                    break
+                
+                self._reap()
+                
+                if self._reload:
+                    self._reload = False
+                    self.rolling_restart()
+            
+            return 0
+        
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """Detener todos los workers a la vez (cada uno drena sus requests)"""
+        self._stopping = True
+        workers = list(self.workers.values())
+        self.workers = {}
+        
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        
+        deadline = time.time() + self.grace
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.time()))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            self._cleanup(worker)
+        
+        if self._own_run_dir:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+        
+        if workers:
+            logger.info("🛑 Workers detenidos")
@@ -0,0 +1,452 @@
+"""
+Perfilado a pedido y registro de requests lentas
+
+- RequestProfile: datos de una request (tiempos por etapa, HTML, perfil de
+  cProfile y muestras de stack). Viaja en un contextvar para que las etapas
+  de /scrape lo completen sin pasarlo como argumento.
+- ProfiledTask: envuelve una process_*_task para correrla bajo cProfile en
+  el worker del Servidor B (params 'profile').
+- SlowRequestRecorder: si una request supera el umbral se muestrea el stack
+  de su asyncio.Task (o de su thread, fuera de un event loop) cada
+  sample_interval y al terminar se guardan el HTML, los tiempos y las
+  muestras en un directorio con a lo sumo max_entries entradas (se borran
+  las más viejas).
+
+Una entrada guardada se puede reproducir offline:
+
+    python -m common.profiling slow_requests/<entrada>.json
+"""
+import asyncio
+import contextvars
+import cProfile
+import hashlib
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Funciones por reporte de cProfile
+PROFILE_LIMIT = 30
+
+# Profundidad máxima de un stack muestreado
+MAX_STACK_DEPTH = 40
+
+_current_request: contextvars.ContextVar = contextvars.ContextVar('current_request', default=None)
+
+
+def profile_report(profiler: cProfile.Profile, limit: int = PROFILE_LIMIT) -> Dict:
+    """
+    Resumen serializable de un cProfile
+    
+    Returns:
+        dict con total_calls, total_ms y las funciones con más tiempo
+        acumulado (function, calls, tottime_ms, cumtime_ms)
+    """
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    
+    return {
+        'total_calls': sum(value[1] for value in stats.values()),
+        'total_ms': round(sum(value[2] for value in stats.values()) * 1000, 3),
+        'functions': [
+            {
+                'function': f"{func} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'tottime_ms': round(tottime * 1000, 3),
+                'cumtime_ms': round(cumtime * 1000, 3)
+            }
+            for (filename, line, func), (_, calls, tottime, cumtime, _) in rows[:limit]
+        ]
+    }
+
+
+class ProfiledTask:
+    """
+    Tarea del pool corrida bajo cProfile (se envía por pickle al worker)
+    
+    Devuelve {'result': resultado, 'profile': profile_report(...)}.
+    """
+    
+    def __init__(self, func):
+        self.func = func
+        # El pool y las métricas identifican la tarea por __name__
+        self.__name__ = func.__name__
+    
+    def __call__(self, *args):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        
+        try:
+            result = self.func(*args)
+        finally:
+            profiler.disable()
+        
+        return {'result': result, 'profile': profile_report(profiler)}
+
+
+class RequestProfile:
+    """Datos de una request para ?profile=1 y para el registro de lentas"""
+    
+    def __init__(self, url: Optional[str], profile: bool = False):
+        self.url = url
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+        self.html: Optional[bytes] = None
+        self.encoding: Optional[str] = None
+        self.trace_id: Optional[str] = None
+        self.processing_profile: Optional[Dict] = None
+        
+        # Stack colapsado ('archivo:función;...') -> cantidad de muestras
+        self.samples: Dict[str, int] = {}
+        self.thread_id: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        
+        self.profiler = cProfile.Profile() if profile else None
+    
+    def add_timing(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+    
+    def timings_ms(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 3) for stage, seconds in self.timings.items()}
+    
+    def report(self) -> Dict:
+        """Perfil de la request (para la respuesta de ?profile=1)"""
+        report = {
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 3),
+            'stages_ms': self.timings_ms()
+        }
+        
+        if self.profiler is not None:
+            self.profiler.disable()
+            report['cpu'] = profile_report(self.profiler)
+        
+        if self.processing_profile:
+            report['processing'] = self.processing_profile
+        
+        return report
+
+
+def current_request() -> Optional[RequestProfile]:
+    return _current_request.get()
+
+
+@contextmanager
+def track_request(record: RequestProfile):
+    """Dejar record como request actual (y perfilar si se pidió)"""
+    token = _current_request.set(record)
+    
+    if record.profiler is not None:
+        record.profiler.enable()
+    
+    try:
+        yield record
+    finally:
+        if record.profiler is not None:
+            record.profiler.disable()
+        
+        record.elapsed = time.perf_counter() - record.start
+        _current_request.reset(token)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse_stack(frame, max_depth: int = MAX_STACK_DEPTH, root=None) -> str:
+    """
+    Stack como 'archivo:función;...' de la raíz a la hoja (formato flamegraph)
+    
+    Args:
+        frame: Frame hoja
+        max_depth: Frames a conservar (los más cercanos a la hoja)
+        root: Frame donde cortar (inclusive); None = hasta el fondo del thread
+    """
+    names = []
+    
+    while frame is not None and len(names) < max_depth:
+        names.append(_frame_name(frame))
+        if frame is root:
+            break
+        frame = frame.f_back
+    
+    return ';'.join(reversed(names))
+
+
+def await_stack(coro, max_depth: int = MAX_STACK_DEPTH) -> str:
+    """Stack de un coroutine suspendido siguiendo cr_await hasta lo que espera"""
+    names = []
+    
+    while coro is not None and len(names) < max_depth:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        
+        names.append(_frame_name(frame))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    
+    return ';'.join(names)
+
+
+def task_stack(task: asyncio.Task, loop_frame) -> Optional[str]:
+    """
+    Stack de una asyncio.Task visto desde otro thread
+    
+    Si la tarea está corriendo, el stack del thread del event loop pasa por
+    el frame de su coroutine y se toma desde ahí. Si no, el loop está en
+    otra request (o en el selector) y se sigue la cadena de awaits de la
+    tarea para ver en qué está esperando.
+    
+    Args:
+        task: Tarea de la request
+        loop_frame: Frame actual del thread del event loop (o None)
+    
+    Returns:
+        Stack colapsado o None si la tarea ya terminó
+    """
+    coro = task.get_coro()
+    root = getattr(coro, 'cr_frame', None)
+    
+    if root is None:
+        return None
+    
+    frame = loop_frame
+    while frame is not None:
+        if frame is root:
+            return collapse_stack(loop_frame, root=root)
+        frame = frame.f_back
+    
+    return await_stack(coro)
+
+
+class SlowRequestRecorder:
+    """Guarda HTML, tiempos y muestras de stack de las requests lentas"""
+    
+    def __init__(
+        self,
+        directory: str,
+        threshold_ms: float = 2000,
+        max_entries: int = 50,
+        sample_interval: float = 0.05,
+        max_html_bytes: int = 10 * 1024 * 1024
+    ):
+        """
+        Args:
+            directory: Directorio del buffer circular de entradas
+            threshold_ms: Latencia a partir de la cual una request se guarda
+            max_entries: Entradas a conservar (se borran las más viejas)
+            sample_interval: Segundos entre muestras de stack
+            max_html_bytes: HTML más grande se guarda truncado
+        """
+        self.directory = directory
+        self.threshold = threshold_ms / 1000
+        self.max_entries = max_entries
+        self.sample_interval = sample_interval
+        self.max_html_bytes = max_html_bytes
+        
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._active: List[RequestProfile] = []
+        self._pending: List[RequestProfile] = []
+        self._wakeup = threading.Event()
+        
+        os.makedirs(directory, exist_ok=True)
+        
+        self._thread = threading.Thread(target=self._run, name='SlowRequestRecorder', daemon=True)
+        self._thread.start()
+    
+    @contextmanager
+    def watch(self, record: RequestProfile):
+        """Muestrear la request mientras dure y guardarla si fue lenta"""
+        record.thread_id = threading.get_ident()
+        
+        # En el event loop el thread es de todas las requests: se muestrea
+        # la tarea de esta
+        try:
+            record.task = asyncio.current_task()
+        except RuntimeError:
+            record.task = None
+        
+        with self._lock:
+            self._active.append(record)
+        self._wakeup.set()
+        
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - record.start
+            
+            with self._lock:
+                self._active.remove(record)
+                
+                # Se escribe en el thread del recorder, no en el event loop
+                if elapsed >= self.threshold:
+                    record.elapsed = elapsed
+                    self._pending.append(record)
+                    self._wakeup.set()
+    
+    def _run(self):
+        while True:
+            # Sin requests en curso no hay nada que muestrear: dormir
+            with self._lock:
+                idle = not self._active and not self._pending
+            
+            self._wakeup.wait(None if idle else self.sample_interval)
+            self._wakeup.clear()
+            
+            with self._lock:
+                active = list(self._active)
+                pending, self._pending = self._pending, []
+            
+            now = time.perf_counter()
+            slow = [record for record in active if now - record.start >= self.threshold]
+            
+            if slow:
+                frames = sys._current_frames()
+                
+                for record in slow:
+                    frame = frames.get(record.thread_id)
+                    
+                    if record.task is not None:
+                        key = task_stack(record.task, frame)
+                    else:
+                        key = collapse_stack(frame) if frame is not None else None
+                    
+                    if key:
+                        record.samples[key] = record.samples.get(key, 0) + 1
+            
+            for record in pending:
+                try:
+                    self.save(record)
+                except Exception as e:
+                    logger.error(f"❌ Error guardando request lenta: {e}")
+    
+    def save(self, record: RequestProfile) -> str:
+        """
+        Escribir la entrada (JSON + HTML) y recortar el buffer
+        
+        Returns:
+            Ruta del JSON de la entrada
+        """
+        digest = hashlib.sha1((record.url or '').encode('utf-8')).hexdigest()[:10]
+        name = f"{int(record.started_at * 1000)}-{digest}"
+        html_file = None
+        
+        if record.html is not None:
+            html_file = f"{name}.html"
+            with open(os.path.join(self.directory, html_file), 'wb') as f:
+                f.write(record.html[:self.max_html_bytes])
+        
+        entry = {
+            'url': record.url,
+            'started_at': record.started_at,
+            'elapsed_ms': round((record.elapsed or 0) * 1000, 3),
+            'threshold_ms': round(self.threshold * 1000, 3),
+            'stages_ms': record.timings_ms(),
+            'trace_id': record.trace_id,
+            'html_file': html_file,
+            'html_encoding': record.encoding,
+            'html_bytes': len(record.html) if record.html is not None else None,
+            'stack_samples': dict(sorted(record.samples.items(), key=lambda item: item[1], reverse=True))
+        }
+        
+        path = os.path.join(self.directory, f"{name}.json")
+        with open(path, 'wb') as f:
+            f.write(json_codec.dumps(entry))
+        
+        self.recorded += 1
+        logger.warning(f"🐢 Request lenta guardada: {record.url} ({entry['elapsed_ms']:.0f} ms) → {path}")
+        
+        self._trim()
+        return path
+    
+    def _trim(self):
+        entries = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+        
+        for name in entries[:max(0, len(entries) - self.max_entries)]:
+            for suffix in ('.json', '.html'):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-len('.json')] + suffix))
+                except FileNotFoundError:
+                    pass
+    
+    def entries(self) -> List[Dict]:
+        """Resumen de las entradas guardadas (más nuevas primero)"""
+        result = []
+        
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not name.endswith('.json'):
+                continue
+            
+            try:
+                with open(os.path.join(self.directory, name), 'rb') as f:
+                    entry = json_codec.loads(f.read())
+            except (OSError, ValueError):
+                continue
+            
+            result.append({
+                'entry': name,
+                'url': entry.get('url'),
+                'elapsed_ms': entry.get('elapsed_ms'),
+                'started_at': entry.get('started_at'),
+                'trace_id': entry.get('trace_id')
+            })
+        
+        return result
+
+
+def replay(entry_path: str) -> Dict:
+    """
+    Volver a parsear el HTML de una entrada bajo cProfile
+    
+    Returns:
+        dict con la duración original por etapa y el perfil del parseo
+    """
+    from scraper.html_parser import HtmlParser
+    
+    with open(entry_path, 'rb') as f:
+        entry = json_codec.loads(f.read())
+    
+    if not entry.get('html_file'):
+        raise ValueError("La entrada no tiene HTML guardado")
+    
+    with open(os.path.join(os.path.dirname(entry_path), entry['html_file']), 'rb') as f:
+        html = f.read()
+    
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    HtmlParser().parse(html, entry['url'], entry.get('html_encoding'))
+    profiler.disable()
+    
+    return {
+        'url': entry['url'],
+        'original_stages_ms': entry.get('stages_ms'),
+        'parse_ms': round((time.perf_counter() - start) * 1000, 3),
+        'profile': profile_report(profiler)
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Uso: python -m common.profiling <entrada.json>")
+        sys.exit(1)
+    
+    result = replay(sys.argv[1])
+    
+    print(f"🔁 {result['url']}")
+    print(f"   Etapas originales (ms): {result['original_stages_ms']}")
+    print(f"   Parseo ahora: {result['parse_ms']:.1f} ms\n")
+    
+    for row in result['profile']['functions']:
+        print(f"{row['cumtime_ms']:>10.1f} ms {row['tottime_ms']:>10.1f} ms {row['calls']:>8}  {row['function']}")
@@ -1,13 +1,14 @@
 """
 Protocolo de comunicación unificado entre servidores
 """
-import json
 import struct
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import asyncio
 import logging
 
+from . import json_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,6 +17,8 @@ class MessageType(Enum):
     REQUEST = 'request'
     RESPONSE = 'response'
     ERROR = 'error'
+    STATUS = 'status'   # Reporte de carga (health checks del balanceador)
+    CANCEL = 'cancel'   # Cancelar las tareas de una request (cliente desconectado)
 
 
 class TaskType(Enum):
@@ -33,11 +36,24 @@ class Protocol:
     Protocolo de comunicación basado en JSON con prefijo de longitud
     
     Formato del mensaje:
-    [4 bytes: longitud][JSON data]
+    [4 bytes: longitud][JSON data][adjuntos binarios]
+    
+    Los adjuntos (ej: el HTML crudo) viajan como bytes después del JSON; el
+    JSON declara su nombre y tamaño en 'attachments'. Al decodificar,
+    'attachments' pasa a ser un dict nombre -> bytes.
     """
     
     @staticmethod
-    def create_request(task_type: TaskType, url: str, params: dict = None) -> dict:
+    def create_request(
+        task_type: TaskType,
+        url: str,
+        params: dict = None,
+        request_id: str = None,
+        deadline: float = None,
+        traceparent: str = None,
+        tenant: str = None,
+        weight: float = None
+    ) -> dict:
         """
         Crear un mensaje de request
         
@@ -45,16 +61,40 @@ class Protocol:
             task_type: Tipo de tarea (TaskType enum)
             url: URL a procesar
             params: Parámetros adicionales (opcional)
+            request_id: Identificador para poder cancelarla con CANCEL (opcional)
+            deadline: Epoch (segundos) a partir del cual el resultado ya no
+                      sirve: el Servidor B deja de procesarla (opcional)
+            traceparent: Contexto de traza W3C del span que envía (opcional)
+            tenant: Tenant que hizo la request (opcional)
+            weight: Peso del tenant en el reparto de workers del Servidor B
+                    (opcional, default 1)
         
         Returns:
             dict con el mensaje de request
         """
-        return {
+        message = {
             'type': MessageType.REQUEST.value,
             'task_type': task_type.value if isinstance(task_type, TaskType) else task_type,
             'url': url,
             'params': params or {}
         }
+        
+        if request_id is not None:
+            message['request_id'] = request_id
+        
+        if deadline is not None:
+            message['deadline'] = deadline
+        
+        if traceparent is not None:
+            message['traceparent'] = traceparent
+        
+        if tenant is not None:
+            message['tenant'] = tenant
+        
+        if weight is not None:
+            message['weight'] = weight
+        
+        return message
     
     @staticmethod
     def create_response(task_type: str, result: Dict[str, Any]) -> dict:
@@ -75,13 +115,15 @@ class Protocol:
         }
     
     @staticmethod
-    def create_error(message: str, task_type: str = None) -> dict:
+    def create_error(message: str, task_type: str = None, retryable: bool = False) -> dict:
         """
         Crear un mensaje de error
         
         Args:
             message: Mensaje de error
             task_type: Tipo de tarea que causó el error (opcional)
+            retryable: El nodo no procesó la tarea (ej: se está deteniendo)
+                       y se puede mandar a otro
         
         Returns:
             dict con el mensaje de error
@@ -94,26 +136,108 @@ class Protocol:
         if task_type:
             error_msg['task_type'] = task_type
         
+        if retryable:
+            error_msg['retryable'] = True
+        
         return error_msg
     
     @staticmethod
-    def encode_message(message: dict) -> bytes:
+    def create_status(load: Dict[str, Any] = None) -> dict:
+        """
+        Crear un mensaje de status
+        
+        Sin 'load' es el pedido de status; la respuesta del Servidor B
+        incluye su reporte de carga.
+        
+        Args:
+            load: Reporte de carga (tareas activas, tamaño del pool, etc.)
+        
+        Returns:
+            dict con el mensaje de status
+        """
+        message = {'type': MessageType.STATUS.value}
+        
+        if load is not None:
+            message['load'] = load
+        
+        return message
+    
+    @staticmethod
+    def create_cancel(request_id: str, cancelled: int = None) -> dict:
+        """
+        Crear un mensaje de cancelación
+        
+        El Servidor B descarta las tareas en cola de la request y termina
+        las que están corriendo; su respuesta indica cuántas canceló.
+        
+        Args:
+            request_id: Request a cancelar
+            cancelled: Tareas canceladas (solo en la respuesta)
+        
+        Returns:
+            dict con el mensaje de cancelación
+        """
+        message = {'type': MessageType.CANCEL.value, 'request_id': request_id}
+        
+        if cancelled is not None:
+            message['cancelled'] = cancelled
+        
+        return message
+    
+    @staticmethod
+    def encode_message(message: dict, attachments: Dict[str, bytes] = None) -> bytes:
         """
         Codificar mensaje a bytes con prefijo de longitud
         
         Args:
             message: Diccionario con el mensaje
+            attachments: Datos binarios a enviar sin pasar por JSON (opcional)
         
         Returns:
-            bytes con [longitud de 4 bytes][JSON]
+            bytes con [longitud de 4 bytes][JSON][adjuntos]
         """
-        json_data = json.dumps(message, ensure_ascii=False)
-        json_bytes = json_data.encode('utf-8')
+        blobs = []
+        
+        if attachments:
+            message = dict(message)
+            message['attachments'] = [
+                {'name': name, 'size': len(data)} for name, data in attachments.items()
+            ]
+            blobs = list(attachments.values())
+        
+        json_bytes = json_codec.dumps(message)
         
         # Crear prefijo de longitud (4 bytes, big-endian)
         length_prefix = struct.pack('>I', len(json_bytes))
         
-        return length_prefix + json_bytes
+        return b''.join([length_prefix, json_bytes] + blobs)
+    
+    @staticmethod
+    def _attachment_specs(message: dict) -> List[Tuple[str, int]]:
+        """(nombre, tamaño) de los adjuntos declarados en el mensaje"""
+        specs = message.get('attachments') if isinstance(message, dict) else None
+        
+        if not isinstance(specs, list):
+            return []
+        
+        return [(spec['name'], int(spec['size'])) for spec in specs]
+    
+    @staticmethod
+    def _recv_exactly(sock, size: int) -> bytes:
+        """Leer exactamente size bytes del socket (b'' si se cierra antes)"""
+        chunks = []
+        bytes_received = 0
+        
+        while bytes_received < size:
+            chunk = sock.recv(min(size - bytes_received, 65536))
+            
+            if not chunk:
+                return b''
+            
+            chunks.append(chunk)
+            bytes_received += len(chunk)
+        
+        return b''.join(chunks)
     
     @staticmethod
     def decode_message(sock) -> dict:
@@ -136,22 +260,16 @@ class Protocol:
             # Decodificar longitud
             message_length = struct.unpack('>I', length_data)[0]
             
-            # Leer el mensaje completo
-            chunks = []
-            bytes_received = 0
+            # Leer el mensaje completo y decodificar JSON (directo de bytes)
+            message = json_codec.loads(Protocol._recv_exactly(sock, message_length))
             
-            while bytes_received < message_length:
-                chunk = sock.recv(min(message_length - bytes_received, 8192))
-                
-                if not chunk:
-                    break
-                
-                chunks.append(chunk)
-                bytes_received += len(chunk)
+            specs = Protocol._attachment_specs(message)
+            if specs:
+                message['attachments'] = {
+                    name: Protocol._recv_exactly(sock, size) for name, size in specs
+                }
             
-            # Combinar chunks y decodificar JSON
-            json_data = b''.join(chunks).decode('utf-8')
-            return json.loads(json_data)
+            return message
         
         except Exception as e:
             logger.error(f"Error decodificando mensaje: {e}")
@@ -181,9 +299,18 @@ class Protocol:
             # Leer el mensaje completo
             json_bytes = await reader.readexactly(message_length)
             
-            # Decodificar JSON
-            json_data = json_bytes.decode('utf-8')
-            return json.loads(json_data)
+            # Decodificar JSON (directo de bytes)
+            message = json_codec.loads(json_bytes)
+            
+            # Adjuntos binarios a continuación del JSON
+            specs = Protocol._attachment_specs(message)
+            if specs:
+                attachments = {}
+                for name, size in specs:
+                    attachments[name] = await reader.readexactly(size)
+                message['attachments'] = attachments
+            
+            return message
         
         except asyncio.IncompleteReadError:
             logger.warning("Conexión cerrada antes de recibir mensaje completo")
@@ -222,6 +349,10 @@ class Protocol:
             
             if 'url' not in message:
                 raise ValueError("Request message must have 'url'")
+            
+            weight = message.get('weight')
+            if weight is not None and (not isinstance(weight, (int, float)) or weight <= 0):
+                raise ValueError("Request 'weight' must be a positive number")
         
         elif msg_type == MessageType.RESPONSE.value:
             if 'result' not in message:
@@ -231,4 +362,8 @@ class Protocol:
             if 'error' not in message:
                 raise ValueError("Error message must have 'error'")
         
+        elif msg_type == MessageType.CANCEL.value:
+            if not message.get('request_id'):
+                raise ValueError("Cancel message must have 'request_id'")
+        
         return True
\ No newline at end of file
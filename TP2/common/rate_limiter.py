@@ -61,6 +61,24 @@ class RateLimiter:
         """Genera la clave de Redis para el dominio"""
         return f"rate_limit:{domain}"
     
+    def _get_delay_key(self, domain: str) -> str:
+        """Clave con el intervalo mínimo entre requests (Crawl-delay)"""
+        return f"rate_limit:delay:{domain}"
+    
+    def set_crawl_delay(self, url: str, delay: float, ttl: int = 86400):
+        """
+        Fija un intervalo mínimo entre requests al dominio (ej: Crawl-delay
+        de robots.txt), además del límite por ventana
+        
+        Args:
+            url: URL del dominio
+            delay: Segundos entre requests
+            ttl: Vigencia del override en segundos
+        """
+        domain = self._get_domain(url)
+        self.redis_client.setex(self._get_delay_key(domain), ttl, delay)
+        logger.info(f"🐢 Crawl-delay de {domain}: {delay}s")
+    
     def check_rate_limit(self, url: str) -> Tuple[bool, dict]:
         """
         Verifica si la URL puede ser procesada según el rate limit
@@ -85,13 +103,22 @@ class RateLimiter:
         # 2. Contar requests en la ventana actual
         pipe.zcard(key)
         
+        # 3. Último request y Crawl-delay del dominio (si hay)
+        pipe.zrange(key, -1, -1, withscores=True)
+        pipe.get(self._get_delay_key(domain))
+        
         # Ejecutar pipeline hasta aquí
         results = pipe.execute()
         request_count = results[1]  # Resultado del ZCARD
+        last_request = results[2][0][1] if results[2] else None
+        crawl_delay = float(results[3]) if results[3] else None
         
         # ✅ VERIFICAR LÍMITE ANTES DE AGREGAR
         allowed = request_count < self.max_requests
         
+        if allowed and crawl_delay and last_request is not None:
+            allowed = now - last_request >= crawl_delay
+        
         # ✅ SOLO AGREGAR SI ESTÁ PERMITIDO
         if allowed:
             pipe = self.redis_client.pipeline()
@@ -101,6 +128,7 @@ class RateLimiter:
         
         info = {
             'domain': domain,
+            'crawl_delay': crawl_delay,
             'requests_in_window': request_count,
             'max_requests': self.max_requests,
             'window_seconds': self.window_seconds,
@@ -115,12 +143,35 @@ class RateLimiter:
             )
         else:
             logger.debug(
-                f"✅ Rate limit OK para {domain}: "
-                f"{request_count + 1}/{self.max_requests} requests"
+                "✅ Rate limit OK para %s: %d/%d requests",
+                domain, request_count + 1, self.max_requests
             )
         
         return allowed, info
     
+    def retry_after(self, url: str) -> float:
+        """
+        Segundos hasta que se libere un lugar en la ventana del dominio
+        
+        Args:
+            url: URL a verificar
+        
+        Returns:
+            0 si ya hay lugar
+        """
+        stats = self.get_stats(url)
+        now = time.time()
+        wait = 0.0
+        
+        if not stats['allowed'] and stats['oldest_request'] is not None:
+            wait = stats['oldest_request'] + self.window_seconds - now
+        
+        delay = self.redis_client.get(self._get_delay_key(self._get_domain(url)))
+        if delay and stats['newest_request'] is not None:
+            wait = max(wait, stats['newest_request'] + float(delay) - now)
+        
+        return max(0.0, wait)
+    
     def reset_domain(self, url: str) -> bool:
         """
         Resetea el rate limit para un dominio (útil para testing)
@@ -0,0 +1,91 @@
+"""
+Event loop y logging del proceso (modo performance)
+
+- uvloop (opcional): loop en Cython, más rápido en I/O de red. Sin uvloop
+  instalado se usa el loop estándar de asyncio.
+- Logging asíncrono: los handlers reales (stderr, archivo) pasan a un
+  thread aparte detrás de una cola; en el event loop solo queda armar el
+  LogRecord y encolarlo. Incluye el access log de aiohttp.
+- Nivel de log: con WARNING las líneas por request (INFO) no se formatean;
+  por eso los logs del camino caliente usan argumentos perezosos
+  (logger.info("... %s", url)) en lugar de f-strings.
+"""
+import asyncio
+import logging
+import logging.handlers
+import queue
+from typing import Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    uvloop = None
+    UVLOOP_AVAILABLE = False
+
+
+def loop_name(use_uvloop: bool) -> str:
+    """'uvloop' o 'asyncio' (el que va a usar run())"""
+    return 'uvloop' if use_uvloop and UVLOOP_AVAILABLE else 'asyncio'
+
+
+def run(main: Awaitable, use_uvloop: bool = False):
+    """
+    asyncio.run() con uvloop si se pide y está instalado
+    
+    Args:
+        main: Corrutina principal
+        use_uvloop: Preferir uvloop
+    """
+    if use_uvloop and not UVLOOP_AVAILABLE:
+        logger.warning("⚠️  uvloop no está instalado (pip install uvloop): se usa el loop de asyncio")
+    
+    if use_uvloop and UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
+    return asyncio.run(main)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola el LogRecord tal cual: a diferencia de QueueHandler, el mensaje
+    se arma (msg % args) en el thread del listener y no en el event loop.
+    Los args se leen más tarde, así que no hay que loguear objetos que se
+    modifiquen después (en este proyecto son strings y números).
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_async_logging(level: int = logging.INFO) -> Optional[logging.handlers.QueueListener]:
+    """
+    Mover los handlers del logger raíz a un thread (QueueHandler/QueueListener)
+    
+    Args:
+        level: Nivel del logger raíz
+    
+    Returns:
+        QueueListener ya iniciado (stop() vacía la cola), o None si el raíz
+        no tenía handlers
+    """
+    root = logging.getLogger()
+    root.setLevel(level)
+    
+    handlers = [
+        handler for handler in root.handlers if not isinstance(handler, logging.handlers.QueueHandler)
+    ]
+    if not handlers:
+        return None
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    
+    listener.start()
+    return listener
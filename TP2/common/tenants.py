@@ -0,0 +1,351 @@
+"""
+Tenants (API keys) con cuotas de requests y de concurrencia en Redis
+
+Cada tenant tiene una o más API keys, un peso para el reparto del Servidor
+B (weighted fair queuing, ver processor/worker_pool.py), un máximo de
+requests en curso y un máximo de requests por minuto. La configuración y
+los contadores viven en Redis: todos los workers del Servidor A (y todas
+sus instancias) comparten las mismas cuotas.
+
+Claves:
+- tenants:config          hash nombre -> JSON con la configuración
+- tenants:keys            hash sha256(API key) -> nombre (la key no se guarda)
+- tenants:rate:<nombre>   sorted set de requests de la ventana (score = timestamp)
+- tenants:inflight:<nombre> sorted set de requests en curso (score = vencimiento
+                          del lease, por si el proceso que la tomó se cae)
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+CONFIG_KEY = 'tenants:config'
+API_KEYS_KEY = 'tenants:keys'
+
+# Header con la API key
+API_KEY_HEADER = 'X-API-Key'
+
+# Tenant de la request en curso (lo fija el middleware del Servidor A)
+_current_tenant: contextvars.ContextVar = contextvars.ContextVar('current_tenant', default=None)
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+def current_tenant() -> Optional['Tenant']:
+    return _current_tenant.get()
+
+
+@contextmanager
+def track_tenant(tenant: 'Tenant'):
+    """Dejar tenant como el de la request actual"""
+    token = _current_tenant.set(tenant)
+    
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+
+class Tenant:
+    """Configuración de un tenant (0 = sin límite)"""
+    
+    def __init__(
+        self,
+        name: str,
+        weight: float = 1.0,
+        max_concurrent: int = 0,
+        requests_per_minute: int = 0
+    ):
+        if weight <= 0:
+            raise ValueError(f"El peso del tenant {name} debe ser positivo")
+        
+        self.name = name
+        self.weight = float(weight)
+        self.max_concurrent = int(max_concurrent)
+        self.requests_per_minute = int(requests_per_minute)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'weight': self.weight,
+            'max_concurrent': self.max_concurrent,
+            'requests_per_minute': self.requests_per_minute
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Tenant':
+        return cls(
+            data['name'],
+            weight=data.get('weight', 1.0),
+            max_concurrent=data.get('max_concurrent', 0),
+            requests_per_minute=data.get('requests_per_minute', 0)
+        )
+
+
+def load_tenants_file(path: str) -> List[Tuple[Tenant, List[str]]]:
+    """
+    Leer tenants de un JSON:
+        
+        {"tenants": {"equipo-a": {"api_keys": ["..."], "weight": 2,
+                                  "max_concurrent": 20, "requests_per_minute": 600}}}
+    
+    Returns:
+        Lista de (Tenant, API keys)
+    
+    Raises:
+        ValueError: Si el archivo tiene un formato inválido
+    """
+    with open(path) as f:
+        data = json.load(f)
+    
+    tenants = []
+    for name, config in data.get('tenants', {}).items():
+        api_keys = config.get('api_keys') or []
+        if not api_keys:
+            raise ValueError(f"El tenant {name} no tiene api_keys")
+        tenants.append((Tenant.from_dict(dict(config, name=name)), list(api_keys)))
+    
+    return tenants
+
+
+class TenantQuotas:
+    """
+    Identificación de tenants y cuotas por tenant usando Redis
+    
+    Cuotas: Sliding Window para requests por minuto (como RateLimiter) y un
+    sorted set de leases para la concurrencia. Para que dos procesos no se
+    pasen del límite al mismo tiempo, primero se agrega y después se cuenta:
+    si quedó por encima del límite, se saca (en el peor caso se rechaza de
+    más, nunca se admite de más).
+    """
+    
+    def __init__(
+        self,
+        redis_host: str = 'localhost',
+        redis_port: int = 6379,
+        window_seconds: int = 60,
+        lease_seconds: float = 600,
+        config_ttl: float = 30
+    ):
+        """
+        Args:
+            redis_host: Host de Redis
+            redis_port: Puerto de Redis
+            window_seconds: Ventana de requests_per_minute en segundos
+            lease_seconds: Vencimiento de una request en curso que nunca se
+                           liberó (el proceso que la tomó se cayó)
+            config_ttl: Segundos que se recuerda la configuración de una API
+                        key en memoria (los cambios en Redis tardan esto)
+        """
+        self.redis_client = redis.Redis(
+            host=redis_host,
+            port=redis_port,
+            decode_responses=True,
+            socket_connect_timeout=5
+        )
+        
+        self.window_seconds = window_seconds
+        self.lease_seconds = lease_seconds
+        self.config_ttl = config_ttl
+        
+        # sha256(API key) -> (Tenant, momento de la lectura)
+        self._known: Dict[str, Tuple[Optional[Tenant], float]] = {}
+        
+        # Verificar conexión
+        try:
+            self.redis_client.ping()
+            logger.info(f"✅ Cuotas de tenants en Redis ({redis_host}:{redis_port})")
+        except redis.ConnectionError:
+            logger.error(f"❌ No se pudo conectar a Redis ({redis_host}:{redis_port})")
+            raise
+    
+    @staticmethod
+    def _rate_key(name: str) -> str:
+        return f"tenants:rate:{name}"
+    
+    @staticmethod
+    def _inflight_key(name: str) -> str:
+        return f"tenants:inflight:{name}"
+    
+    # ------------------------------------------------------------------
+    # Configuración
+    # ------------------------------------------------------------------
+    
+    def save_tenant(self, tenant: Tenant, api_keys: List[str] = ()):
+        """Guardar (o actualizar) un tenant y sus API keys en Redis"""
+        pipe = self.redis_client.pipeline()
+        pipe.hset(CONFIG_KEY, tenant.name, json.dumps(tenant.to_dict()))
+        for api_key in api_keys:
+            pipe.hset(API_KEYS_KEY, hash_api_key(api_key), tenant.name)
+        pipe.execute()
+        
+        self._known.clear()
+    
+    def load_file(self, path: str) -> int:
+        """
+        Cargar en Redis los tenants de un JSON (ver load_tenants_file)
+        
+        Returns:
+            Cantidad de tenants
+        """
+        tenants = load_tenants_file(path)
+        for tenant, api_keys in tenants:
+            self.save_tenant(tenant, api_keys)
+        
+        logger.info(f"👥 {len(tenants)} tenants cargados desde {path}")
+        return len(tenants)
+    
+    def get_tenant(self, name: str) -> Optional[Tenant]:
+        data = self.redis_client.hget(CONFIG_KEY, name)
+        return Tenant.from_dict(json.loads(data)) if data else None
+    
+    def tenants(self) -> List[Tenant]:
+        return [
+            Tenant.from_dict(json.loads(data))
+            for _, data in sorted(self.redis_client.hgetall(CONFIG_KEY).items())
+        ]
+    
+    def identify(self, api_key: Optional[str]) -> Optional[Tenant]:
+        """
+        Tenant de una API key
+        
+        Returns:
+            Tenant o None si la key no existe
+        """
+        if not api_key:
+            return None
+        
+        key_hash = hash_api_key(api_key)
+        known = self._known.get(key_hash)
+        now = time.monotonic()
+        
+        if known is not None and now - known[1] < self.config_ttl:
+            return known[0]
+        
+        name = self.redis_client.hget(API_KEYS_KEY, key_hash)
+        tenant = self.get_tenant(name) if name else None
+        
+        # Las keys inválidas no se recuerdan (no crece con keys inventadas)
+        if tenant is not None:
+            self._known[key_hash] = (tenant, now)
+        return tenant
+    
+    # ------------------------------------------------------------------
+    # Cuotas
+    # ------------------------------------------------------------------
+    
+    def acquire(self, tenant: Tenant) -> Tuple[Optional[str], dict]:
+        """
+        Tomar un lugar para una request del tenant
+        
+        Args:
+            tenant: Tenant de la request
+        
+        Returns:
+            Tuple de (lease: str o None si se rechaza, info: dict). info trae
+            'reason' ('rate' o 'concurrency') y 'retry_after' al rechazar
+        """
+        now = time.time()
+        lease = uuid.uuid4().hex
+        rate_key = self._rate_key(tenant.name)
+        inflight_key = self._inflight_key(tenant.name)
+        
+        pipe = self.redis_client.pipeline()
+        pipe.zremrangebyscore(rate_key, 0, now - self.window_seconds)
+        pipe.zremrangebyscore(inflight_key, 0, now)
+        pipe.zadd(rate_key, {lease: now})
+        pipe.zadd(inflight_key, {lease: now + self.lease_seconds})
+        pipe.zcard(rate_key)
+        pipe.zcard(inflight_key)
+        pipe.zrange(rate_key, 0, 0, withscores=True)
+        pipe.expire(rate_key, self.window_seconds)
+        pipe.expire(inflight_key, math.ceil(self.lease_seconds))
+        results = pipe.execute()
+        
+        requests_in_window, in_flight, oldest = results[4], results[5], results[6]
+        
+        reason = None
+        retry_after = 0.0
+        
+        if tenant.requests_per_minute and requests_in_window > tenant.requests_per_minute:
+            reason = 'rate'
+            retry_after = max(0.0, oldest[0][1] + self.window_seconds - now) if oldest else self.window_seconds
+        elif tenant.max_concurrent and in_flight > tenant.max_concurrent:
+            reason = 'concurrency'
+            retry_after = 1.0
+        
+        if reason is not None:
+            # Los contadores incluyen a la request rechazada
+            requests_in_window -= 1
+            in_flight -= 1
+        
+        info = {
+            'tenant': tenant.name,
+            'allowed': reason is None,
+            'reason': reason,
+            'retry_after': round(retry_after, 1),
+            'requests_in_window': requests_in_window,
+            'requests_per_minute': tenant.requests_per_minute,
+            'in_flight': in_flight,
+            'max_concurrent': tenant.max_concurrent
+        }
+        
+        if reason is not None:
+            # Deshacer: la request rechazada no cuenta en ninguna de las dos
+            pipe = self.redis_client.pipeline()
+            pipe.zrem(rate_key, lease)
+            pipe.zrem(inflight_key, lease)
+            pipe.execute()
+            
+            if reason == 'rate':
+                usage = f"{requests_in_window}/{tenant.requests_per_minute} requests en {self.window_seconds}s"
+            else:
+                usage = f"{in_flight}/{tenant.max_concurrent} requests en curso"
+            logger.warning(f"⚠️  Cuota de {tenant.name} excedida: {usage}")
+            return None, info
+        
+        return lease, info
+    
+    def release(self, tenant: Tenant, lease: str):
+        """Liberar el lugar de concurrencia de una request terminada"""
+        try:
+            self.redis_client.zrem(self._inflight_key(tenant.name), lease)
+        except redis.RedisError as e:
+            # El lease vence solo (lease_seconds)
+            logger.warning(f"⚠️  No se pudo liberar el lease de {tenant.name}: {e}")
+    
+    def usage(self, tenant: Tenant) -> dict:
+        """Requests en la ventana y en curso del tenant"""
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        pipe.zremrangebyscore(self._rate_key(tenant.name), 0, now - self.window_seconds)
+        pipe.zremrangebyscore(self._inflight_key(tenant.name), 0, now)
+        pipe.zcard(self._rate_key(tenant.name))
+        pipe.zcard(self._inflight_key(tenant.name))
+        results = pipe.execute()
+        
+        return dict(
+            tenant.to_dict(),
+            requests_in_window=results[2],
+            in_flight=results[3],
+            window_seconds=self.window_seconds
+        )
+    
+    def reset(self, tenant: Tenant):
+        """Borrar los contadores del tenant (útil para testing)"""
+        self.redis_client.delete(self._rate_key(tenant.name), self._inflight_key(tenant.name))
+    
+    def close(self):
+        """Cierra la conexión a Redis"""
+        self.redis_client.close()
@@ -0,0 +1,426 @@
+"""
+Trazas distribuidas entre el Servidor A, el protocolo y los workers del pool
+
+El contexto viaja en formato W3C traceparent
+('00-<trace_id>-<span_id>-<flags>'): en el header HTTP entrante, en el
+campo 'traceparent' del mensaje REQUEST y, dentro del Servidor B, en los
+argumentos de cada tarea del pool. La decisión de muestreo se toma en la
+raíz de la traza y se hereda (el flag 'sampled' del traceparent), así una
+traza queda completa o no se registra.
+
+Los spans terminados se encolan y un thread los exporta por lotes a un
+archivo JSON lines (--trace-file) o a un collector OTLP/HTTP en JSON
+(--otlp-endpoint, ej: http://localhost:4318/v1/traces), sin dependencias
+extra. Sin exportador los spans no se registran, pero el contexto se sigue
+propagando.
+"""
+import contextvars
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Kinds de OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# Span actual de la tarea asyncio / thread
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class SpanContext:
+    """Identidad de un span (lo que se propaga entre procesos)"""
+    
+    __slots__ = ('trace_id', 'span_id', 'sampled')
+    
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+    
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+    
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional['SpanContext']:
+        """Parsear un traceparent (None si falta o es inválido)"""
+        if not value or not isinstance(value, str):
+            return None
+        
+        parts = value.strip().split('-')
+        
+        if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        
+        try:
+            flags = int(parts[3][:2], 16)
+            int(parts[1], 16)
+            int(parts[2], 16)
+        except ValueError:
+            return None
+        
+        if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+            return None
+        
+        return cls(parts[1], parts[2], bool(flags & 1))
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    """Operación con inicio, fin, atributos y status"""
+    
+    def __init__(
+        self,
+        tracer: 'Tracer',
+        name: str,
+        context: SpanContext,
+        parent_span_id: Optional[str],
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Dict = None,
+        start_time: float = None
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_time = start_time if start_time is not None else time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    @property
+    def recording(self) -> bool:
+        return self.context.sampled and self.tracer.exporter is not None
+    
+    @property
+    def traceparent(self) -> str:
+        return self.context.to_traceparent()
+    
+    def set_attribute(self, key: str, value):
+        if self.recording:
+            self.attributes[key] = value
+    
+    def set_error(self, message: str):
+        self.error = message
+    
+    def end(self, end_time: float = None):
+        if self.end_time is not None:
+            return
+        
+        self.end_time = end_time if end_time is not None else time.time()
+        
+        if self.recording:
+            self.tracer._enqueue(self)
+    
+    def to_dict(self) -> Dict:
+        """Formato del archivo de trazas (un span por línea)"""
+        return {
+            'trace_id': self.context.trace_id,
+            'span_id': self.context.span_id,
+            'parent_span_id': self.parent_span_id,
+            'name': self.name,
+            'service': self.tracer.service_name,
+            'kind': self.kind,
+            'start_time': self.start_time,
+            'duration_ms': round((self.end_time - self.start_time) * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+# ----------------------------------------------------------------------
+# Exportadores
+# ----------------------------------------------------------------------
+
+class FileSpanExporter:
+    """Spans en JSON lines (un archivo por proceso o compartido: se escribe con append)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def export(self, spans: List[Span]):
+        data = b''.join(json_codec.dumps(span.to_dict()) + b'\n' for span in spans)
+        
+        with open(self.path, 'ab') as f:
+            f.write(data)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OTLPHttpExporter:
+    """Collector OTLP/HTTP con encoding JSON (POST a .../v1/traces)"""
+    
+    def __init__(self, endpoint: str, timeout: float = 5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+    
+    @staticmethod
+    def encode(spans: List[Span]) -> bytes:
+        by_service: Dict[str, List[Dict]] = {}
+        
+        for span in spans:
+            otlp_span = {
+                'traceId': span.context.trace_id,
+                'spanId': span.context.span_id,
+                'name': span.name,
+                'kind': span.kind,
+                'startTimeUnixNano': str(int(span.start_time * 1e9)),
+                'endTimeUnixNano': str(int(span.end_time * 1e9)),
+                'attributes': [
+                    {'key': key, 'value': _otlp_value(value)} for key, value in span.attributes.items()
+                ],
+                'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+            }
+            
+            if span.parent_span_id:
+                otlp_span['parentSpanId'] = span.parent_span_id
+            
+            by_service.setdefault(span.tracer.service_name, []).append(otlp_span)
+        
+        return json_codec.dumps({
+            'resourceSpans': [
+                {
+                    'resource': {
+                        'attributes': [{'key': 'service.name', 'value': {'stringValue': service}}]
+                    },
+                    'scopeSpans': [{'scope': {'name': 'tp2.tracing'}, 'spans': service_spans}]
+                }
+                for service, service_spans in by_service.items()
+            ]
+        })
+    
+    def export(self, spans: List[Span]):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=self.encode(spans),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+# ----------------------------------------------------------------------
+# Tracer
+# ----------------------------------------------------------------------
+
+class Tracer:
+    """Crea spans, decide el muestreo y exporta en segundo plano"""
+    
+    def __init__(
+        self,
+        service_name: str,
+        exporter=None,
+        sample_rate: float = 1.0,
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 2.0
+    ):
+        """
+        Args:
+            service_name: Nombre del servicio en los spans
+            exporter: FileSpanExporter / OTLPHttpExporter (None = no registrar)
+            sample_rate: Fracción de trazas nuevas que se registran (0 a 1)
+            max_queue: Spans en espera antes de empezar a descartar
+            batch_size: Spans por exportación
+            flush_interval: Segundos máximos entre exportaciones
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate debe estar entre 0 y 1")
+        
+        self.service_name = service_name
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self.dropped = 0
+        self.exported = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        
+        if exporter is not None:
+            self._thread = threading.Thread(target=self._export_loop, name='TraceExporter', daemon=True)
+            self._thread.start()
+    
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
+    
+    def _sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+    
+    def start_span(
+        self,
+        name: str,
+        parent=None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Dict = None,
+        start_time: float = None
+    ) -> Span:
+        """
+        Crear un span (hay que llamar a end())
+        
+        Args:
+            name: Nombre de la operación
+            parent: Span, SpanContext o traceparent (str); None = span
+                    actual del contexto o, si no hay, una traza nueva
+            kind: SPAN_KIND_*
+            attributes: Atributos iniciales
+            start_time: Epoch de inicio (default: ahora)
+        """
+        if parent is None:
+            parent = _current_span.get()
+        
+        if isinstance(parent, Span):
+            parent = parent.context
+        elif isinstance(parent, str):
+            parent = SpanContext.from_traceparent(parent)
+        
+        if parent is None:
+            context = SpanContext(_new_id(16), _new_id(8), self._sample())
+            parent_span_id = None
+        else:
+            context = SpanContext(parent.trace_id, _new_id(8), parent.sampled)
+            parent_span_id = parent.span_id
+        
+        return Span(self, name, context, parent_span_id, kind, attributes, start_time)
+    
+    @contextmanager
+    def span(self, name: str, parent=None, kind: int = SPAN_KIND_INTERNAL, attributes: Dict = None):
+        """
+        Span como context manager: queda como span actual dentro del bloque
+        (también a través de await) y registra la excepción si la hay
+        """
+        span = self.start_span(name, parent, kind, attributes)
+        token = _current_span.set(span)
+        
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(str(e) or type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+    
+    def record(
+        self,
+        name: str,
+        parent,
+        start_time: float,
+        end_time: float,
+        attributes: Dict = None,
+        error: str = None
+    ):
+        """Registrar un span ya medido (ej: espera en cola de un worker)"""
+        span = self.start_span(name, parent, attributes=attributes, start_time=start_time)
+        
+        if error:
+            span.set_error(error)
+        
+        span.end(end_time)
+        return span
+    
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+    
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+    
+    def _enqueue(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+    
+    def _export_loop(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                
+                if timeout <= 0:
+                    break
+                
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                
+                if item is None:
+                    stop = True
+                    break
+                
+                batch.append(item)
+            
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    logger.warning(f"⚠️  No se pudieron exportar {len(batch)} spans: {e}")
+            
+            if stop:
+                return
+    
+    def shutdown(self, timeout: float = 5):
+        """Exportar lo pendiente y detener el thread"""
+        if self._thread is None:
+            return
+        
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        
+        self._thread.join(timeout)
+        self._thread = None
+
+
+def build_tracer(
+    service_name: str,
+    trace_file: str = None,
+    otlp_endpoint: str = None,
+    sample_rate: float = 1.0
+) -> Tracer:
+    """Tracer según las opciones de línea de comandos (sin ninguna: no registra)"""
+    exporter = None
+    
+    if otlp_endpoint:
+        exporter = OTLPHttpExporter(otlp_endpoint)
+        logger.info(f"🧵 Trazas → OTLP {otlp_endpoint} (muestreo {sample_rate:.0%})")
+    elif trace_file:
+        exporter = FileSpanExporter(trace_file)
+        logger.info(f"🧵 Trazas → {trace_file} (muestreo {sample_rate:.0%})")
+    
+    return Tracer(service_name, exporter, sample_rate)
@@ -1,9 +1,28 @@
-from .screenshot import ScreenshotGenerator
-from .performance import PerformanceAnalyzer
-from .image_processor import ImageProcessor
+"""
+Procesadores del Servidor B
+
+Los módulos se importan recién al usarlos: importar el paquete (o
+processor.worker_pool, processor.render_profiles) no carga Selenium ni PIL.
+"""
+import importlib
+
+_LAZY = {
+    'ScreenshotGenerator': 'processor.screenshot',
+    'PerformanceAnalyzer': 'processor.performance',
+    'ImageProcessor': 'processor.image_processor'
+}
 
 __all__ = [
     'ScreenshotGenerator',
     'PerformanceAnalyzer',
     'ImageProcessor'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
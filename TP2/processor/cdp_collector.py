@@ -0,0 +1,444 @@
+"""
+Colector de métricas de rendimiento vía Chrome DevTools Protocol (CDP)
+
+Reemplaza el polling de window.performance.timing (deprecado) por los eventos
+que Chrome ya registra en el log de performance de ChromeDriver:
+- Network.*  → waterfall por request y tamaños por tipo de recurso
+- Page.*     → DOMContentLoaded / load
+- Tracing.*  → long tasks del main thread (TBT)
+Todo sale de una única navegación.
+"""
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Perfiles de throttling para corridas reproducibles
+# (latencia en ms, throughput en bytes/s, multiplicador de CPU)
+THROTTLING_PRESETS = {
+    'none': None,
+    'slow-3g': {
+        'latency': 400,
+        'download_throughput': 400 * 1024 // 8,
+        'upload_throughput': 400 * 1024 // 8,
+        'cpu_rate': 4
+    },
+    'fast-3g': {
+        'latency': 150,
+        'download_throughput': 1600 * 1024 // 8,
+        'upload_throughput': 750 * 1024 // 8,
+        'cpu_rate': 4
+    },
+    '4g': {
+        'latency': 20,
+        'download_throughput': 4 * 1024 * 1024 // 8,
+        'upload_throughput': 3 * 1024 * 1024 // 8,
+        'cpu_rate': 2
+    },
+    'desktop': {
+        'latency': 40,
+        'download_throughput': 10 * 1024 * 1024 // 8,
+        'upload_throughput': 10 * 1024 * 1024 // 8,
+        'cpu_rate': 1
+    }
+}
+
+# Categorías de tracing que ChromeDriver vuelca en el log de performance
+TRACE_CATEGORIES = 'devtools.timeline,blink.user_timing,loading'
+
+# Umbral de long task (ms) usado para Total Blocking Time
+LONG_TASK_MS = 50
+
+# Observers inyectados antes de que cargue la página (buffered)
+WEB_VITALS_SCRIPT = """
+(function() {
+    window.__perfVitals = {lcp: 0, cls: 0, fcp: 0, longTasks: []};
+    try {
+        new PerformanceObserver(function(list) {
+            list.getEntries().forEach(function(e) {
+                window.__perfVitals.lcp = e.renderTime || e.loadTime || e.startTime;
+            });
+        }).observe({type: 'largest-contentful-paint', buffered: true});
+        new PerformanceObserver(function(list) {
+            list.getEntries().forEach(function(e) {
+                if (!e.hadRecentInput) { window.__perfVitals.cls += e.value; }
+            });
+        }).observe({type: 'layout-shift', buffered: true});
+        new PerformanceObserver(function(list) {
+            list.getEntries().forEach(function(e) {
+                window.__perfVitals.longTasks.push([e.startTime, e.duration]);
+            });
+        }).observe({type: 'longtask', buffered: true});
+        new PerformanceObserver(function(list) {
+            list.getEntries().forEach(function(e) {
+                if (e.name === 'first-contentful-paint') { window.__perfVitals.fcp = e.startTime; }
+            });
+        }).observe({type: 'paint', buffered: true});
+    } catch (err) {}
+})();
+"""
+
+# Una sola llamada a execute_script al final de la carga
+PAGE_SNAPSHOT_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+return {
+    vitals: window.__perfVitals || null,
+    navigation: nav ? nav.toJSON() : null,
+    title: document.title,
+    url: window.location.href,
+    dom_nodes: document.getElementsByTagName('*').length
+};
+"""
+
+
+def configure_chrome_options(chrome_options):
+    """
+    Habilitar el log de performance (Network, Page y Tracing) en ChromeDriver
+    
+    Args:
+        chrome_options: Options de Selenium a modificar
+    """
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    chrome_options.add_experimental_option('perfLoggingPrefs', {
+        'enableNetwork': True,
+        'enablePage': True,
+        'traceCategories': TRACE_CATEGORIES
+    })
+
+
+def parse_log_entries(entries: List[Dict]) -> List[Dict]:
+    """
+    Convertir las entradas de driver.get_log('performance') en eventos CDP
+    
+    Args:
+        entries: Entradas crudas ({'message': '<json>', ...})
+    
+    Returns:
+        Lista de eventos {'method': ..., 'params': ...}
+    """
+    events = []
+    
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+        
+        if 'method' in message:
+            events.append(message)
+    
+    return events
+
+
+def build_waterfall(events: List[Dict]) -> Dict:
+    """
+    Construir el waterfall de requests a partir de eventos Network.*
+    
+    Args:
+        events: Eventos CDP parseados
+    
+    Returns:
+        dict con 'requests' (ordenados por inicio), 'navigation_start'
+        (timestamp monotónico del documento principal) y 'document'
+        (request del documento principal)
+    """
+    requests = {}
+    order = []
+    
+    for event in events:
+        method = event['method']
+        params = event.get('params', {})
+        request_id = params.get('requestId')
+        
+        if method == 'Network.requestWillBeSent':
+            # Redirects reutilizan el requestId: se conserva el inicio original
+            entry = requests.get(request_id)
+            if entry is None:
+                entry = {
+                    'url': params['request']['url'],
+                    'type': params.get('type', 'Other'),
+                    'start': params['timestamp'],
+                    'status': None,
+                    'mime_type': None,
+                    'protocol': None,
+                    'from_cache': False,
+                    'encoded_bytes': 0,
+                    'end': None,
+                    'timing': None,
+                    'failed': None
+                }
+                requests[request_id] = entry
+                order.append(request_id)
+            else:
+                entry['url'] = params['request']['url']
+        
+        elif request_id not in requests:
+            continue
+        
+        elif method == 'Network.responseReceived':
+            response = params.get('response', {})
+            entry = requests[request_id]
+            entry['type'] = params.get('type', entry['type'])
+            entry['status'] = response.get('status')
+            entry['mime_type'] = response.get('mimeType')
+            entry['protocol'] = response.get('protocol')
+            entry['from_cache'] = bool(response.get('fromDiskCache') or response.get('fromServiceWorker'))
+            entry['timing'] = response.get('timing')
+        
+        elif method == 'Network.loadingFinished':
+            entry = requests[request_id]
+            entry['end'] = params.get('timestamp')
+            entry['encoded_bytes'] = params.get('encodedDataLength', 0)
+        
+        elif method == 'Network.loadingFailed':
+            entry = requests[request_id]
+            entry['end'] = params.get('timestamp')
+            entry['failed'] = params.get('blockedReason') or params.get('errorText') or 'failed'
+    
+    if not order:
+        return {'requests': [], 'navigation_start': None, 'document': None}
+    
+    document_id = next(
+        (rid for rid in order if requests[rid]['type'] == 'Document'),
+        order[0]
+    )
+    navigation_start = requests[document_id]['start']
+    
+    waterfall = []
+    
+    for rid in order:
+        entry = requests[rid]
+        start_ms = (entry['start'] - navigation_start) * 1000
+        duration_ms = (entry['end'] - entry['start']) * 1000 if entry['end'] else None
+        
+        ttfb_ms = None
+        timing = entry['timing']
+        if timing and timing.get('receiveHeadersEnd', -1) >= 0:
+            ttfb_ms = timing['receiveHeadersEnd'] - max(timing.get('sendStart', 0), 0)
+        
+        waterfall.append({
+            'url': entry['url'],
+            'type': entry['type'],
+            'status': entry['status'],
+            'mime_type': entry['mime_type'],
+            'protocol': entry['protocol'],
+            'from_cache': entry['from_cache'],
+            'start_ms': round(start_ms, 2),
+            'duration_ms': round(duration_ms, 2) if duration_ms is not None else None,
+            'ttfb_ms': round(ttfb_ms, 2) if ttfb_ms is not None else None,
+            'size_bytes': int(entry['encoded_bytes']),
+            'failed': entry['failed']
+        })
+    
+    waterfall.sort(key=lambda r: r['start_ms'])
+    
+    document = dict(requests[document_id])
+    
+    return {
+        'requests': waterfall,
+        'navigation_start': navigation_start,
+        'document': document
+    }
+
+
+def summarize_resources(waterfall: List[Dict]) -> Dict:
+    """
+    Agrupar requests por tipo de recurso (cantidad y bytes transferidos)
+    
+    Args:
+        waterfall: Requests del waterfall
+    
+    Returns:
+        dict con totales, 'by_type' (cantidad) y 'size_by_type' (bytes)
+    """
+    by_type = {}
+    size_by_type = {}
+    total_size = 0
+    failed = 0
+    
+    for request in waterfall:
+        resource_type = request['type'].lower()
+        by_type[resource_type] = by_type.get(resource_type, 0) + 1
+        size_by_type[resource_type] = size_by_type.get(resource_type, 0) + request['size_bytes']
+        total_size += request['size_bytes']
+        if request['failed']:
+            failed += 1
+    
+    return {
+        'total': len(waterfall),
+        'by_type': by_type,
+        'size_by_type': size_by_type,
+        'total_size': total_size,
+        'failed': failed
+    }
+
+
+def page_lifecycle(events: List[Dict], navigation_start: Optional[float]) -> Dict:
+    """
+    Tiempos de DOMContentLoaded y load relativos al inicio de la navegación
+    
+    Returns:
+        dict con 'dom_content_loaded_ms' y 'load_ms' (None si no ocurrieron)
+    """
+    result = {'dom_content_loaded_ms': None, 'load_ms': None}
+    
+    if navigation_start is None:
+        return result
+    
+    for event in events:
+        method = event['method']
+        timestamp = event.get('params', {}).get('timestamp')
+        
+        if timestamp is None:
+            continue
+        
+        if method == 'Page.domContentEventFired' and result['dom_content_loaded_ms'] is None:
+            result['dom_content_loaded_ms'] = round((timestamp - navigation_start) * 1000, 2)
+        elif method == 'Page.loadEventFired' and result['load_ms'] is None:
+            result['load_ms'] = round((timestamp - navigation_start) * 1000, 2)
+    
+    return result
+
+
+def trace_long_tasks(events: List[Dict]) -> List[float]:
+    """
+    Duraciones (ms) de las tareas largas del main thread según el tracing
+    
+    Se usa como respaldo cuando el observer de 'longtask' no está disponible.
+    """
+    durations = []
+    
+    for event in events:
+        if event['method'] != 'Tracing.dataCollected':
+            continue
+        
+        trace = event.get('params', {})
+        if trace.get('name') in ('RunTask', 'ThreadControllerImpl::RunTask') and trace.get('ph') == 'X':
+            duration_ms = trace.get('dur', 0) / 1000
+            if duration_ms > LONG_TASK_MS:
+                durations.append(duration_ms)
+    
+    return durations
+
+
+def total_blocking_time(long_task_durations: List[float]) -> float:
+    """Total Blocking Time: suma del exceso sobre 50 ms de cada long task"""
+    return round(sum(max(0.0, d - LONG_TASK_MS) for d in long_task_durations), 2)
+
+
+class CDPPerformanceCollector:
+    """
+    Colector de métricas de una navegación usando CDP
+    
+    Uso:
+        collector = CDPPerformanceCollector(throttling='fast-3g')
+        collector.prepare(driver)      # antes de driver.get()
+        driver.get(url)
+        metrics = collector.collect(driver)
+    """
+    
+    def __init__(self, throttling: Optional[str] = None, max_waterfall_entries: int = 200):
+        """
+        Args:
+            throttling: Nombre de un preset de THROTTLING_PRESETS (None = sin throttling)
+            max_waterfall_entries: Máximo de requests incluidos en el waterfall
+        """
+        if throttling and throttling not in THROTTLING_PRESETS:
+            raise ValueError(f"Preset de throttling desconocido: {throttling}")
+        
+        self.throttling = throttling
+        self.max_waterfall_entries = max_waterfall_entries
+    
+    def prepare(self, driver):
+        """
+        Habilitar dominios CDP, inyectar observers y aplicar throttling
+        
+        Args:
+            driver: WebDriver de Chrome (antes de navegar)
+        """
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Performance.enable', {})
+        driver.execute_cdp_cmd(
+            'Page.addScriptToEvaluateOnNewDocument',
+            {'source': WEB_VITALS_SCRIPT}
+        )
+        
+        preset = THROTTLING_PRESETS.get(self.throttling) if self.throttling else None
+        
+        if preset:
+            driver.execute_cdp_cmd('Network.emulateNetworkConditions', {
+                'offline': False,
+                'latency': preset['latency'],
+                'downloadThroughput': preset['download_throughput'],
+                'uploadThroughput': preset['upload_throughput']
+            })
+            driver.execute_cdp_cmd('Emulation.setCPUThrottlingRate', {'rate': preset['cpu_rate']})
+            logger.info(f"🐢 Throttling aplicado: {self.throttling}")
+        
+        # Descartar eventos previos a la navegación
+        driver.get_log('performance')
+    
+    def collect(self, driver) -> Dict:
+        """
+        Recolectar todas las métricas de la navegación ya realizada
+        
+        Args:
+            driver: WebDriver de Chrome (después de driver.get)
+        
+        Returns:
+            dict con waterfall, recursos, lifecycle, web vitals, navegación y
+            métricas de Performance.getMetrics
+        """
+        events = parse_log_entries(driver.get_log('performance'))
+        
+        network = build_waterfall(events)
+        lifecycle = page_lifecycle(events, network['navigation_start'])
+        resources = summarize_resources(network['requests'])
+        
+        cdp_metrics = {}
+        try:
+            raw_metrics = driver.execute_cdp_cmd('Performance.getMetrics', {})
+            cdp_metrics = {m['name']: m['value'] for m in raw_metrics.get('metrics', [])}
+        except Exception as e:
+            logger.debug(f"Performance.getMetrics no disponible: {e}")
+        
+        snapshot = driver.execute_script(PAGE_SNAPSHOT_SCRIPT) or {}
+        vitals = snapshot.get('vitals') or {}
+        
+        long_tasks = [duration for _, duration in vitals.get('longTasks', [])]
+        if not long_tasks:
+            long_tasks = trace_long_tasks(events)
+        
+        web_vitals = {
+            'fcp_ms': round(vitals['fcp'], 2) if vitals.get('fcp') else None,
+            'lcp_ms': round(vitals['lcp'], 2) if vitals.get('lcp') else None,
+            'cls': round(vitals.get('cls', 0), 4),
+            'tbt_ms': total_blocking_time(long_tasks),
+            'long_tasks': len(long_tasks)
+        }
+        
+        return {
+            'events': len(events),
+            'waterfall': network['requests'][:self.max_waterfall_entries],
+            'document': network['document'],
+            'resources': resources,
+            'lifecycle': lifecycle,
+            'web_vitals': web_vitals,
+            'navigation': snapshot.get('navigation') or {},
+            'page': {
+                'title': snapshot.get('title', ''),
+                'url': snapshot.get('url', ''),
+                'dom_nodes': snapshot.get('dom_nodes', 0)
+            },
+            'cdp_metrics': {
+                key: cdp_metrics[key]
+                for key in (
+                    'JSHeapUsedSize', 'Nodes', 'LayoutCount', 'RecalcStyleCount',
+                    'ScriptDuration', 'TaskDuration', 'LayoutDuration'
+                )
+                if key in cdp_metrics
+            },
+            'throttling': self.throttling or 'none'
+        }
@@ -0,0 +1,405 @@
+"""
+Sondeo de imágenes: lee solo headers y los primeros bytes antes de descargar
+
+Permite decidir qué imágenes vale la pena descargar completas:
+- Content-Length / Content-Range para conocer el tamaño real
+- Content-Type para descartar recursos que no son imágenes
+- Dimensiones leídas del header binario (PNG, GIF, JPEG, WebP, BMP)
+- ETag para detectar imágenes que ya fueron procesadas
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import struct
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Bytes a pedir en el sondeo (alcanza para el header de casi todos los formatos)
+DEFAULT_PROBE_BYTES = 16 * 1024
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+|\*)')
+
+# Marcadores JPEG "Start Of Frame" que contienen las dimensiones
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+}
+
+
+def sniff_image_size(data: bytes) -> Optional[Tuple[str, int, int]]:
+    """
+    Detecta formato y dimensiones leyendo solo el header de la imagen
+    
+    Args:
+        data: Primeros bytes del archivo
+    
+    Returns:
+        Tupla (formato, ancho, alto) o None si no se pudo determinar
+    """
+    if len(data) < 10:
+        return None
+    
+    # PNG: firma + chunk IHDR
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return 'PNG', width, height
+    
+    # GIF: logical screen descriptor
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'GIF', width, height
+    
+    # WebP: contenedor RIFF con chunk VP8 / VP8L / VP8X
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and data[23:26] == b'\x9d\x01\x2a':
+            width, height = struct.unpack('<HH', data[26:30])
+            return 'WEBP', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and data[20] == 0x2F:
+            bits = int.from_bytes(data[21:25], 'little')
+            return 'WEBP', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            width = int.from_bytes(data[24:27], 'little') + 1
+            height = int.from_bytes(data[27:30], 'little') + 1
+            return 'WEBP', width, height
+        return None
+    
+    # BMP: BITMAPINFOHEADER
+    if data[:2] == b'BM' and len(data) >= 26:
+        width, height = struct.unpack('<ii', data[18:26])
+        return 'BMP', width, abs(height)
+    
+    # JPEG: recorrer segmentos hasta encontrar un SOF
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 9 < len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            # Marcadores sin longitud (padding, RSTn, SOI)
+            if marker == 0xFF or 0xD0 <= marker <= 0xD8 or marker == 0x01:
+                offset += 1 if marker == 0xFF else 2
+                continue
+            segment_length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if marker in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return 'JPEG', width, height
+            offset += 2 + segment_length
+        return None
+    
+    return None
+
+
+class ImageRegistry:
+    """
+    Registro de imágenes ya procesadas (clave: URL + ETag)
+    
+    Mantiene un LRU en memoria por proceso y, opcionalmente, un set
+    compartido en Redis para que todos los workers vean lo mismo.
+    """
+    
+    def __init__(
+        self,
+        redis_host: Optional[str] = None,
+        redis_port: int = 6379,
+        ttl: int = 7 * 24 * 3600,
+        max_local_entries: int = 10000,
+        key_prefix: str = 'scraper'
+    ):
+        """
+        Args:
+            redis_host: Host de Redis (None = solo memoria local)
+            redis_port: Puerto de Redis
+            ttl: Tiempo que se recuerda una imagen procesada (segundos)
+            max_local_entries: Tamaño máximo del LRU local
+            key_prefix: Prefijo para las keys en Redis
+        """
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self.key_prefix = key_prefix
+        self._local = OrderedDict()
+        self.redis_client = None
+        
+        if redis_host:
+            try:
+                import redis
+                self.redis_client = redis.Redis(
+                    host=redis_host,
+                    port=redis_port,
+                    decode_responses=True,
+                    socket_connect_timeout=5
+                )
+                self.redis_client.ping()
+            except Exception as e:
+                logger.warning(f"⚠️  Registro de imágenes sin Redis ({e}), usando solo memoria")
+                self.redis_client = None
+    
+    def _key(self, url: str, etag: str) -> str:
+        digest = hashlib.md5(f"{url}|{etag}".encode()).hexdigest()
+        return f"{self.key_prefix}:images:seen:{digest}"
+    
+    def is_seen(self, url: str, etag: Optional[str]) -> bool:
+        """Indica si la imagen (misma URL y mismo ETag) ya fue procesada"""
+        if not etag:
+            return False
+        
+        key = self._key(url, etag)
+        
+        if key in self._local:
+            self._local.move_to_end(key)
+            return True
+        
+        if self.redis_client is not None:
+            try:
+                if self.redis_client.exists(key):
+                    self._remember_local(key)
+                    return True
+            except Exception as e:
+                logger.debug(f"Error consultando registro de imágenes: {e}")
+        
+        return False
+    
+    def mark_seen(self, url: str, etag: Optional[str]):
+        """Registra una imagen como procesada"""
+        if not etag:
+            return
+        
+        key = self._key(url, etag)
+        self._remember_local(key)
+        
+        if self.redis_client is not None:
+            try:
+                self.redis_client.setex(key, self.ttl, 1)
+            except Exception as e:
+                logger.debug(f"Error escribiendo registro de imágenes: {e}")
+    
+    def _remember_local(self, key: str):
+        self._local[key] = True
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+
+class ImageProbe:
+    """Sondeo de imágenes con requests de rango (Range: bytes=0-N)"""
+    
+    def __init__(self, probe_bytes: int = DEFAULT_PROBE_BYTES, timeout: int = 10):
+        """
+        Args:
+            probe_bytes: Cantidad de bytes iniciales a leer
+            timeout: Timeout por sondeo en segundos
+        """
+        self.probe_bytes = probe_bytes
+        self.timeout = timeout
+    
+    async def probe(self, url: str, session: aiohttp.ClientSession) -> Dict:
+        """
+        Sondear una imagen leyendo headers y los primeros bytes
+        
+        Args:
+            url: URL de la imagen
+            session: Sesión de aiohttp
+        
+        Returns:
+            Diccionario con status, tamaño, tipo, ETag y dimensiones detectadas.
+            Si la imagen entera entró en el rango, incluye 'body' con los bytes.
+        """
+        result = {
+            'url': url,
+            'status': 0,
+            'content_length': None,
+            'content_type': None,
+            'etag': None,
+            'format': None,
+            'width': None,
+            'height': None,
+            'body': None
+        }
+        
+        headers = {'Range': f'bytes=0-{self.probe_bytes - 1}'}
+        
+        try:
+            async with session.get(url, headers=headers, timeout=self.timeout) as response:
+                result['status'] = response.status
+                result['content_type'] = response.headers.get('Content-Type', '').split(';')[0].strip() or None
+                result['etag'] = response.headers.get('ETag')
+                
+                if response.status not in (200, 206):
+                    return result
+                
+                total = self._total_length(response)
+                result['content_length'] = total
+                
+                # Leer como máximo probe_bytes aunque el servidor ignore el Range
+                head = b''
+                while len(head) < self.probe_bytes:
+                    chunk = await response.content.read(self.probe_bytes - len(head))
+                    if not chunk:
+                        break
+                    head += chunk
+                
+                # Respuesta 200 sin Content-Length que terminó dentro del rango
+                if total is None and response.status == 200 and response.content.at_eof():
+                    total = len(head)
+                    result['content_length'] = total
+                
+                if total is not None and len(head) >= total:
+                    result['body'] = head[:total]
+                
+                sniffed = sniff_image_size(head)
+                if sniffed:
+                    result['format'], result['width'], result['height'] = sniffed
+        
+        except Exception as e:
+            logger.debug(f"Error sondeando {url}: {e}")
+            result['error'] = str(e)
+        
+        return result
+    
+    @staticmethod
+    def _total_length(response: aiohttp.ClientResponse) -> Optional[int]:
+        """Obtiene el tamaño total del recurso desde Content-Range o Content-Length"""
+        content_range = response.headers.get('Content-Range')
+        if content_range:
+            match = _CONTENT_RANGE_RE.match(content_range)
+            if match and match.group(1) != '*':
+                return int(match.group(1))
+        
+        if response.status == 200:
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit():
+                return int(length)
+        
+        return None
+
+
+def image_priority(candidate: Dict, probe: Dict, fold_index: int = 5) -> float:
+    """
+    Calcula la prioridad de una imagen para generar thumbnails
+    
+    Favorece imágenes "above the fold" (primeras en el documento y no lazy)
+    y de mayor área (según el header sniffeado o los atributos width/height).
+    
+    Args:
+        candidate: Datos de la imagen extraídos del HTML
+        probe: Resultado del sondeo
+        fold_index: Posiciones consideradas visibles sin scroll
+    
+    Returns:
+        Prioridad (mayor = más importante)
+    """
+    width = probe.get('width') or candidate.get('width') or 0
+    height = probe.get('height') or candidate.get('height') or 0
+    area = width * height
+    
+    # Área normalizada contra un viewport de 1920x1080
+    score = min(area / (1920 * 1080), 1.0) * 50
+    
+    position = candidate.get('position')
+    if position is not None and position < fold_index and candidate.get('loading') != 'lazy':
+        score += 50 - position * 5
+    
+    # Iconos / pixeles de tracking al final
+    if 0 < width <= 32 and 0 < height <= 32:
+        score -= 100
+    
+    return score
+
+
+def normalize_candidates(images: List) -> List[Dict]:
+    """
+    Normaliza la lista de imágenes recibida (URLs o dicts del HtmlParser)
+    
+    Args:
+        images: Lista de URLs o de dicts con 'url' y hints opcionales
+    
+    Returns:
+        Lista de dicts con al menos 'url' y 'position', sin duplicados
+    """
+    candidates = []
+    seen_urls = set()
+    
+    for index, item in enumerate(images):
+        if isinstance(item, str):
+            item = {'url': item}
+        elif not isinstance(item, dict) or not item.get('url'):
+            continue
+        
+        if item['url'] in seen_urls:
+            continue
+        seen_urls.add(item['url'])
+        
+        candidate = dict(item)
+        candidate.setdefault('position', index)
+        candidates.append(candidate)
+    
+    return candidates
+
+
+async def probe_images(
+    images: List,
+    session: aiohttp.ClientSession,
+    prober: ImageProbe,
+    max_concurrent: int = 5
+) -> List[Tuple[Dict, Dict]]:
+    """
+    Sondear una lista de imágenes en paralelo (con límite de concurrencia)
+    
+    Returns:
+        Lista de tuplas (candidato, resultado del sondeo)
+    """
+    candidates = normalize_candidates(images)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def probe_with_limit(candidate):
+        async with semaphore:
+            return await prober.probe(candidate['url'], session)
+    
+    probes = await asyncio.gather(*(probe_with_limit(c) for c in candidates))
+    return list(zip(candidates, probes))
+
+
+# Instancia global por proceso (se inicializa en cada worker del pool)
+image_registry = None
+
+
+def init_image_registry(
+    redis_host: Optional[str] = None,
+    redis_port: int = 6379
+) -> ImageRegistry:
+    """
+    Inicializa el registro global de imágenes procesadas
+    
+    Args:
+        redis_host: Host de Redis (None = solo memoria local)
+        redis_port: Puerto de Redis
+    
+    Returns:
+        Instancia de ImageRegistry
+    """
+    global image_registry
+    
+    image_registry = ImageRegistry(redis_host=redis_host, redis_port=redis_port)
+    
+    return image_registry
+
+
+def get_image_registry() -> ImageRegistry:
+    """
+    Obtiene el registro global (lo crea en memoria si no fue inicializado)
+    
+    Returns:
+        Instancia de ImageRegistry
+    """
+    global image_registry
+    
+    if image_registry is None:
+        image_registry = ImageRegistry()
+    
+    return image_registry
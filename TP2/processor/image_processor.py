@@ -3,27 +3,31 @@ import io
 import base64
 import asyncio
 import aiohttp
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 from PIL import Image
 from urllib.parse import urljoin
 
+from .image_probe import ImageProbe, ImageRegistry, image_priority, probe_images
+
 logger = logging.getLogger(__name__)
 
 
 class ImageProcessor:
     """Procesador de imágenes web"""
     
-    def __init__(self, max_concurrent: int = 5, timeout: int = 10):
+    def __init__(self, max_concurrent: int = 5, timeout: int = 10, probe_bytes: int = 16 * 1024):
         """
         Inicializar el procesador
         
         Args:
             max_concurrent: Máximo de descargas concurrentes
             timeout: Timeout para descargar imágenes
+            probe_bytes: Bytes iniciales leídos al sondear cada imagen
         """
         self.max_concurrent = max_concurrent
         self.timeout = timeout
+        self.prober = ImageProbe(probe_bytes=probe_bytes, timeout=timeout)
     
     async def download_image(self, url: str, session: aiohttp.ClientSession) -> bytes:
         """
@@ -47,13 +51,29 @@ class ImageProcessor:
             logger.error(f"❌ Error descargando {url}: {e}")
             return b''
     
-    async def process_images(self, image_urls: List[str], create_thumbnails: bool = True) -> Dict:
+    async def process_images(
+        self,
+        image_urls: List,
+        create_thumbnails: bool = True,
+        max_images: int = 10,
+        max_bytes: Optional[int] = None,
+        registry: Optional[ImageRegistry] = None
+    ) -> Dict:
         """
         Procesar múltiples imágenes
         
+        Antes de descargar se sondea cada imagen (headers + primeros bytes):
+        se descartan las que superan max_bytes, las que no son imágenes y las
+        que ya fueron procesadas (misma URL + ETag). Las restantes se ordenan
+        por prioridad (above the fold / mayor área) y se descargan las
+        primeras max_images.
+        
         Args:
-            image_urls: Lista de URLs de imágenes
+            image_urls: Lista de URLs (o dicts del HtmlParser con hints)
             create_thumbnails: Si crear thumbnails
+            max_images: Máximo de imágenes a descargar y procesar
+            max_bytes: Tamaño máximo por imagen (None = sin límite)
+            registry: Registro de imágenes procesadas (None = sin dedupe)
             
         Returns:
             Diccionario con imágenes procesadas
@@ -61,40 +81,112 @@ class ImageProcessor:
         logger.info(f"🖼️  Procesando {len(image_urls)} imágenes")
         
         timeout = aiohttp.ClientTimeout(total=self.timeout)
+        skipped = []
         
         async with aiohttp.ClientSession(timeout=timeout) as session:
-            # Descargar imágenes en paralelo (limitado)
+            # Sondear todas las imágenes (solo headers + primeros bytes)
+            probed = await probe_images(
+                image_urls, session, self.prober, self.max_concurrent
+            )
+            
+            selected = []
+            
+            for candidate, probe in probed:
+                reason = self._skip_reason(probe, max_bytes, registry)
+                
+                if reason:
+                    skipped.append({
+                        'url': candidate['url'],
+                        'reason': reason,
+                        'size_bytes': probe.get('content_length')
+                    })
+                    continue
+                
+                selected.append((image_priority(candidate, probe), candidate, probe))
+            
+            # Prioridad: above the fold y mayor área primero
+            selected.sort(key=lambda item: item[0], reverse=True)
+            
+            for _, candidate, _ in selected[max_images:]:
+                skipped.append({'url': candidate['url'], 'reason': 'low_priority'})
+            
+            selected = selected[:max_images]
+            
+            # Descargar en paralelo (limitado) solo lo que no vino en el sondeo
             semaphore = asyncio.Semaphore(self.max_concurrent)
             
-            async def download_with_limit(url):
+            async def download_with_limit(probe):
+                if probe.get('body'):
+                    return probe['body']
                 async with semaphore:
-                    return await self.download_image(url, session)
+                    return await self.download_image(probe['url'], session)
             
-            tasks = [download_with_limit(url) for url in image_urls]
+            tasks = [download_with_limit(probe) for _, _, probe in selected]
             images_data = await asyncio.gather(*tasks)
         
         # Procesar cada imagen
         processed_images = []
         
-        for url, img_data in zip(image_urls, images_data):
+        for (_, candidate, probe), img_data in zip(selected, images_data):
+            url = candidate['url']
+            
             if not img_data:
                 continue
             
             try:
                 result = self._process_single_image(url, img_data, create_thumbnails)
                 processed_images.append(result)
+                
+                if registry is not None:
+                    registry.mark_seen(url, probe.get('etag'))
             except Exception as e:
                 logger.error(f"❌ Error procesando {url}: {e}")
         
-        logger.info(f"✅ Procesadas {len(processed_images)} imágenes")
+        bytes_downloaded = sum(len(data) for data in images_data if data)
+        
+        logger.info(
+            f"✅ Procesadas {len(processed_images)} imágenes "
+            f"({len(skipped)} omitidas, {bytes_downloaded} bytes descargados)"
+        )
         
         return {
             'total_requested': len(image_urls),
             'total_processed': len(processed_images),
+            'total_skipped': len(skipped),
+            'bytes_downloaded': bytes_downloaded,
             'images': processed_images,
+            'skipped': skipped,
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
     
+    def _skip_reason(
+        self,
+        probe: Dict,
+        max_bytes: Optional[int],
+        registry: Optional[ImageRegistry]
+    ) -> Optional[str]:
+        """
+        Decidir si una imagen sondeada debe omitirse
+        
+        Returns:
+            Motivo de la omisión o None si debe descargarse
+        """
+        if probe.get('error') or probe.get('status') not in (200, 206):
+            return 'unreachable'
+        
+        content_type = probe.get('content_type')
+        if content_type and not content_type.startswith('image/') and not probe.get('format'):
+            return 'not_an_image'
+        
+        size = probe.get('content_length')
+        if max_bytes is not None and size is not None and size > max_bytes:
+            return 'oversized'
+        
+        if registry is not None and registry.is_seen(probe['url'], probe.get('etag')):
+            return 'unchanged'
+        
+        return None
+    
     def _process_single_image(self, url: str, img_data: bytes, create_thumbnail: bool) -> Dict:
         """
         Procesar una sola imagen
@@ -1,6 +1,6 @@
 import logging
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -8,20 +8,33 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
+from .cdp_collector import CDPPerformanceCollector, configure_chrome_options
+from .render_profiles import RenderProfile
+
 logger = logging.getLogger(__name__)
 
 
 class PerformanceAnalyzer:
     """Analizador de métricas de rendimiento web"""
     
-    def __init__(self, headless: bool = True):
+    def __init__(
+        self,
+        headless: bool = True,
+        throttling: Optional[str] = None,
+        render_profile: Optional[RenderProfile] = None
+    ):
         """
         Inicializar el analizador
         
         Args:
             headless: Ejecutar en modo headless
+            throttling: Preset de CPU/red para corridas reproducibles
+                        ('slow-3g', 'fast-3g', '4g', 'desktop' o None)
+            render_profile: Perfil de bloqueo de recursos (default: 'performance-faithful')
         """
         self.headless = headless
+        self.throttling = throttling
+        self.render_profile = render_profile or RenderProfile('performance-faithful')
     
     def _create_driver(self) -> webdriver.Chrome:
         """Crear WebDriver configurado"""
@@ -34,18 +47,26 @@ class PerformanceAnalyzer:
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-gpu')
         
-        # Habilitar logging de rendimiento
-        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        # Habilitar logging de rendimiento (Network, Page y Tracing vía CDP)
+        configure_chrome_options(chrome_options)
+        self.render_profile.apply_to_options(chrome_options)
         
         driver = webdriver.Chrome(options=chrome_options)
         driver.set_page_load_timeout(30)
         
+        self.render_profile.apply_to_driver(driver)
+        
         return driver
     
     def analyze(self, url: str) -> Dict:
         """
         Analizar rendimiento de una URL
         
+        Todas las métricas salen de una única navegación: el waterfall y los
+        tamaños por tipo de recurso de los eventos Network del log de
+        performance, DOMContentLoaded/load de los eventos Page, y LCP/CLS/TBT
+        de PerformanceObservers inyectados antes de cargar la página.
+        
         Args:
             url: URL a analizar
             
@@ -59,7 +80,10 @@ class PerformanceAnalyzer:
             
             driver = self._create_driver()
             
-            # Medir tiempo de carga
+            collector = CDPPerformanceCollector(throttling=self.throttling)
+            collector.prepare(driver)
+            
+            # Tiempo de pared (solo como respaldo si no hay evento load)
             start_time = time.time()
             driver.get(url)
             
@@ -68,90 +92,16 @@ class PerformanceAnalyzer:
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
-            end_time = time.time()
-            page_load_time = round((end_time - start_time) * 1000, 2)  # en ms
-            
-            # Obtener métricas de navegación usando JavaScript
-            navigation_timing = driver.execute_script("""
-                var timing = window.performance.timing;
-                var navigation = window.performance.getEntriesByType('navigation')[0];
-                
-                return {
-                    dns_time: timing.domainLookupEnd - timing.domainLookupStart,
-                    tcp_time: timing.connectEnd - timing.connectStart,
-                    request_time: timing.responseStart - timing.requestStart,
-                    response_time: timing.responseEnd - timing.responseStart,
-                    dom_processing: timing.domComplete - timing.domLoading,
-                    dom_interactive: timing.domInteractive - timing.navigationStart,
-                    dom_content_loaded: timing.domContentLoadedEventEnd - timing.navigationStart,
-                    load_complete: timing.loadEventEnd - timing.navigationStart,
-                    transfer_size: navigation ? navigation.transferSize : 0,
-                    encoded_size: navigation ? navigation.encodedBodySize : 0,
-                    decoded_size: navigation ? navigation.decodedBodySize : 0
-                };
-            """)
+            wall_time_ms = round((time.time() - start_time) * 1000, 2)
             
-            # Contar recursos cargados
-            resources = driver.execute_script("""
-                var resources = window.performance.getEntriesByType('resource');
-                var types = {};
-                var totalSize = 0;
-                
-                resources.forEach(function(resource) {
-                    var type = resource.initiatorType || 'other';
-                    types[type] = (types[type] || 0) + 1;
-                    totalSize += resource.transferSize || 0;
-                });
-                
-                return {
-                    total: resources.length,
-                    by_type: types,
-                    total_size: totalSize
-                };
-            """)
+            data = collector.collect(driver)
             
-            # Obtener información de la página
-            page_info = driver.execute_script("""
-                return {
-                    title: document.title,
-                    url: window.location.href,
-                    dom_nodes: document.getElementsByTagName('*').length
-                };
-            """)
+            metrics = self._build_metrics(data, wall_time_ms)
+            metrics['recommendations'] = self._generate_recommendations(metrics)
             
-            logger.info(f"✅ Análisis completado: {page_load_time}ms")
+            logger.info(f"✅ Análisis completado: {metrics['timing']['page_load_ms']}ms")
             
-            return {
-                'timing': {
-                    'page_load_ms': page_load_time,
-                    'dns_lookup_ms': navigation_timing['dns_time'],
-                    'tcp_connection_ms': navigation_timing['tcp_time'],
-                    'request_ms': navigation_timing['request_time'],
-                    'response_ms': navigation_timing['response_time'],
-                    'dom_processing_ms': navigation_timing['dom_processing'],
-                    'dom_interactive_ms': navigation_timing['dom_interactive'],
-                    'dom_content_loaded_ms': navigation_timing['dom_content_loaded'],
-                    'load_complete_ms': navigation_timing['load_complete']
-                },
-                'resources': {
-                    'total_count': resources['total'],
-                    'by_type': resources['by_type'],
-                    'total_size_bytes': resources['total_size'],
-                    'total_size_kb': round(resources['total_size'] / 1024, 2)
-                },
-                'transfer': {
-                    'transfer_size_bytes': navigation_timing['transfer_size'],
-                    'encoded_size_bytes': navigation_timing['encoded_size'],
-                    'decoded_size_bytes': navigation_timing['decoded_size'],
-                    'transfer_size_kb': round(navigation_timing['transfer_size'] / 1024, 2)
-                },
-                'page': {
-                    'title': page_info['title'],
-                    'final_url': page_info['url'],
-                    'dom_nodes': page_info['dom_nodes']
-                },
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            }
+            return metrics
         
         except Exception as e:
             logger.error(f"❌ Error analizando rendimiento: {e}")
@@ -161,6 +111,77 @@ class PerformanceAnalyzer:
             if driver:
                 driver.quit()
     
+    def _build_metrics(self, data: Dict, wall_time_ms: float) -> Dict:
+        """
+        Armar el resultado a partir de los datos del colector CDP
+        
+        Args:
+            data: Resultado de CDPPerformanceCollector.collect
+            wall_time_ms: Tiempo de pared alrededor de driver.get
+            
+        Returns:
+            Diccionario con métricas de rendimiento
+        """
+        navigation = data['navigation']
+        lifecycle = data['lifecycle']
+        resources = data['resources']
+        document = data['document'] or {}
+        
+        # Desglose de red del documento principal (timing del responseReceived)
+        doc_timing = document.get('timing') or {}
+        
+        def span(start_key, end_key):
+            start, end = doc_timing.get(start_key, -1), doc_timing.get(end_key, -1)
+            return round(end - start, 2) if start >= 0 and end >= 0 else 0
+        
+        def nav_delta(key, start_key='startTime'):
+            if not navigation or not navigation.get(key):
+                return 0
+            return round(navigation[key] - navigation.get(start_key, 0), 2)
+        
+        page_load_ms = lifecycle['load_ms'] if lifecycle['load_ms'] is not None else wall_time_ms
+        transfer_size = navigation.get('transferSize', document.get('encoded_bytes', 0)) or 0
+        
+        return {
+            'timing': {
+                'page_load_ms': page_load_ms,
+                'dns_lookup_ms': span('dnsStart', 'dnsEnd'),
+                'tcp_connection_ms': span('connectStart', 'connectEnd'),
+                'request_ms': span('sendEnd', 'receiveHeadersEnd'),
+                'response_ms': nav_delta('responseEnd', 'responseStart'),
+                'dom_processing_ms': nav_delta('domComplete', 'responseEnd'),
+                'dom_interactive_ms': nav_delta('domInteractive'),
+                'dom_content_loaded_ms': lifecycle['dom_content_loaded_ms'] or nav_delta('domContentLoadedEventEnd'),
+                'load_complete_ms': nav_delta('loadEventEnd') or page_load_ms,
+                'wall_time_ms': wall_time_ms
+            },
+            'web_vitals': data['web_vitals'],
+            'resources': {
+                'total_count': resources['total'],
+                'by_type': resources['by_type'],
+                'size_by_type_bytes': resources['size_by_type'],
+                'failed_count': resources['failed'],
+                'total_size_bytes': resources['total_size'],
+                'total_size_kb': round(resources['total_size'] / 1024, 2)
+            },
+            'transfer': {
+                'transfer_size_bytes': transfer_size,
+                'encoded_size_bytes': navigation.get('encodedBodySize', 0),
+                'decoded_size_bytes': navigation.get('decodedBodySize', 0),
+                'transfer_size_kb': round(transfer_size / 1024, 2)
+            },
+            'page': {
+                'title': data['page']['title'],
+                'final_url': data['page']['url'],
+                'dom_nodes': data['page']['dom_nodes']
+            },
+            'waterfall': data['waterfall'],
+            'cdp_metrics': data['cdp_metrics'],
+            'throttling': data['throttling'],
+            'render_profile': self.render_profile.name,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }
+    
     def get_lighthouse_metrics(self, url: str) -> Dict:
         """
         Obtener métricas tipo Lighthouse (simuladas)
@@ -195,7 +216,7 @@ class PerformanceAnalyzer:
                 'load_time_rating': 'good' if load_time < 2500 else 'needs_improvement' if load_time < 5000 else 'poor'
             },
             'metrics': metrics,
-            'recommendations': self._generate_recommendations(metrics)
+            'recommendations': metrics['recommendations']
         }
     
     def _generate_recommendations(self, metrics: Dict) -> List[str]:
@@ -206,10 +227,55 @@ class PerformanceAnalyzer:
         if metrics['timing']['page_load_ms'] > 3000:
             recommendations.append("Tiempo de carga elevado. Considera optimizar recursos.")
         
+        # Web vitals
+        vitals = metrics.get('web_vitals', {})
+        
+        if vitals.get('lcp_ms') and vitals['lcp_ms'] > 2500:
+            recommendations.append(
+                f"LCP alto ({vitals['lcp_ms']:.0f}ms). Optimiza la imagen/bloque principal y el TTFB."
+            )
+        
+        if vitals.get('cls', 0) > 0.1:
+            recommendations.append(
+                f"CLS alto ({vitals['cls']}). Reserva espacio para imágenes, anuncios y fuentes."
+            )
+        
+        if vitals.get('tbt_ms', 0) > 300:
+            recommendations.append(
+                f"Total Blocking Time alto ({vitals['tbt_ms']:.0f}ms). Divide o difiere el JavaScript pesado."
+            )
+        
         # Análisis de tamaño
         if metrics['transfer']['transfer_size_kb'] > 2000:
             recommendations.append("Tamaño de página grande. Considera comprimir recursos.")
         
+        # Tipo de recurso más pesado
+        size_by_type = metrics['resources'].get('size_by_type_bytes', {})
+        total_size = metrics['resources'].get('total_size_bytes', 0)
+        
+        if size_by_type and total_size > 1024 * 1024:
+            heaviest, heaviest_size = max(size_by_type.items(), key=lambda item: item[1])
+            if heaviest_size / total_size > 0.5:
+                recommendations.append(
+                    f"El {heaviest_size * 100 // total_size}% de los bytes son de tipo '{heaviest}'. "
+                    f"Revisa su compresión o carga diferida."
+                )
+        
+        # Requests lentos
+        slow_requests = [
+            r for r in metrics.get('waterfall', [])
+            if r.get('ttfb_ms') and r['ttfb_ms'] > 1000
+        ]
+        if slow_requests:
+            recommendations.append(
+                f"{len(slow_requests)} request(s) con TTFB mayor a 1s (ej: {slow_requests[0]['url'][:80]})."
+            )
+        
+        if metrics['resources'].get('failed_count', 0) > 0:
+            recommendations.append(
+                f"{metrics['resources']['failed_count']} recurso(s) fallaron al cargar."
+            )
+        
         # Análisis de recursos
         resource_count = metrics['resources']['total_count']
         if resource_count > 100:
@@ -219,4 +285,4 @@ class PerformanceAnalyzer:
         if metrics['page']['dom_nodes'] > 1500:
             recommendations.append("DOM muy grande. Puede afectar el rendimiento.")
         
-        return recommendations
\ No newline at end of file
+        return recommendations
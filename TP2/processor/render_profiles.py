@@ -0,0 +1,192 @@
+"""
+Perfiles de render para las tareas con navegador (screenshot / performance)
+
+Cada perfil define qué recursos se bloquean vía CDP (Network.setBlockedURLs)
+y qué flags extra recibe Chrome. Se eligen por tarea desde los params del
+Protocol ('render_profile' o 'render_profiles': {tarea: perfil}).
+"""
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Dominios de tracking / publicidad / analytics
+TRACKER_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'connect.facebook.net',
+    'facebook.com/tr',
+    'hotjar.com',
+    'mixpanel.com',
+    'segment.com',
+    'segment.io',
+    'scorecardresearch.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'quantserve.com',
+    'newrelic.com',
+    'nr-data.net',
+    'clarity.ms'
+]
+
+# Patrones de URL por tipo de recurso (wildcards de CDP)
+RESOURCE_PATTERNS = {
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.mpd', '*.mov', '*.ogg', '*.mp3', '*.wav'],
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'stylesheet': ['*.css'],
+    'script': ['*.js', '*.mjs']
+}
+
+RENDER_PROFILES = {
+    'performance-faithful': {
+        'description': 'Carga todo (métricas fieles a un usuario real)',
+        'block_trackers': False,
+        'block_resources': [],
+        'chrome_arguments': [],
+        'disable_javascript': False
+    },
+    'screenshot-fast': {
+        'description': 'Sin trackers, fuentes web ni video',
+        'block_trackers': True,
+        'block_resources': ['font', 'media'],
+        'chrome_arguments': ['--autoplay-policy=user-gesture-required', '--mute-audio'],
+        'disable_javascript': False
+    },
+    'text-only': {
+        'description': 'Solo el documento HTML (sin subrecursos ni JavaScript)',
+        'block_trackers': True,
+        'block_resources': ['font', 'media', 'image', 'stylesheet', 'script'],
+        'chrome_arguments': ['--blink-settings=imagesEnabled=false', '--mute-audio'],
+        'disable_javascript': True
+    }
+}
+
+# Perfil por defecto de cada tarea
+DEFAULT_TASK_PROFILES = {
+    'screenshot': 'screenshot-fast',
+    'performance': 'performance-faithful'
+}
+
+
+class RenderProfile:
+    """Perfil de render aplicable a un WebDriver de Chrome"""
+    
+    def __init__(self, name: str, extra_blocked_domains: Optional[List[str]] = None):
+        """
+        Args:
+            name: Nombre del perfil (clave de RENDER_PROFILES)
+            extra_blocked_domains: Dominios adicionales a bloquear
+        
+        Raises:
+            ValueError: Si el perfil no existe
+        """
+        if name not in RENDER_PROFILES:
+            raise ValueError(
+                f"Perfil de render desconocido: {name} "
+                f"(disponibles: {', '.join(RENDER_PROFILES)})"
+            )
+        
+        self.name = name
+        self.config = RENDER_PROFILES[name]
+        self.extra_blocked_domains = extra_blocked_domains or []
+    
+    def blocked_url_patterns(self) -> List[str]:
+        """
+        Patrones para Network.setBlockedURLs
+        
+        Returns:
+            Lista de patrones con wildcards
+        """
+        patterns = []
+        
+        domains = list(self.extra_blocked_domains)
+        if self.config['block_trackers']:
+            domains = TRACKER_DOMAINS + domains
+        
+        for domain in domains:
+            # Dominio exacto y subdominios (con o sin path)
+            patterns.append(f'*://{domain}*')
+            patterns.append(f'*://*.{domain}*')
+        
+        for resource_type in self.config['block_resources']:
+            for pattern in RESOURCE_PATTERNS[resource_type]:
+                patterns.append(pattern)
+                # Recursos con query string (app.js?v=123)
+                patterns.append(f'{pattern}?*')
+        
+        return patterns
+    
+    def apply_to_options(self, chrome_options):
+        """
+        Agregar flags de Chrome del perfil (antes de crear el driver)
+        
+        Args:
+            chrome_options: Options de Selenium
+        """
+        for argument in self.config['chrome_arguments']:
+            chrome_options.add_argument(argument)
+        
+        if self.config['disable_javascript']:
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.javascript': 2
+            })
+    
+    def apply_to_driver(self, driver):
+        """
+        Activar el bloqueo de URLs vía CDP (antes de navegar)
+        
+        Args:
+            driver: WebDriver de Chrome
+        """
+        patterns = self.blocked_url_patterns()
+        
+        if not patterns:
+            return
+        
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        
+        logger.info(f"🚫 Perfil '{self.name}': {len(patterns)} patrones bloqueados")
+    
+    def to_dict(self) -> Dict:
+        """Descripción serializable del perfil"""
+        return {
+            'name': self.name,
+            'description': self.config['description'],
+            'block_trackers': self.config['block_trackers'],
+            'block_resources': list(self.config['block_resources'])
+        }
+
+
+def resolve_render_profile(params: Dict, task: str) -> RenderProfile:
+    """
+    Elegir el perfil de una tarea a partir de los params del Protocol
+    
+    Prioridad: params['render_profiles'][task] > params['render_profile'] >
+    DEFAULT_TASK_PROFILES[task]. 'blocked_domains' agrega dominios extra.
+    
+    Args:
+        params: Params del request
+        task: Nombre de la tarea ('screenshot', 'performance')
+    
+    Returns:
+        RenderProfile
+    """
+    per_task = params.get('render_profiles') or {}
+    name = (
+        per_task.get(task)
+        or params.get('render_profile')
+        or DEFAULT_TASK_PROFILES.get(task, 'performance-faithful')
+    )
+    
+    return RenderProfile(name, extra_blocked_domains=params.get('blocked_domains'))
@@ -1,7 +1,5 @@
 import logging
-import base64
-import io
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -9,15 +7,35 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from PIL import Image
+
+from .render_profiles import RenderProfile
 
 logger = logging.getLogger(__name__)
 
+# Formatos soportados por Page.captureScreenshot
+SUPPORTED_FORMATS = ('png', 'jpeg', 'webp')
+
 
 class ScreenshotGenerator:
-    """Generador de screenshots usando Selenium"""
+    """
+    Generador de screenshots usando Selenium + Chrome DevTools Protocol
+    
+    Las capturas se hacen con Page.captureScreenshot: Chrome codifica la imagen
+    (png/jpeg/webp) y la devuelve ya en base64, así que nunca se decodifica en
+    Python. Las páginas largas se capturan en tiles con 'clip' en lugar de
+    agrandar la ventana al alto completo del documento, y el thumbnail se pide
+    a Chrome con 'clip.scale' en la misma carga de página.
+    """
     
-    def __init__(self, headless: bool = True, width: int = 1920, height: int = 1080):
+    def __init__(
+        self,
+        headless: bool = True,
+        width: int = 1920,
+        height: int = 1080,
+        tile_height: int = 4096,
+        max_tiles: int = 8,
+        render_profile: Optional[RenderProfile] = None
+    ):
         """
         Inicializar el generador
         
@@ -25,10 +43,16 @@ class ScreenshotGenerator:
             headless: Ejecutar en modo headless (sin GUI)
             width: Ancho de la ventana del navegador
             height: Alto de la ventana del navegador
+            tile_height: Alto de cada tile en capturas de página completa
+            max_tiles: Máximo de tiles por página (limita memoria en páginas enormes)
+            render_profile: Perfil de bloqueo de recursos (default: 'screenshot-fast')
         """
         self.headless = headless
         self.width = width
         self.height = height
+        self.tile_height = tile_height
+        self.max_tiles = max_tiles
+        self.render_profile = render_profile or RenderProfile('screenshot-fast')
     
     def _create_driver(self) -> webdriver.Chrome:
         """
@@ -50,67 +74,191 @@ class ScreenshotGenerator:
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36')
         
-        # Desactivar imágenes para acelerar carga (opcional)
-        # chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        # Flags del perfil de render (ej: sin imágenes en 'text-only')
+        self.render_profile.apply_to_options(chrome_options)
         
         driver = webdriver.Chrome(options=chrome_options)
         driver.set_page_load_timeout(30)
         
+        # Bloqueo de trackers / fuentes / video vía CDP
+        self.render_profile.apply_to_driver(driver)
+        
         return driver
     
-    def capture(self, url: str, wait_time: int = 3) -> Dict:
+    @staticmethod
+    def _b64_size(data_b64: str) -> int:
+        """Tamaño en bytes de un payload base64 sin decodificarlo"""
+        padding = data_b64[-2:].count('=')
+        return len(data_b64) * 3 // 4 - padding
+    
+    def _load(self, driver: webdriver.Chrome, url: str, wait_time: int) -> float:
+        """
+        Navegar a la URL y esperar el <body>
+        
+        Returns:
+            Tiempo de carga en segundos
+        """
+        start_time = datetime.utcnow()
+        driver.get(url)
+        
+        WebDriverWait(driver, wait_time).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+        
+        return (datetime.utcnow() - start_time).total_seconds()
+    
+    def _page_size(self, driver: webdriver.Chrome) -> Dict:
+        """
+        Obtener tamaño del viewport y del documento via Page.getLayoutMetrics
+        
+        Returns:
+            dict con 'width', 'viewport_height' y 'content_height' (px CSS)
+        """
+        metrics = driver.execute_cdp_cmd('Page.getLayoutMetrics', {})
+        
+        viewport = metrics.get('cssLayoutViewport') or metrics.get('layoutViewport', {})
+        content = metrics.get('cssContentSize') or metrics.get('contentSize', {})
+        
+        width = int(viewport.get('clientWidth') or self.width)
+        viewport_height = int(viewport.get('clientHeight') or self.height)
+        content_height = int(content.get('height') or viewport_height)
+        
+        return {
+            'width': width,
+            'viewport_height': viewport_height,
+            'content_height': max(content_height, viewport_height)
+        }
+    
+    def _capture_clip(
+        self,
+        driver: webdriver.Chrome,
+        clip: Dict,
+        fmt: str,
+        quality: Optional[int]
+    ) -> Dict:
+        """
+        Capturar una región de la página con Page.captureScreenshot
+        
+        Args:
+            driver: WebDriver de Chrome
+            clip: Región {x, y, width, height, scale}
+            fmt: png / jpeg / webp
+            quality: Calidad de compresión (solo jpeg/webp)
+        
+        Returns:
+            dict con base64, tamaño y dimensiones de la imagen resultante
+        """
+        params = {
+            'format': fmt,
+            'clip': clip,
+            'captureBeyondViewport': True,
+            'optimizeForSpeed': True
+        }
+        
+        if quality is not None and fmt != 'png':
+            params['quality'] = quality
+        
+        data_b64 = driver.execute_cdp_cmd('Page.captureScreenshot', params)['data']
+        
+        # Las dimensiones salen del clip: no hace falta abrir la imagen
+        return {
+            'base64': data_b64,
+            'size_bytes': self._b64_size(data_b64),
+            'dimensions': {
+                'width': int(round(clip['width'] * clip['scale'])),
+                'height': int(round(clip['height'] * clip['scale']))
+            }
+        }
+    
+    def capture(
+        self,
+        url: str,
+        wait_time: int = 3,
+        fmt: str = 'png',
+        quality: Optional[int] = None,
+        full_page: bool = False,
+        thumbnail_width: Optional[int] = None
+    ) -> Dict:
         """
         Capturar screenshot de una URL
         
         Args:
             url: URL a capturar
             wait_time: Tiempo de espera para que cargue la página (segundos)
-            
+            fmt: Formato de salida (png, jpeg o webp)
+            quality: Calidad 0-100 para jpeg/webp
+            full_page: Capturar la página completa en tiles
+            thumbnail_width: Si se indica, genera un thumbnail en la misma carga
+        
         Returns:
             Diccionario con el screenshot y metadatos
         """
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt}")
+        
         driver = None
         
         try:
-            logger.info(f"📸 Capturando screenshot de {url}")
+            logger.info(f"📸 Capturando screenshot de {url} ({fmt}, full_page={full_page})")
             
             # Crear driver
             driver = self._create_driver()
             
-            # Navegar a la URL
-            start_time = datetime.utcnow()
-            driver.get(url)
-            
-            # Esperar a que la página cargue
-            WebDriverWait(driver, wait_time).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            load_time = (datetime.utcnow() - start_time).total_seconds()
+            load_time = self._load(driver, url, wait_time)
+            size = self._page_size(driver)
             
-            # Capturar screenshot
-            screenshot_png = driver.get_screenshot_as_png()
+            # Región visible (primer viewport)
+            viewport_clip = {
+                'x': 0,
+                'y': 0,
+                'width': size['width'],
+                'height': size['viewport_height'],
+                'scale': 1
+            }
             
-            # Convertir a base64
-            screenshot_b64 = base64.b64encode(screenshot_png).decode('ascii')
+            tiles = []
             
-            # Obtener dimensiones de la imagen
-            img = Image.open(io.BytesIO(screenshot_png))
-            width, height = img.size
+            if full_page:
+                tiles = self._capture_tiles(driver, size, fmt, quality)
+                main = tiles[0]
+            else:
+                main = self._capture_clip(driver, viewport_clip, fmt, quality)
             
-            logger.info(f"✅ Screenshot capturado: {width}x{height} ({len(screenshot_png)} bytes)")
+            logger.info(
+                f"✅ Screenshot capturado: {main['dimensions']['width']}x"
+                f"{main['dimensions']['height']} ({main['size_bytes']} bytes)"
+            )
             
-            return {
-                'screenshot_base64': screenshot_b64,
-                'format': 'png',
-                'size_bytes': len(screenshot_png),
-                'dimensions': {
-                    'width': width,
-                    'height': height
-                },
+            result = {
+                'screenshot_base64': main['base64'],
+                'format': fmt,
+                'render_profile': self.render_profile.name,
+                'size_bytes': main['size_bytes'],
+                'dimensions': main['dimensions'],
                 'load_time_seconds': round(load_time, 2),
                 'timestamp': datetime.utcnow().isoformat() + 'Z'
             }
+            
+            if full_page:
+                result['full_page'] = True
+                result['page_height'] = size['content_height']
+                result['truncated'] = size['content_height'] > self.tile_height * self.max_tiles
+                result['tiles'] = [
+                    {
+                        'y': tile['y'],
+                        'screenshot_base64': tile['base64'],
+                        'size_bytes': tile['size_bytes'],
+                        'dimensions': tile['dimensions']
+                    }
+                    for tile in tiles
+                ]
+            
+            if thumbnail_width:
+                result['thumbnail'] = self._capture_thumbnail(
+                    driver, viewport_clip, thumbnail_width, fmt, quality
+                )
+            
+            return result
         
         except Exception as e:
             logger.error(f"❌ Error capturando screenshot de {url}: {e}")
@@ -120,104 +268,91 @@ class ScreenshotGenerator:
             if driver:
                 driver.quit()
     
-    def capture_full_page(self, url: str) -> Dict:
+    def _capture_tiles(
+        self,
+        driver: webdriver.Chrome,
+        size: Dict,
+        fmt: str,
+        quality: Optional[int]
+    ) -> List[Dict]:
         """
-        Capturar screenshot de página completa (scroll completo)
+        Capturar la página completa en tiles de tile_height px
         
-        Args:
-            url: URL a capturar
-            
         Returns:
-            Diccionario con el screenshot
+            Lista de tiles (cada uno con su offset 'y')
         """
-        driver = None
+        total_height = min(size['content_height'], self.tile_height * self.max_tiles)
+        tiles = []
         
-        try:
-            logger.info(f"📸 Capturando screenshot completo de {url}")
-            
-            driver = self._create_driver()
-            driver.get(url)
-            
-            # Esperar carga
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Obtener altura total de la página
-            total_height = driver.execute_script("return document.body.scrollHeight")
-            
-            # Ajustar ventana para capturar página completa
-            driver.set_window_size(self.width, total_height)
-            
-            # Capturar
-            screenshot_png = driver.get_screenshot_as_png()
-            screenshot_b64 = base64.b64encode(screenshot_png).decode('ascii')
-            
-            img = Image.open(io.BytesIO(screenshot_png))
-            width, height = img.size
-            
-            logger.info(f"✅ Screenshot completo: {width}x{height}")
-            
-            return {
-                'screenshot_base64': screenshot_b64,
-                'format': 'png',
-                'size_bytes': len(screenshot_png),
-                'dimensions': {
-                    'width': width,
-                    'height': height
-                },
-                'full_page': True,
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
+        for y in range(0, total_height, self.tile_height):
+            clip = {
+                'x': 0,
+                'y': y,
+                'width': size['width'],
+                'height': min(self.tile_height, total_height - y),
+                'scale': 1
             }
+            tile = self._capture_clip(driver, clip, fmt, quality)
+            tile['y'] = y
+            tiles.append(tile)
         
-        except Exception as e:
-            logger.error(f"❌ Error: {e}")
-            raise
+        logger.info(f"🧩 Página capturada en {len(tiles)} tiles ({total_height}px)")
         
-        finally:
-            if driver:
-                driver.quit()
+        return tiles
     
-    def capture_thumbnail(self, url: str, thumb_width: int = 400) -> Dict:
+    def _capture_thumbnail(
+        self,
+        driver: webdriver.Chrome,
+        viewport_clip: Dict,
+        thumb_width: int,
+        fmt: str,
+        quality: Optional[int]
+    ) -> Dict:
         """
-        Capturar screenshot y generar thumbnail
+        Generar el thumbnail escalando en Chrome (clip.scale), sin PIL
         
-        Args:
-            url: URL a capturar
-            thumb_width: Ancho del thumbnail
-            
         Returns:
-            Diccionario con screenshot y thumbnail
+            Diccionario con el thumbnail
         """
-        # Capturar screenshot normal
-        screenshot_data = self.capture(url)
+        clip = dict(viewport_clip)
+        clip['scale'] = min(1.0, thumb_width / viewport_clip['width'])
         
-        # Decodificar imagen
-        screenshot_png = base64.b64decode(screenshot_data['screenshot_base64'])
-        img = Image.open(io.BytesIO(screenshot_png))
+        thumb = self._capture_clip(driver, clip, fmt, quality)
         
-        # Calcular dimensiones del thumbnail manteniendo aspect ratio
-        aspect_ratio = img.height / img.width
-        thumb_height = int(thumb_width * aspect_ratio)
+        logger.info(
+            f"🖼️  Thumbnail generado: {thumb['dimensions']['width']}x{thumb['dimensions']['height']}"
+        )
         
-        # Crear thumbnail
-        img.thumbnail((thumb_width, thumb_height), Image.Resampling.LANCZOS)
+        return {
+            'thumbnail_base64': thumb['base64'],
+            'format': fmt,
+            'dimensions': thumb['dimensions'],
+            'size_bytes': thumb['size_bytes']
+        }
+    
+    def capture_full_page(self, url: str, fmt: str = 'png', quality: Optional[int] = None) -> Dict:
+        """
+        Capturar screenshot de página completa (en tiles)
         
-        # Convertir a bytes
-        thumb_buffer = io.BytesIO()
-        img.save(thumb_buffer, format='PNG')
-        thumb_png = thumb_buffer.getvalue()
-        thumb_b64 = base64.b64encode(thumb_png).decode('ascii')
+        Args:
+            url: URL a capturar
+            fmt: Formato de salida (png, jpeg o webp)
+            quality: Calidad 0-100 para jpeg/webp
         
-        logger.info(f"🖼️  Thumbnail generado: {thumb_width}x{thumb_height}")
+        Returns:
+            Diccionario con el screenshot y la lista de tiles
+        """
+        return self.capture(url, wait_time=5, fmt=fmt, quality=quality, full_page=True)
+    
+    def capture_thumbnail(self, url: str, thumb_width: int = 400) -> Dict:
+        """
+        Capturar screenshot y generar thumbnail
         
-        screenshot_data['thumbnail'] = {
-            'thumbnail_base64': thumb_b64,
-            'dimensions': {
-                'width': thumb_width,
-                'height': thumb_height
-            },
-            'size_bytes': len(thumb_png)
-        }
+        Args:
+            url: URL a capturar
+            thumb_width: Ancho del thumbnail
         
-        return screenshot_data
\ No newline at end of file
+        Returns:
+            Diccionario con screenshot y thumbnail
+        """
+        return self.capture(url, thumbnail_width=thumb_width)
@@ -0,0 +1,436 @@
+"""
+Reglas de SEO para el motor de SEOAnalyzer
+
+Cada regla declara los tags que le interesan (tags), recibe esos elementos
+durante el único recorrido del documento (collect) y al final arma su sección
+del resultado (finalize). Las reglas no guardan estado propio: lo que
+acumulan vive en el dict 'state' que el motor crea para cada análisis.
+"""
+import json
+from typing import Dict, List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+
+class RuleReport:
+    """Resultado de una regla en un análisis puntual (penalidad + mensajes)"""
+    
+    def __init__(self, weight: float = 1.0):
+        self.weight = weight
+        self.penalty = 0
+        self.issues = []
+        self.warnings = []
+        self.good_practices = []
+    
+    def penalize(self, points: int):
+        """Restar puntos al score (escalados por el peso de la regla)"""
+        self.penalty += int(round(points * self.weight))
+    
+    def issue(self, message: str):
+        self.issues.append(message)
+    
+    def warning(self, message: str):
+        self.warnings.append(message)
+    
+    def good(self, message: str):
+        self.good_practices.append(message)
+
+
+class SEORule:
+    """
+    Clase base de las reglas
+    
+    Atributos:
+        name: Identificador de la regla (y clave de su sección en el resultado)
+        tags: Tags que se le despachan durante el recorrido
+        weight: Peso por defecto de sus penalidades
+    """
+    
+    name = ''
+    tags = ()
+    weight = 1.0
+    
+    def new_state(self) -> Dict:
+        """Estado inicial de la regla para un análisis"""
+        return {'elements': []}
+    
+    def collect(self, element, state: Dict):
+        """Recibir un elemento que coincide con 'tags'"""
+        state['elements'].append(element)
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        """
+        Evaluar lo recolectado
+        
+        Args:
+            state: Estado acumulado durante el recorrido
+            report: Donde registrar penalidades y mensajes
+            context: Datos del análisis ('url', 'base_domain', ...)
+        
+        Returns:
+            Sección de la regla en el resultado
+        """
+        raise NotImplementedError
+
+
+def get_domain(url: str) -> str:
+    """Extrae el dominio de una URL"""
+    return urlparse(url).netloc
+
+
+class TitleRule(SEORule):
+    """Title tag"""
+    
+    name = 'title'
+    tags = ('title',)
+    
+    def new_state(self) -> Dict:
+        return {'title': None}
+    
+    def collect(self, element, state: Dict):
+        # Solo cuenta el primer <title> del documento
+        if state['title'] is None:
+            state['title'] = element
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        title = state['title']
+        
+        if title is None:
+            report.penalize(20)
+            report.issue("❌ CRÍTICO: Falta el tag <title>")
+            return {'exists': False, 'length': 0, 'text': ''}
+        
+        title_text = title.get_text(strip=True)
+        length = len(title_text)
+        
+        if length == 0:
+            report.penalize(20)
+            report.issue("❌ CRÍTICO: El <title> está vacío")
+        elif length < 30:
+            report.penalize(10)
+            report.warning(f"⚠️  Title muy corto ({length} chars). Recomendado: 50-60")
+        elif length > 60:
+            report.penalize(5)
+            report.warning(f"⚠️  Title muy largo ({length} chars). Recomendado: 50-60")
+        else:
+            report.good(f"✅ Title con longitud óptima ({length} chars)")
+        
+        return {'exists': True, 'text': title_text, 'length': length}
+
+
+class MetaDescriptionRule(SEORule):
+    """Meta description"""
+    
+    name = 'meta_description'
+    tags = ('meta',)
+    
+    def new_state(self) -> Dict:
+        return {'meta': None}
+    
+    def collect(self, element, state: Dict):
+        if state['meta'] is None and element.get('name') == 'description':
+            state['meta'] = element
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        meta_desc = state['meta']
+        
+        if meta_desc is None or not meta_desc.get('content'):
+            report.penalize(15)
+            report.issue("❌ Falta meta description")
+            return {'exists': False, 'length': 0, 'text': ''}
+        
+        description = meta_desc.get('content', '').strip()
+        length = len(description)
+        
+        if length < 120:
+            report.penalize(5)
+            report.warning(f"⚠️  Meta description corta ({length} chars). Recomendado: 150-160")
+        elif length > 160:
+            report.penalize(3)
+            report.warning(f"⚠️  Meta description larga ({length} chars). Será truncada en resultados")
+        else:
+            report.good(f"✅ Meta description con longitud óptima ({length} chars)")
+        
+        return {'exists': True, 'text': description, 'length': length}
+
+
+class HeadersRule(SEORule):
+    """Headers H1-H6 (conteo en una sola pasada)"""
+    
+    name = 'headers'
+    tags = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+    
+    def new_state(self) -> Dict:
+        return {'counts': {tag: 0 for tag in self.tags}, 'h1_texts': []}
+    
+    def collect(self, element, state: Dict):
+        state['counts'][element.name] += 1
+        
+        if element.name == 'h1' and len(state['h1_texts']) < 3:
+            state['h1_texts'].append(element.get_text(strip=True)[:100])
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        hierarchy = state['counts']
+        h1_count = hierarchy['h1']
+        
+        if h1_count == 0:
+            report.penalize(15)
+            report.issue("❌ No hay ningún tag <h1>")
+        elif h1_count > 1:
+            report.penalize(10)
+            report.warning(f"⚠️  Múltiples H1 detectados ({h1_count}). Recomendado: 1 único H1")
+        else:
+            report.good("✅ Un único H1 correctamente definido")
+        
+        # Verificar jerarquía
+        if hierarchy['h2'] == 0 and any(hierarchy[f'h{i}'] > 0 for i in range(3, 7)):
+            report.warning("⚠️  Jerarquía de headers incorrecta (hay H3+ sin H2)")
+        
+        return {
+            'h1_count': h1_count,
+            'h1_texts': state['h1_texts'],
+            'hierarchy': dict(hierarchy)
+        }
+
+
+class ImagesRule(SEORule):
+    """Imágenes y alt tags"""
+    
+    name = 'images'
+    tags = ('img',)
+    
+    def new_state(self) -> Dict:
+        return {'total': 0, 'missing_alt': 0}
+    
+    def collect(self, element, state: Dict):
+        state['total'] += 1
+        
+        alt = element.get('alt')
+        if not alt or not alt.strip():
+            state['missing_alt'] += 1
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        total_images = state['total']
+        missing_alt_count = state['missing_alt']
+        
+        if missing_alt_count > 0:
+            report.penalize(min(20, missing_alt_count * 2))
+            
+            if missing_alt_count <= 3:
+                report.warning(f"⚠️  {missing_alt_count} imagen(es) sin atributo alt")
+            else:
+                report.issue(
+                    f"❌ {missing_alt_count} imágenes sin atributo alt (afecta accesibilidad y SEO)"
+                )
+        elif total_images > 0:
+            report.good(f"✅ Todas las imágenes ({total_images}) tienen alt text")
+        
+        return {
+            'total_images': total_images,
+            'images_without_alt': missing_alt_count,
+            'alt_coverage_percent': round(
+                ((total_images - missing_alt_count) / total_images * 100) if total_images > 0 else 100,
+                2
+            )
+        }
+
+
+class LinksRule(SEORule):
+    """Links internos y externos"""
+    
+    name = 'links'
+    tags = ('a',)
+    
+    def new_state(self) -> Dict:
+        return {'total': 0, 'hrefs': []}
+    
+    def collect(self, element, state: Dict):
+        href = element.get('href')
+        
+        if href is None:
+            return
+        
+        state['total'] += 1
+        state['hrefs'].append(href.strip())
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        base_domain = context['base_domain']
+        # Status de links verificados por el Servidor A (check_links=true)
+        link_health = context.get('link_health')
+        internal_links = 0
+        external_links = 0
+        broken_links = []
+        checked = set()
+        
+        for href in state['hrefs']:
+            if href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                continue
+            
+            if href.startswith('http') and get_domain(href) != base_domain:
+                external_links += 1
+            else:
+                internal_links += 1
+            
+            if link_health:
+                absolute_url, _ = urldefrag(urljoin(context['url'], href))
+                health = link_health.get(absolute_url)
+                
+                if health is None or absolute_url in checked:
+                    continue
+                
+                checked.add(absolute_url)
+                if health.get('broken'):
+                    broken_links.append({'url': absolute_url, 'status': health.get('status')})
+        
+        total = state['total']
+        counted = internal_links + external_links
+        
+        if total == 0:
+            report.warning("⚠️  No se encontraron links en la página")
+        elif internal_links == 0:
+            report.warning("⚠️  No hay links internos (mal para SEO)")
+        else:
+            report.good(
+                f"✅ Balance de links: {internal_links} internos, {external_links} externos"
+            )
+        
+        if broken_links:
+            report.penalize(min(15, len(broken_links) * 3))
+            report.issue(f"❌ {len(broken_links)} link(s) roto(s)")
+        elif checked:
+            report.good(f"✅ Sin links rotos ({len(checked)} verificados)")
+        
+        data = {
+            'total_links': total,
+            'internal_links': internal_links,
+            'external_links': external_links,
+            # Proporción de internos sobre links navegables (sin #, mailto:, ...)
+            'ratio': round(internal_links / counted if counted > 0 else 0, 2),
+            'broken_links': broken_links
+        }
+        
+        if link_health:
+            data['checked_links'] = len(checked)
+        
+        return data
+
+
+class OpenGraphRule(SEORule):
+    """Open Graph tags"""
+    
+    name = 'open_graph'
+    tags = ('meta',)
+    required_tags = ('title', 'description', 'image', 'url')
+    
+    def new_state(self) -> Dict:
+        return {'tags': {}}
+    
+    def collect(self, element, state: Dict):
+        prop = element.get('property')
+        
+        if prop and prop.startswith('og:'):
+            state['tags'][prop.replace('og:', '')] = element.get('content', '')
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        og_tags = state['tags']
+        missing_tags = [tag for tag in self.required_tags if tag not in og_tags]
+        
+        if len(og_tags) == 0:
+            report.warning("⚠️  No hay tags Open Graph (recomendados para redes sociales)")
+        elif missing_tags:
+            report.warning(f"⚠️  Faltan Open Graph tags: {', '.join(missing_tags)}")
+        else:
+            report.good("✅ Open Graph tags completos")
+        
+        return {
+            'exists': len(og_tags) > 0,
+            'tags': og_tags,
+            'missing_required': missing_tags,
+            'completeness_percent': round(
+                ((len(self.required_tags) - len(missing_tags)) / len(self.required_tags) * 100),
+                2
+            )
+        }
+
+
+class StructuredDataRule(SEORule):
+    """Datos estructurados (JSON-LD, Schema.org)"""
+    
+    name = 'structured_data'
+    tags = ('script',)
+    
+    def collect(self, element, state: Dict):
+        if element.get('type') == 'application/ld+json':
+            state['elements'].append(element)
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        json_ld_scripts = state['elements']
+        types = []
+        
+        # Extraer tipos de schema
+        for script in json_ld_scripts:
+            try:
+                data = json.loads(script.string)
+            except (TypeError, ValueError):
+                continue
+            
+            items = data if isinstance(data, list) else [data]
+            for item in items:
+                if isinstance(item, dict) and '@type' in item:
+                    types.append(item['@type'])
+        
+        if json_ld_scripts:
+            report.good(f"✅ Datos estructurados presentes ({len(json_ld_scripts)} schemas)")
+        else:
+            report.warning("⚠️  No hay datos estructurados (JSON-LD recomendado para SEO avanzado)")
+        
+        return {
+            'has_json_ld': len(json_ld_scripts) > 0,
+            'json_ld_count': len(json_ld_scripts),
+            'types': types
+        }
+
+
+class CanonicalRule(SEORule):
+    """Canonical URL"""
+    
+    name = 'canonical'
+    tags = ('link',)
+    
+    def new_state(self) -> Dict:
+        return {'canonical': None}
+    
+    def collect(self, element, state: Dict):
+        # 'rel' es multivaluado en BeautifulSoup (lista)
+        if state['canonical'] is None and 'canonical' in (element.get('rel') or []):
+            state['canonical'] = element
+    
+    def finalize(self, state: Dict, report: RuleReport, context: Dict) -> Dict:
+        canonical = state['canonical']
+        
+        if canonical is None:
+            report.warning("⚠️  Falta tag canonical (puede causar contenido duplicado)")
+        else:
+            report.good("✅ Tag canonical presente")
+        
+        return {
+            'exists': canonical is not None,
+            'url': canonical.get('href') if canonical is not None else None
+        }
+
+
+# Reglas por defecto (el orden define el orden de los mensajes)
+DEFAULT_RULES: List[SEORule] = [
+    TitleRule(),
+    MetaDescriptionRule(),
+    HeadersRule(),
+    ImagesRule(),
+    LinksRule(),
+    OpenGraphRule(),
+    StructuredDataRule(),
+    CanonicalRule()
+]
+
+
+def rule_names(rules: Optional[List[SEORule]] = None) -> List[str]:
+    """Nombres de las reglas registradas"""
+    return [rule.name for rule in (rules if rules is not None else DEFAULT_RULES)]
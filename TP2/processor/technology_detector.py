@@ -177,19 +177,23 @@ class TechnologyDetector:
             }
         }
     
-    def analyze(self, html_content: str, headers: dict = None) -> dict:
+    def analyze(self, html_content, headers: dict = None, encoding: str = None) -> dict:
         """
         Analiza el HTML y headers para detectar tecnologías
         
         Args:
-            html_content: Contenido HTML de la página
+            html_content: Contenido HTML de la página (str o bytes)
             headers: Headers HTTP de la respuesta
+            encoding: Encoding de los bytes (lo decodifica lxml)
         
         Returns:
             Diccionario con tecnologías detectadas por categoría
         """
         try:
-            soup = BeautifulSoup(html_content, 'lxml')
+            if isinstance(html_content, bytes):
+                soup = BeautifulSoup(html_content, 'lxml', from_encoding=encoding)
+            else:
+                soup = BeautifulSoup(html_content, 'lxml')
             
             # Convertir HTML a string para búsquedas de patrones
             html_str = str(soup).lower()
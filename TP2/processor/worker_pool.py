@@ -0,0 +1,672 @@
+"""
+Pool de procesos con ciclo de vida administrado para el Servidor B
+
+A diferencia de multiprocessing.Pool:
+- Cada worker se recicla al llegar a max_tasks tareas o si su RSS supera
+  max_rss_mb (Selenium y PIL van acumulando memoria).
+- Si un worker muere a mitad de una tarea (segfault, OOM killer) se
+  detecta al instante por el sentinel del proceso: la tarea se reintenta en
+  un worker nuevo (las tareas de análisis son idempotentes) o falla con
+  WorkerCrashed, en lugar de colgar el .get() hasta el timeout.
+- Una tarea que excede task_timeout mata a su worker (el slot no queda
+  ocupado por un navegador colgado).
+- cancel() descarta una tarea en cola o termina al worker que la está
+  corriendo (SIGTERM: los finally de la tarea cierran el navegador).
+- Cada slot lleva estadísticas (tareas, RSS, reinicios) para el reporte
+  STATUS del protocolo.
+- Un worker recibe tareas recién cuando terminó su initializer (que puede
+  precalentar analizadores y navegador); wait_ready() espera a todo el pool.
+- La cola reparte los workers entre tenants según su peso (weighted fair
+  queuing, ver FairQueue): un lote enorme de un tenant no deja esperando a
+  las tareas de los demás.
+
+Cada slot tiene un thread despachador en el proceso padre que le pasa las
+tareas por un Pipe.
+"""
+import logging
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Tenant de las tareas que no dicen de quién son
+DEFAULT_TENANT = 'default'
+
+
+class WorkerCrashed(Exception):
+    """El worker terminó sin devolver resultado"""
+
+
+class TaskTimeout(Exception):
+    """La tarea excedió task_timeout (su worker fue terminado)"""
+
+
+class TaskCancelled(Exception):
+    """La tarea se canceló mientras corría (su worker fue terminado)"""
+
+
+def current_rss_mb() -> float:
+    """RSS actual del proceso en MB (/proc; pico de getrusage si no hay /proc)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _exit_on_sigterm(signum, frame):
+    # SystemExit no lo atrapan los 'except Exception' de las tareas: corren
+    # los finally (driver.quit() de Selenium) y el worker termina
+    raise SystemExit(128 + signum)
+
+
+def _worker_main(conn, initializer: Optional[Callable], initargs: Tuple):
+    """Loop del proceso worker: recibir (func, args), responder (ok, resultado, rss)"""
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    
+    started = time.perf_counter()
+    if initializer is not None:
+        initializer(*initargs)
+    
+    # Aviso de listo: (True, segundos del initializer, rss)
+    conn.send((True, round(time.perf_counter() - started, 3), current_rss_mb()))
+    
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        
+        if task is None:
+            break
+        
+        func, args = task
+        
+        try:
+            result = (True, func(*args))
+        except Exception as e:
+            result = (False, e)
+        
+        try:
+            conn.send(result + (current_rss_mb(),))
+        except Exception as e:
+            # Resultado no serializable
+            conn.send((False, RuntimeError(f"Resultado no serializable: {e}"), current_rss_mb()))
+
+
+class FairQueue:
+    """
+    Cola de tareas con weighted fair queuing entre tenants
+    
+    Start-time fair queuing: cada tarea recibe una marca de inicio
+    max(tiempo virtual, fin de la tarea anterior del tenant) y una de fin
+    inicio + costo / peso. get() entrega la de menor marca de inicio y el
+    tiempo virtual avanza hasta ella. Con todos los tenants ocupados, cada
+    uno recibe workers en proporción a su peso; un tenant que recién llega
+    empieza en el tiempo virtual actual, sin esperar detrás del lote de otro
+    (y sin acumular crédito por el tiempo que estuvo inactivo).
+    
+    Dentro de un tenant las tareas salen en orden de llegada. Thread-safe.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queues: Dict[str, deque] = {}
+        self._finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = 0
+        self._size = 0
+        self._closed = False
+    
+    def put(self, item, tenant: str = DEFAULT_TENANT, weight: float = 1.0, cost: float = 1.0):
+        """
+        Encolar un item
+        
+        Args:
+            item: Lo que devuelve get()
+            tenant: Dueño del item
+            weight: Peso del tenant (> 0; el doble de peso, el doble de workers)
+            cost: Costo relativo del item
+        """
+        with self._cond:
+            start = max(self._virtual_time, self._finish.get(tenant, 0.0))
+            self._finish[tenant] = start + cost / weight
+            self._sequence += 1
+            
+            self._queues.setdefault(tenant, deque()).append((start, self._sequence, item))
+            self._size += 1
+            self._cond.notify()
+    
+    def get(self):
+        """
+        Sacar el item con menor marca de inicio (bloquea si la cola está vacía)
+        
+        Returns:
+            El item, o None si la cola está cerrada y vacía
+        """
+        with self._cond:
+            while self._size == 0:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            
+            tenant = min(self._queues, key=lambda name: self._queues[name][0][:2])
+            queue_ = self._queues[tenant]
+            start, _, item = queue_.popleft()
+            self._size -= 1
+            self._virtual_time = start
+            
+            if not queue_:
+                del self._queues[tenant]
+                # Su próxima tarea empezaría en el tiempo virtual de todos modos
+                if self._finish[tenant] <= self._virtual_time:
+                    del self._finish[tenant]
+            
+            return item
+    
+    def close(self):
+        """Los get() devuelven None al vaciarse la cola"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+    
+    def qsize(self) -> int:
+        return self._size
+    
+    def depths(self) -> Dict[str, int]:
+        """Items en cola por tenant"""
+        with self._cond:
+            return {tenant: len(items) for tenant, items in self._queues.items()}
+
+
+class _Slot:
+    """Un lugar del pool: proceso actual más sus estadísticas"""
+    
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        
+        self.tasks = 0           # Tareas del proceso actual
+        self.total_tasks = 0
+        self.rss_mb = 0.0
+        self.restarts = 0
+        self.recycled = 0
+        self.crashes = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.busy_since: Optional[float] = None
+        
+        # Terminó el initializer del proceso actual (y cuánto tardó)
+        self.ready = False
+        self.init_seconds: Optional[float] = None
+        
+        # Tarea en curso y si se pidió cancelarla
+        self.future: Optional[Future] = None
+        self.cancel_requested = False
+    
+    def to_dict(self) -> Dict:
+        return {
+            'slot': self.index,
+            'pid': self.process.pid if self.process else None,
+            'busy': self.busy_since is not None,
+            'ready': self.ready,
+            'init_seconds': self.init_seconds,
+            'tasks': self.tasks,
+            'total_tasks': self.total_tasks,
+            'rss_mb': round(self.rss_mb, 1),
+            'restarts': self.restarts,
+            'recycled': self.recycled,
+            'crashes': self.crashes,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled
+        }
+
+
+class WorkerPool:
+    """Pool de procesos con reciclado, detección de caídas y reintentos"""
+    
+    def __init__(
+        self,
+        processes: int,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = (),
+        max_tasks: Optional[int] = 100,
+        max_rss_mb: Optional[float] = None,
+        task_timeout: Optional[float] = None,
+        retries: int = 1,
+        init_timeout: Optional[float] = None,
+        on_task_done: Optional[Callable[[str, float, float, str, object, str], None]] = None
+    ):
+        """
+        Args:
+            processes: Cantidad de workers
+            initializer: Función a correr al iniciar cada worker
+            initargs: Argumentos del initializer
+            max_tasks: Tareas por worker antes de reciclarlo (None = sin límite)
+            max_rss_mb: RSS a partir del cual se recicla el worker (None = sin límite)
+            task_timeout: Segundos máximos por tarea (None = sin límite)
+            retries: Reintentos de una tarea si su worker muere
+            init_timeout: Segundos máximos del initializer antes de matar al
+                          worker y arrancar otro (None = sin límite)
+            on_task_done: Callback (nombre de la función, segundos en cola,
+                          segundos corriendo, resultado, context, tenant) al
+                          terminar cada intento; resultado es 'ok', 'error',
+                          'timeout', 'crash' o 'cancelled' y context y tenant
+                          son los de apply_async. Corre en el thread
+                          despachador.
+        """
+        self.processes = processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.task_timeout = task_timeout
+        self.retries = retries
+        self.init_timeout = init_timeout
+        self.on_task_done = on_task_done
+        
+        self._ctx = mp.get_context()
+        self._queue = FairQueue()
+        self._slots = [_Slot(i) for i in range(processes)]
+        self._closed = False
+        
+        # Protege slot.future / slot.cancel_requested / _retrying entre
+        # despachadores y cancel()
+        self._lock = threading.Lock()
+        self._ready_changed = threading.Condition(self._lock)
+        # Futures de tareas caídas que esperan su reintento en la cola
+        self._retrying = set()
+        
+        self._threads = []
+        for slot in self._slots:
+            self._spawn(slot)
+            thread = threading.Thread(
+                target=self._dispatch_loop,
+                args=(slot,),
+                name=f"WorkerPool-{slot.index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+    
+    # ------------------------------------------------------------------
+    # API (compatible con el uso que se hacía de multiprocessing.Pool)
+    # ------------------------------------------------------------------
+    
+    def apply_async(
+        self,
+        func: Callable,
+        args: Tuple = (),
+        retry: bool = True,
+        context=None,
+        tenant: str = DEFAULT_TENANT,
+        weight: float = 1.0
+    ) -> Future:
+        """
+        Encolar una tarea
+        
+        Args:
+            func: Función a nivel de módulo (se envía por pickle)
+            args: Argumentos
+            retry: Si se puede reintentar en otro worker (tarea idempotente)
+            context: Dato opaco que se pasa a on_task_done (ej: span de la
+                     request); no viaja al worker
+            tenant: Dueño de la tarea (reparto de workers, ver FairQueue)
+            weight: Peso del tenant
+        
+        Returns:
+            concurrent.futures.Future con el resultado
+        """
+        if self._closed:
+            raise RuntimeError("WorkerPool cerrado")
+        
+        future = Future()
+        self._queue.put(
+            (func, args, future, self.retries if retry else 0, time.perf_counter(), context, tenant, weight),
+            tenant, weight
+        )
+        return future
+    
+    def apply(self, func: Callable, args: Tuple = (), retry: bool = True):
+        """Ejecutar una tarea y esperar el resultado"""
+        return self.apply_async(func, args, retry).result()
+    
+    def cancel(self, future: Future) -> bool:
+        """
+        Cancelar una tarea
+        
+        Si todavía está en cola no llega a ejecutarse; si está corriendo se
+        termina su worker (el future falla con TaskCancelled y el slot
+        arranca un worker nuevo). Si su worker se cayó y espera el
+        reintento en la cola, el reintento se descarta.
+        
+        Returns:
+            True si la tarea se canceló, False si ya había terminado
+        """
+        if future.cancel():
+            return True
+        
+        with self._lock:
+            for slot in self._slots:
+                if slot.future is future and not slot.cancel_requested:
+                    slot.cancel_requested = True
+                    
+                    if slot.process is not None and slot.process.is_alive():
+                        slot.process.terminate()
+                    return True
+            
+            retrying = future in self._retrying
+            self._retrying.discard(future)
+        
+        # Fuera del lock: los callbacks del future pueden volver a llamar al pool
+        if retrying:
+            future.set_exception(TaskCancelled("Tarea cancelada antes de su reintento"))
+            return True
+        
+        return False
+    
+    def queue_depth(self) -> int:
+        """Tareas esperando un worker libre"""
+        return self._queue.qsize()
+    
+    def queue_depths(self) -> Dict[str, int]:
+        """Tareas esperando un worker, por tenant"""
+        return self._queue.depths()
+    
+    def busy_workers(self) -> int:
+        return sum(1 for slot in self._slots if slot.busy_since is not None)
+    
+    def ready_workers(self) -> int:
+        """Workers con el initializer terminado"""
+        return sum(1 for slot in self._slots if slot.ready)
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que todos los workers terminen su initializer
+        
+        Returns:
+            True si el pool completo está listo antes del timeout
+        """
+        with self._ready_changed:
+            return self._ready_changed.wait_for(
+                lambda: all(slot.ready for slot in self._slots),
+                timeout
+            )
+    
+    def stats(self) -> List[Dict]:
+        """Estadísticas por worker"""
+        return [slot.to_dict() for slot in self._slots]
+    
+    def close(self):
+        """No aceptar más tareas; los workers terminan al vaciar la cola"""
+        if self._closed:
+            return
+        
+        self._closed = True
+        self._queue.close()
+    
+    def join(self, timeout: Optional[float] = None):
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def terminate(self):
+        """Cerrar y matar a los workers sin esperar"""
+        self.close()
+        for slot in self._slots:
+            if slot.process is not None and slot.process.is_alive():
+                slot.process.terminate()
+    
+    # ------------------------------------------------------------------
+    # Procesos
+    # ------------------------------------------------------------------
+    
+    def _spawn(self, slot: _Slot):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.initializer, self.initargs),
+            name=f"Worker-{slot.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        
+        if slot.process is not None:
+            slot.restarts += 1
+        
+        slot.process = process
+        slot.conn = parent_conn
+        slot.tasks = 0
+        slot.rss_mb = 0.0
+        
+        with self._lock:
+            slot.ready = False
+            slot.init_seconds = None
+    
+    def _await_ready(self, slot: _Slot) -> bool:
+        """Esperar el aviso de listo del worker (False si murió o tardó demasiado)"""
+        ready = wait([slot.conn, slot.process.sentinel], timeout=self.init_timeout)
+        
+        if slot.conn not in ready:
+            return False
+        
+        try:
+            _, init_seconds, rss_mb = slot.conn.recv()
+        except (EOFError, OSError):
+            return False
+        
+        slot.rss_mb = rss_mb
+        
+        with self._ready_changed:
+            slot.ready = True
+            slot.init_seconds = init_seconds
+            self._ready_changed.notify_all()
+        
+        return True
+    
+    def _stop(self, slot: _Slot, kill: bool = False):
+        """Terminar el proceso del slot (ordenadamente o a la fuerza)"""
+        process = slot.process
+        
+        if process is None:
+            return
+        
+        if kill:
+            process.terminate()
+        else:
+            try:
+                slot.conn.send(None)
+            except (OSError, EOFError):
+                pass
+        
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        
+        slot.conn.close()
+    
+    def _replace(self, slot: _Slot, reason: str, kill: bool = False):
+        logger.info(f"♻️  Worker {slot.index} (pid {slot.process.pid}) reemplazado: {reason}")
+        self._stop(slot, kill=kill)
+        self._spawn(slot)
+    
+    # ------------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------------
+    
+    def _run_on_slot(self, slot: _Slot, func: Callable, args: Tuple):
+        """
+        Ejecutar una tarea en el worker del slot
+        
+        Returns:
+            (ok, resultado)
+        
+        Raises:
+            WorkerCrashed, TaskTimeout
+        """
+        try:
+            slot.conn.send((func, args))
+        except (OSError, EOFError) as e:
+            raise WorkerCrashed(f"Worker {slot.index} no acepta tareas: {e}")
+        
+        # El sentinel se activa si el proceso termina: no se espera al timeout
+        ready = wait([slot.conn, slot.process.sentinel], timeout=self.task_timeout)
+        
+        if slot.conn in ready:
+            try:
+                ok, result, rss_mb = slot.conn.recv()
+            except (EOFError, OSError):
+                raise WorkerCrashed(f"Worker {slot.index} cerró la conexión")
+            
+            slot.rss_mb = rss_mb
+            return ok, result
+        
+        if not ready:
+            raise TaskTimeout(f"Tarea {getattr(func, '__name__', func)} excedió {self.task_timeout}s")
+        
+        raise WorkerCrashed(
+            f"Worker {slot.index} (pid {slot.process.pid}) terminó con código {slot.process.exitcode}"
+        )
+    
+    def _report(self, func: Callable, wait_seconds: float, run_seconds: float, outcome: str, context, tenant: str):
+        if self.on_task_done is None:
+            return
+        
+        try:
+            self.on_task_done(getattr(func, '__name__', str(func)), wait_seconds, run_seconds, outcome, context, tenant)
+        except Exception as e:
+            logger.warning(f"⚠️  Error en on_task_done: {e}")
+    
+    def _dispatch_loop(self, slot: _Slot):
+        while True:
+            # Un worker nuevo no recibe tareas hasta terminar su initializer
+            while not slot.ready:
+                if self._await_ready(slot):
+                    break
+                
+                slot.crashes += 1
+                logger.error(f"💥 Worker {slot.index} (pid {slot.process.pid}) no terminó su initializer")
+                
+                if self._closed:
+                    self._stop(slot, kill=True)
+                    return
+                
+                time.sleep(1)
+                self._replace(slot, 'initializer fallido', kill=True)
+            
+            item = self._queue.get()
+            
+            if item is None:
+                self._stop(slot)
+                return
+            
+            func, args, future, retries_left, enqueued_at, context, tenant, weight = item
+            
+            # Un reintento vuelve con su future ya en RUNNING (o terminado
+            # por cancel() mientras esperaba en la cola)
+            retry = future.running() or (future.done() and not future.cancelled())
+            if not retry and not future.set_running_or_notify_cancel():
+                continue
+            
+            with self._lock:
+                # Un reintento que ya no está en _retrying lo canceló cancel()
+                skipped = retry and future not in self._retrying
+                self._retrying.discard(future)
+                
+                if not skipped:
+                    slot.future = future
+            
+            if skipped:
+                self._report(func, time.perf_counter() - enqueued_at, 0.0, 'cancelled', context, tenant)
+                continue
+            
+            slot.busy_since = time.time()
+            
+            error = None
+            ok = False
+            started_at = time.perf_counter()
+            
+            try:
+                ok, result = self._run_on_slot(slot, func, args)
+            except (TaskTimeout, WorkerCrashed) as e:
+                error = e
+            finally:
+                slot.busy_since = None
+                
+                with self._lock:
+                    slot.future = None
+                    cancelled = slot.cancel_requested
+                    slot.cancel_requested = False
+                    
+                    # Desde acá hasta que vuelva a salir de la cola, cancel()
+                    # la encuentra en _retrying
+                    if isinstance(error, WorkerCrashed) and not cancelled and retries_left > 0:
+                        self._retrying.add(future)
+            
+            if cancelled:
+                outcome = 'cancelled'
+            elif isinstance(error, TaskTimeout):
+                outcome = 'timeout'
+            elif isinstance(error, WorkerCrashed):
+                outcome = 'crash'
+            else:
+                outcome = 'ok' if ok else 'error'
+            
+            self._report(func, started_at - enqueued_at, time.perf_counter() - started_at, outcome, context, tenant)
+            
+            # Lo terminó cancel(): no es una caída ni se reintenta
+            if cancelled:
+                slot.cancelled += 1
+                future.set_exception(TaskCancelled(f"Tarea {getattr(func, '__name__', func)} cancelada"))
+                self._replace(slot, 'tarea cancelada', kill=True)
+                continue
+            
+            if isinstance(error, TaskTimeout):
+                slot.timeouts += 1
+                future.set_exception(error)
+                self._replace(slot, str(error), kill=True)
+                continue
+            
+            if isinstance(error, WorkerCrashed):
+                slot.crashes += 1
+                logger.error(f"💥 {error}")
+                self._replace(slot, 'caída', kill=True)
+                
+                if retries_left > 0:
+                    logger.info(f"🔁 Reintentando {getattr(func, '__name__', func)} en un worker nuevo")
+                    self._queue.put(
+                        (func, args, future, retries_left - 1, time.perf_counter(), context, tenant, weight),
+                        tenant, weight
+                    )
+                else:
+                    future.set_exception(error)
+                continue
+            
+            slot.tasks += 1
+            slot.total_tasks += 1
+            
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+            
+            # Reciclado por cantidad de tareas o memoria
+            if self.max_tasks and slot.tasks >= self.max_tasks:
+                slot.recycled += 1
+                self._replace(slot, f"{slot.tasks} tareas")
+            elif self.max_rss_mb and slot.rss_mb > self.max_rss_mb:
+                slot.recycled += 1
+                self._replace(slot, f"RSS {slot.rss_mb:.0f} MB > {self.max_rss_mb:.0f} MB")
+
@@ -1,9 +1,18 @@
 from .html_parser import HtmlParser
 from .metadata_extractor import MetadataExtractor
 from .async_http import AsyncHttpClient
+from .crawler import SiteCrawler
+from .link_graph import LinkGraph
+from .robots import RobotsCache
+from .change_detection import PageFingerprint, ChangeTracker
 
 __all__ = [
     'HtmlParser',
     'MetadataExtractor',
-    'AsyncHttpClient'
+    'AsyncHttpClient',
+    'SiteCrawler',
+    'LinkGraph',
+    'RobotsCache',
+    'PageFingerprint',
+    'ChangeTracker'
 ]
\ No newline at end of file
@@ -7,6 +7,8 @@ import asyncio
 import logging
 from typing import Optional, Dict, Tuple
 
+from .encoding import sniff_encoding, decode_html
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,7 +66,10 @@ class AsyncHttpClient:
                 try:
                     async with session.get(url, headers=request_headers, allow_redirects=True) as response:
                         status = response.status
-                        content = await response.text()
+                        # Charset por header/BOM/<meta> (sin chardet)
+                        body = await response.read()
+                        encoding, _ = sniff_encoding(body, response.headers.get('Content-Type'))
+                        content = decode_html(body, encoding)
                         response_headers = dict(response.headers)
                         
                         logger.info(f"✅ {url} - Status: {status} - Size: {len(content)} bytes")
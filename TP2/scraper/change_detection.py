@@ -0,0 +1,396 @@
+"""
+Detección de cambios entre fetches de una misma URL
+
+Cada fetch deja una huella compacta de la página (PageFingerprint):
+- hash del texto visible normalizado y su SimHash de 64 bits (dos textos
+  casi iguales, por ejemplo con la fecha o un contador distintos, difieren
+  en pocos bits);
+- un hash por sección: head (título y recursos del <head>), meta, links,
+  images y text;
+- lo mínimo para armar un diff estructural: título, meta tags y un hash
+  corto por link e imagen.
+
+ChangeTracker guarda en Redis la última huella de cada URL y, por tarea del
+Servidor B, el resultado junto con las secciones de las que salió. En el
+fetch siguiente solo se reprocesan las tareas cuyas secciones cambiaron
+(ver TASK_SECTIONS); las demás reusan el resultado guardado. Los cambios se
+publican como evento (pub/sub de Redis) con el diff.
+"""
+import hashlib
+import logging
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from common import json_codec
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_VERSION = 1
+
+SECTIONS = ('head', 'meta', 'links', 'images', 'text')
+
+# Secciones de la página de las que depende cada tarea del Servidor B.
+# None = no se reusa nunca: TechnologyDetector busca patrones en todo el
+# HTML (clases, scripts inline y del body) y en los headers de la
+# respuesta, que la huella no cubre; además es la tarea más liviana
+TASK_SECTIONS = {
+    'screenshot': ('head', 'images', 'text'),
+    'performance': ('head', 'images'),
+    'images': ('images',),
+    'technologies': None,
+    'seo': ('head', 'meta', 'links', 'images', 'text')
+}
+
+# Bits de diferencia del SimHash hasta los que el texto cuenta como el mismo
+DEFAULT_SIMHASH_THRESHOLD = 3
+
+# Palabras por shingle del SimHash
+SHINGLE_SIZE = 3
+
+_WORDS = re.compile(r'\w+', re.UNICODE)
+
+_MASK64 = (1 << 64) - 1
+
+
+def _digest(value: str, size: int = 8) -> str:
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=size).hexdigest()
+
+
+def _section_hash(items: Iterable[str]) -> str:
+    return _digest('\n'.join(items))
+
+
+def normalize_text(text: str) -> str:
+    """Texto en minúsculas con los espacios colapsados"""
+    return ' '.join(_WORDS.findall(text.casefold()))
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """
+    SimHash de 64 bits del texto (shingles de shingle_size palabras)
+    
+    Cada bit del resultado es 1 si la mayoría de los shingles tiene ese bit
+    en 1. Cada palabra distinta se hashea una sola vez y el hash de un
+    shingle combina los de sus palabras rotados según la posición (el orden
+    cuenta); los bits se cuentan por columna con slices de un solo string.
+    """
+    words = normalize_text(text).split()
+    if not words:
+        return 0
+    
+    hashes = {
+        word: int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'big')
+        for word in set(words)
+    }
+    sequence = [hashes[word] for word in words]
+    
+    count = max(1, len(sequence) - shingle_size + 1)
+    shingles = sequence[:count]
+    for position in range(1, min(shingle_size, len(sequence))):
+        shift = position * 64 // shingle_size
+        shingles = [
+            shingle ^ (((value << shift) | (value >> (64 - shift))) & _MASK64)
+            for shingle, value in zip(shingles, sequence[position:position + count])
+        ]
+    
+    bits = ''.join(format(shingle, '064b') for shingle in shingles)
+    half = len(shingles) / 2
+    
+    return int(''.join('1' if bits[i::64].count('1') > half else '0' for i in range(64)), 2)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _flat_meta(metadata: dict) -> Dict[str, str]:
+    """{'basic': {'description': ...}, 'open_graph': {...}} -> {'description': ..., 'og:title': ...}"""
+    prefixes = {'basic': '', 'open_graph': 'og:', 'twitter': 'twitter:'}
+    return {
+        f"{prefixes.get(group, group + ':')}{name}": value
+        for group, values in sorted((metadata or {}).items())
+        for name, value in sorted(values.items())
+    }
+
+
+class PageFingerprint:
+    """Huella de una página para compararla con el fetch siguiente"""
+    
+    def __init__(
+        self,
+        text_hash: str,
+        simhash: int,
+        sections: Dict[str, str],
+        title: str = '',
+        meta: Dict[str, str] = None,
+        links: List[str] = None,
+        images: List[str] = None,
+        word_count: int = 0,
+        created_at: float = None
+    ):
+        self.text_hash = text_hash
+        self.simhash = simhash
+        self.sections = sections
+        self.title = title
+        self.meta = meta or {}
+        self.links = links or []
+        self.images = images or []
+        self.word_count = word_count
+        self.created_at = created_at if created_at is not None else time.time()
+    
+    @classmethod
+    def build(cls, text: str, head: List[str], scraping_data: dict) -> 'PageFingerprint':
+        """
+        Huella a partir del texto visible, los recursos del <head> y lo que
+        extrajo HtmlParser
+        
+        Args:
+            text: Texto visible de la página
+            head: Recursos del <head> (ver HtmlParser._head_resources)
+            scraping_data: Resultado de HtmlParser.parse()
+        """
+        normalized = normalize_text(text)
+        title = scraping_data.get('basic', {}).get('title', '')
+        meta = _flat_meta(scraping_data.get('metadata'))
+        
+        links = sorted({_digest(f"{link['url']} {link.get('text', '')}", 4) for link in scraping_data.get('links', [])})
+        images = sorted({_digest(f"{image['url']} {image.get('alt', '')}", 4) for image in scraping_data.get('images', [])})
+        text_hash = _digest(normalized)
+        
+        sections = {
+            'head': _section_hash([title] + sorted(head)),
+            'meta': _section_hash(f"{name}={value}" for name, value in meta.items()),
+            'links': _section_hash(links),
+            'images': _section_hash(images),
+            'text': text_hash
+        }
+        
+        return cls(
+            text_hash=text_hash,
+            simhash=simhash(normalized),
+            sections=sections,
+            title=title,
+            meta=meta,
+            links=links,
+            images=images,
+            word_count=len(normalized.split())
+        )
+    
+    def to_dict(self) -> dict:
+        return {
+            'version': FINGERPRINT_VERSION,
+            'text_hash': self.text_hash,
+            'simhash': format(self.simhash, '016x'),
+            'sections': self.sections,
+            'title': self.title,
+            'meta': self.meta,
+            'links': self.links,
+            'images': self.images,
+            'word_count': self.word_count,
+            'created_at': self.created_at
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PageFingerprint':
+        return cls(
+            text_hash=data['text_hash'],
+            simhash=int(data['simhash'], 16),
+            sections=data['sections'],
+            title=data.get('title', ''),
+            meta=data.get('meta'),
+            links=data.get('links'),
+            images=data.get('images'),
+            word_count=data.get('word_count', 0),
+            created_at=data.get('created_at')
+        )
+
+
+def _item_diff(old: List[str], new: List[str], urls: Dict[str, str]) -> dict:
+    old_set, new_set = set(old), set(new)
+    return {
+        'added': sorted(urls[item] for item in new_set - old_set if item in urls),
+        'removed': len(old_set - new_set)
+    }
+
+
+def compare(
+    old: PageFingerprint,
+    new: PageFingerprint,
+    scraping_data: dict = None,
+    threshold: int = DEFAULT_SIMHASH_THRESHOLD
+) -> dict:
+    """
+    Diff estructural entre dos huellas de la misma URL
+    
+    El texto cuenta como cambiado solo si el SimHash difiere en más de
+    threshold bits: un texto casi igual no reprocesa nada (aparece en 'text'
+    con changed=True pero sin estar en 'sections').
+    
+    Args:
+        old: Huella anterior
+        new: Huella actual
+        scraping_data: Datos del fetch actual (para listar links e imágenes
+                       nuevas por URL; sin esto solo se cuentan)
+        threshold: Bits de diferencia tolerados en el SimHash
+    
+    Returns:
+        dict con 'changed', 'sections' (las que cambiaron) y el detalle por
+        sección
+    """
+    distance = hamming(old.simhash, new.simhash)
+    text_changed = old.text_hash != new.text_hash
+    
+    sections = [
+        section for section in SECTIONS
+        if section != 'text' and old.sections.get(section) != new.sections.get(section)
+    ]
+    if text_changed and distance > threshold:
+        sections.append('text')
+    
+    diff = {
+        'changed': bool(sections),
+        'sections': sections,
+        'previous_fetch': old.created_at,
+        'text': {
+            'changed': text_changed,
+            'near_duplicate': text_changed and distance <= threshold,
+            'hamming_distance': distance,
+            'similarity': round(1 - distance / 64, 3),
+            'word_count': {'old': old.word_count, 'new': new.word_count}
+        }
+    }
+    
+    if 'head' in sections:
+        diff['head'] = {
+            'title': {'old': old.title, 'new': new.title} if old.title != new.title else None,
+            'resources_changed': old.sections['head'] != new.sections['head'] and old.title == new.title
+        }
+    
+    if 'meta' in sections:
+        diff['meta'] = {
+            'added': {name: value for name, value in new.meta.items() if name not in old.meta},
+            'removed': sorted(name for name in old.meta if name not in new.meta),
+            'changed': {
+                name: {'old': old.meta[name], 'new': value}
+                for name, value in new.meta.items()
+                if name in old.meta and old.meta[name] != value
+            }
+        }
+    
+    scraping_data = scraping_data or {}
+    
+    if 'links' in sections:
+        urls = {
+            _digest(f"{link['url']} {link.get('text', '')}", 4): link['url']
+            for link in scraping_data.get('links', [])
+        }
+        diff['links'] = _item_diff(old.links, new.links, urls)
+    
+    if 'images' in sections:
+        urls = {
+            _digest(f"{image['url']} {image.get('alt', '')}", 4): image['url']
+            for image in scraping_data.get('images', [])
+        }
+        diff['images'] = _item_diff(old.images, new.images, urls)
+    
+    return diff
+
+
+class ChangeTracker:
+    """
+    Última huella y resultados del Servidor B por URL, en Redis
+    
+    Usa los blobs de RedisCache (JSON comprimido con zlib): un registro por
+    URL con la huella y, por tarea, {'result', 'sections', 'simhash',
+    'render_profile'}.
+    """
+    
+    def __init__(
+        self,
+        cache,
+        ttl: int = 7 * 86400,
+        channel: Optional[str] = 'page-changes',
+        threshold: int = DEFAULT_SIMHASH_THRESHOLD
+    ):
+        """
+        Args:
+            cache: RedisCache
+            ttl: Segundos que se recuerda una URL sin volver a verla
+            channel: Canal de pub/sub donde publicar los cambios (None = no publicar)
+            threshold: Bits de diferencia tolerados en el SimHash del texto
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.channel = channel
+        self.threshold = threshold
+    
+    @staticmethod
+    def _name(url: str) -> str:
+        return f"changes:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+    
+    def load(self, url: str) -> Optional[dict]:
+        """Registro guardado de la URL (None si no hay o es de otra versión)"""
+        data = self.cache.get_blob(self._name(url))
+        if not data:
+            return None
+        
+        try:
+            record = json_codec.loads(zlib.decompress(data))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"⚠️  Registro de cambios inválido para {url}: {e}")
+            return None
+        
+        if record.get('fingerprint', {}).get('version') != FINGERPRINT_VERSION:
+            return None
+        
+        record['fingerprint'] = PageFingerprint.from_dict(record['fingerprint'])
+        return record
+    
+    def save(self, url: str, fingerprint: PageFingerprint, tasks: Dict[str, dict]) -> bool:
+        """Guardar la huella actual y los resultados por tarea"""
+        record = {'fingerprint': fingerprint.to_dict(), 'tasks': tasks}
+        return self.cache.set_blob(self._name(url), zlib.compress(json_codec.dumps(record)), ttl=self.ttl)
+    
+    def reusable(self, entry: Optional[dict], task: str, fingerprint: PageFingerprint, render_profile: str = None) -> bool:
+        """Si el resultado guardado de la tarea sirve para la página actual"""
+        if not entry or TASK_SECTIONS[task] is None or entry.get('render_profile') != render_profile:
+            return False
+        
+        for section in TASK_SECTIONS[task]:
+            if section == 'text':
+                if hamming(int(entry['simhash'], 16), fingerprint.simhash) > self.threshold:
+                    return False
+            elif entry['sections'].get(section) != fingerprint.sections[section]:
+                return False
+        
+        return True
+    
+    @staticmethod
+    def task_entry(result, fingerprint: PageFingerprint, render_profile: str = None) -> dict:
+        """Resultado de una tarea con las secciones de las que salió"""
+        return {
+            'result': result,
+            'sections': fingerprint.sections,
+            'simhash': format(fingerprint.simhash, '016x'),
+            'render_profile': render_profile
+        }
+    
+    def publish(self, url: str, diff: dict) -> int:
+        """
+        Publicar un evento de cambio en el canal
+        
+        Returns:
+            Suscriptores que lo recibieron
+        """
+        if not self.channel:
+            return 0
+        
+        event = {'type': 'page_changed', 'url': url, 'timestamp': time.time(), 'diff': diff}
+        
+        try:
+            return self.cache.redis_client.publish(self.channel, json_codec.dumps(event))
+        except Exception as e:
+            logger.error(f"⚠️  Error publicando cambio de {url}: {e}")
+            return 0
@@ -0,0 +1,226 @@
+"""
+Crawler BFS acotado dentro de un mismo sitio
+
+Usa los links que extrae HtmlParser para recorrer el sitio por niveles
+(depth) hasta max_pages páginas. Las URLs ya encoladas se descartan con un
+Bloom filter y cada página se emite apenas termina (async generator), así
+el servidor puede streamear los resultados.
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urlparse, urlunparse
+
+from common.bloom_filter import BloomFilter
+from .link_graph import LinkGraph
+
+logger = logging.getLogger(__name__)
+
+# Extensiones que no son páginas HTML (no se encolan)
+SKIPPED_EXTENSIONS = (
+    '.pdf', '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg', '.iso',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.avif',
+    '.mp3', '.mp4', '.webm', '.mov', '.avi', '.css', '.js', '.json', '.xml',
+    '.woff', '.woff2', '.ttf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx'
+)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Normalizar una URL para deduplicar (sin fragmento, host en minúsculas,
+    sin puerto por defecto)
+    
+    Returns:
+        URL normalizada o None si no es http(s)
+    """
+    url, _ = urldefrag(url.strip())
+    parsed = urlparse(url)
+    
+    if parsed.scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+    
+    netloc = parsed.hostname.lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS[parsed.scheme]:
+        netloc = f"{netloc}:{parsed.port}"
+    
+    return urlunparse((parsed.scheme, netloc, parsed.path or '/', parsed.params, parsed.query, ''))
+
+
+def _strip_www(host: str) -> str:
+    return host[4:] if host.startswith('www.') else host
+
+
+def same_site(url: str, site: str) -> bool:
+    """Si la URL pertenece al sitio (mismo host, con o sin 'www.')"""
+    return _strip_www(urlparse(url).netloc) == _strip_www(site)
+
+
+def is_crawlable(url: str) -> bool:
+    """Descarta recursos que no son páginas (por extensión)"""
+    return not urlparse(url).path.lower().endswith(SKIPPED_EXTENSIONS)
+
+
+# fetch_page(url) -> dict con 'status_code', 'scraping_data' y opcional 'cache'
+FetchPage = Callable[[str], Awaitable[Dict]]
+
+
+class SiteCrawler:
+    """Crawl BFS de un sitio con visited set compacto y grafo de links"""
+    
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        max_depth: int = 2,
+        max_pages: int = 50,
+        max_concurrent: int = 5,
+        error_rate: float = 0.001,
+        url_filter: Optional[Callable[[str], bool]] = None
+    ):
+        """
+        Args:
+            fetch_page: Corrutina que descarga y parsea una página
+                        (el servidor aplica ahí rate limit y caché)
+            max_depth: Profundidad máxima desde la URL raíz
+            max_pages: Máximo de páginas a visitar
+            max_concurrent: Páginas descargándose en paralelo
+            error_rate: Falsos positivos del Bloom filter
+            url_filter: Predicado extra para encolar una URL (ej: robots.txt)
+        """
+        self.fetch_page = fetch_page
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_concurrent = max_concurrent
+        self.error_rate = error_rate
+        self.url_filter = url_filter
+        
+        self.graph = LinkGraph()
+        self.filtered = 0
+    
+    def _split_links(self, scraping_data: Optional[Dict], site: str) -> Tuple[List[str], int]:
+        """
+        Separar links internos (normalizados) de externos
+        
+        Returns:
+            (links internos, cantidad de externos)
+        """
+        internal = []
+        external = 0
+        
+        for link in (scraping_data or {}).get('links', []):
+            url = normalize_url(link.get('url', ''))
+            
+            if url is None:
+                continue
+            
+            if same_site(url, site):
+                if is_crawlable(url):
+                    internal.append(url)
+            else:
+                external += 1
+        
+        return internal, external
+    
+    def _allowed(self, url: str) -> bool:
+        """Aplicar url_filter contando las URLs descartadas"""
+        if self.url_filter is None or self.url_filter(url):
+            return True
+        
+        self.filtered += 1
+        return False
+    
+    async def _visit(self, url: str, depth: int) -> Dict:
+        """Descargar una página sin propagar errores"""
+        start = time.perf_counter()
+        
+        try:
+            page = await self.fetch_page(url)
+        except Exception as e:
+            logger.warning(f"⚠️  Crawl: error en {url}: {e}")
+            page = {'status_code': None, 'scraping_data': None, 'error': str(e)}
+        
+        page['url'] = url
+        page['depth'] = depth
+        page['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        
+        return page
+    
+    async def crawl(self, root_url: str, seeds: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """
+        Recorrer el sitio emitiendo cada página al terminar
+        
+        Args:
+            root_url: URL inicial
+            seeds: URLs extra de nivel 0 (ej: del sitemap)
+        
+        Yields:
+            dict por página ('type': 'page')
+        """
+        root = normalize_url(root_url)
+        
+        if root is None:
+            raise ValueError(f"URL no válida para crawl: {root_url}")
+        
+        site = urlparse(root).netloc
+        
+        # Capacidad holgada: cada página aporta muchos links descubiertos
+        visited = BloomFilter(capacity=max(1000, self.max_pages * 100), error_rate=self.error_rate)
+        self.graph = LinkGraph()
+        self.filtered = 0
+        
+        frontier = []
+        for url in [root] + [normalize_url(seed) for seed in seeds or []]:
+            if url and same_site(url, site) and self._allowed(url) and visited.add(url):
+                frontier.append(url)
+                self.graph.node(url)
+        
+        pages_visited = 0
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        async def bounded_visit(url: str, depth: int) -> Dict:
+            async with semaphore:
+                return await self._visit(url, depth)
+        
+        for depth in range(self.max_depth + 1):
+            if not frontier or pages_visited >= self.max_pages:
+                break
+            
+            batch = frontier[:self.max_pages - pages_visited]
+            pages_visited += len(batch)
+            next_frontier = []
+            
+            logger.info(f"🕸️  Crawl nivel {depth}: {len(batch)} páginas")
+            
+            tasks = [asyncio.ensure_future(bounded_visit(url, depth)) for url in batch]
+            
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    page = await next_done
+                    links, external = self._split_links(page.get('scraping_data'), site)
+                    
+                    self.graph.add_page(page['url'], page.get('status_code'), links, external)
+                    
+                    if depth < self.max_depth:
+                        for link in links:
+                            # Las bloqueadas también se marcan: se cuentan una vez
+                            if visited.add(link) and self._allowed(link):
+                                next_frontier.append(link)
+                    
+                    page['type'] = 'page'
+                    page['internal_links'] = len(set(links))
+                    page['external_links'] = external
+                    
+                    yield page
+            finally:
+                # El cliente puede cortar el stream a mitad de un nivel
+                for task in tasks:
+                    task.cancel()
+            
+            frontier = next_frontier
+        
+        logger.info(
+            f"✅ Crawl de {root} terminado: {pages_visited} páginas, "
+            f"{len(self.graph)} URLs descubiertas (visited set: {visited.size_bytes} bytes)"
+        )
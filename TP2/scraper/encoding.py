@@ -0,0 +1,103 @@
+"""
+Detección del charset de una página HTML sin decodificarla
+
+Se sigue el orden del estándar HTML: BOM, charset del header Content-Type y
+<meta charset> en los primeros KB. El HTML se mantiene en bytes y se le
+pasa a lxml junto con el encoding, así la página se decodifica una sola vez
+(en el parser) y no hace falta que aiohttp adivine con chardet.
+"""
+import codecs
+import re
+from typing import Optional, Tuple
+
+# Bytes donde se busca <meta charset> (el estándar usa 1024; hay sitios que
+# lo ponen más abajo)
+PRESCAN_BYTES = 4096
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be')
+)
+
+# Etiquetas que en la práctica son windows-1252 (los navegadores las tratan así)
+WINDOWS_1252_ALIASES = ('latin-1', 'iso8859-1', 'ascii')
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+# Cubre <meta charset="x"> y <meta http-equiv="Content-Type" content="...; charset=x">
+_META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+
+def normalize_encoding(label: Optional[str]) -> Optional[str]:
+    """
+    Normalizar una etiqueta de charset
+    
+    Returns:
+        Nombre del encoding o None si Python no lo conoce
+    """
+    if not label:
+        return None
+    
+    label = label.strip().lower()
+    
+    try:
+        name = codecs.lookup(label).name
+    except LookupError:
+        return None
+    
+    if name in WINDOWS_1252_ALIASES or name == 'cp1252':
+        return 'windows-1252'
+    
+    return 'utf-8' if name == 'utf-8' else label
+
+
+def _looks_like_utf8(prefix: bytes) -> bool:
+    """Si el prefijo es UTF-8 válido (tolera un carácter cortado al final)"""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def sniff_encoding(body: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Detectar el encoding de un documento HTML
+    
+    Args:
+        body: HTML en bytes
+        content_type: Header Content-Type de la respuesta
+    
+    Returns:
+        (encoding, origen) con origen 'bom', 'header', 'meta' o 'default'
+    """
+    for bom, encoding in BOMS:
+        if body.startswith(bom):
+            return encoding, 'bom'
+    
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        encoding = normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding, 'header'
+    
+    prefix = body[:PRESCAN_BYTES]
+    
+    match = _META_CHARSET.search(prefix)
+    if match:
+        encoding = normalize_encoding(match.group(1).decode('ascii', errors='ignore'))
+        
+        # Si el meta se pudo leer como ASCII el documento no es UTF-16
+        if encoding and encoding.startswith('utf-16'):
+            encoding = 'utf-8'
+        
+        if encoding:
+            return encoding, 'meta'
+    
+    return ('utf-8' if _looks_like_utf8(prefix) else 'windows-1252'), 'default'
+
+
+def decode_html(body: bytes, encoding: str) -> str:
+    """Decodificar el HTML (solo donde hace falta un str)"""
+    return body.decode(encoding, errors='replace')
@@ -3,8 +3,11 @@ Parser HTML para extraer información estructurada de páginas web
 """
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from typing import List, Optional, Union
 import logging
 
+from .change_detection import PageFingerprint
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,27 +25,48 @@ class HtmlParser:
     def __init__(self):
         self.parser = 'lxml'  # Usar lxml para mejor performance
     
-    def parse(self, html_content: str, base_url: str) -> dict:
+    def parse(
+        self,
+        html_content: Union[str, bytes],
+        base_url: str,
+        encoding: Optional[str] = None,
+        fingerprint: bool = False
+    ) -> dict:
         """
         Parsea contenido HTML y extrae información estructurada
         
         Args:
-            html_content: Contenido HTML como string
+            html_content: Contenido HTML (str o bytes sin decodificar)
             base_url: URL base para resolver links relativos
+            encoding: Encoding de los bytes (lo decodifica lxml)
+            fingerprint: Agregar 'fingerprint' (PageFingerprint) para la
+                         detección de cambios
         
         Returns:
             Diccionario con datos extraídos
         """
         try:
-            soup = BeautifulSoup(html_content, self.parser)
+            if isinstance(html_content, bytes):
+                soup = BeautifulSoup(html_content, self.parser, from_encoding=encoding)
+            else:
+                soup = BeautifulSoup(html_content, self.parser)
             
-            return {
-                'basic': self._extract_basic_info(soup),
+            # Antes de sacar los <script> del árbol para el texto visible
+            head = self._head_resources(soup) if fingerprint else None
+            text = self._visible_text(soup)
+            
+            data = {
+                'basic': self._extract_basic_info(soup, text),
                 'structure': self._extract_structure(soup),
                 'links': self._extract_links(soup, base_url),
                 'images': self._extract_images(soup, base_url),
                 'metadata': self._extract_metadata(soup)
             }
+            
+            if fingerprint:
+                data['fingerprint'] = PageFingerprint.build(text, head, data)
+            
+            return data
         
         except Exception as e:
             logger.error(f"Error parseando HTML: {e}")
@@ -55,17 +79,41 @@ class HtmlParser:
                 'metadata': {}
             }
     
-    def _extract_basic_info(self, soup: BeautifulSoup) -> dict:
+    @staticmethod
+    def _visible_text(soup: BeautifulSoup) -> str:
+        """Texto visible de la página (saca <script> y <style> del árbol)"""
+        for script in soup(['script', 'style']):
+            script.decompose()
+        
+        return soup.get_text(separator=' ', strip=True)
+    
+    @staticmethod
+    def _head_resources(soup: BeautifulSoup) -> List[str]:
+        """
+        Recursos del <head> que cambian cómo se ve la página: scripts
+        externos, <link> (CSS, fuentes, canonical) y <base>
+        
+        Los scripts inline no cuentan: suelen traer nonces o timestamps
+        que cambian en cada fetch.
+        """
+        head = soup.head
+        if head is None:
+            return []
+        
+        resources = [f"script {tag['src']}" for tag in head.find_all('script', src=True)]
+        resources += [
+            f"link {' '.join(tag.get('rel') or [])} {tag['href']}"
+            for tag in head.find_all('link', href=True)
+        ]
+        resources += [f"base {tag['href']}" for tag in head.find_all('base', href=True)]
+        return resources
+    
+    def _extract_basic_info(self, soup: BeautifulSoup, text: str) -> dict:
         """Extrae información básica de la página"""
         try:
             title = soup.find('title')
             title_text = title.get_text(strip=True) if title else 'Sin título'
             
-            # Extraer todo el texto visible
-            for script in soup(['script', 'style']):
-                script.decompose()
-            
-            text = soup.get_text(separator=' ', strip=True)
             words = text.split()
             
             return {
@@ -133,7 +181,7 @@ class HtmlParser:
         try:
             images = []
             
-            for img in soup.find_all('img'):
+            for position, img in enumerate(soup.find_all('img')):
                 src = img.get('src', '').strip()
                 
                 if not src:
@@ -142,11 +190,20 @@ class HtmlParser:
                 # Convertir a URL absoluta
                 absolute_url = urljoin(base_url, src)
                 
-                images.append({
+                image = {
                     'url': absolute_url,
                     'alt': img.get('alt', ''),
-                    'title': img.get('title', '')
-                })
+                    'title': img.get('title', ''),
+                    # Hints para priorizar thumbnails en el Servidor B
+                    'position': position,
+                    'width': self._parse_dimension(img.get('width')),
+                    'height': self._parse_dimension(img.get('height'))
+                }
+                
+                if img.get('loading'):
+                    image['loading'] = img.get('loading').lower()
+                
+                images.append(image)
             
             return images[:50]  # Limitar a 50 imágenes
         
@@ -154,6 +211,15 @@ class HtmlParser:
             logger.error(f"Error extrayendo imágenes: {e}")
             return []
     
+    @staticmethod
+    def _parse_dimension(value):
+        """Convierte un atributo width/height ('300', '300px') a entero"""
+        if not value:
+            return None
+        
+        digits = ''.join(ch for ch in str(value).strip().split('.')[0] if ch.isdigit())
+        return int(digits) if digits else None
+    
     def _extract_metadata(self, soup: BeautifulSoup) -> dict:
         """Extrae metadatos (meta tags, Open Graph, Twitter Cards)"""
         try:
@@ -0,0 +1,175 @@
+"""
+Verificador de links rotos (HEAD concurrente con fallback a GET con Range)
+
+Reusa la sesión aiohttp del servidor, limita la concurrencia por dominio y
+guarda el status de cada link en Redis con su propio TTL: los links comunes
+(header, footer, nav) se verifican una sola vez para todo el sitio.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urldefrag, urlparse
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Status que indican acceso restringido (el link existe, no está roto)
+RESTRICTED_STATUSES = (401, 403, 429)
+
+# Status con los que se reintenta con GET (servidores que no soportan HEAD)
+HEAD_FALLBACK_STATUSES = (400, 403, 405, 501)
+
+
+def is_broken(status: Optional[int]) -> bool:
+    """Si un status indica link roto (None = error de red)"""
+    if status is None:
+        return True
+    return status >= 400 and status not in RESTRICTED_STATUSES
+
+
+class LinkChecker:
+    """Verifica el estado HTTP de una lista de links"""
+    
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        cache=None,
+        max_concurrent: int = 20,
+        per_domain_limit: int = 4,
+        timeout: int = 10,
+        ttl: int = 86400
+    ):
+        """
+        Args:
+            session: Sesión aiohttp compartida
+            cache: RedisCache para los status (None = sin caché)
+            max_concurrent: Requests simultáneos en total
+            per_domain_limit: Requests simultáneos por dominio
+            timeout: Timeout por link en segundos
+            ttl: TTL del status en caché (los errores de red duran menos)
+        """
+        self.session = session
+        self.cache = cache
+        self.per_domain_limit = per_domain_limit
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.ttl = ttl
+        
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+    
+    def _domain_semaphore(self, url: str) -> asyncio.Semaphore:
+        domain = urlparse(url).netloc
+        
+        if domain not in self._domains:
+            self._domains[domain] = asyncio.Semaphore(self.per_domain_limit)
+        
+        return self._domains[domain]
+    
+    async def _probe(self, url: str) -> Dict:
+        """
+        HEAD y, si el servidor no lo soporta, GET del primer byte
+        
+        Returns:
+            dict con 'status', 'method' y opcional 'error'
+        """
+        async with self._global, self._domain_semaphore(url):
+            try:
+                async with self.session.head(url, allow_redirects=True, timeout=self.timeout) as response:
+                    status = response.status
+                
+                if status not in HEAD_FALLBACK_STATUSES:
+                    return {'status': status, 'method': 'HEAD'}
+                
+                async with self.session.get(
+                    url,
+                    headers={'Range': 'bytes=0-0'},
+                    allow_redirects=True,
+                    timeout=self.timeout
+                ) as response:
+                    return {'status': response.status, 'method': 'GET'}
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return {'status': None, 'method': 'HEAD', 'error': type(e).__name__}
+    
+    async def check(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Verificar links (sin fragmento, deduplicados)
+        
+        Args:
+            urls: URLs absolutas
+        
+        Returns:
+            dict url -> {'status', 'broken', 'method', 'cached', 'error'?}
+        """
+        unique = []
+        seen = set()
+        
+        for url in urls:
+            url, _ = urldefrag(url)
+            if urlparse(url).scheme in ('http', 'https') and url not in seen:
+                seen.add(url)
+                unique.append(url)
+        
+        results = self.cache.get_link_statuses(unique) if self.cache else {}
+        for result in results.values():
+            result['cached'] = True
+        
+        pending = [url for url in unique if url not in results]
+        
+        if pending:
+            probes = await asyncio.gather(*(self._probe(url) for url in pending))
+            fresh = {}
+            
+            for url, probe in zip(pending, probes):
+                probe['broken'] = is_broken(probe['status'])
+                fresh[url] = probe
+            
+            if self.cache:
+                self.cache.set_link_statuses(fresh, self.ttl)
+            
+            for url, probe in fresh.items():
+                results[url] = dict(probe, cached=False)
+        
+        return results
+    
+    async def health_report(self, urls: Iterable[str]) -> Dict:
+        """
+        Verificar links y resumir
+        
+        Returns:
+            dict con 'checked', 'broken', 'restricted', 'from_cache',
+            'elapsed_ms' y 'results' (url -> status/broken)
+        """
+        start = time.perf_counter()
+        results = await self.check(urls)
+        
+        broken = [
+            {'url': url, 'status': result['status'], 'error': result.get('error')}
+            for url, result in results.items() if result['broken']
+        ]
+        
+        report = {
+            'checked': len(results),
+            'broken': broken,
+            'restricted': sum(1 for r in results.values() if r['status'] in RESTRICTED_STATUSES),
+            'from_cache': sum(1 for r in results.values() if r['cached']),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+            'results': {
+                url: {'status': result['status'], 'broken': result['broken']}
+                for url, result in results.items()
+            }
+        }
+        
+        logger.info(
+            f"🔗 Links verificados: {report['checked']} "
+            f"({len(broken)} rotos, {report['from_cache']} desde caché)"
+        )
+        
+        return report
+
+
+def link_urls(links: List[Dict]) -> List[str]:
+    """URLs de la lista de links de HtmlParser"""
+    return [link['url'] for link in links if link.get('url')]
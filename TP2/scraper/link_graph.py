@@ -0,0 +1,204 @@
+"""
+Grafo de links de un sitio (resultado del crawl)
+
+Los nodos se guardan como índices enteros y las aristas en formato CSR
+(offsets + targets en arrays de 32 bits), que se serializa comprimido con
+zlib para persistirlo en Redis.
+"""
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+# Cabecera del formato serializado: magic + versión
+GRAPH_MAGIC = b'LGR1'
+
+
+def _to_le(values: array) -> bytes:
+    """Bytes little-endian de un array (independiente de la plataforma)"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class LinkGraph:
+    """Grafo dirigido de páginas de un sitio"""
+    
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.urls: List[str] = []
+        self._out: List[Optional[array]] = []
+        # -1 = descubierta sin visitar, 0 = error de red, >0 = status HTTP
+        self.status = array('h')
+        self.external_out = array('I')
+    
+    def node(self, url: str) -> int:
+        """Índice del nodo (lo crea si no existe)"""
+        node_id = self._ids.get(url)
+        
+        if node_id is None:
+            node_id = len(self.urls)
+            self._ids[url] = node_id
+            self.urls.append(url)
+            self._out.append(None)
+            self.status.append(-1)
+            self.external_out.append(0)
+        
+        return node_id
+    
+    def add_page(self, url: str, status: Optional[int], links: Iterable[str], external: int = 0):
+        """
+        Registrar una página visitada y sus links internos
+        
+        Args:
+            url: URL de la página
+            status: Status HTTP (None si falló la conexión)
+            links: Links internos (ya normalizados)
+            external: Cantidad de links externos
+        """
+        source = self.node(url)
+        targets = array('I', sorted({self.node(link) for link in links if link != url}))
+        
+        self._out[source] = targets
+        self.status[source] = status or 0
+        self.external_out[source] = external
+    
+    def __len__(self) -> int:
+        return len(self.urls)
+    
+    def in_degrees(self) -> array:
+        degrees = array('I', [0]) * len(self.urls)
+        
+        for targets in self._out:
+            for target in targets or ():
+                degrees[target] += 1
+        
+        return degrees
+    
+    def summary(self, root_url: str) -> Dict:
+        """
+        Resumen del grafo (grados, páginas huérfanas y links rotos)
+        
+        Args:
+            root_url: URL raíz del crawl (no cuenta como huérfana)
+        
+        Returns:
+            dict serializable
+        """
+        in_degrees = self.in_degrees()
+        root = self._ids.get(root_url)
+        
+        nodes = []
+        orphans = []
+        broken_links = []
+        edges = 0
+        
+        for node_id, url in enumerate(self.urls):
+            targets = self._out[node_id]
+            status = self.status[node_id]
+            edges += len(targets or ())
+            
+            nodes.append({
+                'url': url,
+                'status': status if status >= 0 else None,
+                'crawled': targets is not None,
+                'in_degree': in_degrees[node_id],
+                'out_degree': len(targets or ()),
+                'external_links': self.external_out[node_id]
+            })
+            
+            if targets is not None and in_degrees[node_id] == 0 and node_id != root:
+                orphans.append(url)
+            
+            for target in targets or ():
+                target_status = self.status[target]
+                
+                # Solo se sabe que está roto si se visitó
+                if target_status == 0 or target_status >= 400:
+                    broken_links.append({
+                        'source': url,
+                        'target': self.urls[target],
+                        'status': target_status or None
+                    })
+        
+        return {
+            'root': root_url,
+            'pages_discovered': len(self.urls),
+            'pages_crawled': sum(1 for targets in self._out if targets is not None),
+            'edges': edges,
+            'orphan_pages': orphans,
+            'broken_links': broken_links,
+            'nodes': nodes
+        }
+    
+    def to_bytes(self) -> bytes:
+        """
+        Serializar en formato compacto
+        
+        Layout (antes de zlib): magic, n_nodes, n_edges, offsets (n+1 x u32),
+        targets (u32), status (i16), external_out (u32), URLs separadas por '\\n'
+        """
+        offsets = array('I', [0])
+        targets = array('I')
+        
+        for out in self._out:
+            if out:
+                targets.extend(out)
+            offsets.append(len(targets))
+        
+        # Nodos sin visitar (None) se distinguen por el status -1
+        payload = b''.join([
+            GRAPH_MAGIC,
+            struct.pack('<II', len(self.urls), len(targets)),
+            _to_le(offsets),
+            _to_le(targets),
+            _to_le(self.status),
+            _to_le(self.external_out),
+            '\n'.join(self.urls).encode('utf-8')
+        ])
+        
+        return zlib.compress(payload, 6)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'LinkGraph':
+        """Reconstruir un grafo serializado con to_bytes()"""
+        payload = zlib.decompress(data)
+        
+        if payload[:4] != GRAPH_MAGIC:
+            raise ValueError("Formato de grafo desconocido")
+        
+        n_nodes, n_edges = struct.unpack_from('<II', payload, 4)
+        pos = 12
+        
+        def take(typecode: str, count: int) -> array:
+            nonlocal pos
+            size = array(typecode).itemsize * count
+            values = _from_le(typecode, payload[pos:pos + size])
+            pos += size
+            return values
+        
+        offsets = take('I', n_nodes + 1)
+        targets = take('I', n_edges)
+        
+        graph = cls()
+        graph.status = take('h', n_nodes)
+        graph.external_out = take('I', n_nodes)
+        graph.urls = payload[pos:].decode('utf-8').split('\n') if n_nodes else []
+        graph._ids = {url: i for i, url in enumerate(graph.urls)}
+        graph._out = [
+            targets[offsets[i]:offsets[i + 1]] if graph.status[i] != -1 else None
+            for i in range(n_nodes)
+        ]
+        
+        return graph
+
@@ -0,0 +1,336 @@
+"""
+robots.txt: parser, matcher compilado y caché por host
+
+Se descarga una vez por host y se compila a una lista de reglas (regex) del
+grupo que aplica a nuestro user-agent. La política se cachea en memoria y
+en Redis con TTL; el Crawl-delay se traslada al rate limiter del dominio.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Token de producto con el que se eligen los grupos de robots.txt
+USER_AGENT_TOKEN = 'tp2-scraper'
+
+# robots.txt de más de 500 KiB se truncan (RFC 9309)
+MAX_ROBOTS_BYTES = 500 * 1024
+
+# Si robots.txt no responde (5xx / red) se asume "disallow all" por poco tiempo
+UNREACHABLE_TTL = 300
+
+
+def agent_matches(agent: str, user_agent: str) -> int:
+    """
+    Si la línea 'User-agent:' de robots.txt aplica a nuestro token de producto
+    
+    Compara tokens de producto (sin versión, sin mayúsculas): 'tp2-scraper'
+    y 'TP2-Scraper/1.0' aplican, y un prefijo hasta un '-' también
+    ('tp2' aplica a 'tp2-scraper'). Tokens genéricos como 'bot' o vacíos no.
+    
+    Returns:
+        Largo del token que coincidió (0 = no aplica); el más largo es el
+        grupo más específico
+    """
+    agent = agent.split('/', 1)[0].strip().lower()
+    user_agent = user_agent.lower()
+    
+    if agent and (user_agent == agent or user_agent.startswith(agent + '-')):
+        return len(agent)
+    return 0
+
+
+def _compile_pattern(path: str) -> re.Pattern:
+    """Patrón de robots ('*' comodín, '$' fin) a regex anclada al inicio"""
+    anchored = path.endswith('$')
+    if anchored:
+        path = path[:-1]
+    
+    regex = '.*'.join(re.escape(part) for part in path.split('*'))
+    return re.compile(regex + ('$' if anchored else ''))
+
+
+class RobotsPolicy:
+    """Reglas de robots.txt ya compiladas para un host"""
+    
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, bool]]] = None,
+        crawl_delay: Optional[float] = None,
+        sitemaps: Optional[List[str]] = None,
+        status: Optional[int] = None
+    ):
+        """
+        Args:
+            rules: Lista (path pattern, allow)
+            crawl_delay: Segundos entre requests (None = sin indicación)
+            sitemaps: URLs de sitemaps declaradas
+            status: Status HTTP de robots.txt (None = error de red)
+        """
+        self.rules = rules or []
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        self.status = status
+        
+        # Regla más específica primero; a igual longitud gana allow
+        ordered = sorted(self.rules, key=lambda rule: (-len(rule[0]), not rule[1]))
+        self._compiled = [(_compile_pattern(path), allow) for path, allow in ordered]
+    
+    @classmethod
+    def allow_all(cls, status: Optional[int] = None) -> 'RobotsPolicy':
+        return cls(status=status)
+    
+    @classmethod
+    def disallow_all(cls, status: Optional[int] = None) -> 'RobotsPolicy':
+        return cls(rules=[('/', False)], status=status)
+    
+    def can_fetch(self, url: str) -> bool:
+        """Si la URL se puede descargar según la política"""
+        parsed = urlparse(url)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        
+        if path == '/robots.txt':
+            return True
+        
+        for pattern, allow in self._compiled:
+            if pattern.match(path):
+                return allow
+        
+        return True
+    
+    def to_dict(self) -> Dict:
+        return {
+            'rules': self.rules,
+            'crawl_delay': self.crawl_delay,
+            'sitemaps': self.sitemaps,
+            'status': self.status
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RobotsPolicy':
+        return cls(
+            rules=[tuple(rule) for rule in data.get('rules', [])],
+            crawl_delay=data.get('crawl_delay'),
+            sitemaps=data.get('sitemaps'),
+            status=data.get('status')
+        )
+
+
+def parse_robots(text: str, user_agent: str = USER_AGENT_TOKEN, status: int = 200) -> RobotsPolicy:
+    """
+    Parsear robots.txt quedándose con el grupo de nuestro user-agent
+    
+    Se usa el grupo cuyo user-agent coincide con el token (el más
+    específico, ver agent_matches) o '*' si no hay ninguno. Las líneas
+    'Sitemap:' aplican a todo el archivo.
+    
+    Args:
+        text: Contenido de robots.txt
+        user_agent: Token de producto propio
+        status: Status HTTP de la respuesta
+    
+    Returns:
+        RobotsPolicy
+    """
+    groups = {'specific': None, 'wildcard': None}
+    specific_length = 0
+    sitemaps = []
+    
+    current = None
+    in_agents = False
+    
+    for raw_line in text.splitlines():
+        line = raw_line.split('#', 1)[0].strip()
+        
+        if ':' not in line:
+            continue
+        
+        field, value = line.split(':', 1)
+        field = field.strip().lower()
+        value = value.strip()
+        
+        if field == 'sitemap':
+            if value:
+                sitemaps.append(value)
+            continue
+        
+        if field == 'user-agent':
+            # Líneas user-agent consecutivas comparten el mismo grupo
+            if not in_agents:
+                current = {'rules': [], 'crawl_delay': None}
+                in_agents = True
+            
+            if value == '*':
+                groups['wildcard'] = groups['wildcard'] or current
+                continue
+            
+            length = agent_matches(value, user_agent)
+            if length > specific_length:
+                groups['specific'] = current
+                specific_length = length
+            continue
+        
+        in_agents = False
+        
+        if current is None:
+            continue
+        
+        if field in ('allow', 'disallow'):
+            # 'Disallow:' vacío no restringe nada
+            if value:
+                current['rules'].append((value, field == 'allow'))
+        elif field == 'crawl-delay':
+            try:
+                current['crawl_delay'] = float(value)
+            except ValueError:
+                pass
+    
+    group = groups['specific'] or groups['wildcard'] or {'rules': [], 'crawl_delay': None}
+    
+    return RobotsPolicy(
+        rules=group['rules'],
+        crawl_delay=group['crawl_delay'],
+        sitemaps=sitemaps,
+        status=status
+    )
+
+
+class RobotsCache:
+    """Políticas de robots.txt por host (memoria + Redis)"""
+    
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        cache=None,
+        rate_limiter=None,
+        ttl: int = 86400,
+        user_agent: str = USER_AGENT_TOKEN
+    ):
+        """
+        Args:
+            session: Sesión aiohttp compartida
+            cache: RedisCache (None = solo memoria)
+            rate_limiter: RateLimiter que recibe el Crawl-delay
+            ttl: TTL de la política
+            user_agent: Token de producto propio
+        """
+        self.session = session
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.ttl = ttl
+        self.user_agent = user_agent
+        
+        # host -> (policy, expira)
+        self._memory: Dict[str, Tuple[RobotsPolicy, float]] = {}
+        # Una sola descarga en vuelo por host
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def __len__(self) -> int:
+        """Hosts con política en memoria (por proceso)"""
+        return len(self._memory)
+    
+    async def get_policy(self, url: str) -> RobotsPolicy:
+        """
+        Política de robots.txt del host de la URL
+        
+        Args:
+            url: Cualquier URL del host
+        
+        Returns:
+            RobotsPolicy
+        """
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        
+        entry = self._memory.get(origin)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        
+        async with lock:
+            # Otra corrutina pudo haberla cargado mientras esperábamos
+            entry = self._memory.get(origin)
+            if entry and entry[1] > time.time():
+                return entry[0]
+            
+            policy, ttl = await self._load(origin)
+            self._memory[origin] = (policy, time.time() + ttl)
+            
+            return policy
+    
+    async def _load(self, origin: str) -> Tuple[RobotsPolicy, float]:
+        """
+        Leer de Redis o descargar (y aplicar Crawl-delay al rate limiter)
+        
+        La entrada de Redis guarda su vencimiento: otro proceso que la lee la
+        recuerda solo lo que le queda (un disallow temporal por un 5xx dura
+        UNREACHABLE_TTL en todos los workers, no self.ttl).
+        
+        Returns:
+            Tuple de (RobotsPolicy, segundos que vale)
+        """
+        name = f"robots:{origin}"
+        
+        if self.cache:
+            data = self.cache.get_blob(name)
+            if data:
+                entry = json.loads(data)
+                remaining = entry.get('expires_at', 0) - time.time()
+                if remaining > 0:
+                    return RobotsPolicy.from_dict(entry['policy']), remaining
+        
+        policy, ttl = await self._fetch(origin)
+        
+        if self.cache:
+            entry = {'policy': policy.to_dict(), 'expires_at': time.time() + ttl}
+            self.cache.set_blob(name, json.dumps(entry).encode('utf-8'), ttl=ttl)
+        
+        if policy.crawl_delay and self.rate_limiter:
+            self.rate_limiter.set_crawl_delay(origin, policy.crawl_delay, ttl=ttl)
+        
+        return policy, ttl
+    
+    async def _fetch(self, origin: str) -> Tuple[RobotsPolicy, int]:
+        """Descargar y parsear robots.txt"""
+        robots_url = f"{origin}/robots.txt"
+        
+        try:
+            async with self.session.get(robots_url, allow_redirects=True) as response:
+                status = response.status
+                
+                if status >= 500:
+                    logger.warning(f"⚠️  {robots_url} respondió {status}: disallow temporal")
+                    return RobotsPolicy.disallow_all(status), UNREACHABLE_TTL
+                
+                if status >= 400:
+                    return RobotsPolicy.allow_all(status), self.ttl
+                
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body.extend(chunk)
+                    if len(body) >= MAX_ROBOTS_BYTES:
+                        del body[MAX_ROBOTS_BYTES:]
+                        break
+        
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"⚠️  No se pudo leer {robots_url}: {e}")
+            return RobotsPolicy.disallow_all(None), UNREACHABLE_TTL
+        
+        policy = parse_robots(bytes(body).decode('utf-8', errors='replace'), self.user_agent, status)
+        
+        logger.info(
+            f"🤖 robots.txt de {origin}: {len(policy.rules)} reglas, "
+            f"crawl-delay={policy.crawl_delay}, {len(policy.sitemaps)} sitemaps"
+        )
+        
+        return policy, self.ttl
@@ -0,0 +1,187 @@
+"""
+Lectura en streaming de sitemaps (urlset e índices, con o sin gzip)
+
+El XML se parsea a medida que llegan los chunks (XMLPullParser) y cada
+elemento se libera apenas se procesa, así un sitemap de 50.000 URLs no se
+carga entero en memoria. Las URLs se emiten en lotes.
+"""
+import logging
+import zlib
+from typing import AsyncIterator, Dict, List, Optional
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Límites del protocolo de sitemaps (por archivo, ya descomprimido)
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _local_name(tag: str) -> str:
+    """'{namespace}loc' -> 'loc'"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapStreamParser:
+    """Parser incremental de un archivo de sitemap"""
+    
+    def __init__(self):
+        self._parser = XMLPullParser(events=('start', 'end'))
+        self._root = None
+        self._decompressor = None
+        self._first_chunk = True
+        self.bytes_parsed = 0
+        
+        # Resultado: URLs de páginas y sitemaps anidados (índices)
+        self.urls: List[Dict] = []
+        self.sitemaps: List[str] = []
+    
+    def feed(self, chunk: bytes):
+        """
+        Procesar un chunk (gzip se detecta por los magic bytes)
+        
+        Raises:
+            ValueError: Si el sitemap supera MAX_SITEMAP_BYTES
+        """
+        if self._first_chunk:
+            self._first_chunk = False
+            if chunk[:2] == GZIP_MAGIC:
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk, MAX_SITEMAP_BYTES - self.bytes_parsed + 1)
+        
+        self.bytes_parsed += len(chunk)
+        if self.bytes_parsed > MAX_SITEMAP_BYTES:
+            raise ValueError("Sitemap demasiado grande")
+        
+        self._parser.feed(chunk)
+        self._drain()
+    
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+                continue
+            
+            name = _local_name(element.tag)
+            
+            if name not in ('url', 'sitemap'):
+                continue
+            
+            entry = {}
+            for child in element:
+                child_name = _local_name(child.tag)
+                if child_name in ('loc', 'lastmod', 'changefreq', 'priority') and child.text:
+                    entry[child_name] = child.text.strip()
+            
+            if entry.get('loc'):
+                if name == 'url':
+                    self.urls.append(entry)
+                else:
+                    self.sitemaps.append(entry['loc'])
+            
+            # Liberar lo ya procesado (el árbol no crece)
+            element.clear()
+            if self._root is not None:
+                self._root.clear()
+    
+    def close(self):
+        self._parser.close()
+        self._drain()
+    
+    def take_urls(self) -> List[Dict]:
+        """URLs acumuladas desde la última llamada"""
+        urls, self.urls = self.urls, []
+        return urls
+
+
+async def iter_sitemap_urls(
+    session: aiohttp.ClientSession,
+    sitemap_urls: List[str],
+    batch_size: int = 1000,
+    max_urls: int = 50000,
+    max_sitemaps: int = 50,
+    chunk_size: int = 64 * 1024
+) -> AsyncIterator[List[Dict]]:
+    """
+    Recorrer sitemaps (e índices anidados) emitiendo lotes de URLs
+    
+    Args:
+        session: Sesión aiohttp compartida
+        sitemap_urls: Sitemaps iniciales (de robots.txt o /sitemap.xml)
+        batch_size: URLs por lote
+        max_urls: Máximo total de URLs
+        max_sitemaps: Máximo de archivos a leer (incluye índices)
+        chunk_size: Tamaño de lectura
+    
+    Yields:
+        Listas de dicts {'loc', 'lastmod'?, ...}
+    """
+    queue = list(dict.fromkeys(sitemap_urls))
+    seen = set(queue)
+    fetched = 0
+    emitted = 0
+    batch: List[Dict] = []
+    
+    while queue and fetched < max_sitemaps and emitted < max_urls:
+        sitemap_url = queue.pop(0)
+        fetched += 1
+        parser = SitemapStreamParser()
+        
+        try:
+            async with session.get(sitemap_url) as response:
+                if response.status != 200:
+                    logger.warning(f"⚠️  Sitemap {sitemap_url}: HTTP {response.status}")
+                    continue
+                
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    parser.feed(chunk)
+                    
+                    for entry in parser.take_urls():
+                        batch.append(entry)
+                        emitted += 1
+                        
+                        if len(batch) >= batch_size:
+                            yield batch
+                            batch = []
+                        
+                        if emitted >= max_urls:
+                            break
+                    
+                    if emitted >= max_urls:
+                        break
+                else:
+                    parser.close()
+        
+        except (aiohttp.ClientError, ParseError, ValueError) as e:
+            logger.warning(f"⚠️  Error leyendo sitemap {sitemap_url}: {e}")
+        
+        for entry in parser.take_urls():
+            if emitted >= max_urls:
+                break
+            batch.append(entry)
+            emitted += 1
+        
+        # Índices: encolar sitemaps hijos
+        for child in parser.sitemaps:
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+        
+        logger.info(
+            f"🗺️  Sitemap {sitemap_url}: {parser.bytes_parsed} bytes, "
+            f"{len(parser.sitemaps)} sitemaps anidados, {emitted} URLs acumuladas"
+        )
+    
+    if batch:
+        yield batch
+
+
+def default_sitemaps(origin: str, declared: Optional[List[str]] = None) -> List[str]:
+    """Sitemaps a leer: los declarados en robots.txt o /sitemap.xml"""
+    return list(declared) if declared else [f"{origin}/sitemap.xml"]
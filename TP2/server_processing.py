@@ -1,22 +1,28 @@
 import socketserver
 import multiprocessing as mp
-from multiprocessing import Pool
 import argparse
+import gc
+import importlib
 import logging
+import signal
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError as FuturesCancelledError
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
 from datetime import datetime
 
 # Importar el protocolo unificado
 from common.protocol import Protocol, MessageType, TaskType
+from common.metrics import MetricsRegistry, SIZE_BUCKETS, serve_metrics
+from common.tracing import Tracer, build_tracer, SPAN_KIND_SERVER
+from common.profiling import ProfiledTask
 
-# Importar los procesadores reales
-from processor.screenshot import ScreenshotGenerator
-from processor.performance import PerformanceAnalyzer
-from processor.image_processor import ImageProcessor
-
-# ✅ IMPORTAR NUEVOS ANALIZADORES (BONUS TRACK 3)
-from processor.technology_detector import TechnologyDetector
-from processor.seo_analyzer import SEOAnalyzer
+# Los procesadores reales (Selenium, PIL, BeautifulSoup) se importan en
+# cada process_*_task: ver TASK_MODULES
+from processor.render_profiles import resolve_render_profile
+from processor.worker_pool import WorkerPool, TaskCancelled, DEFAULT_TENANT
 
 # Configurar logging
 logging.basicConfig(
@@ -25,27 +31,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Presupuesto de bytes por imagen (las más grandes no se descargan)
+DEFAULT_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+# Módulos de las tareas. Cada worker importa el suyo en la primera tarea de
+# ese tipo: uno que solo hace SEO no carga Selenium. Con --preload se
+# importan en el proceso padre antes de crear el pool y los workers los
+# heredan por fork (ver preload_task_modules)
+TASK_MODULES = (
+    'processor.screenshot',
+    'processor.performance',
+    'processor.image_processor',
+    'processor.technology_detector',
+    'processor.seo_analyzer'
+)
+
+# El motor de reglas SEO no tiene estado: una instancia por proceso (ver get_seo_analyzer)
+_seo_analyzer = None
+
+# Espera máxima por los resultados de una tarea ALL (sin deadline más corto)
+ALL_TASKS_TIMEOUT = 60
+
+# CANCEL que llegan antes que su request (se recuerdan los últimos)
+MAX_EARLY_CANCELS = 1000
+
+# Apagado ordenado: espera por las requests en curso y, vencida, por las
+# que se cancelaron (responden enseguida)
+DEFAULT_DRAIN_TIMEOUT = 30.0
+CANCEL_GRACE = 5.0
+
+# Precalentamiento de cada worker del pool (ver warm_up_worker)
+WARM_UP_LEVELS = ('none', 'analyzers', 'full')
+# Cada cuánto se revisa si llegó SIGTERM mientras el pool precalienta
+WARM_UP_POLL_INTERVAL = 0.5
+
+# Página de ejemplo para el precalentamiento
+WARM_UP_HTML = """<!DOCTYPE html>
+<html lang="es">
+<head>
+  <meta charset="utf-8">
+  <meta name="generator" content="WordPress 6.4">
+  <meta name="description" content="Página de ejemplo para precalentar los analizadores">
+  <title>Precalentamiento</title>
+  <link rel="canonical" href="https://example.com/">
+  <script src="https://code.jquery.com/jquery.min.js"></script>
+  <script async src="https://www.googletagmanager.com/gtag/js?id=G-TEST"></script>
+</head>
+<body>
+  <h1>Precalentamiento</h1>
+  <p>Texto de ejemplo con un <a href="/otra">link interno</a>.</p>
+  <img src="/logo.png" alt="Logo" width="64" height="64">
+</body>
+</html>""".encode('utf-8')
+
+
+def get_seo_analyzer():
+    """Motor de reglas SEO del proceso (se arma en el primer uso)"""
+    global _seo_analyzer
+    
+    if _seo_analyzer is None:
+        from processor.seo_analyzer import SEOAnalyzer
+        _seo_analyzer = SEOAnalyzer()
+    
+    return _seo_analyzer
+
+
+def task_name(func_name: str) -> str:
+    """Nombre corto de una tarea del pool (process_screenshot_task -> screenshot)"""
+    if func_name.startswith('process_') and func_name.endswith('_task'):
+        return func_name[len('process_'):-len('_task')]
+    return func_name
+
 
 # ============================================================================
 # FUNCIONES QUE SE EJECUTARÁN EN PROCESOS SEPARADOS
 # ============================================================================
 
+def get_html_payload(data):
+    """
+    HTML de la request: bytes crudos adjuntos (con su encoding) o el
+    'html_content' en params de clientes anteriores
+    
+    Returns:
+        (html, encoding)
+    """
+    params = data.get('params', {})
+    html = (data.get('attachments') or {}).get('html')
+    
+    if html is not None:
+        return html, params.get('html_encoding')
+    
+    return params.get('html_content', ''), None
+
+
 def process_screenshot_task(data):
     """
     Generar screenshot usando Selenium/Chromium
     
     Args:
-        data: dict con 'url' y otros parámetros
-        
+        data: dict con 'url' y params opcionales: 'screenshot_format'
+              (png/jpeg/webp), 'screenshot_quality', 'full_page',
+              'thumbnail_width' y 'render_profile' / 'render_profiles'
+    
     Returns:
         dict con resultado del screenshot
     """
     url = data.get('url', '')
+    params = data.get('params', {})
     logger.info(f"[Proceso {mp.current_process().name}] Generando screenshot de {url}")
     
     try:
-        generator = ScreenshotGenerator(headless=True)
-        result = generator.capture(url)
+        from processor.screenshot import ScreenshotGenerator
+        
+        generator = ScreenshotGenerator(
+            headless=True,
+            render_profile=resolve_render_profile(params, 'screenshot')
+        )
+        result = generator.capture(
+            url,
+            fmt=params.get('screenshot_format', 'png'),
+            quality=params.get('screenshot_quality'),
+            full_page=params.get('full_page', False),
+            thumbnail_width=params.get('thumbnail_width')
+        )
         
         logger.info(f"[Proceso {mp.current_process().name}] Screenshot completado")
         return result
@@ -60,11 +168,13 @@ def process_screenshot_task(data):
 
 def process_performance_task(data):
     """
-    Analizar rendimiento usando Selenium
+    Analizar rendimiento usando Selenium + CDP
     
     Args:
-        data: dict con 'url' y otros parámetros
-        
+        data: dict con 'url' y params opcionales ('throttling': preset de
+              CPU/red para corridas reproducibles, 'render_profile' /
+              'render_profiles': perfil de bloqueo de recursos)
+    
     Returns:
         dict con métricas de rendimiento
     """
@@ -72,7 +182,14 @@ def process_performance_task(data):
     logger.info(f"[Proceso {mp.current_process().name}] Analizando rendimiento de {url}")
     
     try:
-        analyzer = PerformanceAnalyzer(headless=True)
+        from processor.performance import PerformanceAnalyzer
+        
+        params = data.get('params', {})
+        analyzer = PerformanceAnalyzer(
+            headless=True,
+            throttling=params.get('throttling'),
+            render_profile=resolve_render_profile(params, 'performance')
+        )
         result = analyzer.analyze(url)
         
         logger.info(f"[Proceso {mp.current_process().name}] Análisis completado")
@@ -92,25 +209,35 @@ def process_images_task(data):
     
     Args:
         data: dict con 'url' y lista de imágenes
-        
+    
     Returns:
         dict con thumbnails procesados
     """
     url = data.get('url', '')
-    image_urls = data.get('params', {}).get('image_urls', [])
+    params = data.get('params', {})
+    image_urls = params.get('image_urls', [])
     
     logger.info(f"[Proceso {mp.current_process().name}] Procesando {len(image_urls)} imágenes de {url}")
     
     try:
         import asyncio
+        from processor.image_probe import get_image_registry
+        from processor.image_processor import ImageProcessor
         
         processor = ImageProcessor()
         
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
+        # Se sondean todas y se descargan solo las 10 más prioritarias
         result = loop.run_until_complete(
-            processor.process_images(image_urls[:10], create_thumbnails=True)
+            processor.process_images(
+                image_urls,
+                create_thumbnails=True,
+                max_images=params.get('max_images', 10),
+                max_bytes=params.get('max_image_bytes', DEFAULT_MAX_IMAGE_BYTES),
+                registry=get_image_registry()
+            )
         )
         
         loop.close()
@@ -132,20 +259,22 @@ def process_technologies_task(data):
     Detectar tecnologías web utilizadas
     
     Args:
-        data: dict con 'url', 'html_content' y 'headers'
-        
+        data: dict con 'url', el HTML (adjunto 'html' o 'html_content') y 'headers'
+    
     Returns:
         dict con tecnologías detectadas
     """
     url = data.get('url', '')
-    html_content = data.get('params', {}).get('html_content', '')
+    html_content, encoding = get_html_payload(data)
     headers = data.get('params', {}).get('headers', {})
     
     logger.info(f"[Proceso {mp.current_process().name}] Detectando tecnologías de {url}")
     
     try:
+        from processor.technology_detector import TechnologyDetector
+        
         detector = TechnologyDetector()
-        result = detector.analyze(html_content, headers)
+        result = detector.analyze(html_content, headers, encoding=encoding)
         
         logger.info(
             f"[Proceso {mp.current_process().name}] "
@@ -167,19 +296,30 @@ def process_seo_task(data):
     Analizar SEO de la página
     
     Args:
-        data: dict con 'url' y 'html_content'
-        
+        data: dict con 'url', el HTML (adjunto 'html' o 'html_content') y
+              params opcionales: 'seo_rules'
+              (reglas a ejecutar), 'seo_disabled_rules', 'seo_weights'
+              ({regla: peso}) y 'link_health' (status de links del Servidor A)
+    
     Returns:
         dict con análisis de SEO
     """
     url = data.get('url', '')
-    html_content = data.get('params', {}).get('html_content', '')
+    params = data.get('params', {})
+    html_content, encoding = get_html_payload(data)
     
     logger.info(f"[Proceso {mp.current_process().name}] Analizando SEO de {url}")
     
     try:
-        analyzer = SEOAnalyzer()
-        result = analyzer.analyze(html_content, url)
+        result = get_seo_analyzer().analyze(
+            html_content,
+            url,
+            enabled=params.get('seo_rules'),
+            disabled=params.get('seo_disabled_rules'),
+            weights=params.get('seo_weights'),
+            context={'link_health': params.get('link_health')},
+            encoding=encoding
+        )
         
         logger.info(
             f"[Proceso {mp.current_process().name}] "
@@ -195,6 +335,135 @@ def process_seo_task(data):
         }
 
 
+# Tareas de ALL, en el orden del resultado
+ALL_TASKS = (
+    ('screenshot', process_screenshot_task),
+    ('performance', process_performance_task),
+    ('images', process_images_task),
+    ('technologies', process_technologies_task),
+    ('seo', process_seo_task)
+)
+
+
+def select_all_tasks(params: dict) -> list:
+    """
+    Tareas de un ALL: todas o solo las de params['tasks'] (el Servidor A
+    pide solo las de las secciones de la página que cambiaron)
+    
+    Returns:
+        Lista de (nombre, función)
+    
+    Raises:
+        ValueError: Si params['tasks'] nombra una tarea que no existe
+    """
+    names = params.get('tasks')
+    if names is None:
+        return list(ALL_TASKS)
+    
+    unknown = set(names) - {name for name, _ in ALL_TASKS}
+    if unknown:
+        raise ValueError(f"Tareas desconocidas en ALL: {', '.join(sorted(unknown))}")
+    
+    return [(name, func) for name, func in ALL_TASKS if name in names]
+
+
+def warm_up_worker(browser: bool = False) -> dict:
+    """
+    Pagar al arrancar el worker lo que pagaría su primera tarea
+    
+    Analizar una página de ejemplo compila las expresiones regulares del
+    detector de tecnologías y de las reglas SEO (quedan en la caché de re) y
+    carga lxml/BeautifulSoup; un thumbnail carga los codecs de PIL. Con
+    browser=True además se abre y cierra Chrome una vez: Selenium resuelve
+    el driver y el binario queda en la caché de disco.
+    
+    Un paso que falla solo se registra: la tarea correspondiente va a
+    devolver su propio error.
+    
+    Args:
+        browser: También abrir Chrome
+    
+    Returns:
+        dict paso -> segundos (o el error del paso)
+    """
+    from PIL import Image
+    from processor.image_processor import ImageProcessor
+    from processor.technology_detector import TechnologyDetector
+    
+    steps = [
+        ('technologies', lambda: TechnologyDetector().analyze(WARM_UP_HTML, {'server': 'nginx'}, encoding='utf-8')),
+        ('seo', lambda: get_seo_analyzer().analyze(WARM_UP_HTML, 'https://example.com/', encoding='utf-8')),
+        ('images', lambda: ImageProcessor()._create_thumbnail(Image.new('RGB', (64, 64))))
+    ]
+    
+    if browser:
+        from processor.screenshot import ScreenshotGenerator
+        steps.append(('browser', lambda: ScreenshotGenerator(headless=True)._create_driver().quit()))
+    
+    timings = {}
+    
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+            timings[name] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            timings[name] = f'error: {str(e).strip()}'
+            logger.warning(f"⚠️  [Proceso {mp.current_process().name}] Precalentamiento de {name} falló: {str(e).strip()}")
+    
+    logger.info(f"🔥 [Proceso {mp.current_process().name}] Worker precalentado: {timings}")
+    return timings
+
+
+def preload_task_modules() -> dict:
+    """
+    Importar y precalentar en este proceso lo que usan las tareas (--preload)
+    
+    Se llama antes de crear el pool. Los workers nacen por fork con los
+    módulos importados, las expresiones regulares compiladas y el analizador
+    SEO armado, y comparten esas páginas de memoria con el padre
+    (copy-on-write): un worker nuevo (reciclado o tras una caída) no vuelve a
+    pagar los imports. gc.freeze() saca esos objetos de las pasadas del
+    recolector, que si no los tocaría y forzaría la copia de las páginas.
+    
+    Returns:
+        dict módulo -> segundos de import, más 'warm_up' con los pasos de
+        warm_up_worker (sin navegador)
+    """
+    timings = {}
+    
+    for module in TASK_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(module)
+        timings[module] = round(time.perf_counter() - started, 3)
+    
+    timings['warm_up'] = warm_up_worker(browser=False)
+    
+    gc.collect()
+    gc.freeze()
+    
+    logger.info(f"📦 Módulos de las tareas precargados en el proceso padre: {timings}")
+    return timings
+
+
+def init_worker(redis_host: str = None, redis_port: int = 6379, warm_up: str = 'none'):
+    """
+    Initializer de cada worker del pool (también de los que reemplazan a
+    uno reciclado o caído)
+    
+    Args:
+        redis_host: Redis del registro de imágenes (None = en memoria)
+        redis_port: Puerto de Redis
+        warm_up: 'none', 'analyzers' o 'full' (analizadores y navegador)
+    """
+    from processor.image_probe import init_image_registry
+    
+    init_image_registry(redis_host, redis_port)
+    
+    if warm_up != 'none':
+        warm_up_worker(browser=warm_up == 'full')
+
+
 # ============================================================================
 # HANDLER PARA PROCESAR REQUESTS
 # ============================================================================
@@ -225,13 +494,73 @@ class ProcessingRequestHandler(socketserver.BaseRequestHandler):
                 self.request.sendall(Protocol.encode_message(error_response))
                 return
             
-            logger.info(f"📦 Request recibido: {request_data.get('task_type', 'unknown')}")
+            # Health check del balanceador: responder sin tocar el pool
+            if request_data['type'] == MessageType.STATUS.value:
+                self.request.sendall(Protocol.encode_message(
+                    Protocol.create_status(self.server.load_report())
+                ))
+                return
+            
+            # El Servidor A ya no espera esta request: liberar el pool
+            if request_data['type'] == MessageType.CANCEL.value:
+                request_id = request_data['request_id']
+                cancelled = self.server.cancel_request(request_id)
+                self.request.sendall(Protocol.encode_message(
+                    Protocol.create_cancel(request_id, cancelled=cancelled)
+                ))
+                return
+            
+            # Deteniéndose: la tarea va a otro nodo (el balanceador reintenta)
+            if self.server.draining:
+                self.request.sendall(Protocol.encode_message(Protocol.create_error(
+                    message='Server draining',
+                    task_type=request_data.get('task_type'),
+                    retryable=True
+                )))
+                return
+            
+            logger.info(
+                f"📦 Request recibido: {request_data.get('task_type', 'unknown')} "
+                f"(tenant {request_data.get('tenant') or DEFAULT_TENANT})"
+            )
+            
+            # Vencida mientras esperaba (conexión lenta, cola del socket)
+            deadline = request_data.get('deadline')
+            if deadline is not None and time.time() >= deadline:
+                logger.warning(f"⏱️  Request {request_data.get('request_id')} recibida con el deadline vencido")
+                self.request.sendall(Protocol.encode_message(Protocol.create_error(
+                    message='Deadline exceeded',
+                    task_type=request_data.get('task_type')
+                )))
+                return
+            
+            # Procesar la tarea (ALL lanza una tarea por análisis en el pool)
+            if request_data.get('task_type') == TaskType.ALL.value:
+                subset = request_data.get('params', {}).get('tasks')
+                jobs = len(ALL_TASKS) if subset is None else max(1, len(subset))
+            else:
+                jobs = 1
+            
+            task_type = request_data.get('task_type', 'unknown')
+            
+            # Continúa la traza del Servidor A (traceparent del mensaje)
+            span = self.server.tracer.span(
+                'processing.request',
+                parent=request_data.get('traceparent'),
+                kind=SPAN_KIND_SERVER,
+                attributes={
+                    'task_type': task_type,
+                    'url': request_data.get('url', ''),
+                    'request_id': request_data.get('request_id') or ''
+                }
+            )
             
-            # Procesar la tarea
-            response = self.process_task(request_data)
+            with span, self.server.track(jobs), self.server.request_seconds.time(task_type=task_type):
+                response = self.process_task(request_data)
             
             # Enviar respuesta
             response_bytes = Protocol.encode_message(response)
+            self.server.response_bytes.observe(len(response_bytes), task_type=task_type)
             self.request.sendall(response_bytes)
             
             logger.info(f"✅ Respuesta enviada a {self.client_address}")
@@ -244,89 +573,173 @@ class ProcessingRequestHandler(socketserver.BaseRequestHandler):
             except:
                 pass
     
+    def run_tasks(self, request_data, funcs, timeout=None, profiles=None):
+        """
+        Lanzar tareas en el pool y esperar sus resultados
+        
+        Las tareas quedan registradas bajo el request_id del mensaje para que
+        un CANCEL las interrumpa. Si se vence el deadline del mensaje (o
+        timeout) se cancelan las que falten: no siguen ocupando workers. El
+        pool reparte los workers entre los tenants de los mensajes según su
+        peso.
+        
+        Args:
+            request_data: dict con la tarea (se pasa a cada función)
+            funcs: Funciones process_*_task a ejecutar en paralelo
+            timeout: Segundos máximos de espera (None = sin límite propio)
+            profiles: dict donde dejar el cProfile de cada tarea, por nombre
+                      corto (None = no perfilar)
+        
+        Returns:
+            Lista de resultados en el orden de funcs
+        
+        Raises:
+            TimeoutError: Si se venció el deadline o el timeout
+            FuturesCancelledError / TaskCancelled: Si llegó un CANCEL
+        """
+        pool = self.server.process_pool
+        request_id = request_data.get('request_id')
+        
+        limits = []
+        if timeout is not None:
+            limits.append(time.time() + timeout)
+        if request_data.get('deadline') is not None:
+            limits.append(request_data['deadline'])
+        wait_until = min(limits) if limits else None
+        
+        # El contexto de traza viaja en los argumentos de cada tarea y en el
+        # context del pool (espera en cola y ejecución se registran como spans)
+        span = Tracer.current_span()
+        if span is not None:
+            request_data = dict(request_data, traceparent=span.traceparent)
+        
+        if profiles is not None:
+            funcs = [ProfiledTask(func) for func in funcs]
+        
+        futures = [
+            pool.apply_async(
+                func,
+                (request_data,),
+                context=span.context if span else None,
+                tenant=request_data.get('tenant') or DEFAULT_TENANT,
+                weight=request_data.get('weight') or 1.0
+            )
+            for func in funcs
+        ]
+        self.server.register_request(request_id, futures)
+        
+        try:
+            results = [
+                future.result(
+                    timeout=None if wait_until is None else max(0.0, wait_until - time.time())
+                )
+                for future in futures
+            ]
+            
+            if profiles is not None:
+                for func, profiled in zip(funcs, results):
+                    profiles[task_name(func.__name__)] = profiled['profile']
+                results = [profiled['result'] for profiled in results]
+            
+            return results
+        except FuturesTimeoutError:
+            for future in futures:
+                pool.cancel(future)
+            
+            if timeout is not None and wait_until < request_data.get('deadline', float('inf')):
+                raise TimeoutError(f"Processing timeout ({timeout}s exceeded)")
+            raise TimeoutError("Deadline exceeded")
+        finally:
+            self.server.unregister_request(request_id)
+    
     def process_task(self, request_data):
         """
         Procesar una tarea usando el pool de procesos
         
         Args:
             request_data: dict con la tarea a procesar
-            
+        
         Returns:
             dict con el resultado (ya en formato Protocol)
         """
         task_type = request_data.get('task_type', 'unknown')
         url = request_data.get('url', '')
         
-        # Obtener el pool de procesos del servidor
-        pool = self.server.process_pool
+        # ?profile=1 en el Servidor A: cProfile de cada tarea en la respuesta
+        profiles = {} if request_data.get('params', {}).get('profile') else None
         
         try:
             # Seleccionar la función apropiada según el tipo de tarea
             if task_type == TaskType.SCREENSHOT.value:
                 logger.info(f"🎯 Procesando tarea SCREENSHOT para {url}")
-                result = pool.apply(process_screenshot_task, (request_data,))
+                result, = self.run_tasks(request_data, [process_screenshot_task], profiles=profiles)
             
             elif task_type == TaskType.PERFORMANCE.value:
                 logger.info(f"🎯 Procesando tarea PERFORMANCE para {url}")
-                result = pool.apply(process_performance_task, (request_data,))
+                result, = self.run_tasks(request_data, [process_performance_task], profiles=profiles)
             
             elif task_type == TaskType.IMAGES.value:
                 logger.info(f"🎯 Procesando tarea IMAGES para {url}")
-                result = pool.apply(process_images_task, (request_data,))
+                result, = self.run_tasks(request_data, [process_images_task], profiles=profiles)
             
             # ✅ NUEVAS TAREAS (BONUS TRACK 3)
             elif task_type == 'technologies':
                 logger.info(f"🎯 Procesando tarea TECHNOLOGIES para {url}")
-                result = pool.apply(process_technologies_task, (request_data,))
+                result, = self.run_tasks(request_data, [process_technologies_task], profiles=profiles)
             
             elif task_type == 'seo':
                 logger.info(f"🎯 Procesando tarea SEO para {url}")
-                result = pool.apply(process_seo_task, (request_data,))
+                result, = self.run_tasks(request_data, [process_seo_task], profiles=profiles)
             
             elif task_type == TaskType.ALL.value:
                 # ✅ PROCESAR TODAS LAS TAREAS EN PARALELO (INCLUYENDO NUEVAS)
                 logger.info(f"🔄 Procesando TODAS las tareas para {url}")
                 
-                # Lanzar todas las tareas en paralelo
-                screenshot_future = pool.apply_async(process_screenshot_task, (request_data,))
-                performance_future = pool.apply_async(process_performance_task, (request_data,))
-                images_future = pool.apply_async(process_images_task, (request_data,))
-                
-                # ✅ AGREGAR NUEVAS TAREAS AL PROCESAMIENTO PARALELO
-                technologies_future = pool.apply_async(process_technologies_task, (request_data,))
-                seo_future = pool.apply_async(process_seo_task, (request_data,))
-                
-                # Esperar resultados con timeout de 60 segundos
                 try:
-                    screenshot_result = screenshot_future.get(timeout=60)
-                    performance_result = performance_future.get(timeout=60)
-                    images_result = images_future.get(timeout=60)
-                    technologies_result = technologies_future.get(timeout=60)
-                    seo_result = seo_future.get(timeout=60)
+                    tasks = select_all_tasks(request_data.get('params', {}))
+                    results = self.run_tasks(
+                        request_data,
+                        [func for _, func in tasks],
+                        timeout=ALL_TASKS_TIMEOUT,
+                        profiles=profiles
+                    )
                     
-                    result = {
-                        'screenshot': screenshot_result,
-                        'performance': performance_result,
-                        'images': images_result,
-                        'technologies': technologies_result,  # ✅ NUEVO
-                        'seo': seo_result                      # ✅ NUEVO
-                    }
+                    result = {name: task_result for (name, _), task_result in zip(tasks, results)}
                     
-                    logger.info("✅ Todas las tareas completadas (incluyendo análisis avanzados)")
+                    logger.info(f"✅ Tareas completadas: {', '.join(result) or 'ninguna'}")
                 
-                except mp.TimeoutError:
-                    logger.error("⏱️  Timeout procesando tareas")
-                    raise Exception("Processing timeout (60s exceeded)")
+                except TimeoutError as e:
+                    logger.error(f"⏱️  Timeout procesando tareas: {e}")
+                    raise
             
             else:
                 raise ValueError(f"Tipo de tarea desconocido: {task_type}")
             
+            if profiles and isinstance(result, dict):
+                result = dict(result, profile=profiles)
+            
             # Crear respuesta usando el protocolo
             return Protocol.create_response(
                 task_type=task_type,
                 result=result
             )
         
+        except (FuturesCancelledError, TaskCancelled):
+            logger.info(f"🛑 Tarea {task_type} cancelada ({request_data.get('request_id')})")
+            
+            # Cancelada por el apagado (no por el cliente): que la tome otro nodo
+            if self.server.draining:
+                return Protocol.create_error(
+                    message='Server draining',
+                    task_type=task_type,
+                    retryable=True
+                )
+            
+            return Protocol.create_error(
+                message='Request cancelled',
+                task_type=task_type
+            )
+        
         except Exception as e:
             logger.error(f"❌ Error procesando tarea {task_type}: {e}")
             return Protocol.create_error(
@@ -346,29 +759,435 @@ class ProcessingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     
     allow_reuse_address = True
     
-    def __init__(self, server_address, num_processes=None):
+    def __init__(
+        self,
+        server_address,
+        num_processes=None,
+        redis_host=None,
+        redis_port=6379,
+        max_tasks_per_worker=50,
+        max_worker_rss_mb=1536,
+        task_timeout=120,
+        task_retries=1,
+        tracer: Tracer = None,
+        warm_up: str = 'none',
+        preload: bool = False
+    ):
         """
         Inicializar el servidor
         
         Args:
             server_address: tupla (host, port)
             num_processes: número de procesos en el pool (None = CPU count)
+            redis_host: Redis para compartir el registro de imágenes procesadas
+                        entre workers (None = registro en memoria por worker)
+            redis_port: Puerto de Redis
+            max_tasks_per_worker: Tareas antes de reciclar un worker (None = sin límite)
+            max_worker_rss_mb: RSS que dispara el reciclado de un worker (None = sin límite)
+            task_timeout: Segundos máximos por tarea antes de matar al worker
+            task_retries: Reintentos de una tarea si su worker se cae
+            tracer: Tracer para los spans (None = propagar sin registrar)
+            warm_up: Precalentamiento de cada worker al arrancar: 'none',
+                     'analyzers' o 'full' (también el navegador)
+            preload: Importar los módulos de las tareas antes de crear el
+                     pool (ver preload_task_modules)
         """
         super().__init__(server_address, ProcessingRequestHandler)
         
         if num_processes is None:
             num_processes = mp.cpu_count()
         
+        self._init_metrics()
+        self.tracer = tracer or build_tracer('processing-server')
+        
         self.num_processes = num_processes
-        self.process_pool = Pool(processes=num_processes)
+        self.preload_timings = preload_task_modules() if preload else None
+        self.process_pool = WorkerPool(
+            processes=num_processes,
+            initializer=init_worker,
+            initargs=(redis_host, redis_port, warm_up),
+            max_tasks=max_tasks_per_worker,
+            max_rss_mb=max_worker_rss_mb,
+            task_timeout=task_timeout,
+            retries=task_retries,
+            init_timeout=task_timeout,
+            on_task_done=self._observe_task
+        )
+        
+        logger.info(
+            f"🔧 Pool de procesos creado con {num_processes} workers "
+            f"(reciclado: {max_tasks_per_worker} tareas / {max_worker_rss_mb} MB)"
+        )
+        
+        # Carga actual (se reporta con mensajes STATUS)
+        self._load_lock = threading.Lock()
+        self.active_requests = 0
+        self.active_tasks = 0
+        self.completed_requests = 0
+        self.cancelled_requests = 0
+        self.started_at = time.time()
+        self._idle = threading.Condition(self._load_lock)
         
-        logger.info(f"🔧 Pool de procesos creado con {num_processes} workers")
+        # ready: el pool terminó de precalentarse (warm_up()); draining: se
+        # está apagando y rechaza tareas nuevas con un error retryable
+        self.ready = False
+        self.draining = False
+        
+        # request_id -> futures en el pool (para mensajes CANCEL)
+        self._requests_lock = threading.Lock()
+        self._requests = {}
+        self._early_cancels = OrderedDict()
     
-    def shutdown(self):
-        """Cerrar el pool de procesos antes de apagar el servidor"""
+    def _init_metrics(self):
+        """Métricas del exportador /metrics (ver --metrics-port)"""
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        
+        self.request_seconds = self.metrics.histogram(
+            'processor_request_seconds',
+            'Duración de una request completa (todas sus tareas)',
+            labelnames=('task_type',)
+        )
+        self.task_seconds = self.metrics.histogram(
+            'processor_task_seconds',
+            'Tiempo de ejecución de cada process_*_task en un worker',
+            labelnames=('task',)
+        )
+        self.task_wait_seconds = self.metrics.histogram(
+            'processor_task_wait_seconds',
+            'Tiempo de cada tarea en la cola del pool esperando un worker',
+            labelnames=('task',)
+        )
+        self.tasks_total = self.metrics.counter(
+            'processor_tasks_total',
+            'Tareas terminadas por resultado (ok, error, timeout, crash, cancelled)',
+            labelnames=('task', 'outcome')
+        )
+        self.response_bytes = self.metrics.histogram(
+            'processor_response_bytes',
+            'Tamaño de la respuesta serializada',
+            labelnames=('task_type',),
+            buckets=SIZE_BUCKETS
+        )
+        self.cancelled_total = self.metrics.counter(
+            'processor_requests_cancelled_total',
+            'Requests canceladas por mensajes CANCEL'
+        )
+        self.tenant_tasks = self.metrics.counter(
+            'processor_tenant_tasks_total',
+            'Tareas terminadas por tenant y resultado',
+            labelnames=('tenant', 'outcome')
+        )
+        self.tenant_worker_seconds = self.metrics.counter(
+            'processor_tenant_worker_seconds_total',
+            'Segundos de worker usados por cada tenant',
+            labelnames=('tenant',)
+        )
+        self.tenant_wait_seconds = self.metrics.histogram(
+            'processor_tenant_wait_seconds',
+            'Tiempo de cada tarea en la cola del pool, por tenant',
+            labelnames=('tenant',)
+        )
+        
+        self.metrics.gauge_callback(
+            'processor_requests_in_flight',
+            'Requests en curso',
+            lambda: self.active_requests
+        )
+        self.metrics.gauge_callback(
+            'processor_queue_depth',
+            'Tareas en la cola del pool esperando un worker',
+            lambda: self.process_pool.queue_depth()
+        )
+        self.metrics.gauge_callback(
+            'processor_tenant_queue_depth',
+            'Tareas en la cola del pool por tenant',
+            lambda: {(tenant,): depth for tenant, depth in self.process_pool.queue_depths().items()},
+            labelnames=('tenant',)
+        )
+        self.metrics.gauge_callback(
+            'processor_workers_busy',
+            'Workers ejecutando una tarea',
+            lambda: self.process_pool.busy_workers()
+        )
+        self.metrics.gauge_callback(
+            'processor_workers',
+            'Tamaño del pool de procesos',
+            lambda: self.num_processes
+        )
+        self.metrics.gauge_callback(
+            'processor_worker_rss_bytes',
+            'RSS de cada worker medido tras su última tarea',
+            lambda: {
+                (str(worker['slot']),): worker['rss_mb'] * 1024 * 1024
+                for worker in self.process_pool.stats()
+            },
+            labelnames=('slot',)
+        )
+    
+    def _observe_task(
+        self, func_name: str, wait_seconds: float, run_seconds: float, outcome: str, context, tenant: str
+    ):
+        task = task_name(func_name)
+        
+        self.task_wait_seconds.observe(wait_seconds, task=task)
+        self.task_seconds.observe(run_seconds, task=task)
+        self.tasks_total.inc(task=task, outcome=outcome)
+        
+        self.tenant_wait_seconds.observe(wait_seconds, tenant=tenant)
+        self.tenant_worker_seconds.inc(run_seconds, tenant=tenant)
+        self.tenant_tasks.inc(tenant=tenant, outcome=outcome)
+        
+        if context is not None:
+            finished = time.time()
+            started = finished - run_seconds
+            attributes = {'task': task, 'outcome': outcome, 'tenant': tenant}
+            
+            self.tracer.record(f'pool.wait {task}', context, started - wait_seconds, started, attributes)
+            self.tracer.record(
+                f'pool.execute {task}', context, started, finished, attributes,
+                error=None if outcome == 'ok' else outcome
+            )
+    
+    def start_metrics_exporter(self, host: str, port: int):
+        """Exponer GET /metrics (formato Prometheus), /ready y /live en otro puerto HTTP"""
+        self.metrics_server = serve_metrics(
+            self.metrics, host, port,
+            checks={'/ready': self.readiness, '/live': self.liveness}
+        )
+        address = f"http://{host}:{self.metrics_server.server_address[1]}"
+        logger.info(f"📈 Métricas en {address}/metrics (readiness {address}/ready, liveness {address}/live)")
+        return self.metrics_server
+    
+    @contextmanager
+    def track(self, tasks: int):
+        """Contar una request en curso y las tareas que ocupa en el pool"""
+        with self._load_lock:
+            self.active_requests += 1
+            self.active_tasks += tasks
+        
+        try:
+            yield
+        finally:
+            with self._load_lock:
+                self.active_requests -= 1
+                self.active_tasks -= tasks
+                self.completed_requests += 1
+                self._idle.notify_all()
+    
+    def register_request(self, request_id, futures):
+        """Asociar las tareas en el pool a su request_id (None = no cancelable)"""
+        if request_id is None:
+            return
+        
+        with self._requests_lock:
+            early = self._early_cancels.pop(request_id, None) is not None
+            if not early:
+                self._requests[request_id] = futures
+        
+        # El CANCEL llegó antes que la request
+        if early:
+            self._cancel_futures(request_id, futures)
+    
+    def unregister_request(self, request_id):
+        if request_id is None:
+            return
+        
+        with self._requests_lock:
+            self._requests.pop(request_id, None)
+    
+    def cancel_request(self, request_id) -> int:
+        """
+        Cancelar las tareas de una request: las que esperan en la cola se
+        descartan y las que están corriendo terminan su worker
+        
+        Returns:
+            Cantidad de tareas canceladas
+        """
+        with self._requests_lock:
+            futures = self._requests.pop(request_id, None)
+            
+            if futures is None:
+                # Todavía no llegó (o ya terminó): recordar por si llega
+                self._early_cancels[request_id] = time.time()
+                while len(self._early_cancels) > MAX_EARLY_CANCELS:
+                    self._early_cancels.popitem(last=False)
+                return 0
+        
+        return self._cancel_futures(request_id, futures)
+    
+    def _cancel_futures(self, request_id, futures) -> int:
+        cancelled = sum(1 for future in futures if self.process_pool.cancel(future))
+        
+        with self._load_lock:
+            self.cancelled_requests += 1
+        self.cancelled_total.inc()
+        
+        logger.info(f"🛑 Request {request_id} cancelada: {cancelled} tareas detenidas")
+        return cancelled
+    
+    def load_report(self) -> dict:
+        """
+        Reporte de carga para el balanceador del Servidor A
+        
+        Returns:
+            dict con requests y tareas activas, tareas en cola (más allá de
+            los workers del pool, y por tenant), tamaño del pool, requests
+            completadas y canceladas, y estadísticas por worker (tareas, RSS,
+            reinicios)
+        """
+        with self._load_lock:
+            return {
+                'active_requests': self.active_requests,
+                'active_tasks': self.active_tasks,
+                'queued_tasks': max(0, self.active_tasks - self.num_processes),
+                'queued_by_tenant': self.process_pool.queue_depths(),
+                'pool_size': self.num_processes,
+                'completed_requests': self.completed_requests,
+                'cancelled_requests': self.cancelled_requests,
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'ready': self.ready,
+                'draining': self.draining,
+                'workers': self.process_pool.stats()
+            }
+    
+    def warm_up(self, timeout: float = None, stop: threading.Event = None) -> bool:
+        """
+        Esperar a que los workers del pool terminen su initializer
+        (precalentamiento) y marcar el servidor como listo
+        
+        Hasta entonces /ready responde 503 y el reporte STATUS dice
+        ready=False: el balanceador del Servidor A prefiere otros nodos.
+        
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+            stop: Evento de apagado (SIGTERM); si se activa se deja de
+                  esperar y el servidor no se marca como listo
+        
+        Returns:
+            True si todo el pool quedó listo; si venció el timeout el
+            servidor queda listo igual con los workers que sí terminaron
+        """
+        started = time.time()
+        deadline = None if timeout is None else started + timeout
+        complete = False
+        
+        # De a WARM_UP_POLL_INTERVAL para no ignorar un SIGTERM hasta el timeout
+        while not complete:
+            if stop is not None and stop.is_set():
+                logger.info("🛑 Precalentamiento interrumpido")
+                return False
+            
+            wait = WARM_UP_POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, deadline - time.time())
+                if wait <= 0:
+                    break
+            
+            complete = self.process_pool.wait_ready(wait)
+        
+        if complete:
+            logger.info(f"🔥 Pool listo en {time.time() - started:.1f}s ({self.num_processes} workers precalentados)")
+        else:
+            logger.warning(
+                f"⚠️  Solo {self.process_pool.ready_workers()}/{self.num_processes} workers "
+                f"terminaron de precalentarse en {timeout}s"
+            )
+        
+        self.ready = True
+        return complete
+    
+    def readiness(self):
+        """GET /ready: precalentado y sin drenar (se le pueden mandar tareas)"""
+        ready = self.ready and not self.draining
+        return ready, {
+            'ready': ready,
+            'draining': self.draining,
+            'workers_ready': self.process_pool.ready_workers(),
+            'pool_size': self.num_processes
+        }
+    
+    def liveness(self):
+        """GET /live: el proceso responde (también mientras precalienta o drena)"""
+        return True, {
+            'alive': True,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'active_requests': self.active_requests
+        }
+    
+    def drain(self, timeout: float = DEFAULT_DRAIN_TIMEOUT) -> bool:
+        """
+        Rechazar tareas nuevas y esperar a que terminen las requests en curso
+        
+        Las tareas que llegan mientras tanto responden un error retryable
+        (el Servidor A las manda a otro nodo). Vencido el timeout, las
+        requests que quedan se cancelan y también responden retryable.
+        
+        Args:
+            timeout: Segundos máximos de espera
+        
+        Returns:
+            True si todas las requests terminaron dentro del timeout
+        """
+        self.draining = True
+        
+        with self._idle:
+            logger.info(f"🚦 Drenando {self.active_requests} requests en curso (hasta {timeout}s)")
+            finished = self._idle.wait_for(lambda: self.active_requests == 0, timeout)
+        
+        if finished:
+            return True
+        
+        with self._requests_lock:
+            request_ids = list(self._requests)
+        
+        logger.warning(f"⏱️  Drenado vencido: se devuelven {len(request_ids)} requests a otros nodos")
+        for request_id in request_ids:
+            self.cancel_request(request_id)
+        
+        with self._idle:
+            self._idle.wait_for(lambda: self.active_requests == 0, CANCEL_GRACE)
+        
+        return False
+    
+    def graceful_shutdown(self, timeout: float = DEFAULT_DRAIN_TIMEOUT):
+        """
+        Apagado ordenado (SIGTERM): dejar de aceptar conexiones, drenar las
+        requests en curso, cerrar el pool y vaciar las trazas pendientes
+        
+        serve_forever() tiene que estar corriendo en otro thread.
+        
+        Args:
+            timeout: Segundos para las requests en curso (ver drain())
+        """
+        self.draining = True
+        
+        # Las conexiones nuevas se rechazan: el balanceador reintenta en otro nodo
+        super().shutdown()
+        self.socket.close()
+        
+        self.drain(timeout)
+        self.shutdown(timeout=CANCEL_GRACE)
+    
+    def shutdown(self, timeout: float = None):
+        """
+        Cerrar el pool de procesos antes de apagar el servidor
+        
+        Args:
+            timeout: Segundos de espera por las tareas en cola antes de
+                     terminar a los workers (None = esperarlas)
+        """
         logger.info("🛑 Cerrando pool de procesos...")
         self.process_pool.close()
-        self.process_pool.join()
+        self.process_pool.join(timeout)
+        self.process_pool.terminate()
+        
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        
+        # Exporta los spans que esperan su lote
+        self.tracer.shutdown()
+        
         super().shutdown()
 
 
@@ -417,6 +1236,102 @@ Tareas soportadas:
         help=f'Número de procesos en el pool (default: {mp.cpu_count()})'
     )
     
+    parser.add_argument(
+        '--max-tasks-per-worker',
+        type=int,
+        default=50,
+        help='Tareas antes de reciclar un worker (0 = sin límite, default: 50)'
+    )
+    
+    parser.add_argument(
+        '--max-worker-rss-mb',
+        type=int,
+        default=1536,
+        help='RSS en MB que dispara el reciclado de un worker (0 = sin límite, default: 1536)'
+    )
+    
+    parser.add_argument(
+        '--task-timeout',
+        type=int,
+        default=120,
+        help='Segundos máximos por tarea antes de matar al worker (default: 120)'
+    )
+    
+    parser.add_argument(
+        '--task-retries',
+        type=int,
+        default=1,
+        help='Reintentos de una tarea si su worker se cae (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--redis-host',
+        default=None,
+        help='Redis para deduplicar imágenes ya procesadas (default: solo memoria)'
+    )
+    
+    parser.add_argument(
+        '--redis-port',
+        type=int,
+        default=6379,
+        help='Puerto de Redis (default: 6379)'
+    )
+    
+    parser.add_argument(
+        '--trace-file',
+        default=None,
+        help='Archivo JSON lines donde exportar los spans de las trazas'
+    )
+    
+    parser.add_argument(
+        '--otlp-endpoint',
+        default=None,
+        help='Collector OTLP/HTTP para las trazas (ej: http://localhost:4318/v1/traces)'
+    )
+    
+    parser.add_argument(
+        '--trace-sample-rate',
+        type=float,
+        default=1.0,
+        help='Fracción de trazas nuevas a registrar; las del Servidor A respetan su decisión (default: 1.0)'
+    )
+    
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help='Puerto HTTP para GET /metrics (Prometheus), /ready y /live (default: deshabilitado)'
+    )
+    
+    parser.add_argument(
+        '--warm-up',
+        choices=WARM_UP_LEVELS,
+        default='analyzers',
+        help='Precalentar cada worker antes de recibir tareas: analizadores y/o navegador (default: analyzers)'
+    )
+    
+    parser.add_argument(
+        '--warm-up-timeout',
+        type=float,
+        default=120,
+        help='Segundos máximos de precalentamiento antes de declararse listo (default: 120)'
+    )
+    
+    parser.add_argument(
+        '--preload',
+        action='store_true',
+        help='Importar Selenium, PIL y los analizadores una vez en el proceso padre antes de '
+             'crear el pool: los workers los heredan (arranque y reemplazo más rápidos)'
+    )
+    
+    parser.add_argument(
+        '--drain-timeout',
+        type=float,
+        default=DEFAULT_DRAIN_TIMEOUT,
+        help='Segundos para terminar las requests en curso al recibir SIGTERM; '
+             'las que quedan vuelven al Servidor A para otro nodo (default: 30)'
+    )
+    
     return parser.parse_args()
 
 
@@ -425,7 +1340,27 @@ def main():
     args = parse_arguments()
     
     server_address = (args.ip, args.port)
-    server = ProcessingServer(server_address, num_processes=args.processes)
+    server = ProcessingServer(
+        server_address,
+        num_processes=args.processes,
+        redis_host=args.redis_host,
+        redis_port=args.redis_port,
+        max_tasks_per_worker=args.max_tasks_per_worker or None,
+        max_worker_rss_mb=args.max_worker_rss_mb or None,
+        task_timeout=args.task_timeout or None,
+        task_retries=args.task_retries,
+        tracer=build_tracer(
+            'processing-server',
+            trace_file=args.trace_file,
+            otlp_endpoint=args.otlp_endpoint,
+            sample_rate=args.trace_sample_rate
+        ),
+        warm_up=args.warm_up,
+        preload=args.preload
+    )
+    
+    if args.metrics_port is not None:
+        server.start_metrics_exporter(args.ip, args.metrics_port)
     
     logger.info("=" * 70)
     logger.info("🚀 SERVIDOR DE PROCESAMIENTO INICIADO")
@@ -440,15 +1375,27 @@ def main():
     logger.info(f"   - technologies   : Detección de tecnologías web ✨ NUEVO")
     logger.info(f"   - seo            : Análisis de SEO ✨ NUEVO")
     logger.info(f"   - all            : Todas las tareas en paralelo")
-    logger.info(f"\n💡 Presiona Ctrl+C para detener")
+    logger.info(f"\n🔥 Precalentamiento de workers: {args.warm_up}{' (módulos precargados)' if args.preload else ''}")
+    logger.info(f"💡 Ctrl+C o SIGTERM para detener (drena hasta {args.drain_timeout}s)")
     logger.info("=" * 70)
     
+    # STATUS, CANCEL y /live responden mientras el pool precalienta
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    threading.Thread(target=server.serve_forever, name='ProcessingServer', daemon=True).start()
+    
     try:
-        server.serve_forever()
+        server.warm_up(args.warm_up_timeout, stop)
+        
+        while not stop.wait(1):
+            pass
+        
+        logger.info("🛑 SIGTERM recibido")
     except KeyboardInterrupt:
         logger.info("\n🛑 Deteniendo servidor...")
     finally:
-        server.shutdown()
+        server.graceful_shutdown(args.drain_timeout)
+        server.server_close()
         logger.info("👋 Servidor detenido correctamente")
 
 
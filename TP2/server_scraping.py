@@ -5,14 +5,44 @@ import asyncio
 import aiohttp
 from aiohttp import web
 import argparse
+import hashlib
+import hmac
 import logging
+import math
+import os
+import signal
+import sys
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
+from urllib.parse import urlparse
 
 from scraper.html_parser import HtmlParser
+from scraper.crawler import SiteCrawler, normalize_url
+from scraper.link_graph import LinkGraph
+from scraper.link_checker import LinkChecker, link_urls
+from scraper.robots import RobotsCache
+from scraper.sitemap import iter_sitemap_urls, default_sitemaps
+from scraper.encoding import sniff_encoding
+from scraper.change_detection import ChangeTracker, TASK_SECTIONS, DEFAULT_SIMHASH_THRESHOLD, compare
 from common.protocol import Protocol, MessageType, TaskType
 
 from common.rate_limiter import init_rate_limiter, get_rate_limiter
+from common.tenants import TenantQuotas, API_KEY_HEADER, current_tenant, track_tenant
 from common.cache import init_cache, get_cache
+from common import json_codec
+from common.metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE, SIZE_BUCKETS
+from common.prefork import PreforkSupervisor, aggregate_metrics, query_workers, save_worker_metrics, worker_socket
+from common import runtime
+from common.tracing import Tracer, build_tracer, SPAN_KIND_SERVER
+from common.profiling import RequestProfile, SlowRequestRecorder, current_request, track_request
+from common.load_balancer import LoadBalancer, STRATEGIES, parse_nodes
+from common.compression import (
+    negotiate, compress, build_variants, make_etag, variant_etag, etag_matches,
+    MIN_COMPRESS_SIZE
+)
+from processor.render_profiles import RENDER_PROFILES
 
 # Configurar logging
 logging.basicConfig(
@@ -21,6 +51,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Límites del modo crawl
+MAX_CRAWL_DEPTH = 5
+MAX_CRAWL_PAGES = 500
+
+# Límites de /sitemap
+MAX_SITEMAP_URLS = 50000
+MAX_SITEMAP_BATCH = 5000
+
+# Segundos entre dejar de aceptar conexiones y cerrar las inactivas al detenerse
+ACCEPT_GRACE = 0.5
+
+# Rutas que con --tenants-file piden API key y consumen la cuota del tenant
+TENANT_ROUTES = frozenset(('/scrape', '/crawl', '/crawl/graph', '/sitemap'))
+
+# Valores de los ajustes de runtime que no se pasan por línea de comandos
+STANDARD_DEFAULTS = {'uvloop': False, 'async_logging': False, 'log_level': 'INFO', 'backlog': 128}
+PERFORMANCE_DEFAULTS = {'uvloop': True, 'async_logging': True, 'log_level': 'WARNING', 'backlog': 2048}
+
 
 class ScrapingServer:
     """Servidor HTTP asíncrono para scraping de páginas web"""
@@ -36,13 +84,69 @@ class ScrapingServer:
         enable_cache: bool = True,
         enable_rate_limit: bool = True,
         max_requests_per_minute: int = 10,
-        cache_ttl: int = 3600
+        cache_ttl: int = 3600,
+        link_cache_ttl: int = 86400,
+        robots_ttl: int = 86400,
+        processing_nodes: list = None,
+        balance_strategy: str = 'least-outstanding',
+        hedge_after: float = None,
+        tracer: Tracer = None,
+        admin_token: str = None,
+        slow_request_ms: float = None,
+        slow_request_dir: str = 'slow_requests',
+        slow_request_max: int = 50,
+        reuse_port: bool = False,
+        worker_slot: int = None,
+        run_dir: str = None,
+        shutdown_timeout: float = 30.0,
+        drain_delay: float = 0.0,
+        keepalive_timeout: float = 75.0,
+        backlog: int = 128,
+        max_line_size: int = 8190,
+        max_field_size: int = 8190,
+        access_log: bool = True,
+        tenants_file: str = None,
+        change_detection: bool = False,
+        change_ttl: int = 7 * 86400,
+        change_channel: str = 'page-changes',
+        simhash_threshold: int = DEFAULT_SIMHASH_THRESHOLD
     ):
         self.host = host
         self.port = port
+        
+        # Ajustes del servidor HTTP de aiohttp
+        self.keepalive_timeout = keepalive_timeout
+        self.backlog = backlog
+        self.max_line_size = max_line_size
+        self.max_field_size = max_field_size
+        self.access_log = access_log
+        
+        # Modo pre-fork: varios procesos comparten el puerto (SO_REUSEPORT) y
+        # se consultan entre sí por los sockets Unix de run_dir
+        self.reuse_port = reuse_port
+        self.worker_slot = worker_slot
+        self.run_dir = run_dir
+        self.shutdown_timeout = shutdown_timeout
+        self.started_at = time.time()
+        self._stop_event = None
+        
+        # Drenado (SIGTERM): /ready pasa a 503 drain_delay segundos antes de
+        # dejar de aceptar, para que el balanceador externo saque al proceso
+        self.drain_delay = drain_delay
+        self.ready = False
+        self.draining = False
+        self.on_ready = None
         self.processing_host = processing_host
         self.processing_port = processing_port
         
+        # Servidores B: lista (host, port) o el único processing_host/port
+        self.balancer = LoadBalancer(
+            processing_nodes or [(processing_host, processing_port)],
+            strategy=balance_strategy,
+            hedge_after=hedge_after
+        )
+        self._health_task = None
+        
         # Configuración de Redis
         self.redis_host = redis_host
         self.redis_port = redis_port
@@ -50,6 +154,8 @@ class ScrapingServer:
         self.enable_rate_limit = enable_rate_limit
         self.max_requests_per_minute = max_requests_per_minute
         self.cache_ttl = cache_ttl
+        self.link_cache_ttl = link_cache_ttl
+        self.robots_ttl = robots_ttl
         
         self.html_parser = HtmlParser()
         self.protocol = Protocol()
@@ -57,6 +163,325 @@ class ScrapingServer:
         # Rate Limiter y Caché
         self.rate_limiter = None
         self.cache = None
+        
+        # Tenants: API key obligatoria y cuotas por tenant en Redis (None =
+        # requests anónimas, solo con el rate limit por dominio)
+        self.tenants_file = tenants_file
+        self.tenant_quotas = None
+        
+        # Detección de cambios: huella por URL en Redis (usa la caché) y
+        # Servidor B solo para las secciones que cambiaron
+        self.change_detection = change_detection
+        self.change_ttl = change_ttl
+        self.change_channel = change_channel
+        self.simhash_threshold = simhash_threshold
+        self.change_tracker = None
+        
+        # Sesión HTTP compartida y verificador de links (se crean en start())
+        self.session = None
+        self.link_checker = None
+        self.robots = None
+        
+        self._init_metrics()
+        
+        # Trazas (sin exportador solo se propaga el contexto a B)
+        self.tracer = tracer or build_tracer('scraping-server')
+        
+        # Perfilado a pedido (?profile=1, solo con X-Admin-Token) y
+        # registro de requests lentas (None = deshabilitado)
+        self.admin_token = admin_token
+        self._profiling = False
+        self.slow_requests = None
+        
+        if slow_request_ms:
+            self.slow_requests = SlowRequestRecorder(
+                slow_request_dir,
+                threshold_ms=slow_request_ms,
+                max_entries=slow_request_max
+            )
+    
+    def _init_metrics(self):
+        """Métricas expuestas en /metrics (formato Prometheus)"""
+        self.metrics = MetricsRegistry()
+        
+        self.stage_seconds = self.metrics.histogram(
+            'scraper_stage_seconds',
+            'Duración de cada etapa de /scrape (rate_limit, cache_lookup, fetch, '
+            'parse, link_check, processing, cache_store, serialize, compress)',
+            labelnames=('stage',)
+        )
+        self.response_bytes = self.metrics.histogram(
+            'scraper_response_bytes',
+            'Tamaño de las respuestas JSON serializadas (antes de comprimir)',
+            buckets=SIZE_BUCKETS
+        )
+        self.http_seconds = self.metrics.histogram(
+            'scraper_http_request_seconds',
+            'Duración de las requests HTTP por ruta',
+            labelnames=('route',)
+        )
+        self.http_requests = self.metrics.counter(
+            'scraper_http_requests_total',
+            'Requests HTTP por ruta y status (499 = el cliente se desconectó)',
+            labelnames=('route', 'status')
+        )
+        self.http_in_flight = self.metrics.gauge(
+            'scraper_http_requests_in_flight',
+            'Requests HTTP en curso'
+        )
+        self.cache_lookups = self.metrics.counter(
+            'scraper_cache_lookups_total',
+            'Consultas al caché de /scrape por resultado (hit, not_modified, miss)',
+            labelnames=('result',)
+        )
+        self.rate_limit_rejections = self.metrics.counter(
+            'scraper_rate_limit_rejections_total',
+            'Requests frenadas por el rate limit, por dominio',
+            labelnames=('domain',)
+        )
+        self.processing_errors = self.metrics.counter(
+            'scraper_processing_errors_total',
+            'Requests al Servidor B que terminaron en error'
+        )
+        self.tenant_requests = self.metrics.counter(
+            'scraper_tenant_requests_total',
+            'Requests admitidas por tenant y status',
+            labelnames=('tenant', 'status')
+        )
+        self.tenant_rejections = self.metrics.counter(
+            'scraper_tenant_rejections_total',
+            'Requests rechazadas por tenant y motivo (unauthorized, rate, concurrency)',
+            labelnames=('tenant', 'reason')
+        )
+        self.tenant_seconds = self.metrics.histogram(
+            'scraper_tenant_request_seconds',
+            'Duración de las requests admitidas por tenant',
+            labelnames=('tenant',)
+        )
+        self.tenant_in_flight = self.metrics.gauge(
+            'scraper_tenant_requests_in_flight',
+            'Requests en curso por tenant (en este proceso)',
+            labelnames=('tenant',)
+        )
+        self.change_checks = self.metrics.counter(
+            'scraper_change_checks_total',
+            'Fetches comparados con la huella anterior (first_seen, changed, unchanged)',
+            labelnames=('result',)
+        )
+        self.page_changes = self.metrics.counter(
+            'scraper_page_changes_total',
+            'Secciones de página que cambiaron entre fetches',
+            labelnames=('section',)
+        )
+        self.tasks_reused = self.metrics.counter(
+            'scraper_processing_tasks_reused_total',
+            'Tareas del Servidor B no pedidas porque la página no cambió',
+            labelnames=('task',)
+        )
+        
+        self.metrics.gauge_callback(
+            'scraper_processing_outstanding',
+            'Tareas en vuelo por Servidor B',
+            lambda: {(node.address,): node.outstanding for node in self.balancer.nodes},
+            labelnames=('node',)
+        )
+        self.metrics.gauge_callback(
+            'scraper_processing_healthy',
+            'Servidor B disponible (1) o expulsado (0)',
+            lambda: {(node.address,): int(node.available(time.time())) for node in self.balancer.nodes},
+            labelnames=('node',)
+        )
+    
+    @web.middleware
+    async def _metrics_middleware(self, request, handler):
+        """Requests en vuelo, latencia y status por ruta"""
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else 'unmatched'
+        status = 500
+        
+        self.http_in_flight.inc()
+        start = time.perf_counter()
+        
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        except asyncio.CancelledError:
+            status = 499
+            raise
+        finally:
+            self.http_in_flight.dec()
+            self.http_seconds.observe(time.perf_counter() - start, route=route)
+            self.http_requests.inc(route=route, status=str(status))
+    
+    @web.middleware
+    async def _tracing_middleware(self, request, handler):
+        """Span raíz de cada request (continúa un traceparent entrante)"""
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else 'unmatched'
+        
+        with self.tracer.span(
+            f"{request.method} {route}",
+            parent=request.headers.get('traceparent'),
+            kind=SPAN_KIND_SERVER,
+            attributes={'http.method': request.method, 'http.target': request.path_qs}
+        ) as span:
+            response = await handler(request)
+            span.set_attribute('http.status_code', response.status)
+            
+            # Para buscar la traza de una respuesta lenta
+            if not response.prepared:
+                response.headers['X-Trace-Id'] = span.context.trace_id
+            
+            return response
+    
+    @web.middleware
+    async def _tenant_middleware(self, request, handler):
+        """
+        API key y cuotas del tenant en TENANT_ROUTES (solo con --tenants-file)
+        
+        401 sin una API key válida y 429 si el tenant está en su máximo de
+        requests por minuto o en curso. Durante la request admitida
+        current_tenant() devuelve su Tenant (viaja al Servidor B con su peso).
+        """
+        if self.tenant_quotas is None or request.path not in TENANT_ROUTES:
+            return await handler(request)
+        
+        try:
+            tenant = self.tenant_quotas.identify(request.headers.get(API_KEY_HEADER))
+            lease, info = self.tenant_quotas.acquire(tenant) if tenant is not None else (None, None)
+        except Exception as e:
+            logger.error(f"❌ Error consultando las cuotas de tenants: {e}")
+            return web.json_response({'error': 'Tenant quotas unavailable'}, status=503)
+        
+        if tenant is None:
+            self.tenant_rejections.inc(tenant='unknown', reason='unauthorized')
+            return web.json_response({'error': f'Missing or invalid {API_KEY_HEADER} header'}, status=401)
+        
+        if lease is None:
+            self.tenant_rejections.inc(tenant=tenant.name, reason=info['reason'])
+            retry_after = max(1, math.ceil(info['retry_after']))
+            exceeded = 'requests' if info['reason'] == 'rate' else 'concurrent requests'
+            return web.json_response(
+                {
+                    'error': 'Tenant quota exceeded',
+                    'message': f"Too many {exceeded} for tenant {tenant.name}",
+                    'quota': info
+                },
+                status=429,
+                headers={'Retry-After': str(retry_after), 'X-Tenant': tenant.name}
+            )
+        
+        status = 500
+        start = time.perf_counter()
+        self.tenant_in_flight.inc(tenant=tenant.name)
+        
+        try:
+            with track_tenant(tenant):
+                response = await handler(request)
+            status = response.status
+            
+            if not response.prepared:
+                response.headers['X-Tenant'] = tenant.name
+                if tenant.requests_per_minute:
+                    response.headers['X-Tenant-Remaining'] = str(
+                        max(0, tenant.requests_per_minute - info['requests_in_window'])
+                    )
+            
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        except asyncio.CancelledError:
+            status = 499
+            raise
+        finally:
+            self.tenant_in_flight.dec(tenant=tenant.name)
+            self.tenant_seconds.observe(time.perf_counter() - start, tenant=tenant.name)
+            self.tenant_requests.inc(tenant=tenant.name, status=str(status))
+            self.tenant_quotas.release(tenant, lease)
+    
+    @contextmanager
+    def _stage(self, name: str):
+        """Etapa de /scrape: histograma de latencia y span de la traza"""
+        start = time.perf_counter()
+        
+        try:
+            with self.tracer.span(name) as span, self.stage_seconds.time(stage=name):
+                yield span
+        finally:
+            record = current_request()
+            if record is not None:
+                record.add_timing(name, time.perf_counter() - start)
+    
+    async def slow_requests_handler(self, request):
+        """Requests lentas guardadas (solo admin)"""
+        if not self._is_admin(request):
+            return web.json_response({'error': 'Requires a valid X-Admin-Token'}, status=403)
+        
+        if self.slow_requests is None:
+            return web.json_response({'error': 'Slow request recording not enabled'}, status=503)
+        
+        loop = asyncio.get_event_loop()
+        entries = await loop.run_in_executor(None, self.slow_requests.entries)
+        
+        return web.json_response({
+            'threshold_ms': self.slow_requests.threshold * 1000,
+            'directory': self.slow_requests.directory,
+            'entries': entries
+        })
+    
+    async def metrics_handler(self, request):
+        """Endpoint de métricas para Prometheus (de todos los workers en pre-fork)"""
+        if self.run_dir is None:
+            body = self.metrics.render()
+        else:
+            answers = await query_workers(self.run_dir, '/_worker/metrics')
+            body = aggregate_metrics(self.run_dir, [answer for answer in answers.values() if answer]).render()
+        
+        return web.Response(body=body, headers={'Content-Type': METRICS_CONTENT_TYPE})
+    
+    def _worker_state(self) -> dict:
+        """Estado propio de este proceso (para /health en pre-fork)"""
+        return {
+            'worker': self.worker_slot,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'requests': self.http_requests.total(),
+            'in_flight': self.http_in_flight.value(),
+            'robots_cached': len(self.robots) if self.robots is not None else 0,
+            'processing_outstanding': sum(node.outstanding for node in self.balancer.nodes)
+        }
+    
+    async def ready_handler(self, request):
+        """Readiness: 503 hasta estar escuchando y mientras drena"""
+        ready = self.ready and not self.draining
+        return web.json_response(
+            {'ready': ready, 'draining': self.draining, 'worker': self.worker_slot},
+            status=200 if ready else 503
+        )
+    
+    async def live_handler(self, request):
+        """Liveness: el event loop responde (también mientras drena)"""
+        return web.json_response({
+            'alive': True,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'in_flight': self.http_in_flight.value()
+        })
+    
+    async def _worker_metrics_handler(self, request):
+        # Lo último que se reportó queda en run_dir: si este proceso muere,
+        # el total agregado no baja de ahí
+        metrics = self.metrics.snapshot()
+        save_worker_metrics(self.run_dir, self.worker_slot, metrics)
+        return web.json_response({'worker': str(self.worker_slot), 'pid': os.getpid(), 'metrics': metrics})
+    
+    async def _worker_state_handler(self, request):
+        return web.json_response(self._worker_state())
     
     async def _init_redis_services(self):
         """Inicializa servicios de Redis (Rate Limiter y Caché)"""
@@ -88,12 +513,62 @@ class ScrapingServer:
                 )
             else:
                 logger.info("⚠️  Caché deshabilitado")
+            
+            # Detección de cambios (guarda las huellas como blobs de la caché)
+            if self.change_detection and self.cache:
+                self.change_tracker = ChangeTracker(
+                    self.cache,
+                    ttl=self.change_ttl,
+                    channel=self.change_channel,
+                    threshold=self.simhash_threshold
+                )
+                logger.info(
+                    f"✅ Detección de cambios habilitada: canal {self.change_channel or '-'}, "
+                    f"TTL={self.change_ttl}s"
+                )
+            elif self.change_detection:
+                logger.warning("⚠️  La detección de cambios necesita la caché: deshabilitada")
         
         except Exception as e:
             logger.error(f"❌ Error inicializando servicios de Redis: {e}")
             logger.warning("⚠️  Servidor continuará sin Rate Limiting ni Caché")
             self.enable_rate_limit = False
             self.enable_cache = False
+            self.change_tracker = None
+    
+    async def _init_tenants(self):
+        """
+        Cargar los tenants de --tenants-file en Redis
+        
+        Sin Redis no se puede identificar a nadie: a diferencia del rate
+        limiter y la caché, el servidor no arranca sin las cuotas.
+        """
+        if not self.tenants_file:
+            return
+        
+        try:
+            self.tenant_quotas = TenantQuotas(redis_host=self.redis_host, redis_port=self.redis_port)
+            count = self.tenant_quotas.load_file(self.tenants_file)
+        except Exception as e:
+            logger.error(f"❌ Error inicializando los tenants: {e}")
+            raise
+        
+        logger.info(f"✅ Tenants habilitados: {count} (header {API_KEY_HEADER})")
+    
+    async def tenant_usage_handler(self, request):
+        """Uso de las cuotas del tenant de la API key (de todos con X-Admin-Token)"""
+        if self.tenant_quotas is None:
+            return web.json_response({'error': 'Tenants not enabled'}, status=503)
+        
+        if self._is_admin(request):
+            tenants = self.tenant_quotas.tenants()
+        else:
+            tenant = self.tenant_quotas.identify(request.headers.get(API_KEY_HEADER))
+            if tenant is None:
+                return web.json_response({'error': f'Missing or invalid {API_KEY_HEADER} header'}, status=401)
+            tenants = [tenant]
+        
+        return web.json_response({'tenants': [self.tenant_quotas.usage(tenant) for tenant in tenants]})
     
     async def health_handler(self, request):
         """Endpoint de health check"""
@@ -102,10 +577,26 @@ class ScrapingServer:
             'timestamp': datetime.utcnow().isoformat() + 'Z',
             'services': {
                 'rate_limiter': 'enabled' if self.enable_rate_limit else 'disabled',
-                'cache': 'enabled' if self.enable_cache else 'disabled'
-            }
+                'cache': 'enabled' if self.enable_cache else 'disabled',
+                'tenants': 'enabled' if self.tenant_quotas is not None else 'disabled',
+                'change_detection': 'enabled' if self.change_tracker is not None else 'disabled'
+            },
+            'processing': self.balancer.stats()
         }
         
+        # En pre-fork: estado de cada worker (el balanceador es por proceso)
+        if self.run_dir is not None:
+            answers = await query_workers(self.run_dir, '/_worker/state')
+            response['worker'] = self.worker_slot
+            response['workers'] = sorted(
+                (answer for answer in answers.values() if answer),
+                key=lambda state: (state['worker'], state['pid'])
+            )
+            unreachable = sum(1 for answer in answers.values() if not answer)
+            if unreachable:
+                response['status'] = 'degraded'
+                response['workers_unreachable'] = unreachable
+        
         # Agregar estadísticas de caché si está habilitado
         if self.enable_cache and self.cache:
             try:
@@ -116,12 +607,52 @@ class ScrapingServer:
         
         return web.json_response(response)
     
+    def _is_admin(self, request) -> bool:
+        if not self.admin_token:
+            return False
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), self.admin_token)
+    
     async def scrape_handler(self, request):
-        """Endpoint principal de scraping"""
+        """
+        Endpoint principal de scraping
+        
+        Con ?profile=1 (y X-Admin-Token) la respuesta incluye 'profile':
+        tiempos por etapa, cProfile del Servidor A mientras dura la request
+        (el event loop es compartido: puede aparecer trabajo de otras
+        requests) y el cProfile de cada tarea en el Servidor B. Si hay
+        registro de requests lentas, las que superan el umbral se guardan.
+        """
+        profile = request.query.get('profile', '').lower() in ('1', 'true')
+        
+        if profile:
+            if not self._is_admin(request):
+                return web.json_response({'error': 'Profiling requires a valid X-Admin-Token'}, status=403)
+            
+            # Un solo cProfile activo por proceso
+            if self._profiling:
+                return web.json_response({'error': 'Another request is being profiled'}, status=409)
+            
+            self._profiling = True
+        
+        record = RequestProfile(request.query.get('url'), profile=profile)
+        span = Tracer.current_span()
+        record.trace_id = span.context.trace_id if span is not None else None
+        
+        try:
+            with self.slow_requests.watch(record) if self.slow_requests else nullcontext(), track_request(record):
+                return await self._scrape(request)
+        finally:
+            if profile:
+                self._profiling = False
+    
+    async def _scrape(self, request):
+        """Scraping de la URL de la request (caché, fetch, parseo y procesamiento)"""
         try:
             # Obtener parámetros
             url = request.query.get('url')
             full = request.query.get('full', 'false').lower() == 'true'
+            render_profile = request.query.get('render_profile')
+            check_links = request.query.get('check_links', 'false').lower() == 'true'
             
             if not url:
                 return web.json_response(
@@ -129,13 +660,24 @@ class ScrapingServer:
                     status=400
                 )
             
-            logger.info(f"📥 Request recibido: {url} (full={full})")
+            if render_profile and render_profile not in RENDER_PROFILES:
+                return web.json_response(
+                    {
+                        'error': f'Unknown render_profile: {render_profile}',
+                        'available': list(RENDER_PROFILES)
+                    },
+                    status=400
+                )
+            
+            logger.info("📥 Request recibido: %s (full=%s)", url, full)
             
             # VERIFICAR RATE LIMIT
             if self.enable_rate_limit and self.rate_limiter:
-                allowed, rate_info = self.rate_limiter.check_rate_limit(url)
+                with self._stage('rate_limit'):
+                    allowed, rate_info = self.rate_limiter.check_rate_limit(url)
                 
                 if not allowed:
+                    self.rate_limit_rejections.inc(domain=rate_info['domain'])
                     logger.warning(
                         f"⚠️  Rate limit excedido para {rate_info['domain']}: "
                         f"{rate_info['requests_in_window']}/{rate_info['max_requests']}"
@@ -159,36 +701,65 @@ class ScrapingServer:
                         }
                     )
             
+            # Un perfil de render explícito cambia el resultado de las tareas
+            # con navegador: esas respuestas no se mezclan con las del caché.
+            # Con check_links el status de cada link ya tiene su propio caché.
+            # Una request perfilada siempre recorre todas las etapas
+            record = current_request()
+            profiling = record is not None and record.profiler is not None
+            
+            use_cache = (
+                self.enable_cache and self.cache
+                and not (full and render_profile)
+                and not check_links
+                and not profiling
+            )
+            
             # VERIFICAR CACHÉ
-            if self.enable_cache and self.cache:
-                cached_data = self.cache.get(url, full)
+            if use_cache:
+                # Respuesta ya serializada y comprimida (con ETag)
+                with self._stage('cache_lookup'):
+                    cached_response = self._cached_response(request, url, full)
                 
-                if cached_data:
-                    logger.info(
-                        f"✅ Respuesta desde caché: {url} "
-                        f"(TTL: {cached_data['cache']['ttl_seconds']}s)"
-                    )
+                if cached_response is not None:
+                    self.cache_lookups.inc(result='not_modified' if cached_response.status == 304 else 'hit')
+                    return cached_response
+                
+                # Entradas sin variantes (ej: escritas por /crawl): los bytes
+                # guardados se devuelven tal cual
+                with self._stage('cache_lookup'):
+                    cached_raw = self.cache.get_raw(url, full)
+                
+                if cached_raw:
+                    self.cache_lookups.inc(result='hit')
+                    ttl = cached_raw['ttl_seconds']
+                    logger.info("✅ Respuesta desde caché: %s (TTL: %ss)", url, ttl)
                     
-                    return web.json_response(
-                        cached_data,
-                        headers={
-                            'X-Cache': 'HIT',
-                            'X-Cache-TTL': str(cached_data['cache']['ttl_seconds'])
-                        }
+                    return await self._body_response(
+                        request,
+                        cached_raw['body'],
+                        headers={'X-Cache': 'HIT', 'X-Cache-TTL': str(ttl)}
                     )
             
             # PROCESAR REQUEST (no está en caché)
-            logger.info(f"🔄 Procesando nueva request: {url}")
+            if use_cache:
+                self.cache_lookups.inc(result='miss')
             
-            # SCRAPING DIRECTO CON AIOHTTP
-            timeout = aiohttp.ClientTimeout(total=30)
+            logger.info("🔄 Procesando nueva request: %s", url)
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as response:
-                    html_content = await response.text()
+            # SCRAPING DIRECTO CON AIOHTTP (sesión compartida)
+            # El HTML queda en bytes: se decodifica una sola vez, en lxml
+            with self._stage('fetch'):
+                async with self.session.get(url) as response:
+                    html_content, encoding = await self._read_html(response)
                     status_code = response.status
                     headers = dict(response.headers)
             
+            # El HTML queda disponible para el registro de requests lentas
+            if record is not None:
+                record.html = html_content
+                record.encoding = encoding
+            
             if not html_content:
                 return web.json_response(
                     {
@@ -199,8 +770,13 @@ class ScrapingServer:
                     status=500
                 )
             
-            # Parsear HTML
-            scraping_data = self.html_parser.parse(html_content, url)
+            # Parsear HTML (con la huella para la detección de cambios)
+            with self._stage('parse'):
+                scraping_data = self.html_parser.parse(
+                    html_content, url, encoding,
+                    fingerprint=self.change_tracker is not None
+                )
+            fingerprint = scraping_data.pop('fingerprint', None)
             
             # Estructura de respuesta
             response_data = {
@@ -210,25 +786,93 @@ class ScrapingServer:
                 'scraping_data': scraping_data
             }
             
+            # Comparar con el fetch anterior de la URL
+            previous = None
+            if fingerprint is not None:
+                with self._stage('change_detection'):
+                    previous = self.change_tracker.load(url)
+                    response_data['changes'] = self._detect_changes(url, fingerprint, previous, scraping_data)
+            
+            # Verificación de links rotos (opcional)
+            link_health = None
+            if check_links:
+                with self._stage('link_check'):
+                    link_health = await self.link_checker.health_report(
+                        link_urls(scraping_data.get('links', []))
+                    )
+                response_data['link_health'] = link_health
+            
             # Si se solicita procesamiento completo
+            processing_data = None
+            tasks, reused = None, {}
             if full:
-                try:
-                    # PASAR HTML Y HEADERS AL SERVIDOR B
-                    processing_data = await self._request_processing(
-                        url,
-                        html_content=html_content,
-                        headers=headers
+                # Con detección de cambios, solo las tareas cuyas secciones
+                # cambiaron (tasks=None: todas)
+                if fingerprint is not None:
+                    tasks, reused = self._plan_processing(
+                        previous, fingerprint, render_profile,
+                        rerun=('seo',) if check_links else (),
+                        all_tasks=profiling
                     )
+                    response_data['changes']['reprocessed'] = list(TASK_SECTIONS) if tasks is None else tasks
+                    response_data['changes']['reused'] = list(reused)
+                
+                try:
+                    processed = {}
+                    if tasks is None or tasks:
+                        # PASAR HTML Y HEADERS AL SERVIDOR B
+                        processed = await self._request_processing(
+                            url,
+                            html_content=html_content,
+                            html_encoding=encoding,
+                            headers=headers,
+                            images=scraping_data.get('images', []),
+                            render_profile=render_profile,
+                            link_health=link_health['results'] if link_health else None,
+                            tasks=tasks
+                        )
+                    
+                    if reused:
+                        merged = dict(reused, **processed)
+                        processing_data = {name: merged[name] for name in TASK_SECTIONS if name in merged}
+                        processing_data.update((name, value) for name, value in merged.items() if name not in processing_data)
+                    else:
+                        processing_data = processed
                     response_data['processing_data'] = processing_data
                 except Exception as e:
                     logger.error(f"⚠️  Error en procesamiento: {e}")
+                    self.processing_errors.inc()
                     response_data['processing_error'] = str(e)
             
+            # La huella se actualiza siempre; los resultados, solo los nuevos
+            # y sin error
+            if fingerprint is not None:
+                try:
+                    with self._stage('change_detection'):
+                        self._save_changes(url, fingerprint, previous, processing_data, set(reused), render_profile)
+                except Exception as e:
+                    logger.error(f"⚠️  Error guardando la huella de {url}: {e}")
+            
             # GUARDAR EN CACHÉ
-            if self.enable_cache and self.cache:
+            # Sin 'changes': un hit no vuelve a comparar y repetiría el diff
+            # de este fetch como si fuera actual. El body no lleva bloque
+            # 'cache' (hit/miss y TTL van en X-Cache / X-Cache-TTL): el miss
+            # y los hits devuelven los mismos bytes y el mismo ETag. Se
+            # serializa y comprime una sola vez: el miss responde con la
+            # misma variante que se guarda
+            etag = body = variants = None
+            
+            if use_cache:
+                cached_data = {key: value for key, value in response_data.items() if key != 'changes'}
                 try:
-                    self.cache.set(url, response_data, full, ttl=self.cache_ttl)
-                    logger.info(f"💾 Respuesta guardada en caché: {url}")
+                    with self._stage('serialize'):
+                        body = json_codec.dumps(cached_data)
+                    etag = make_etag(body)
+                    
+                    with self._stage('cache_store'):
+                        self.cache.set_raw(url, body, full, ttl=self.cache_ttl)
+                        variants = await self._store_variants(url, body, full, etag)
+                    logger.info("💾 Respuesta guardada en caché: %s", url)
                 except Exception as e:
                     logger.error(f"⚠️  Error guardando en caché: {e}")
             
@@ -247,7 +891,18 @@ class ScrapingServer:
                 except:
                     pass
             
-            return web.json_response(response_data, headers=response_headers)
+            if profiling:
+                response_data['profile'] = record.report()
+            
+            if body is not None:
+                # El diff de este fetch se agrega solo a esta respuesta
+                if 'changes' in response_data:
+                    body = json_codec.splice_object(body, 'changes', response_data['changes'])
+                    variants = None
+                
+                return await self._body_response(request, body, headers=response_headers, etag=etag, variants=variants)
+            
+            return await self._json_response(request, response_data, headers=response_headers, etag=etag)
         
         except Exception as e:
             logger.error(f"❌ Error procesando request: {e}", exc_info=True)
@@ -256,6 +911,208 @@ class ScrapingServer:
                 status=500
             )
     
+    def _detect_changes(self, url: str, fingerprint, previous: dict, scraping_data: dict) -> dict:
+        """
+        Comparar la huella actual con la del fetch anterior y publicar el
+        evento si cambió alguna sección
+        
+        Returns:
+            dict para response_data['changes']
+        """
+        if previous is None:
+            self.change_checks.inc(result='first_seen')
+            return {'first_seen': True, 'changed': False, 'sections': [], 'diff': None}
+        
+        diff = compare(previous['fingerprint'], fingerprint, scraping_data, threshold=self.change_tracker.threshold)
+        self.change_checks.inc(result='changed' if diff['changed'] else 'unchanged')
+        
+        if diff['changed']:
+            for section in diff['sections']:
+                self.page_changes.inc(section=section)
+            
+            logger.info("🔔 Cambios en %s: %s", url, ', '.join(diff['sections']))
+            self.change_tracker.publish(url, diff)
+        
+        return {'first_seen': False, 'changed': diff['changed'], 'sections': diff['sections'], 'diff': diff}
+    
+    def _plan_processing(self, previous: dict, fingerprint, render_profile: str = None, rerun=(), all_tasks: bool = False):
+        """
+        Tareas del Servidor B a pedir y resultados guardados a reusar
+        
+        Una tarea se reusa si las secciones de las que depende (TASK_SECTIONS)
+        no cambiaron desde que se calculó y con el mismo perfil de render.
+        technologies se pide siempre: depende de todo el HTML y los headers.
+        
+        Args:
+            previous: Registro anterior de la URL (None = primera vez)
+            fingerprint: Huella actual
+            render_profile: Perfil de render de la request
+            rerun: Tareas que se piden siempre (ej: seo con check_links)
+            all_tasks: Pedir todas (ej: request perfilada)
+        
+        Returns:
+            Tuple de (tareas: list o None = todas, reusados: dict tarea -> resultado)
+        """
+        entries = previous['tasks'] if previous and not all_tasks else {}
+        reused = {
+            task: entries[task]['result']
+            for task in TASK_SECTIONS
+            if task not in rerun and self.change_tracker.reusable(entries.get(task), task, fingerprint, render_profile)
+        }
+        
+        for task in reused:
+            self.tasks_reused.inc(task=task)
+        
+        if not reused:
+            return None, {}
+        return [task for task in TASK_SECTIONS if task not in reused], reused
+    
+    def _save_changes(self, url: str, fingerprint, previous: dict, processing_data: dict, reused: set, render_profile: str = None):
+        """Guardar la huella y los resultados nuevos (los reusados mantienen su registro)"""
+        entries = dict(previous['tasks']) if previous else {}
+        
+        for task, result in (processing_data or {}).items():
+            if TASK_SECTIONS.get(task) is None or task in reused:
+                continue
+            
+            # Una tarea que falló se vuelve a pedir en el próximo fetch
+            if isinstance(result, dict) and 'error' in result:
+                entries.pop(task, None)
+            else:
+                entries[task] = ChangeTracker.task_entry(result, fingerprint, render_profile)
+        
+        self.change_tracker.save(url, fingerprint, entries)
+    
+    def _cached_response(self, request, url: str, full: bool):
+        """
+        Servir un hit desde las variantes pre-comprimidas
+        
+        Con If-None-Match primero se lee solo el ETag: si coincide se
+        responde 304 sin traer el body de Redis.
+        
+        Returns:
+            web.Response o None si la entrada no tiene variantes
+        """
+        coding = negotiate(request.headers.get('Accept-Encoding'))
+        if_none_match = request.headers.get('If-None-Match')
+        
+        if if_none_match:
+            entry = self.cache.get_variant(url, None, full)
+            
+            if entry is None:
+                return None
+            
+            if etag_matches(if_none_match, entry['etag']):
+                logger.info("✅ 304 Not Modified: %s", url)
+                self.cache.record_hit()
+                return web.Response(status=304, headers={
+                    'ETag': variant_etag(entry['etag'], coding),
+                    'Vary': 'Accept-Encoding',
+                    'X-Cache': 'HIT',
+                    'X-Cache-TTL': str(entry['ttl_seconds'])
+                })
+        
+        entry = self.cache.get_variant(url, coding, full)
+        
+        if entry is None:
+            return None
+        
+        headers = {
+            'ETag': variant_etag(entry['etag'], entry['coding']),
+            'Vary': 'Accept-Encoding',
+            'X-Cache': 'HIT',
+            'X-Cache-TTL': str(entry['ttl_seconds'])
+        }
+        
+        if entry['coding'] != 'identity':
+            headers['Content-Encoding'] = entry['coding']
+        
+        logger.info(
+            "✅ Respuesta desde caché: %s (%s, %d bytes, TTL: %ss)",
+            url, entry['coding'], len(entry['body']), entry['ttl_seconds']
+        )
+        
+        return web.Response(body=entry['body'], content_type='application/json', headers=headers)
+    
+    async def _store_variants(self, url: str, body: bytes, full: bool, etag: str) -> dict:
+        """
+        Guardar la respuesta ya serializada comprimida en cada coding
+        disponible (se comprime una vez por escritura, no por hit)
+        
+        Args:
+            url: URL cacheada
+            body: Respuesta serializada (la misma que recibió el miss)
+            full: Si es scraping completo
+            etag: ETag de body
+        
+        Returns:
+            Variantes guardadas (coding -> bytes), para servir el miss
+        """
+        # Comprimir varios MB bloquearía el event loop
+        loop = asyncio.get_event_loop()
+        variants = await loop.run_in_executor(None, build_variants, body)
+        
+        self.cache.set_variants(url, variants, etag, full, ttl=self.cache_ttl)
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "🗜️  Variantes guardadas para %s: %s",
+                url, ', '.join(f"{name}={len(data)}" for name, data in variants.items())
+            )
+        
+        return variants
+    
+    async def _json_response(self, request, data: dict, status: int = 200, headers: dict = None, etag: str = None):
+        """Respuesta JSON (codec rápido) con ETag y compresión negociada"""
+        with self._stage('serialize'):
+            body = json_codec.dumps(data)
+        
+        return await self._body_response(request, body, status, headers, etag)
+    
+    async def _body_response(
+        self,
+        request,
+        body: bytes,
+        status: int = 200,
+        headers: dict = None,
+        etag: str = None,
+        variants: dict = None
+    ):
+        """
+        Enviar un body JSON ya serializado con ETag, If-None-Match y
+        compresión negociada
+        
+        etag: ETag de la entrada cacheada a la que corresponde el body
+        (None = el del body). variants: versiones ya comprimidas de body
+        (build_variants); se sirve la del coding negociado sin comprimir
+        de nuevo
+        """
+        self.response_bytes.observe(len(body))
+        
+        etag = etag or make_etag(body)
+        coding = negotiate(request.headers.get('Accept-Encoding'))
+        
+        if len(body) < MIN_COMPRESS_SIZE or (variants is not None and coding not in variants):
+            coding = 'identity'
+        
+        headers = dict(headers or {})
+        headers['ETag'] = variant_etag(etag, coding)
+        headers['Vary'] = 'Accept-Encoding'
+        
+        if status == 200 and etag_matches(request.headers.get('If-None-Match'), etag):
+            return web.Response(status=304, headers=headers)
+        
+        if coding != 'identity':
+            if variants is not None:
+                body = variants[coding]
+            else:
+                loop = asyncio.get_event_loop()
+                with self._stage('compress'):
+                    body = await loop.run_in_executor(None, compress, body, coding)
+            headers['Content-Encoding'] = coding
+        
+        return web.Response(body=body, status=status, content_type='application/json', headers=headers)
+    
     async def cache_stats_handler(self, request):
         """Endpoint para ver estadísticas de caché"""
         if not self.enable_cache or not self.cache:
@@ -297,63 +1154,386 @@ class ScrapingServer:
                 status=500
             )
     
-    async def _request_processing(self, url: str, html_content: str = None, headers: dict = None) -> dict:
+    async def crawl_handler(self, request):
         """
-        Solicita procesamiento al Servidor B
+        Endpoint de crawl BFS dentro del sitio
         
-        Args:
-            url: URL de la página
-            html_content: Contenido HTML (para análisis avanzados)
-            headers: Headers HTTP (para detección de tecnologías)
+        Query params: url, depth (default 2), max_pages (default 50),
+        check_links (verifica los links de cada página) y sitemap (agrega las
+        URLs del sitemap como semillas de nivel 0). Respeta robots.txt.
+        Responde NDJSON en streaming: una línea por página y una línea final
+        'summary' con el grafo de links (que además se guarda en Redis).
+        """
+        url = request.query.get('url')
+        
+        if not url:
+            return web.json_response(
+                {'error': 'URL parameter is required'},
+                status=400
+            )
+        
+        root = normalize_url(url)
+        
+        try:
+            depth = int(request.query.get('depth', 2))
+            max_pages = int(request.query.get('max_pages', 50))
+        except ValueError:
+            root = None
+            depth = max_pages = -1
+        
+        if root is None or not 0 <= depth <= MAX_CRAWL_DEPTH or not 1 <= max_pages <= MAX_CRAWL_PAGES:
+            return web.json_response(
+                {
+                    'error': 'Invalid crawl parameters',
+                    'limits': {'depth': [0, MAX_CRAWL_DEPTH], 'max_pages': [1, MAX_CRAWL_PAGES]}
+                },
+                status=400
+            )
+        
+        logger.info(f"🕸️  Crawl iniciado: {root} (depth={depth}, max_pages={max_pages})")
+        
+        fetch_page = self._fetch_page
+        
+        if request.query.get('check_links', 'false').lower() == 'true':
+            fetch_page = self._fetch_page_with_links
+        
+        # robots.txt (también fija el Crawl-delay en el rate limiter)
+        policy = await self.robots.get_policy(root)
+        
+        seeds = []
+        if request.query.get('sitemap', 'false').lower() == 'true':
+            parsed = urlparse(root)
+            sitemaps = default_sitemaps(f"{parsed.scheme}://{parsed.netloc}", policy.sitemaps)
+            async for batch in iter_sitemap_urls(self.session, sitemaps, max_urls=max_pages):
+                seeds.extend(entry['loc'] for entry in batch)
+        
+        crawler = SiteCrawler(
+            fetch_page,
+            max_depth=depth,
+            max_pages=max_pages,
+            url_filter=policy.can_fetch
+        )
+        
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        
+        async for page in crawler.crawl(root, seeds=seeds):
+            await response.write(self._ndjson_line(page))
+        
+        summary = crawler.graph.summary(root)
+        summary['type'] = 'summary'
+        summary['robots'] = {
+            'rules': len(policy.rules),
+            'crawl_delay': policy.crawl_delay,
+            'blocked_urls': crawler.filtered
+        }
+        summary['sitemap_seeds'] = len(seeds)
+        summary['graph_stored'] = self._store_link_graph(root, crawler.graph)
+        
+        await response.write(self._ndjson_line(summary))
+        await response.write_eof()
+        
+        logger.info(
+            f"✅ Crawl completado: {summary['pages_crawled']} páginas, "
+            f"{len(summary['broken_links'])} links rotos"
+        )
+        
+        return response
+    
+    async def sitemap_handler(self, request):
         """
+        Endpoint que lista las URLs de los sitemaps de un sitio
+        
+        Query params: url, batch_size (default 1000), max_urls (default 10000).
+        Lee los sitemaps declarados en robots.txt (o /sitemap.xml), incluidos
+        índices y .gz, en streaming. Responde NDJSON: lotes 'batch' de URLs
+        permitidas por robots.txt y una línea final 'summary'.
+        """
+        root = normalize_url(request.query.get('url', ''))
+        
         try:
-            logger.info(f"🔗 Conectando a {self.processing_host}:{self.processing_port}")
+            batch_size = int(request.query.get('batch_size', 1000))
+            max_urls = int(request.query.get('max_urls', 10000))
+        except ValueError:
+            root = None
+            batch_size = max_urls = 0
+        
+        if root is None or not 1 <= batch_size <= MAX_SITEMAP_BATCH or not 1 <= max_urls <= MAX_SITEMAP_URLS:
+            return web.json_response(
+                {
+                    'error': 'Invalid sitemap parameters',
+                    'limits': {'batch_size': [1, MAX_SITEMAP_BATCH], 'max_urls': [1, MAX_SITEMAP_URLS]}
+                },
+                status=400
+            )
+        
+        parsed = urlparse(root)
+        policy = await self.robots.get_policy(root)
+        sitemaps = default_sitemaps(f"{parsed.scheme}://{parsed.netloc}", policy.sitemaps)
+        
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        
+        total = 0
+        blocked = 0
+        
+        async for batch in iter_sitemap_urls(self.session, sitemaps, batch_size=batch_size, max_urls=max_urls):
+            allowed = [entry for entry in batch if policy.can_fetch(entry['loc'])]
+            blocked += len(batch) - len(allowed)
+            total += len(allowed)
             
-            reader, writer = await asyncio.open_connection(
-                self.processing_host,
-                self.processing_port
+            if allowed:
+                await response.write(self._ndjson_line({'type': 'batch', 'urls': allowed}))
+        
+        await response.write(self._ndjson_line({
+            'type': 'summary',
+            'url': root,
+            'sitemaps': sitemaps,
+            'total_urls': total,
+            'blocked_by_robots': blocked
+        }))
+        await response.write_eof()
+        
+        logger.info(f"🗺️  Sitemap de {root}: {total} URLs ({blocked} bloqueadas por robots.txt)")
+        
+        return response
+    
+    async def crawl_graph_handler(self, request):
+        """Endpoint para consultar el grafo guardado de un crawl anterior"""
+        root = normalize_url(request.query.get('url', ''))
+        
+        if not root:
+            return web.json_response(
+                {'error': 'URL parameter is required'},
+                status=400
+            )
+        
+        data = self.cache.get_blob(self._graph_key(root)) if self.enable_cache and self.cache else None
+        
+        if not data:
+            return web.json_response(
+                {'error': 'Graph not found', 'url': root},
+                status=404
             )
+        
+        graph = LinkGraph.from_bytes(data)
+        summary = graph.summary(root)
+        summary['stored_bytes'] = len(data)
+        
+        return web.json_response(summary)
+    
+    async def _fetch_page(self, url: str) -> dict:
+        """
+        Descarga y parsea una página del crawl (reusa caché y rate limiter)
+        
+        Returns:
+            dict con 'status_code', 'scraping_data' y 'cache'
+        """
+        if self.enable_cache and self.cache:
+            cached_data = self.cache.get(url, False)
             
-            logger.info(f"✅ Conectado al servidor de procesamiento")
+            if cached_data:
+                return {
+                    'status_code': 200,
+                    'scraping_data': cached_data.get('scraping_data'),
+                    'cache': 'HIT'
+                }
+        
+        await self._wait_rate_limit(url)
+        
+        async with self.session.get(url) as response:
+            status_code = response.status
+            content_type = response.headers.get('Content-Type', '')
             
+            if status_code >= 400 or 'html' not in content_type:
+                return {'status_code': status_code, 'scraping_data': None, 'cache': 'MISS'}
+            
+            html_content, encoding = await self._read_html(response)
+        
+        scraping_data = self.html_parser.parse(html_content, url, encoding)
+        
+        # Mismo formato que /scrape básico: el caché sirve para ambos
+        if self.enable_cache and self.cache:
+            self.cache.set(url, {
+                'url': url,
+                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'status': 'success',
+                'scraping_data': scraping_data
+            }, False, ttl=self.cache_ttl)
+        
+        return {'status_code': status_code, 'scraping_data': scraping_data, 'cache': 'MISS'}
+    
+    @staticmethod
+    async def _read_html(response: aiohttp.ClientResponse):
+        """
+        Leer el body sin decodificar y detectar su encoding
+        
+        Returns:
+            (bytes del HTML, encoding)
+        """
+        body = await response.read()
+        encoding, source = sniff_encoding(body, response.headers.get('Content-Type'))
+        
+        logger.debug("🔤 Encoding de %s: %s (%s)", response.url, encoding, source)
+        
+        return body, encoding
+    
+    async def _fetch_page_with_links(self, url: str) -> dict:
+        """_fetch_page + verificación de links (cacheada entre páginas)"""
+        page = await self._fetch_page(url)
+        
+        if page.get('scraping_data'):
+            report = await self.link_checker.health_report(
+                link_urls(page['scraping_data'].get('links', []))
+            )
+            page['link_health'] = {
+                key: value for key, value in report.items() if key != 'results'
+            }
+        
+        return page
+    
+    async def _wait_rate_limit(self, url: str):
+        """Esperar (en lugar de rechazar) hasta que el rate limit del dominio lo permita"""
+        if not self.enable_rate_limit or not self.rate_limiter:
+            return
+        
+        while True:
+            allowed, rate_info = self.rate_limiter.check_rate_limit(url)
+            
+            if allowed:
+                return
+            
+            self.rate_limit_rejections.inc(domain=rate_info['domain'])
+            wait = max(0.1, self.rate_limiter.retry_after(url))
+            logger.info(f"⏳ Crawl: esperando {wait:.1f}s por rate limit de {rate_info['domain']}")
+            await asyncio.sleep(wait)
+    
+    @staticmethod
+    def _graph_key(root: str) -> str:
+        return f"crawl:graph:{hashlib.md5(root.encode()).hexdigest()}"
+    
+    def _store_link_graph(self, root: str, graph: LinkGraph) -> bool:
+        """Persistir el grafo de links en Redis (formato compacto)"""
+        if not self.enable_cache or not self.cache:
+            return False
+        
+        data = graph.to_bytes()
+        stored = self.cache.set_blob(self._graph_key(root), data, ttl=self.cache_ttl)
+        
+        if stored:
+            logger.info(f"💾 Grafo de links guardado: {len(graph)} nodos, {len(data)} bytes")
+        
+        return stored
+    
+    @staticmethod
+    def _ndjson_line(data: dict) -> bytes:
+        return json_codec.dumps(data) + b'\n'
+    
+    async def _request_processing(
+        self,
+        url: str,
+        html_content: bytes = None,
+        html_encoding: str = None,
+        headers: dict = None,
+        images: list = None,
+        render_profile: str = None,
+        link_health: dict = None,
+        tasks: list = None
+    ) -> dict:
+        """
+        Solicita procesamiento al Servidor B
+        
+        Args:
+            url: URL de la página
+            html_content: HTML crudo (para análisis avanzados); viaja como
+                          adjunto binario, sin pasar por JSON
+            html_encoding: Encoding detectado del HTML
+            headers: Headers HTTP (para detección de tecnologías)
+            images: Imágenes extraídas (con hints de posición y tamaño)
+            render_profile: Perfil de render para las tareas con navegador
+            link_health: Status de los links (url -> status/broken) para SEO
+            tasks: Tareas de ALL a ejecutar (None = todas)
+        
+        Si el cliente HTTP se desconecta, aiohttp cancela el handler y el
+        balanceador manda CANCEL con el request_id al Servidor B. El deadline
+        del mensaje hace que B deje de procesar cuando A ya no espera más.
+        El tenant de la request (si hay) viaja con su peso: B reparte sus
+        workers entre tenants.
+        """
+        try:
             # AGREGAR HTML Y HEADERS A LOS PARÁMETROS
             params = {}
+            attachments = {}
             
             if html_content:
-                params['html_content'] = html_content
-                logger.info(f"📄 Enviando HTML ({len(html_content)} bytes)")
+                attachments['html'] = html_content
+                params['html_encoding'] = html_encoding
+                logger.debug("📄 Enviando HTML (%d bytes, %s)", len(html_content), html_encoding)
             
             if headers:
                 params['headers'] = headers
-                logger.info(f"📋 Enviando headers ({len(headers)} items)")
+                logger.debug("📋 Enviando headers (%d items)", len(headers))
             
-            # Crear mensaje de request
-            logger.info(f"📦 Creando mensaje de request")
-            message_dict = self.protocol.create_request(TaskType.ALL, url, params)
+            if images:
+                params['image_urls'] = images
             
-            # ✅ CODIFICAR EL MENSAJE A BYTES
-            message_bytes = self.protocol.encode_message(message_dict)
+            if render_profile:
+                params['render_profile'] = render_profile
             
-            logger.info(f"📤 Enviando mensaje ({len(message_bytes)} bytes)")
-            writer.write(message_bytes)
-            await writer.drain()
+            if link_health:
+                params['link_health'] = link_health
             
-            logger.info(f"⏳ Esperando respuesta...")
-            response_data = await self.protocol.receive_message(reader)
+            if tasks is not None:
+                params['tasks'] = tasks
             
-            logger.info(f"📥 Respuesta recibida")
+            record = current_request()
+            if record is not None and record.profiler is not None:
+                params['profile'] = True
             
-            writer.close()
-            await writer.wait_closed()
+            tenant = current_tenant()
+            
+            # Crear mensaje de request (el span 'processing' viaja como
+            # traceparent: B cuelga sus spans de este)
+            with self._stage('processing') as span:
+                logger.debug("📦 Creando mensaje de request")
+                request_id = uuid.uuid4().hex
+                # Un solo presupuesto: el deadline del sobre es también el
+                # límite de los reintentos del balanceador
+                deadline = time.time() + self.balancer.timeout
+                message_dict = self.protocol.create_request(
+                    TaskType.ALL,
+                    url,
+                    params,
+                    request_id=request_id,
+                    deadline=deadline,
+                    traceparent=span.traceparent,
+                    tenant=tenant.name if tenant else None,
+                    weight=tenant.weight if tenant else None
+                )
+                span.set_attribute('request_id', request_id)
+                
+                # ✅ CODIFICAR EL MENSAJE A BYTES
+                message_bytes = self.protocol.encode_message(message_dict, attachments)
+                
+                # El balanceador elige el nodo (y reintenta en otro si no responde)
+                logger.debug("📤 Enviando mensaje (%d bytes)", len(message_bytes))
+                response_data = await self.balancer.call(url, message_bytes, request_id, deadline=deadline)
+            
+            logger.debug("📥 Respuesta recibida")
             
             if response_data['type'] == MessageType.RESPONSE.value:
-                logger.info(f"✅ Respuesta exitosa")
-                return response_data['result']
+                logger.debug("✅ Respuesta exitosa")
+                result = response_data['result']
+                
+                if params.get('profile') and isinstance(result, dict):
+                    record.processing_profile = result.pop('profile', None)
+                
+                return result
             else:
                 error_msg = response_data.get('error', 'Unknown error')
                 logger.error(f"❌ Error del servidor B: {error_msg}")
                 raise Exception(error_msg)
-    
+        
         except Exception as e:
             logger.error(f"❌ Error comunicándose con servidor de procesamiento: {e}", exc_info=True)
             raise
@@ -361,29 +1541,151 @@ class ScrapingServer:
     async def start(self):
         """Inicia el servidor"""
         await self._init_redis_services()
+        await self._init_tenants()
+        
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        self.link_checker = LinkChecker(
+            self.session,
+            cache=self.cache if self.enable_cache else None,
+            ttl=self.link_cache_ttl
+        )
+        self.robots = RobotsCache(
+            self.session,
+            cache=self.cache if self.enable_cache else None,
+            rate_limiter=self.rate_limiter if self.enable_rate_limit else None,
+            ttl=self.robots_ttl
+        )
+        self._health_task = asyncio.ensure_future(self.balancer.run_health_checks())
         
-        app = web.Application()
+        app = web.Application(
+            middlewares=[self._metrics_middleware, self._tracing_middleware, self._tenant_middleware]
+        )
         
         app.router.add_get('/health', self.health_handler)
+        app.router.add_get('/ready', self.ready_handler)
+        app.router.add_get('/live', self.live_handler)
+        app.router.add_get('/metrics', self.metrics_handler)
+        app.router.add_get('/debug/slow-requests', self.slow_requests_handler)
         app.router.add_get('/scrape', self.scrape_handler)
+        app.router.add_get('/crawl', self.crawl_handler)
+        app.router.add_get('/crawl/graph', self.crawl_graph_handler)
+        app.router.add_get('/sitemap', self.sitemap_handler)
+        app.router.add_get('/tenants/usage', self.tenant_usage_handler)
         app.router.add_get('/cache/stats', self.cache_stats_handler)
         app.router.add_post('/cache/clear', self.cache_clear_handler)
         
-        runner = web.AppRunner(app)
+        # Cancelar el handler si el cliente se desconecta (propaga CANCEL a B).
+        # Al detenerse, las requests en curso tienen shutdown_timeout segundos
+        runner = web.AppRunner(
+            app,
+            handler_cancellation=True,
+            shutdown_timeout=self.shutdown_timeout,
+            keepalive_timeout=self.keepalive_timeout,
+            max_line_size=self.max_line_size,
+            max_field_size=self.max_field_size,
+            access_log=logging.getLogger('aiohttp.access') if self.access_log else None
+        )
         await runner.setup()
         
-        site = web.TCPSite(runner, self.host, self.port)
+        site = web.TCPSite(
+            runner,
+            self.host,
+            self.port,
+            backlog=self.backlog,
+            reuse_port=self.reuse_port or None
+        )
         await site.start()
         
+        control_runner = None
+        if self.run_dir is not None:
+            control_runner = await self._start_control_site()
+        
+        self._stop_event = asyncio.Event()
+        
+        # SIGTERM (deploy o reinicio escalonado) drena en lugar de cortar
+        loop = asyncio.get_event_loop()
+        loop.add_signal_handler(signal.SIGTERM, self._stop_event.set)
+        
+        self.ready = True
+        if self.on_ready is not None:
+            self.on_ready()
+        
+        try:
+            if self.worker_slot is None:
+                self._print_banner()
+            else:
+                logger.info(f"✅ Worker {self.worker_slot} (PID {os.getpid()}) escuchando en {self.host}:{self.port}")
+            
+            await self._stop_event.wait()
+        except KeyboardInterrupt:
+            logger.info("🛑 Servidor detenido por el usuario")
+        finally:
+            self.draining = True
+            loop.remove_signal_handler(signal.SIGTERM)
+            logger.info(
+                "🚦 %s drenando %d requests en curso (hasta %ss)",
+                'Servidor' if self.worker_slot is None else f'Worker {self.worker_slot}',
+                self.http_in_flight.value(),
+                self.drain_delay + self.shutdown_timeout
+            )
+            
+            if self.drain_delay:
+                await asyncio.sleep(self.drain_delay)
+            
+            # Primero se deja de aceptar; las conexiones ya aceptadas tienen un
+            # momento para mandar su request antes de que aiohttp cierre las
+            # que ve inactivas. Las requests que no terminan en
+            # shutdown_timeout se cancelan (y el balanceador manda CANCEL a B)
+            await site.stop()
+            await asyncio.sleep(ACCEPT_GRACE)
+            await runner.cleanup()
+            if control_runner is not None:
+                await control_runner.cleanup()
+                save_worker_metrics(self.run_dir, self.worker_slot, self.metrics.snapshot())
+            self._health_task.cancel()
+            await self.session.close()
+            
+            # Vaciar los spans que esperan su lote
+            self.tracer.shutdown()
+            logger.info("👋 Servidor detenido (%d requests atendidas)", self.http_requests.total())
+    
+    async def _start_control_site(self) -> web.AppRunner:
+        """Socket Unix por el que los otros workers piden métricas y estado"""
+        control = web.Application()
+        control.router.add_get('/_worker/metrics', self._worker_metrics_handler)
+        control.router.add_get('/_worker/state', self._worker_state_handler)
+        
+        runner = web.AppRunner(control, access_log=None)
+        await runner.setup()
+        await web.UnixSite(runner, worker_socket(self.run_dir, self.worker_slot)).start()
+        return runner
+    
+    def stop(self):
+        """Pedir que start() termine (drenando las requests en curso)"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+    
+    def _print_banner(self):
         print("=" * 70)
         print("🚀 SERVIDOR DE SCRAPING INICIADO")
         print("=" * 70)
         print(f"📍 Dirección: http://{self.host}:{self.port}")
-        print(f"🔗 Servidor de procesamiento: {self.processing_host}:{self.processing_port}")
+        print(
+            f"🔗 Servidores de procesamiento ({self.balancer.strategy}): "
+            + ', '.join(node.address for node in self.balancer.nodes)
+        )
         print(f"💡 Endpoints disponibles:")
         print(f"   - GET  /health           → Health check")
+        print(f"   - GET  /ready, /live     → Readiness (503 al drenar) y liveness")
+        print(f"   - GET  /metrics          → Métricas (Prometheus)")
+        print(f"   - GET  /debug/slow-requests → Requests lentas guardadas (X-Admin-Token)")
         print(f"   - GET  /scrape?url=...   → Scraping básico")
         print(f"   - GET  /scrape?url=...&full=true → Scraping completo")
+        print(f"   - GET  /crawl?url=...&depth=N&max_pages=M → Crawl del sitio (NDJSON)")
+        print(f"   - GET  /sitemap?url=...  → URLs de los sitemaps (NDJSON por lotes)")
+        
+        if self.tenant_quotas is not None:
+            print(f"   - GET  /tenants/usage    → Uso de las cuotas del tenant ({API_KEY_HEADER})")
         
         if self.enable_cache:
             print(f"   - GET  /cache/stats      → Estadísticas de caché")
@@ -394,24 +1696,32 @@ class ScrapingServer:
         if self.enable_rate_limit:
             print(f"     └─ Límite: {self.max_requests_per_minute} req/min por dominio")
         
+        print(f"   Tenants: {'✅ ' + self.tenants_file if self.tenant_quotas is not None else '❌ Deshabilitado (anónimo)'}")
         print(f"   Caché: {'✅ Habilitado' if self.enable_cache else '❌ Deshabilitado'}")
         if self.enable_cache:
             print(f"     └─ TTL: {self.cache_ttl}s ({self.cache_ttl//60} minutos)")
         
-        if self.enable_cache or self.enable_rate_limit:
+        print(f"   Detección de cambios: {'✅ Habilitada' if self.change_tracker is not None else '❌ Deshabilitada'}")
+        if self.change_tracker is not None:
+            print(f"     └─ Canal: {self.change_channel or '-'}, TTL: {self.change_ttl}s, SimHash: ≤{self.simhash_threshold} bits")
+        
+        if self.enable_cache or self.enable_rate_limit or self.tenant_quotas is not None:
             print(f"   Redis: {self.redis_host}:{self.redis_port}")
         
-        print("\n💡 Presiona Ctrl+C para detener")
+        loop = type(asyncio.get_event_loop())
+        print(f"   Event loop: {loop.__module__.split('.')[0]} ({loop.__name__})")
+        print(
+            f"   HTTP: keep-alive {self.keepalive_timeout}s, backlog {self.backlog}, "
+            f"access log {'✅' if self.access_log else '❌'}, "
+            f"log {logging.getLevelName(logging.getLogger().getEffectiveLevel())}"
+        )
+        
+        print("\n💡 Ctrl+C o SIGTERM para detener (drena las requests en curso)")
         print("=" * 70)
         print()
-        
-        try:
-            await asyncio.Event().wait()
-        except KeyboardInterrupt:
-            logger.info("🛑 Servidor detenido por el usuario")
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """Parsea argumentos de línea de comandos"""
     parser = argparse.ArgumentParser(
         description='Servidor de Scraping Asíncrono con Rate Limiting y Caché'
@@ -427,15 +1737,161 @@ def parse_arguments():
     parser.add_argument('--no-rate-limit', action='store_true')
     parser.add_argument('--max-requests', type=int, default=10)
     parser.add_argument('--cache-ttl', type=int, default=3600)
+    parser.add_argument('--link-cache-ttl', type=int, default=86400)
+    parser.add_argument(
+        '--robots-ttl',
+        type=int,
+        default=86400,
+        help='Segundos que se cachea en Redis cada robots.txt compilado (default: 86400)'
+    )
+    parser.add_argument(
+        '--tenants-file',
+        default=None,
+        help=f'JSON con tenants, API keys ({API_KEY_HEADER}) y cuotas; se cargan en Redis (default: anónimo)'
+    )
+    parser.add_argument(
+        '--change-detection',
+        action='store_true',
+        help='Guardar una huella por URL y pedir al Servidor B solo las tareas de las secciones que cambiaron (requiere caché)'
+    )
+    parser.add_argument(
+        '--change-ttl',
+        type=int,
+        default=7 * 86400,
+        help='Segundos que se recuerda la huella de una URL (default: 7 días)'
+    )
+    parser.add_argument(
+        '--change-channel',
+        default='page-changes',
+        help='Canal de Redis donde publicar los eventos de cambio ("" = no publicar)'
+    )
+    parser.add_argument(
+        '--simhash-threshold',
+        type=int,
+        default=DEFAULT_SIMHASH_THRESHOLD,
+        help=f'Bits de SimHash hasta los que el texto cuenta como sin cambios (default: {DEFAULT_SIMHASH_THRESHOLD})'
+    )
+    parser.add_argument(
+        '--processing-nodes',
+        type=parse_nodes,
+        default=None,
+        help='Servidores B como host:puerto,host:puerto (reemplaza --processing-host/port)'
+    )
+    parser.add_argument('--balance-strategy', choices=STRATEGIES, default='least-outstanding')
+    parser.add_argument(
+        '--hedge-after',
+        type=float,
+        default=None,
+        help='Segundos antes de duplicar una tarea lenta en otro nodo (default: sin hedging)'
+    )
+    parser.add_argument('--trace-file', default=None, help='Archivo JSON lines donde exportar los spans')
+    parser.add_argument(
+        '--otlp-endpoint',
+        default=None,
+        help='Collector OTLP/HTTP para las trazas (ej: http://localhost:4318/v1/traces)'
+    )
+    parser.add_argument(
+        '--trace-sample-rate',
+        type=float,
+        default=1.0,
+        help='Fracción de requests a trazar (default: 1.0)'
+    )
+    parser.add_argument(
+        '--admin-token',
+        default=None,
+        help='Token (header X-Admin-Token) para ?profile=1 y /debug/slow-requests'
+    )
+    parser.add_argument(
+        '--slow-request-ms',
+        type=float,
+        default=None,
+        help='Guardar HTML, tiempos y stacks de las requests más lentas que esto (default: deshabilitado)'
+    )
+    parser.add_argument('--slow-request-dir', default='slow_requests')
+    parser.add_argument('--slow-request-max', type=int, default=50, help='Requests lentas a conservar (default: 50)')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Procesos que atienden el mismo puerto con SO_REUSEPORT (default: 1; SIGHUP = reinicio escalonado)'
+    )
+    parser.add_argument(
+        '--shutdown-timeout',
+        type=float,
+        default=30.0,
+        help='Segundos para terminar las requests en curso al detenerse (default: 30)'
+    )
+    parser.add_argument(
+        '--drain-delay',
+        type=float,
+        default=0.0,
+        help='Segundos con /ready en 503 antes de dejar de aceptar al recibir SIGTERM (default: 0)'
+    )
+    
+    performance = parser.add_argument_group('modo performance')
+    performance.add_argument(
+        '--performance-mode',
+        action='store_true',
+        help='uvloop, logging asíncrono, nivel WARNING (el access log sigue) y backlog grande'
+    )
+    performance.add_argument('--uvloop', action='store_true', default=None, help='Usar uvloop si está instalado')
+    performance.add_argument(
+        '--async-logging',
+        action='store_true',
+        default=None,
+        help='Escribir los logs (y el access log) desde un thread aparte'
+    )
+    performance.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default=None,
+        help='Nivel de log (default: INFO, WARNING en modo performance)'
+    )
+    performance.add_argument('--no-access-log', action='store_true', help='Sin access log de aiohttp')
+    performance.add_argument('--keepalive-timeout', type=float, default=75.0, help='Keep-alive HTTP en segundos (default: 75)')
+    performance.add_argument('--backlog', type=int, default=None, help='Cola de accept (default: 128, 2048 en modo performance)')
+    performance.add_argument('--max-line-size', type=int, default=8190, help='Largo máximo de la request line (default: 8190)')
+    performance.add_argument('--max-field-size', type=int, default=8190, help='Largo máximo de un header (default: 8190)')
     
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    
+    # Lo que no se pidió explícitamente toma el valor del modo
+    defaults = PERFORMANCE_DEFAULTS if args.performance_mode else STANDARD_DEFAULTS
+    for name, value in defaults.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    
+    if args.drain_delay < 0 or args.shutdown_timeout < 0:
+        parser.error('--drain-delay y --shutdown-timeout no pueden ser negativos')
+    if args.workers < 1:
+        parser.error('--workers debe ser al menos 1')
+    if args.workers > 1 and args.port == 0:
+        parser.error('--workers necesita un puerto fijo (todos los procesos comparten el mismo)')
+    
+    return args
 
 
-async def main():
-    """Función principal"""
-    args = parse_arguments()
+def configure_runtime(args):
+    """
+    Nivel de log y logging asíncrono del proceso (también en cada worker)
+    
+    Returns:
+        QueueListener del logging asíncrono (None si no se usa)
+    """
+    logging.getLogger().setLevel(args.log_level)
+    
+    # El access log se conserva aunque el resto quede en WARNING
+    if not args.no_access_log:
+        logging.getLogger('aiohttp.access').setLevel(logging.INFO)
     
-    server = ScrapingServer(
+    if args.async_logging:
+        return runtime.setup_async_logging(logging.getLevelName(args.log_level))
+    return None
+
+
+def build_server(args, **kwargs) -> ScrapingServer:
+    """ScrapingServer a partir de los argumentos de línea de comandos"""
+    return ScrapingServer(
         host=args.ip,
         port=args.port,
         processing_host=args.processing_host,
@@ -445,14 +1901,92 @@ async def main():
         enable_cache=not args.no_cache,
         enable_rate_limit=not args.no_rate_limit,
         max_requests_per_minute=args.max_requests,
-        cache_ttl=args.cache_ttl
+        cache_ttl=args.cache_ttl,
+        link_cache_ttl=args.link_cache_ttl,
+        robots_ttl=args.robots_ttl,
+        processing_nodes=args.processing_nodes,
+        balance_strategy=args.balance_strategy,
+        hedge_after=args.hedge_after,
+        tracer=build_tracer(
+            'scraping-server',
+            trace_file=args.trace_file,
+            otlp_endpoint=args.otlp_endpoint,
+            sample_rate=args.trace_sample_rate
+        ),
+        admin_token=args.admin_token,
+        slow_request_ms=args.slow_request_ms,
+        slow_request_dir=args.slow_request_dir,
+        slow_request_max=args.slow_request_max,
+        shutdown_timeout=args.shutdown_timeout,
+        drain_delay=args.drain_delay,
+        keepalive_timeout=args.keepalive_timeout,
+        backlog=args.backlog,
+        max_line_size=args.max_line_size,
+        max_field_size=args.max_field_size,
+        access_log=not args.no_access_log,
+        tenants_file=args.tenants_file,
+        change_detection=args.change_detection,
+        change_ttl=args.change_ttl,
+        change_channel=args.change_channel or None,
+        simhash_threshold=args.simhash_threshold,
+        **kwargs
+    )
+
+
+def run_worker(args, slot: int, run_dir: str, ready):
+    """Proceso worker del modo pre-fork (ver common/prefork.py)"""
+    listener = configure_runtime(args)
+    server = build_server(args, reuse_port=True, worker_slot=slot, run_dir=run_dir)
+    server.on_ready = ready.set
+    
+    try:
+        runtime.run(server.start(), use_uvloop=args.uvloop)
+    finally:
+        if listener is not None:
+            listener.stop()
+
+
+def run_prefork(args) -> int:
+    """Supervisor de --workers procesos escuchando en el mismo puerto"""
+    supervisor = PreforkSupervisor(
+        run_worker,
+        args=(args,),
+        workers=args.workers,
+        grace=args.drain_delay + args.shutdown_timeout + 5
     )
     
+    print("=" * 70)
+    print(f"🚀 SERVIDOR DE SCRAPING (pre-fork, {args.workers} workers)")
+    print("=" * 70)
+    print(f"📍 Dirección: http://{args.ip}:{args.port}")
+    print(f"⚡ Event loop: {runtime.loop_name(args.uvloop)}, log {args.log_level}")
+    print(f"👷 Supervisor PID {os.getpid()}: kill -HUP {os.getpid()} → reinicio escalonado")
+    print(f"📊 /health y /metrics reúnen a todos los workers")
+    print("\n💡 Presiona Ctrl+C para detener")
+    print("=" * 70)
+    print()
+    
+    return supervisor.run()
+
+
+async def main(args=None):
+    """Función principal"""
+    server = build_server(args or parse_arguments())
     await server.start()
 
 
 if __name__ == '__main__':
+    arguments = parse_arguments()
+    
+    if arguments.workers > 1:
+        sys.exit(run_prefork(arguments))
+    
+    log_listener = configure_runtime(arguments)
+    
     try:
-        asyncio.run(main())
+        runtime.run(main(arguments), use_uvloop=arguments.uvloop)
     except KeyboardInterrupt:
-        print("\n👋 Servidor detenido")
\ No newline at end of file
+        print("\n👋 Servidor detenido")
+    finally:
+        if log_listener is not None:
+            log_listener.stop()
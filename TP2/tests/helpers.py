@@ -0,0 +1,36 @@
+"""
+Utilidades compartidas por los tests (puertos libres, mensajes al Servidor B y Redis falso)
+"""
+import asyncio
+import socket
+import sys
+import threading
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load.fake_redis import FakeRedisServer
+from common.protocol import Protocol
+
+
+def free_port() -> int:
+    """Puerto sin nadie escuchando (para un servidor nuevo o un nodo caído)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def exchange(port: int, message: dict) -> dict:
+    """Enviar un mensaje al Servidor B en 127.0.0.1:port y leer la respuesta"""
+    with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+        sock.sendall(Protocol.encode_message(message))
+        return Protocol.decode_message(sock)
+
+
+def start_fake_redis() -> FakeRedisServer:
+    """Redis falso en un thread con su propio event loop (.port, .store)"""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(FakeRedisServer().start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server
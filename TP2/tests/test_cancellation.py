@@ -0,0 +1,261 @@
+"""
+Tests de cancelación: CANCEL del protocolo, deadline y tareas en el pool
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.protocol import Protocol, MessageType, TaskType
+from common.load_balancer import LoadBalancer
+from helpers import exchange
+from processor.worker_pool import WorkerPool, TaskCancelled
+from server_processing import ProcessingServer
+
+
+def slow_task(marker):
+    """Tarea larga que deja una marca en su finally (como driver.quit())"""
+    try:
+        time.sleep(30)
+        return 'terminó'
+    finally:
+        if marker:
+            open(marker, 'w').close()
+
+
+def square(x):
+    return x * x
+
+
+def crash_then_mark(folder):
+    """Se cae la primera vez; el reintento deja una marca"""
+    crashed = os.path.join(folder, 'crashed')
+    if not os.path.exists(crashed):
+        open(crashed, 'w').close()
+        os._exit(1)
+    open(os.path.join(folder, 'retried'), 'w').close()
+    return 'ok'
+
+
+def test_protocol_cancel():
+    """Mensaje CANCEL y campos request_id / deadline del request"""
+    print("🧪 Test 1: Mensaje CANCEL")
+    
+    request = Protocol.create_request(TaskType.ALL, 'https://example.com', request_id='abc', deadline=123.0)
+    assert request['request_id'] == 'abc' and request['deadline'] == 123.0
+    assert 'request_id' not in Protocol.create_request(TaskType.ALL, 'https://example.com')
+    
+    cancel = Protocol.create_cancel('abc')
+    assert cancel == {'type': MessageType.CANCEL.value, 'request_id': 'abc'}
+    assert Protocol.validate_message(cancel)
+    
+    try:
+        Protocol.validate_message({'type': MessageType.CANCEL.value})
+        assert False
+    except ValueError:
+        pass
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_pool_cancel():
+    """Tarea en cola descartada; tarea corriendo termina su worker con su finally"""
+    print("🧪 Test 2: Cancelación en el WorkerPool")
+    
+    pool = WorkerPool(processes=1)
+    marker = os.path.join(tempfile.mkdtemp(), 'finally')
+    
+    try:
+        running = pool.apply_async(slow_task, (marker,))
+        queued = pool.apply_async(slow_task, (None,))
+        
+        while not running.running():
+            time.sleep(0.01)
+        
+        assert pool.cancel(queued)
+        assert queued.cancelled()
+        
+        start = time.time()
+        assert pool.cancel(running)
+        
+        try:
+            running.result(timeout=10)
+            assert False
+        except TaskCancelled:
+            pass
+        
+        assert time.time() - start < 5
+        assert os.path.exists(marker), "el finally de la tarea no corrió"
+        
+        # El slot sigue funcionando con un worker nuevo
+        assert pool.apply(square, (7,)) == 49
+        assert pool.stats()[0]['cancelled'] == 1
+        assert pool.stats()[0]['crashes'] == 0
+        
+        # Una tarea terminada ya no se cancela
+        done = pool.apply_async(square, (2,))
+        done.result(timeout=10)
+        assert not pool.cancel(done)
+    finally:
+        pool.terminate()
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_pool_cancel_during_retry():
+    """Cancelar una tarea caída mientras su reintento espera en la cola"""
+    print("🧪 Test 3: Cancelación durante el reintento")
+    
+    pool = WorkerPool(processes=1, retries=1)
+    folder = tempfile.mkdtemp()
+    
+    try:
+        crashing = pool.apply_async(crash_then_mark, (folder,))
+        blocker = pool.apply_async(slow_task, (None,))
+        
+        # La caída re-encola el reintento detrás de la tarea lenta
+        while not blocker.running():
+            time.sleep(0.01)
+        assert os.path.exists(os.path.join(folder, 'crashed'))
+        
+        start = time.time()
+        assert pool.cancel(crashing)
+        
+        try:
+            crashing.result(timeout=10)
+            assert False
+        except TaskCancelled:
+            pass
+        
+        assert time.time() - start < 5
+        assert not pool.cancel(crashing)
+        
+        # Al salir de la cola el reintento se descarta sin correr
+        assert pool.cancel(blocker)
+        assert pool.apply(square, (3,)) == 9
+        assert not os.path.exists(os.path.join(folder, 'retried'))
+        assert pool.stats()[0]['crashes'] == 1
+    finally:
+        pool.terminate()
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_server_cancel_and_deadline():
+    """El Servidor B cancela por request_id (aunque el CANCEL llegue antes) y respeta el deadline"""
+    print("🧪 Test 4: CANCEL y deadline en el Servidor B")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    try:
+        pool = server.process_pool
+        
+        futures = [pool.apply_async(slow_task, (None,)), pool.apply_async(slow_task, (None,))]
+        server.register_request('r1', futures)
+        
+        while not futures[0].running():
+            time.sleep(0.01)
+        
+        response = exchange(port, Protocol.create_cancel('r1'))
+        assert response['type'] == MessageType.CANCEL.value
+        assert response['cancelled'] == 2
+        assert futures[1].cancelled()
+        
+        try:
+            futures[0].result(timeout=10)
+            assert False
+        except TaskCancelled:
+            pass
+        
+        # CANCEL antes que la request: se aplica al registrarla
+        assert exchange(port, Protocol.create_cancel('r2'))['cancelled'] == 0
+        late = [pool.apply_async(slow_task, (None,))]
+        server.register_request('r2', late)
+        
+        try:
+            late[0].result(timeout=10)
+            assert False
+        except (CancelledError, TaskCancelled):
+            pass
+        
+        # Request con el deadline vencido: error sin usar el pool
+        response = exchange(port, Protocol.create_request(
+            TaskType.SEO, 'https://example.com', request_id='r3', deadline=time.time() - 1
+        ))
+        assert response['type'] == MessageType.ERROR.value
+        assert response['error'] == 'Deadline exceeded'
+        
+        assert server.load_report()['cancelled_requests'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    print("✅ Test 4 PASSED\n")
+
+
+def test_balancer_sends_cancel():
+    """Cancelar la llamada del balanceador manda CANCEL al nodo con el request_id"""
+    print("🧪 Test 5: CANCEL desde el balanceador")
+    
+    async def run():
+        received = []
+        got_request = asyncio.Event()
+        got_cancel = asyncio.Event()
+        
+        async def handle(reader, writer):
+            message = await Protocol.receive_message(reader)
+            received.append(message)
+            
+            if message['type'] == MessageType.CANCEL.value:
+                writer.write(Protocol.encode_message(Protocol.create_cancel(message['request_id'], cancelled=5)))
+                await writer.drain()
+                writer.close()
+                got_cancel.set()
+                return
+            
+            # Request: no responde nunca (tarea larga)
+            got_request.set()
+            await reader.read()
+            writer.close()
+        
+        node = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = node.sockets[0].getsockname()[1]
+        balancer = LoadBalancer([('127.0.0.1', port)])
+        
+        message = Protocol.create_request(TaskType.ALL, 'https://example.com', request_id='req-1')
+        call = asyncio.ensure_future(balancer.call('https://example.com', Protocol.encode_message(message), 'req-1'))
+        
+        await asyncio.wait_for(got_request.wait(), timeout=5)
+        call.cancel()
+        await asyncio.wait_for(got_cancel.wait(), timeout=5)
+        
+        assert call.cancelled()
+        assert received[-1] == {'type': MessageType.CANCEL.value, 'request_id': 'req-1'}
+        assert balancer.stats()['cancels_sent'] == 1
+        assert balancer.nodes[0].outstanding == 0
+        
+        node.close()
+        await node.wait_closed()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_protocol_cancel()
+    test_pool_cancel()
+    test_pool_cancel_during_retry()
+    test_server_cancel_and_deadline()
+    test_balancer_sends_cancel()
+    print("✅ Todos los tests de cancelación pasaron")
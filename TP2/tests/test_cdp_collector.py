@@ -0,0 +1,90 @@
+"""
+Tests del colector de performance vía CDP (waterfall, lifecycle y TBT)
+"""
+import json
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from processor.cdp_collector import (
+    parse_log_entries, build_waterfall, summarize_resources,
+    page_lifecycle, trace_long_tasks, total_blocking_time
+)
+
+
+def _entry(method, **params):
+    """Simula una entrada de driver.get_log('performance')"""
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+LOG = [
+    _entry('Network.requestWillBeSent', requestId='1', type='Document',
+           timestamp=100.0, request={'url': 'https://example.com/'}),
+    _entry('Network.responseReceived', requestId='1', type='Document',
+           response={'status': 200, 'mimeType': 'text/html',
+                     'timing': {'dnsStart': 0, 'dnsEnd': 12, 'connectStart': 12,
+                                'connectEnd': 40, 'sendStart': 41, 'sendEnd': 42,
+                                'receiveHeadersEnd': 140}}),
+    _entry('Network.loadingFinished', requestId='1', timestamp=100.2, encodedDataLength=5000),
+    _entry('Network.requestWillBeSent', requestId='2', type='Script',
+           timestamp=100.25, request={'url': 'https://example.com/app.js'}),
+    _entry('Network.loadingFinished', requestId='2', timestamp=100.5, encodedDataLength=20000),
+    _entry('Network.requestWillBeSent', requestId='3', type='Image',
+           timestamp=100.3, request={'url': 'https://ads.example.net/pixel.gif'}),
+    _entry('Network.loadingFailed', requestId='3', timestamp=100.31, errorText='net::ERR_BLOCKED_BY_CLIENT'),
+    _entry('Page.domContentEventFired', timestamp=100.6),
+    _entry('Page.loadEventFired', timestamp=101.0),
+    _entry('Tracing.dataCollected', name='RunTask', ph='X', dur=120000),
+    _entry('Tracing.dataCollected', name='RunTask', ph='X', dur=30000),
+    {'message': 'not json'}
+]
+
+
+def test_waterfall():
+    """El waterfall se arma con tiempos relativos al documento principal"""
+    print("🧪 Test 1: Waterfall")
+    
+    events = parse_log_entries(LOG)
+    network = build_waterfall(events)
+    requests = network['requests']
+    
+    assert len(requests) == 3
+    assert requests[0]['url'] == 'https://example.com/'
+    assert requests[0]['start_ms'] == 0
+    assert requests[0]['ttfb_ms'] == 99
+    assert requests[1]['start_ms'] == 250
+    assert requests[2]['failed'] == 'net::ERR_BLOCKED_BY_CLIENT'
+    
+    resources = summarize_resources(requests)
+    assert resources['total_size'] == 25000
+    assert resources['size_by_type'] == {'document': 5000, 'script': 20000, 'image': 0}
+    assert resources['failed'] == 1
+    print("✅ Test 1 PASSED\n")
+
+
+def test_lifecycle_and_tbt():
+    """DOMContentLoaded/load relativos al inicio y TBT desde el tracing"""
+    print("🧪 Test 2: Lifecycle y TBT")
+    
+    events = parse_log_entries(LOG)
+    network = build_waterfall(events)
+    lifecycle = page_lifecycle(events, network['navigation_start'])
+    
+    assert lifecycle == {'dom_content_loaded_ms': 600.0, 'load_ms': 1000.0}
+    assert total_blocking_time(trace_long_tasks(events)) == 70.0
+    print("✅ Test 2 PASSED\n")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTS DEL COLECTOR CDP")
+    print("=" * 60 + "\n")
+    
+    test_waterfall()
+    test_lifecycle_and_tbt()
+    
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
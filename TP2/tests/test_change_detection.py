@@ -0,0 +1,268 @@
+"""
+Tests de detección de cambios: huellas, diff y re-procesamiento parcial
+"""
+import asyncio
+import json
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load.processing_stub import ProcessingStub
+from common.protocol import Protocol, MessageType, TaskType
+from helpers import start_fake_redis
+from scraper.change_detection import ChangeTracker, PageFingerprint, TASK_SECTIONS, compare, hamming, simhash
+from scraper.html_parser import HtmlParser
+from server_processing import ProcessingServer
+from server_scraping import ScrapingServer
+
+WORDS = (
+    "el servidor de scraping descarga cada página del sitio y el servidor de "
+    "procesamiento genera capturas métricas de rendimiento miniaturas y un "
+    "análisis seo completo que después se guarda en la caché compartida "
+).split()
+
+ARTICLE = ' '.join(f"{word} {i}" for i, word in enumerate(WORDS * 6))
+
+
+def page(text: str = ARTICLE, image: str = '/a.png', description: str = 'Noticias', script: str = '1') -> str:
+    return (
+        "<html><head><title>Monitor</title>"
+        f"<meta name='description' content='{description}'>"
+        "<link rel='stylesheet' href='/app.css'>"
+        f"<script>window.build = {script};</script>"
+        "</head><body>"
+        f"<p>{text}</p>"
+        "<a href='/contacto'>Contacto</a>"
+        f"<img src='{image}' alt='Logo'>"
+        "</body></html>"
+    )
+
+
+def fingerprint(html: str) -> PageFingerprint:
+    return HtmlParser().parse(html, 'https://example.com/', fingerprint=True)['fingerprint']
+
+
+def test_simhash():
+    """Textos casi iguales quedan a pocos bits; textos distintos, lejos"""
+    print("🧪 Test 1: SimHash")
+    
+    assert simhash('') == 0
+    assert simhash(ARTICLE) == simhash(ARTICLE.upper().replace(' ', '  '))
+    
+    near = hamming(simhash(ARTICLE), simhash(ARTICLE.replace('sitio 8 ', 'portal 8 ')))
+    far = hamming(simhash(ARTICLE), simhash(' '.join(reversed(ARTICLE.split()))))
+    assert near <= 3 < far, (near, far)
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_fingerprint_diff():
+    """Huella por sección y diff estructural entre dos fetches"""
+    print("🧪 Test 2: Huellas y diff")
+    
+    base = fingerprint(page())
+    
+    # Idéntica salvo el script inline: sin cambios
+    assert fingerprint(page(script='2')).sections == base.sections
+    assert compare(base, fingerprint(page(script='2')))['changed'] is False
+    
+    # Una palabra distinta: el texto cambió pero es casi igual
+    near = compare(base, fingerprint(page(text=ARTICLE.replace('sitio 8 ', 'portal 8 '))))
+    assert near['changed'] is False and near['text']['changed'] and near['text']['near_duplicate']
+    
+    # Imagen y meta nuevas
+    data = HtmlParser().parse(page(image='/b.png', description='Ofertas'), 'https://example.com/', fingerprint=True)
+    diff = compare(base, data['fingerprint'], data)
+    assert diff['sections'] == ['meta', 'images'], diff['sections']
+    assert diff['images'] == {'added': ['https://example.com/b.png'], 'removed': 1}
+    assert diff['meta']['changed'] == {'description': {'old': 'Noticias', 'new': 'Ofertas'}}
+    
+    # Texto reescrito
+    assert 'text' in compare(base, fingerprint(page(text=' '.join(reversed(ARTICLE.split())))))['sections']
+    
+    # Ida y vuelta por JSON
+    restored = PageFingerprint.from_dict(json.loads(json.dumps(base.to_dict())))
+    assert restored.simhash == base.simhash and restored.sections == base.sections
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_all_subset():
+    """B: ALL con params['tasks'] corre solo esas tareas"""
+    print("🧪 Test 3: ALL con un subconjunto de tareas")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    def request(tasks):
+        with socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=30) as sock:
+            sock.sendall(Protocol.encode_message(Protocol.create_request(
+                TaskType.ALL, 'https://example.com/',
+                {'html_content': '<html><title>B</title></html>', 'tasks': tasks}
+            )))
+            return Protocol.decode_message(sock)
+    
+    try:
+        response = request(['seo'])
+        assert response['type'] == MessageType.RESPONSE.value, response
+        assert list(response['result']) == ['seo'] and 'score' in response['result']['seo']
+        
+        assert request([])['result'] == {}
+        
+        response = request(['seo', 'video'])
+        assert response['type'] == MessageType.ERROR.value and 'video' in response['error']
+    finally:
+        server.shutdown(timeout=5)
+        server.server_close()
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_scrape_reprocesses_changed_sections():
+    """A: sin cambios no se llama a B; con cambios, solo las tareas afectadas"""
+    print("🧪 Test 4: /scrape con detección de cambios")
+    
+    redis_server = start_fake_redis()
+    current = {'html': page()}
+    
+    async def origin(request):
+        return web.Response(text=current['html'], content_type='text/html')
+    
+    async def run():
+        stub = await ProcessingStub(latency=0, jitter=0).start()
+        
+        origin_app = web.Application()
+        origin_app.router.add_get('/', origin)
+        origin_runner = web.AppRunner(origin_app)
+        await origin_runner.setup()
+        await web.TCPSite(origin_runner, '127.0.0.1', 0).start()
+        url = f'http://127.0.0.1:{origin_runner.addresses[0][1]}/'
+        
+        server = ScrapingServer(
+            processing_port=stub.port,
+            redis_port=redis_server.port,
+            enable_rate_limit=False,
+            change_detection=True
+        )
+        await server._init_redis_services()
+        server.session = aiohttp.ClientSession()
+        
+        app = web.Application()
+        app.router.add_get('/scrape', server.scrape_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        base = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        client = aiohttp.ClientSession()
+        
+        async def scrape():
+            # Sin la respuesta cacheada: cada request hace el fetch
+            server.cache.clear_all()
+            async with client.get(f'{base}/scrape', params={'url': url, 'full': 'true'}) as r:
+                assert r.status == 200
+                return await r.json()
+        
+        try:
+            first = await scrape()
+            assert first['changes']['first_seen'] and first['changes']['reprocessed'] == list(first['processing_data'])
+            assert stub.stats['requests'] == 1
+            
+            # Misma página (otro script inline): B solo corre technologies
+            current['html'] = page(script='2')
+            second = await scrape()
+            assert second['changes']['changed'] is False and second['changes']['reprocessed'] == ['technologies']
+            assert second['processing_data'] == first['processing_data']
+            assert stub.stats['requests'] == 2
+            
+            # Meta nueva: seo y technologies
+            current['html'] = page(script='3', description='Ofertas')
+            third = await scrape()
+            assert third['changes']['sections'] == ['meta']
+            assert third['changes']['reused'] == ['screenshot', 'performance', 'images']
+            assert third['changes']['reprocessed'] == ['technologies', 'seo']
+            assert list(third['processing_data']) == ['screenshot', 'performance', 'images', 'technologies', 'seo']
+            assert stub.stats['requests'] == 3
+            
+            # Imagen nueva: todo
+            current['html'] = page(script='4', description='Ofertas', image='/b.png')
+            fourth = await scrape()
+            assert fourth['changes']['sections'] == ['images'] and fourth['changes']['reused'] == []
+            
+            channel, message = redis_server.store.published[-1]
+            event = json.loads(message)
+            assert channel == b'page-changes' and event['url'] == url
+            assert event['diff']['images']['added'] == [url + 'b.png']
+            
+            # Un hit del caché no repite el diff del fetch que lo guardó
+            async with client.get(f'{base}/scrape', params={'url': url, 'full': 'true'}) as r:
+                assert r.headers['X-Cache'] == 'HIT'
+                cached = await r.json()
+            assert 'changes' not in cached and cached['processing_data'] == fourth['processing_data']
+            
+            assert server.tasks_reused.value(task='screenshot') == 2
+            assert server.tasks_reused.value(task='technologies') == 0
+            assert server.page_changes.value(section='meta') == 1
+            assert server.change_checks.value(result='unchanged') == 1
+        finally:
+            await client.close()
+            await server.session.close()
+            await runner.cleanup()
+            await origin_runner.cleanup()
+            await stub.close()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 4 PASSED\n")
+
+
+def test_technologies_always_rerun():
+    """Scripts y atributos del body no entran en la huella: technologies no se reusa"""
+    print("🧪 Test 5: technologies se pide siempre")
+    
+    from processor.technology_detector import TechnologyDetector
+    
+    plain = page()
+    react = plain.replace(
+        "<p>",
+        "<script src='https://cdn.example.com/jquery.min.js'></script><div data-reactroot=''></div><p>"
+    )
+    
+    old, new = fingerprint(plain), fingerprint(react)
+    assert compare(old, new)['sections'] == []
+    
+    detector = TechnologyDetector()
+    assert detector.analyze(plain)['libraries'] == []
+    detected = detector.analyze(react)
+    assert 'jQuery' in detected['libraries'] and 'React' in detected['frameworks']
+    
+    tracker = ChangeTracker(cache=None)
+    server = ScrapingServer(enable_cache=False, enable_rate_limit=False)
+    server.change_tracker = tracker
+    
+    previous = {
+        'fingerprint': old,
+        'tasks': {task: ChangeTracker.task_entry({'task': task}, old) for task in TASK_SECTIONS}
+    }
+    assert not tracker.reusable(previous['tasks']['technologies'], 'technologies', new)
+    
+    tasks, reused = server._plan_processing(previous, new)
+    assert tasks == ['technologies']
+    assert list(reused) == ['screenshot', 'performance', 'images', 'seo']
+    
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_simhash()
+    test_fingerprint_diff()
+    test_all_subset()
+    test_scrape_reprocesses_changed_sections()
+    test_technologies_always_rerun()
+    print("✅ Todos los tests de detección de cambios pasaron")
@@ -0,0 +1,223 @@
+"""
+Tests de compresión negociada, ETags y 304 en /scrape
+"""
+import asyncio
+import gzip
+import sys
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.compression import negotiate, build_variants, make_etag, variant_etag, etag_matches, PREFERENCE
+from common import json_codec
+from server_scraping import ScrapingServer
+
+
+class MemoryResponseCache:
+    """Caché en memoria con la interfaz de RedisCache usada por /scrape"""
+    
+    def __init__(self):
+        self.entries = {}
+        self.variants = {}
+        self.variant_reads = []
+        self.hits = 0
+    
+    def get_raw(self, url, full=False):
+        body = self.entries.get((url, full))
+        return {'body': body, 'ttl_seconds': 60} if body is not None else None
+    
+    def set(self, url, data, full=False, ttl=None):
+        return self.set_raw(url, json_codec.dumps(data), full, ttl)
+    
+    def set_raw(self, url, body, full=False, ttl=None):
+        self.entries[(url, full)] = body
+        return True
+    
+    def set_variants(self, url, variants, etag, full=False, ttl=None):
+        self.variants[(url, full)] = dict(variants, etag=etag)
+        return True
+    
+    def get_variant(self, url, coding, full=False):
+        entry = self.variants.get((url, full))
+        self.variant_reads.append(coding)
+        
+        if entry is None:
+            return None
+        
+        if coding and coding not in entry:
+            coding = 'identity'
+        
+        # El sondeo de ETag (coding=None) no cuenta, como en RedisCache
+        if coding:
+            self.hits += 1
+        
+        return {
+            'etag': entry['etag'],
+            'ttl_seconds': 60,
+            'coding': coding,
+            'body': entry[coding] if coding else None
+        }
+    
+    def record_hit(self):
+        self.hits += 1
+
+
+def test_negotiate():
+    """Accept-Encoding con q-values y comodín"""
+    print("🧪 Test 1: Negociación de encoding")
+    
+    assert negotiate(None) == 'identity'
+    assert negotiate('gzip') == 'gzip'
+    assert negotiate('gzip;q=0, deflate') == 'identity'
+    assert negotiate('*') == PREFERENCE[0]
+    assert negotiate('*, gzip;q=0') in ('zstd', 'br', 'identity')
+    assert negotiate('GZIP ; q=0.5, identity') == 'gzip'
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_variants_and_etags():
+    """Variantes comprimidas y comparación de If-None-Match"""
+    print("🧪 Test 2: Variantes y ETags")
+    
+    body = b'{"data": "' + b'x' * 5000 + b'"}'
+    variants = build_variants(body)
+    
+    assert variants['identity'] == body
+    assert gzip.decompress(variants['gzip']) == body
+    assert build_variants(b'{}') == {'identity': b'{}'}
+    
+    etag = make_etag(body)
+    assert etag.startswith('"') and etag == make_etag(body)
+    assert variant_etag(etag, 'gzip') == etag[:-1] + '-gzip"'
+    
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/{variant_etag(etag, "gzip")}', etag)
+    assert etag_matches(f'"otro", {etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"otro"', etag)
+    assert not etag_matches(None, etag)
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_scrape_compressed_and_conditional():
+    """Miss comprimido, hit desde variantes y 304 sin leer el body"""
+    print("🧪 Test 3: /scrape con compresión y 304")
+    
+    links = ''.join(f'<a href="/pagina-{i}">Link {i}</a>' for i in range(100))
+    page = f'<html><head><title>Comprimir</title></head><body>{links}</body></html>'
+    
+    async def origin(request):
+        return web.Response(text=page, content_type='text/html')
+    
+    async def run():
+        origin_app = web.Application()
+        origin_app.router.add_get('/', origin)
+        origin_runner = web.AppRunner(origin_app)
+        await origin_runner.setup()
+        await web.TCPSite(origin_runner, '127.0.0.1', 0).start()
+        origin_port = origin_runner.addresses[0][1]
+        
+        server = ScrapingServer(enable_rate_limit=False)
+        server.cache = MemoryResponseCache()
+        server.session = aiohttp.ClientSession()
+        
+        app = web.Application()
+        app.router.add_get('/scrape', server.scrape_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        port = runner.addresses[0][1]
+        
+        url = f'http://127.0.0.1:{origin_port}/'
+        endpoint = f'http://127.0.0.1:{port}/scrape'
+        
+        try:
+            async with aiohttp.ClientSession(auto_decompress=False) as client:
+                # Miss: se sirve la misma variante que se guardó (una sola
+                # serialización y una sola compresión)
+                async with client.get(endpoint, params={'url': url}, headers={'Accept-Encoding': 'gzip'}) as r:
+                    assert r.status == 200
+                    assert r.headers['X-Cache'] == 'MISS'
+                    assert r.headers['Content-Encoding'] == 'gzip'
+                    miss_body = await r.read()
+                    assert b'Comprimir' in gzip.decompress(miss_body)
+                    assert miss_body == server.cache.variants[(url, False)]['gzip']
+                    miss_etag = r.headers['ETag']
+                
+                # La entrada JSON guardada son los mismos bytes, sin bloque 'cache'
+                assert gzip.decompress(miss_body) == server.cache.entries[(url, False)]
+                assert 'cache' not in json_codec.loads(gzip.decompress(miss_body))
+                
+                # Hit: bytes pre-comprimidos guardados en la escritura
+                async with client.get(endpoint, params={'url': url}, headers={'Accept-Encoding': 'gzip'}) as r:
+                    assert r.status == 200
+                    assert r.headers['X-Cache'] == 'HIT'
+                    body = await r.read()
+                    etag = r.headers['ETag']
+                    assert body == server.cache.variants[(url, False)]['gzip']
+                    assert etag.endswith('-gzip"')
+                    
+                    # El miss y los hits comparten bytes y ETag
+                    assert etag == miss_etag
+                
+                # If-None-Match: 304 leyendo solo el ETag, un solo hit
+                server.cache.variant_reads.clear()
+                server.cache.hits = 0
+                async with client.get(
+                    endpoint,
+                    params={'url': url},
+                    headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}
+                ) as r:
+                    assert r.status == 304
+                    assert await r.read() == b''
+                    assert server.cache.variant_reads == [None]
+                    assert server.cache.hits == 1
+                
+                # If-None-Match que no coincide: sondeo + body, pero un solo hit
+                server.cache.variant_reads.clear()
+                server.cache.hits = 0
+                async with client.get(
+                    endpoint,
+                    params={'url': url},
+                    headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"otro"'}
+                ) as r:
+                    assert r.status == 200
+                    assert await r.read() == server.cache.variants[(url, False)]['gzip']
+                    assert server.cache.variant_reads == [None, 'gzip']
+                    assert server.cache.hits == 1
+                
+                # Sin Accept-Encoding: body original
+                async with client.get(endpoint, params={'url': url}, headers={'Accept-Encoding': 'identity'}) as r:
+                    assert 'Content-Encoding' not in r.headers
+                    assert r.headers['X-Cache'] == 'HIT' and r.headers['X-Cache-TTL'] == '60'
+                    assert await r.read() == server.cache.entries[(url, False)]
+                
+                # Entrada sin variantes (ej: de /crawl): los bytes guardados tal cual
+                del server.cache.variants[(url, False)]
+                async with client.get(endpoint, params={'url': url}, headers={'Accept-Encoding': 'gzip'}) as r:
+                    assert r.headers['X-Cache'] == 'HIT' and r.headers['X-Cache-TTL'] == '60'
+                    data = json_codec.loads(gzip.decompress(await r.read()))
+                    assert 'cache' not in data
+                    assert r.headers['ETag'] == miss_etag
+                    assert data['scraping_data']['basic']['title'] == 'Comprimir'
+        finally:
+            await server.session.close()
+            await runner.cleanup()
+            await origin_runner.cleanup()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_negotiate()
+    test_variants_and_etags()
+    test_scrape_compressed_and_conditional()
+    print("✅ Todos los tests de compresión pasaron")
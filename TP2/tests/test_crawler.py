@@ -0,0 +1,119 @@
+"""
+Tests del modo crawl (Bloom filter, grafo de links y BFS acotado)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.bloom_filter import BloomFilter
+from scraper.crawler import SiteCrawler, normalize_url
+from scraper.link_graph import LinkGraph
+
+
+# Sitio simulado: página -> links
+SITE = {
+    'https://example.com/': ['/a', '/b', 'https://otro.com/x', '/a#seccion'],
+    'https://example.com/a': ['/', '/c', '/rota'],
+    'https://example.com/b': ['/a', '/doc.pdf'],
+    'https://example.com/c': ['/d'],
+    'https://example.com/d': []
+}
+
+
+async def fake_fetch(url):
+    """Simula _fetch_page del servidor"""
+    if url not in SITE:
+        return {'status_code': 404, 'scraping_data': None}
+    
+    links = [
+        {'url': 'https://example.com' + link if link.startswith('/') else link}
+        for link in SITE[url]
+    ]
+    return {'status_code': 200, 'scraping_data': {'links': links}, 'cache': 'MISS'}
+
+
+def test_normalize_url():
+    """Test: normalización de URLs para deduplicar"""
+    print("\n🧪 Test 1: Normalización de URLs")
+    
+    assert normalize_url('https://EXAMPLE.com') == 'https://example.com/'
+    assert normalize_url(' https://example.com/a#seccion ') == 'https://example.com/a'
+    assert normalize_url('http://example.com:80/a?q=1') == 'http://example.com/a?q=1'
+    assert normalize_url('https://example.com:8443/') == 'https://example.com:8443/'
+    assert normalize_url('mailto:info@example.com') is None
+    assert normalize_url('javascript:void(0)') is None
+    
+    print("✅ Test 1 PASSED")
+
+
+def test_bloom_filter():
+    """Test: Bloom filter sin falsos negativos"""
+    print("\n🧪 Test 2: Bloom filter")
+    
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f'https://example.com/p/{i}' for i in range(1000)]
+    
+    added = sum(1 for url in urls[:500] if bloom.add(url))
+    assert added >= 495
+    assert all(url in bloom for url in urls[:500])
+    assert not bloom.add(urls[0])
+    
+    false_positives = sum(1 for url in urls[500:] if url in bloom)
+    assert false_positives < 25
+    
+    print(f"   {bloom.size_bytes} bytes, {false_positives} falsos positivos")
+    print("✅ Test 2 PASSED")
+
+
+def test_crawl_and_graph():
+    """Test: BFS por niveles, límites y grafo"""
+    print("\n🧪 Test 3: Crawl y grafo de links")
+    
+    async def run(depth, max_pages):
+        crawler = SiteCrawler(fake_fetch, max_depth=depth, max_pages=max_pages)
+        pages = [page async for page in crawler.crawl('https://EXAMPLE.com')]
+        return crawler, pages
+    
+    crawler, pages = asyncio.run(run(depth=2, max_pages=50))
+    visited = {page['url']: page['depth'] for page in pages}
+    
+    assert visited == {
+        'https://example.com/': 0,
+        'https://example.com/a': 1,
+        'https://example.com/b': 1,
+        'https://example.com/c': 2,
+        'https://example.com/rota': 2
+    }
+    
+    summary = crawler.graph.summary('https://example.com/')
+    assert summary['pages_crawled'] == 5
+    assert summary['broken_links'] == [
+        {'source': 'https://example.com/a', 'target': 'https://example.com/rota', 'status': 404}
+    ]
+    
+    # Roundtrip del formato compacto
+    restored = LinkGraph.from_bytes(crawler.graph.to_bytes())
+    assert restored.summary('https://example.com/') == summary
+    
+    _, limited = asyncio.run(run(depth=5, max_pages=3))
+    assert len(limited) == 3
+    
+    print(f"   {summary['pages_discovered']} URLs, {summary['edges']} aristas")
+    print("✅ Test 3 PASSED")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🧪 TESTS DEL MODO CRAWL")
+    print("=" * 60)
+    
+    test_normalize_url()
+    test_bloom_filter()
+    test_crawl_and_graph()
+    
+    print("\n" + "=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
@@ -0,0 +1,109 @@
+"""
+Tests de detección de encoding y de adjuntos binarios del protocolo
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scraper.encoding import sniff_encoding
+from scraper.html_parser import HtmlParser
+from common.protocol import Protocol, TaskType
+from server_processing import get_html_payload
+
+
+LATIN1_PAGE = (
+    '<html><head><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">'
+    '<title>Año de café</title></head><body><p>Ñandú “rápido”</p></body></html>'
+).encode('cp1252')
+
+
+class FakeSocket:
+    """Socket que entrega los datos en pedazos chicos"""
+    
+    def __init__(self, data: bytes):
+        self.data = data
+    
+    def recv(self, size: int) -> bytes:
+        chunk, self.data = self.data[:min(size, 7)], self.data[min(size, 7):]
+        return chunk
+
+
+def test_sniff_order():
+    """BOM > header > meta > default"""
+    print("🧪 Test 1: Orden de detección")
+    
+    assert sniff_encoding(b'\xef\xbb\xbf<html>', 'text/html; charset=latin1') == ('utf-8', 'bom')
+    assert sniff_encoding(b'<meta charset="utf-8">', 'text/html; charset=ISO-8859-1') == ('windows-1252', 'header')
+    assert sniff_encoding(b'<meta charset="Shift_JIS">', 'text/html') == ('shift_jis', 'meta')
+    assert sniff_encoding(LATIN1_PAGE, None) == ('windows-1252', 'meta')
+    
+    # Charset desconocido en el header: se sigue con el meta
+    assert sniff_encoding(b'<meta charset="utf-8">', 'text/html; charset=bogus') == ('utf-8', 'meta')
+    
+    # Un meta que dice utf-16 se leyó como ASCII: es utf-8
+    assert sniff_encoding(b'<meta charset="utf-16">', None) == ('utf-8', 'meta')
+    
+    # Sin declaración: UTF-8 si es válido, windows-1252 si no
+    assert sniff_encoding('<p>café</p>'.encode('utf-8')) == ('utf-8', 'default')
+    assert sniff_encoding('<p>café</p>'.encode('cp1252')) == ('windows-1252', 'default')
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_parse_bytes_without_mojibake():
+    """HtmlParser decodifica los bytes con el encoding detectado"""
+    print("🧪 Test 2: Parseo de bytes Latin-1")
+    
+    encoding, _ = sniff_encoding(LATIN1_PAGE, 'text/html')
+    data = HtmlParser().parse(LATIN1_PAGE, 'https://example.com/', encoding)
+    
+    assert data['basic']['title'] == 'Año de café'
+    assert 'Ñandú “rápido”' in data['basic']['text_preview']
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_attachments_roundtrip():
+    """El HTML viaja como bytes crudos, fuera del JSON"""
+    print("🧪 Test 3: Adjuntos binarios del protocolo")
+    
+    request = Protocol.create_request(TaskType.SEO, 'https://example.com/', {'html_encoding': 'windows-1252'})
+    encoded = Protocol.encode_message(request, {'html': LATIN1_PAGE})
+    
+    # Los bytes van tal cual al final del mensaje
+    assert encoded.endswith(LATIN1_PAGE)
+    
+    decoded = Protocol.decode_message(FakeSocket(encoded))
+    assert decoded['attachments'] == {'html': LATIN1_PAGE}
+    assert decoded['params'] == request['params']
+    
+    html, encoding = get_html_payload(decoded)
+    assert html == LATIN1_PAGE and encoding == 'windows-1252'
+    
+    async def receive():
+        reader = asyncio.StreamReader()
+        reader.feed_data(encoded + Protocol.encode_message({'type': 'response', 'result': {}}))
+        reader.feed_eof()
+        first = await Protocol.receive_message(reader)
+        second = await Protocol.receive_message(reader)
+        return first, second
+    
+    first, second = asyncio.run(receive())
+    assert first['attachments']['html'] == LATIN1_PAGE
+    assert second == {'type': 'response', 'result': {}}
+    
+    # Mensajes sin adjuntos: formato anterior
+    plain = Protocol.create_request(TaskType.SEO, 'https://example.com/', {'html_content': '<p>x</p>'})
+    assert get_html_payload(Protocol.decode_message(FakeSocket(Protocol.encode_message(plain)))) == ('<p>x</p>', None)
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_sniff_order()
+    test_parse_bytes_without_mojibake()
+    test_attachments_roundtrip()
+    print("✅ Todos los tests de encoding pasaron")
@@ -0,0 +1,282 @@
+"""
+Tests del apagado ordenado: precalentamiento, /ready y /live, drenado con
+SIGTERM y reintento en otro nodo de las tareas que un Servidor B rechaza
+"""
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load.fixtures import Fixtures
+from benchmarks.load.run import wait_ready
+from common.protocol import Protocol, MessageType, TaskType
+from common.load_balancer import LoadBalancer
+from helpers import exchange, free_port
+from processor.worker_pool import TaskCancelled
+from server_processing import ProcessingServer
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def slow_task(data):
+    time.sleep(30)
+    return 'terminó'
+
+
+def get_status(url: str):
+    """(status HTTP, JSON) sin lanzar en 503"""
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_processing_warm_up_and_drain():
+    """B: /ready en 503 hasta precalentar y al drenar; las tareas nuevas se rechazan como retryable"""
+    print("🧪 Test 1: Precalentamiento y drenado del Servidor B")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1, warm_up='analyzers')
+    port = server.server_address[1]
+    exporter = server.start_metrics_exporter('127.0.0.1', 0)
+    base = f'http://127.0.0.1:{exporter.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    try:
+        assert get_status(f'{base}/ready')[0] == 503
+        assert get_status(f'{base}/live')[0] == 200
+        assert exchange(port, Protocol.create_status())['load']['ready'] is False
+        
+        assert server.warm_up(60)
+        status, state = get_status(f'{base}/ready')
+        assert status == 200 and state['workers_ready'] == 1
+        assert server.process_pool.stats()[0]['init_seconds'] is not None
+        
+        # Una request en curso que termina a los 0.5s
+        def in_flight():
+            with server.track(1):
+                time.sleep(0.5)
+        
+        holder = threading.Thread(target=in_flight)
+        holder.start()
+        time.sleep(0.1)
+        
+        result = {}
+        drainer = threading.Thread(target=lambda: result.update(finished=server.drain(10)))
+        drainer.start()
+        time.sleep(0.1)
+        
+        response = exchange(port, Protocol.create_request(TaskType.SEO, 'https://example.com'))
+        assert response['type'] == MessageType.ERROR.value and response['retryable'] is True
+        assert exchange(port, Protocol.create_status())['load']['draining'] is True
+        assert get_status(f'{base}/ready')[0] == 503
+        assert get_status(f'{base}/live')[0] == 200
+        
+        drainer.join(10)
+        assert result['finished'] is True
+        holder.join()
+    finally:
+        server.graceful_shutdown(5)
+        server.server_close()
+    
+    # Ya no acepta conexiones
+    try:
+        socket.create_connection(('127.0.0.1', port), timeout=2).close()
+        assert False
+    except OSError:
+        pass
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_processing_drain_timeout():
+    """B: vencido el drenado las requests en curso se cancelan y terminan"""
+    print("🧪 Test 2: Drenado vencido en el Servidor B")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    assert server.warm_up(30)
+    outcome = {}
+    
+    def in_flight():
+        with server.track(1):
+            future = server.process_pool.apply_async(slow_task, (None,))
+            server.register_request('r1', [future])
+            try:
+                future.result(timeout=30)
+            except TaskCancelled:
+                outcome['cancelled'] = True
+            finally:
+                server.unregister_request('r1')
+    
+    holder = threading.Thread(target=in_flight)
+    holder.start()
+    
+    try:
+        while server.process_pool.busy_workers() == 0:
+            time.sleep(0.01)
+        
+        start = time.time()
+        assert server.drain(0.3) is False
+        assert time.time() - start < 10
+        holder.join(10)
+        assert outcome.get('cancelled') and server.active_requests == 0
+    finally:
+        server.shutdown(timeout=5)
+        server.server_close()
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_processing_warm_up_interrupted():
+    """B: un SIGTERM durante el precalentamiento corta la espera sin marcar listo"""
+    print("🧪 Test 3: Precalentamiento interrumpido")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    # Pool que nunca termina de precalentarse (ej: Chrome colgado)
+    server.process_pool.wait_ready = lambda timeout: time.sleep(timeout) or False
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+    
+    try:
+        started = time.time()
+        assert server.warm_up(120, stop) is False
+        assert time.time() - started < 5
+        assert server.ready is False
+    finally:
+        server.process_pool.terminate()
+        server.server_close()
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_balancer_retries_draining_node():
+    """A: una tarea rechazada como retryable va a otro nodo sin contar como fallo"""
+    print("🧪 Test 4: Reintento en otro nodo")
+    
+    async def run():
+        draining = {'value': True}
+        
+        async def handle_draining(reader, writer):
+            message = await Protocol.receive_message(reader)
+            if message['type'] == MessageType.STATUS.value:
+                response = Protocol.create_status({'ready': True, 'draining': draining['value']})
+            else:
+                response = Protocol.create_error('Server draining', retryable=True)
+            writer.write(Protocol.encode_message(response))
+            await writer.drain()
+            writer.close()
+        
+        async def handle_ok(reader, writer):
+            message = await Protocol.receive_message(reader)
+            writer.write(Protocol.encode_message(Protocol.create_response(message['task_type'], {'node': 'ok'})))
+            await writer.drain()
+            writer.close()
+        
+        old = await asyncio.start_server(handle_draining, '127.0.0.1', 0)
+        new = await asyncio.start_server(handle_ok, '127.0.0.1', 0)
+        nodes = [('127.0.0.1', server.sockets[0].getsockname()[1]) for server in (old, new)]
+        
+        # 'hash' para que la URL elegida caiga primero en el nodo que drena
+        balancer = LoadBalancer(nodes, strategy='hash')
+        url = next(
+            f'https://example.com/{i}' for i in range(100)
+            if balancer.pick(f'https://example.com/{i}') is balancer.nodes[0]
+        )
+        message = Protocol.encode_message(Protocol.create_request(TaskType.SEO, url))
+        
+        try:
+            response = await balancer.call(url, message)
+            assert response['result'] == {'node': 'ok'}
+            
+            node = balancer.nodes[0]
+            assert not node.accepting and node.failures == 0
+            assert balancer.pick(url) is balancer.nodes[1]
+            
+            # El health check lo reincorpora cuando deja de drenar
+            await balancer.check_node(node)
+            assert not node.accepting
+            draining['value'] = False
+            await balancer.check_node(node)
+            assert node.accepting and balancer.pick(url) is node
+        finally:
+            old.close()
+            new.close()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 4 PASSED\n")
+
+
+def test_scraping_sigterm_drain():
+    """A: con SIGTERM /ready pasa a 503, la request en curso termina y el proceso sale con 0"""
+    print("🧪 Test 5: SIGTERM en el Servidor A")
+    
+    fixtures = Fixtures({'processing_latency': 1.5, 'processing_jitter': 0, 'slow_delay': 0})
+    info = fixtures.start()
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    
+    process = subprocess.Popen(
+        [
+            sys.executable, str(PROJECT_ROOT / 'server_scraping.py'),
+            '--ip', '127.0.0.1', '--port', str(port),
+            '--processing-port', str(info['processing_port']),
+            '--redis-port', str(info['redis_port']),
+            '--max-requests', '100000', '--drain-delay', '0.5', '--shutdown-timeout', '10'
+        ],
+        cwd=str(PROJECT_ROOT),
+        stdout=open(os.path.join(tempfile.mkdtemp(), 'server.log'), 'w'),
+        stderr=subprocess.STDOUT
+    )
+    
+    try:
+        wait_ready(f'{base}/ready', process, timeout=60)
+        assert get_status(f'{base}/live')[0] == 200
+        
+        page = f"http://127.0.0.1:{info['origin_port']}/pages/small"
+        result = {}
+        
+        def full_request():
+            result['status'], result['body'] = get_status(f'{base}/scrape?url={page}&full=true')
+        
+        client = threading.Thread(target=full_request)
+        client.start()
+        time.sleep(0.5)
+        
+        process.send_signal(signal.SIGTERM)
+        time.sleep(0.2)
+        assert get_status(f'{base}/ready')[0] == 503
+        
+        client.join(30)
+        assert result['status'] == 200, result
+        assert result['body']['status'] == 'success'
+        assert process.wait(30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+        fixtures.stop()
+    
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_processing_warm_up_and_drain()
+    test_processing_drain_timeout()
+    test_processing_warm_up_interrupted()
+    test_balancer_retries_draining_node()
+    test_scraping_sigterm_drain()
+    print("✅ Todos los tests de apagado ordenado pasaron")
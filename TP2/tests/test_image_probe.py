@@ -0,0 +1,88 @@
+"""
+Tests del sondeo de imágenes (sniffing de dimensiones, dedupe y prioridad)
+"""
+import io
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from processor.image_probe import (
+    sniff_image_size, ImageRegistry, image_priority, normalize_candidates
+)
+
+
+def _encode(fmt: str, size=(320, 240)) -> bytes:
+    """Genera una imagen en memoria con el formato pedido"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_sniff_formats():
+    """Las dimensiones se leen solo del header (primeros bytes)"""
+    print("🧪 Test 1: Sniffing de dimensiones")
+    
+    for fmt in ['PNG', 'GIF', 'JPEG', 'WEBP', 'BMP']:
+        data = _encode(fmt)
+        sniffed = sniff_image_size(data[:2048])
+        print(f"  {fmt}: {sniffed}")
+        assert sniffed == (fmt, 320, 240)
+    
+    assert sniff_image_size(b'<html>not an image</html>') is None
+    print("✅ Test 1 PASSED\n")
+
+
+def test_registry_dedupe():
+    """Misma URL + mismo ETag se considera ya procesada"""
+    print("🧪 Test 2: Dedupe por URL + ETag")
+    
+    registry = ImageRegistry()
+    url = 'https://example.com/logo.png'
+    
+    assert not registry.is_seen(url, '"v1"')
+    registry.mark_seen(url, '"v1"')
+    assert registry.is_seen(url, '"v1"')
+    assert not registry.is_seen(url, '"v2"')
+    
+    # Sin ETag no se puede garantizar que no cambió
+    registry.mark_seen(url, None)
+    assert not registry.is_seen(url, None)
+    print("✅ Test 2 PASSED\n")
+
+
+def test_priority():
+    """Imágenes grandes y above the fold primero, íconos al final"""
+    print("🧪 Test 3: Prioridad de thumbnails")
+    
+    candidates = normalize_candidates([
+        'https://example.com/hero.jpg',
+        {'url': 'https://example.com/icon.png'},
+        {'url': 'https://example.com/footer.jpg', 'loading': 'lazy'},
+        'https://example.com/hero.jpg'
+    ])
+    assert len(candidates) == 3
+    
+    hero = image_priority(candidates[0], {'width': 1600, 'height': 900})
+    icon = image_priority(candidates[1], {'width': 16, 'height': 16})
+    footer = image_priority(candidates[2], {'width': 1600, 'height': 900})
+    
+    assert hero > footer > icon
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTS DEL SONDEO DE IMÁGENES")
+    print("=" * 60 + "\n")
+    
+    test_sniff_formats()
+    test_registry_dedupe()
+    test_priority()
+    
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
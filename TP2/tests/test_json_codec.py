@@ -0,0 +1,72 @@
+"""
+Tests del codec JSON compartido y del empalme de metadata en bytes
+"""
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common import json_codec
+from common.protocol import Protocol, TaskType
+
+
+def test_roundtrip():
+    """dumps/loads con cualquier backend devuelven lo mismo"""
+    print(f"🧪 Test 1: Roundtrip ({json_codec.BACKEND})")
+    
+    data = {'url': 'https://example.com/ñ', 'n': [1, 2.5, None, True], 'big': 2 ** 70}
+    encoded = json_codec.dumps(data)
+    
+    assert isinstance(encoded, bytes)
+    assert json_codec.loads(encoded) == data
+    assert json_codec.loads(encoded.decode('utf-8')) == data
+    
+    # Claves no-str (ej: status HTTP) se convierten a str como en json
+    assert json_codec.loads(json_codec.dumps({404: 1})) == {'404': 1}
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_splice_object():
+    """Agregar 'cache' sin parsear el documento"""
+    print("🧪 Test 2: Empalme de metadata")
+    
+    body = json_codec.dumps({'url': 'https://example.com', 'data': {'x': '}'}})
+    spliced = json_codec.splice_object(body, 'cache', {'hit': True, 'ttl_seconds': 10})
+    
+    assert json_codec.loads(spliced) == {
+        'url': 'https://example.com',
+        'data': {'x': '}'},
+        'cache': {'hit': True, 'ttl_seconds': 10}
+    }
+    
+    assert json_codec.loads(json_codec.splice_object(b'{ }\n', 'a', 1)) == {'a': 1}
+    assert json_codec.loads(json_codec.splice_object(b'{"x": 1}  ', 'a', 1)) == {'x': 1, 'a': 1}
+    
+    try:
+        json_codec.splice_object(b'[1, 2]', 'a', 1)
+        assert False, "Debería rechazar algo que no es un objeto"
+    except ValueError:
+        pass
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_protocol_uses_codec():
+    """El protocolo serializa con el codec compartido"""
+    print("🧪 Test 3: Protocolo con el codec")
+    
+    request = Protocol.create_request(TaskType.SEO, 'https://example.com', {'texto': 'año'})
+    encoded = Protocol.encode_message(request)
+    
+    assert encoded[4:] == json_codec.dumps(request)
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_roundtrip()
+    test_splice_object()
+    test_protocol_uses_codec()
+    print("✅ Todos los tests del codec JSON pasaron")
@@ -0,0 +1,83 @@
+"""
+Tests de imports perezosos y --preload del Servidor B
+"""
+import gc
+import socket
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.protocol import Protocol, MessageType, TaskType
+from server_processing import ProcessingServer, TASK_MODULES
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+HEAVY_MODULES = ('selenium', 'PIL', 'bs4', 'lxml')
+
+
+def loaded_after(code: str) -> list:
+    """Módulos pesados cargados en un intérprete nuevo después de correr code"""
+    check = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, '-c', check],
+        cwd=str(PROJECT_ROOT), capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1:]
+    return [name for name in ''.join(output).split(',') if name]
+
+
+def test_lazy_imports():
+    """Importar el servidor o los paquetes no carga Selenium, PIL ni BeautifulSoup"""
+    print("🧪 Test 1: Imports perezosos")
+    
+    assert loaded_after('import server_processing') == []
+    assert loaded_after('import processor, common, processor.worker_pool') == []
+    
+    # Cada tarea carga solo lo suyo
+    assert 'selenium' not in loaded_after(
+        "from server_processing import get_seo_analyzer; "
+        "get_seo_analyzer().analyze(b'<html><title>t</title></html>', 'https://example.com/')"
+    )
+    assert 'selenium' in loaded_after('from processor import ScreenshotGenerator')
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_preload():
+    """--preload importa las tareas en el padre y los workers las heredan"""
+    print("🧪 Test 2: Precarga antes del fork")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1, preload=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    try:
+        assert set(TASK_MODULES) <= set(server.preload_timings)
+        assert all(module in sys.modules for module in TASK_MODULES)
+        assert gc.get_freeze_count() > 0
+        
+        assert server.warm_up(30)
+        
+        port = server.server_address[1]
+        with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+            sock.sendall(Protocol.encode_message(Protocol.create_request(
+                TaskType.SEO, 'https://example.com/', {'html_content': '<html><title>Hola</title></html>'}
+            )))
+            response = Protocol.decode_message(sock)
+        
+        assert response['type'] == MessageType.RESPONSE.value, response
+        assert 'score' in response['result']
+    finally:
+        server.shutdown(timeout=5)
+        server.server_close()
+        gc.unfreeze()
+    
+    print("✅ Test 2 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_lazy_imports()
+    test_preload()
+    print("✅ Todos los tests de imports perezosos pasaron")
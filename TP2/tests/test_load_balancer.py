@@ -0,0 +1,219 @@
+"""
+Tests del balanceador hacia varios Servidores B (afinidad, failover,
+expulsión, hedging y STATUS)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.protocol import Protocol, MessageType, TaskType
+from common.load_balancer import LoadBalancer, parse_nodes
+from helpers import free_port
+
+
+async def start_fake_node(delay: float = 0.0, name: str = 'b'):
+    """Servidor B falso: responde STATUS y tareas (con demora opcional)"""
+    served = []
+    
+    async def handle(reader, writer):
+        message = await Protocol.receive_message(reader)
+        
+        if message['type'] == MessageType.STATUS.value:
+            response = Protocol.create_status({'active_tasks': 0, 'node': name})
+        else:
+            served.append(message['url'])
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                writer.close()
+                return
+            response = Protocol.create_response(message['task_type'], {'node': name})
+        
+        writer.write(Protocol.encode_message(response))
+        await writer.drain()
+        writer.close()
+    
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1], served
+
+
+def request_bytes(url: str) -> bytes:
+    return Protocol.encode_message(Protocol.create_request(TaskType.SEO, url))
+
+
+def test_parse_nodes():
+    """host:puerto separados por coma, IPv6 entre corchetes"""
+    print("🧪 Test 1: Parseo de nodos")
+    
+    assert parse_nodes('a:9000, b:9001') == [('a', 9000), ('b', 9001)]
+    assert parse_nodes('[::1]:9000') == [('::1', 9000)]
+    
+    try:
+        parse_nodes('sin-puerto')
+        assert False
+    except ValueError:
+        pass
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_hash_affinity():
+    """Rendezvous hashing: misma URL, mismo nodo; sacar un nodo solo mueve sus URLs"""
+    print("🧪 Test 2: Afinidad por URL")
+    
+    nodes = [('b1', 9000), ('b2', 9000), ('b3', 9000)]
+    balancer = LoadBalancer(nodes, strategy='hash')
+    urls = [f'https://example.com/{i}' for i in range(300)]
+    
+    before = {url: balancer.pick(url).address for url in urls}
+    assert before == {url: balancer.pick(url).address for url in urls}
+    assert len(set(before.values())) == 3
+    
+    smaller = LoadBalancer(nodes[:2], strategy='hash')
+    for url, address in before.items():
+        if address != 'b3:9000':
+            assert smaller.pick(url).address == address
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_failover_and_ejection():
+    """Un nodo caído se reintenta en otro y queda expulsado tras varios fallos"""
+    print("🧪 Test 3: Failover y expulsión")
+    
+    async def run():
+        server, port, served = await start_fake_node(name='vivo')
+        dead = free_port()
+        
+        balancer = LoadBalancer(
+            [('127.0.0.1', dead), ('127.0.0.1', port)],
+            max_failures=2,
+            eject_seconds=60
+        )
+        
+        try:
+            for i in range(4):
+                response = await balancer.call(f'https://example.com/{i}', request_bytes(f'https://example.com/{i}'))
+                assert response['result']['node'] == 'vivo'
+            
+            dead_node, live_node = balancer.nodes
+            assert not dead_node.available(time.time())
+            assert dead_node.errors == 2, dead_node.errors
+            assert live_node.requests == 4
+            
+            # Health check: el vivo reporta su carga, el caído sigue fuera
+            assert await balancer.check_node(live_node)
+            assert live_node.load['node'] == 'vivo'
+            assert not await balancer.check_node(dead_node)
+            
+            # Sin ningún nodo vivo: ConnectionError
+            only_dead = LoadBalancer([('127.0.0.1', dead)])
+            try:
+                await only_dead.call('https://example.com/', request_bytes('https://example.com/'))
+                assert False
+            except ConnectionError:
+                pass
+        finally:
+            server.close()
+            await server.wait_closed()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_hedging():
+    """Si el nodo elegido tarda, gana la copia enviada a otro nodo"""
+    print("🧪 Test 4: Hedging")
+    
+    async def run():
+        slow, slow_port, _ = await start_fake_node(delay=2.0, name='lento')
+        fast, fast_port, _ = await start_fake_node(name='rapido')
+        
+        balancer = LoadBalancer(
+            [('127.0.0.1', slow_port), ('127.0.0.1', fast_port)],
+            hedge_after=0.1
+        )
+        
+        # Forzar que el primero elegido sea el lento
+        balancer.nodes[1].outstanding = 1
+        
+        try:
+            start = asyncio.get_event_loop().time()
+            response = await balancer.call('https://example.com/', request_bytes('https://example.com/'))
+            elapsed = asyncio.get_event_loop().time() - start
+            
+            assert response['result']['node'] == 'rapido'
+            assert elapsed < 1.5
+            assert balancer.hedged == 1 and balancer.hedge_wins == 1
+            
+            # La request perdedora se cancela (no queda en vuelo)
+            await asyncio.sleep(0.05)
+            assert balancer.nodes[0].outstanding == 0
+        finally:
+            for server in (slow, fast):
+                server.close()
+                await server.wait_closed()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 4 PASSED\n")
+
+
+def test_deadline_budget():
+    """Los reintentos comparten el deadline del sobre: nunca reciben uno vencido"""
+    print("🧪 Test 5: Un solo presupuesto para los reintentos")
+    
+    async def run():
+        slow, slow_port, slow_served = await start_fake_node(delay=2.0, name='lento')
+        fast, fast_port, fast_served = await start_fake_node(name='rapido')
+        
+        balancer = LoadBalancer(
+            [('127.0.0.1', slow_port), ('127.0.0.1', fast_port)],
+            timeout=0.5
+        )
+        
+        # Forzar que el primero elegido sea el lento
+        balancer.nodes[1].outstanding = 1
+        
+        try:
+            # El lento agota el presupuesto: no queda tiempo para reintentar
+            start = time.time()
+            try:
+                await balancer.call('https://example.com/', request_bytes('https://example.com/'), deadline=start + 0.5)
+                assert False
+            except ConnectionError:
+                pass
+            elapsed = time.time() - start
+            
+            assert elapsed < 1.0, elapsed
+            assert slow_served == ['https://example.com/'] and fast_served == []
+            
+            # Deadline ya vencido: ni siquiera se envía
+            try:
+                await balancer.call('https://example.com/', request_bytes('https://example.com/'), deadline=time.time() - 1)
+                assert False
+            except ConnectionError:
+                pass
+            assert len(slow_served) == 1 and fast_served == []
+        finally:
+            for server in (slow, fast):
+                server.close()
+                await server.wait_closed()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_parse_nodes()
+    test_hash_affinity()
+    test_failover_and_ejection()
+    test_hedging()
+    test_deadline_budget()
+    print("✅ Todos los tests del balanceador pasaron")
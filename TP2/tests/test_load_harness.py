@@ -0,0 +1,138 @@
+"""
+Tests del harness de carga: Redis falso, generador de lazo abierto y corrida completa
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import redis
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load.loadgen import Sample, Target, build_targets, percentile, summarize
+from benchmarks.load.origin import build_corpus
+from benchmarks.load.run import compare, main
+from common.cache import RedisCache
+from common.rate_limiter import RateLimiter
+from helpers import start_fake_redis
+
+
+def test_fake_redis():
+    """RedisCache y RateLimiter funcionan contra el Redis falso (RESP2 y RESP3)"""
+    print("🧪 Test 1: Redis falso")
+    
+    server = start_fake_redis()
+    
+    for protocol in (2, 3):
+        client = redis.Redis(port=server.port, protocol=protocol, decode_responses=True)
+        client.flushall()
+        client.zadd('z', {'a': 1.5, 'b': 2})
+        assert [tuple(item) for item in client.zrange('z', 0, -1, withscores=True)] == [('a', 1.5), ('b', 2.0)]
+        assert client.zremrangebyscore('z', 0, '(2') == 1
+        
+        client.hset('h', mapping={'x': '1'})
+        assert client.hincrby('h', 'x', 2) == 3
+        assert client.hgetall('h') == {'x': '3'}
+        
+        pipe = client.pipeline(transaction=True)
+        pipe.set('k', 'v', ex=10)
+        pipe.ttl('k')
+        assert pipe.execute() == [True, 10]
+        assert client.mget(['k', 'falta']) == ['v', None]
+    
+    cache = RedisCache(redis_port=server.port)
+    cache.set('https://example.com', {'title': 'Hola'})
+    assert cache.get('https://example.com')['title'] == 'Hola'
+    
+    limiter = RateLimiter(redis_port=server.port, max_requests=2)
+    assert [limiter.check_rate_limit('https://example.com/')[0] for _ in range(3)] == [True, True, False]
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_schedule_and_summary():
+    """Horario reproducible, percentiles y comparación con una corrida base"""
+    print("🧪 Test 2: Horario, percentiles y regresiones")
+    
+    corpus = build_corpus(slow_delay=0)
+    assert set(corpus) >= {'small', 'large', 'latin1', 'meta-charset', 'slow', 'huge-images'}
+    assert b'charset="shift_jis"' in corpus['meta-charset'].body
+    assert len(corpus['large'].body) > 500 * 1024
+    
+    mix = {'small': 1, 'article': 1}
+    first = build_targets('http://origen', mix, 50, full_ratio=0.5, unique_urls=5)
+    second = build_targets('http://origen', mix, 50, full_ratio=0.5, unique_urls=5)
+    assert [target.url for target in first] == [target.url for target in second]
+    assert len({target.url for target in first}) <= 10
+    
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+    assert percentile([], 50) is None
+    
+    samples = []
+    for i in range(10):
+        sample = Sample(Target('small', False, 'http://origen/pages/small'), intended=0.0)
+        sample.sent, sample.finished = 0.01, 0.1 * (i + 1)
+        sample.status = 200 if i < 9 else None
+        sample.error = None if i < 9 else 'timeout'
+        samples.append(sample)
+    
+    summary = summarize(samples, elapsed=1.0)
+    assert summary['ok'] == 9 and summary['outcomes'] == {'200': 9, 'timeout': 1}
+    assert summary['latency_ms']['p50'] == 500.0
+    assert summary['throughput_rps'] == 9.0
+    
+    baseline = {'summary': {'latency_ms': {'p50': 100, 'p99': 200}, 'throughput_rps': 50, 'error_rate': 0.0}}
+    same = {'summary': {'latency_ms': {'p50': 110, 'p99': 190}, 'throughput_rps': 49, 'error_rate': 0.0}}
+    worse = {'summary': {'latency_ms': {'p50': 100, 'p99': 300}, 'throughput_rps': 30, 'error_rate': 0.05}}
+    
+    assert compare(same, baseline, tolerance=0.15) == []
+    regressions = compare(worse, baseline, tolerance=0.15)
+    assert len(regressions) == 3
+    assert any(regression.startswith('summary.latency_ms.p99') for regression in regressions)
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_end_to_end_run():
+    """Corrida corta contra el Servidor A real y el entorno falso"""
+    print("🧪 Test 3: Corrida de punta a punta")
+    
+    output = os.path.join(tempfile.mkdtemp(), 'resultado.json')
+    code = main([
+        '--rps', '10', '--duration', '2', '--warmup', '0',
+        '--mix', 'small=3,latin1=1,meta-charset=1',
+        '--full-ratio', '0.3', '--unique-urls', '2',
+        '--processing-latency', '0.05', '--processing-jitter', '0',
+        '--output', output
+    ])
+    assert code == 0
+    
+    with open(output) as f:
+        result = json.load(f)
+    
+    summary = result['summary']
+    assert summary['requests'] == 20
+    assert summary['error_rate'] == 0.0, summary['outcomes']
+    assert summary['cache'].get('HIT', 0) > 0
+    assert summary['latency_ms']['p99'] is not None
+    assert any(label.endswith('(full)') for label in summary['by_page'])
+    assert result['resources']['server_a']['cpu_seconds'] >= 0
+    
+    # --baseline con tolerancia amplia (la latencia en CI es ruidosa)
+    assert main([
+        '--rps', '10', '--duration', '1', '--warmup', '0', '--mix', 'small=1',
+        '--baseline', output, '--tolerance', '100'
+    ]) == 0
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_fake_redis()
+    test_schedule_and_summary()
+    test_end_to_end_run()
+    print("✅ Todos los tests del harness de carga pasaron")
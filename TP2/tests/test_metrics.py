@@ -0,0 +1,168 @@
+"""
+Tests de métricas: registro Prometheus, /metrics del Servidor A y exportador del Servidor B
+"""
+import asyncio
+import socket
+import sys
+import threading
+import urllib.request
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.metrics import MetricsRegistry, CONTENT_TYPE
+from common.protocol import Protocol, MessageType, TaskType
+from server_scraping import ScrapingServer
+from server_processing import ProcessingServer
+
+
+def test_registry_render():
+    """Contadores, gauges calculados e histogramas acumulados"""
+    print("🧪 Test 1: Formato de exposición")
+    
+    registry = MetricsRegistry()
+    requests = registry.counter('app_requests_total', 'Requests', labelnames=('domain',))
+    latency = registry.histogram('app_seconds', 'Latencia', labelnames=('stage',), buckets=(0.1, 1))
+    registry.gauge_callback('app_queue', 'Cola', lambda: 3)
+    
+    requests.inc(domain='a.com')
+    requests.inc(2, domain='say "hi"')
+    latency.observe(0.05, stage='fetch')
+    latency.observe(0.1, stage='fetch')
+    latency.observe(5, stage='fetch')
+    
+    text = registry.render().decode('utf-8')
+    
+    assert '# TYPE app_requests_total counter' in text
+    assert 'app_requests_total{domain="a.com"} 1' in text
+    assert 'app_requests_total{domain="say \\"hi\\""} 2' in text
+    assert 'app_seconds_bucket{stage="fetch",le="0.1"} 2' in text
+    assert 'app_seconds_bucket{stage="fetch",le="1"} 2' in text
+    assert 'app_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'app_seconds_count{stage="fetch"} 3' in text
+    assert 'app_queue 3' in text
+    assert latency.count(stage='fetch') == 3
+    
+    try:
+        requests.inc()
+        assert False
+    except ValueError:
+        pass
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_scraping_server_metrics():
+    """Etapas de /scrape, status por ruta y rechazos del rate limit"""
+    print("🧪 Test 2: /metrics del Servidor A")
+    
+    class DenyAll:
+        def check_rate_limit(self, url):
+            return False, {
+                'domain': 'bloqueado.com', 'requests_in_window': 10, 'max_requests': 10,
+                'window_seconds': 60, 'remaining': 0
+            }
+    
+    async def origin(request):
+        return web.Response(text='<html><head><title>Métricas</title></head><body></body></html>', content_type='text/html')
+    
+    async def run():
+        origin_app = web.Application()
+        origin_app.router.add_get('/', origin)
+        origin_runner = web.AppRunner(origin_app)
+        await origin_runner.setup()
+        await web.TCPSite(origin_runner, '127.0.0.1', 0).start()
+        origin_port = origin_runner.addresses[0][1]
+        
+        server = ScrapingServer(enable_cache=False, enable_rate_limit=False)
+        server.session = aiohttp.ClientSession()
+        
+        app = web.Application(middlewares=[server._metrics_middleware])
+        app.router.add_get('/scrape', server.scrape_handler)
+        app.router.add_get('/metrics', server.metrics_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        base = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        
+        try:
+            async with aiohttp.ClientSession() as client:
+                async with client.get(f'{base}/scrape', params={'url': f'http://127.0.0.1:{origin_port}/'}) as r:
+                    assert r.status == 200
+                
+                server.enable_rate_limit = True
+                server.rate_limiter = DenyAll()
+                async with client.get(f'{base}/scrape', params={'url': 'http://bloqueado.com/'}) as r:
+                    assert r.status == 429
+                
+                async with client.get(f'{base}/metrics') as r:
+                    assert r.headers['Content-Type'] == CONTENT_TYPE
+                    text = await r.text()
+        finally:
+            await server.session.close()
+            await runner.cleanup()
+            await origin_runner.cleanup()
+        
+        return text
+    
+    text = asyncio.run(run())
+    
+    for stage in ('fetch', 'parse', 'serialize', 'rate_limit'):
+        assert f'scraper_stage_seconds_count{{stage="{stage}"}} 1' in text, stage
+    
+    assert 'scraper_http_requests_total{route="/scrape",status="200"} 1' in text
+    assert 'scraper_http_requests_total{route="/scrape",status="429"} 1' in text
+    assert 'scraper_rate_limit_rejections_total{domain="bloqueado.com"} 1' in text
+    assert 'scraper_http_requests_in_flight 1' in text  # la propia request a /metrics
+    assert 'scraper_response_bytes_count 1' in text
+    assert 'scraper_processing_healthy{node="localhost:9000"} 1' in text
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_processing_server_exporter():
+    """Histogramas por tarea y estado del pool en el exportador del Servidor B"""
+    print("🧪 Test 3: Exportador del Servidor B")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    exporter = server.start_metrics_exporter('127.0.0.1', 0)
+    
+    try:
+        html = b'<html><head><title>SEO</title></head><body><h1>Hola</h1></body></html>'
+        message = Protocol.create_request(TaskType.SEO, 'https://example.com', {'html_encoding': 'utf-8'})
+        
+        with socket.create_connection(server.server_address, timeout=30) as sock:
+            sock.sendall(Protocol.encode_message(message, {'html': html}))
+            response = Protocol.decode_message(sock)
+        
+        assert response['type'] == MessageType.RESPONSE.value
+        
+        url = f'http://127.0.0.1:{exporter.server_address[1]}/metrics'
+        with urllib.request.urlopen(url, timeout=10) as r:
+            text = r.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    assert 'processor_task_seconds_count{task="seo"} 1' in text
+    assert 'processor_task_wait_seconds_count{task="seo"} 1' in text
+    assert 'processor_tasks_total{task="seo",outcome="ok"} 1' in text
+    assert 'processor_request_seconds_count{task_type="seo"} 1' in text
+    assert 'processor_response_bytes_count{task_type="seo"} 1' in text
+    assert 'processor_queue_depth 0' in text
+    assert 'processor_workers 1' in text
+    assert 'processor_worker_rss_bytes{slot="0"}' in text
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_registry_render()
+    test_scraping_server_metrics()
+    test_processing_server_exporter()
+    print("✅ Todos los tests de métricas pasaron")
@@ -0,0 +1,101 @@
+"""
+Tests de los microbenchmarks: medición, comparación y corrida del CLI
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.micro.harness import compare_results, run_benchmark
+from benchmarks.micro.run import main
+from benchmarks.micro.suite import BENCHMARKS, select
+
+
+def test_harness():
+    """Calibración, ops/s y memoria de una función conocida"""
+    print("🧪 Test 1: Medición")
+    
+    result = run_benchmark('lista', lambda: [0] * 100_000, samples=3, min_time=0.01)
+    data = result.to_dict()
+    
+    assert result.loops >= 1 and data['samples'] == 3
+    assert data['ops_per_sec'] > 0
+    assert abs(data['ops_per_sec'] * data['median_us'] / 1e6 - 1) < 0.01
+    # 100.000 punteros de 8 bytes: ~780 KB
+    assert 700 < data['peak_kb'] < 1000, data
+    assert data['retained_kb'] > 700
+    
+    assert run_benchmark('sin memoria', lambda: None, samples=2, min_time=0.001, memory=False).peak_kb is None
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_compare_results():
+    """Solo cuentan los cambios que superan la tolerancia y el ruido"""
+    print("🧪 Test 2: Comparación con la base")
+    
+    def bench(median, stdev=0.0):
+        return {'median_us': median, 'stdev_us': stdev}
+    
+    baseline = {'a': bench(100), 'b': bench(100), 'c': bench(100), 'd': bench(100, 30), 'gone': bench(5)}
+    current = {'a': bench(105), 'b': bench(150), 'c': bench(50), 'd': bench(140, 30), 'new': bench(1)}
+    
+    status = {row['name']: row['status'] for row in compare_results(current, baseline, tolerance=0.10)}
+    assert status == {
+        'a': 'same', 'b': 'slower', 'c': 'faster',
+        # +40% pero con un desvío del 30%: es ruido
+        'd': 'same',
+        'gone': 'missing', 'new': 'new'
+    }
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_suite_and_cli():
+    """Cada benchmark arranca y el CLI guarda y compara resultados"""
+    print("🧪 Test 3: Suite y CLI")
+    
+    names = [name for name, _ in BENCHMARKS]
+    assert len(names) == len(set(names))
+    for component in ('parser', 'seo', 'tech', 'protocol', 'serialization', 'images', 'cache', 'imports'):
+        assert select([component]), component
+    
+    # Cada setup devuelve una función que corre sin errores
+    for name, setup in BENCHMARKS:
+        result = setup()()
+        if name.startswith('parser.'):
+            assert 'error' not in result and result['links'], name
+        elif not name.startswith('logging.'):
+            assert result is not None, name
+    
+    output = os.path.join(tempfile.mkdtemp(), 'micro.json')
+    argv = ['--filter', 'protocol.encode', '--samples', '2', '--min-time', '0.005']
+    assert main(argv + ['--output', output]) == 0
+    
+    with open(output) as f:
+        result = json.load(f)
+    
+    assert set(result['benchmarks']) == {name for name in names if name.startswith('protocol.encode')}
+    assert all(data['ops_per_sec'] > 0 for data in result['benchmarks'].values())
+    
+    # La base "mucho más rápida" marca regresión
+    for data in result['benchmarks'].values():
+        data['median_us'] /= 10
+        data['stdev_us'] = 0
+    with open(output, 'w') as f:
+        json.dump(result, f)
+    
+    assert main(argv + ['--no-memory', '--baseline', output]) == 1
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_harness()
+    test_compare_results()
+    test_suite_and_cli()
+    print("✅ Todos los tests de microbenchmarks pasaron")
@@ -0,0 +1,180 @@
+"""
+Tests del modo pre-fork: métricas agregadas, /health de todos los workers y reinicio escalonado
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load.fixtures import Fixtures
+from benchmarks.load.run import wait_ready
+from common.metrics import MetricsRegistry, merge_snapshots
+from common.prefork import aggregate_metrics, retire_worker_metrics, save_worker_metrics, worker_metrics_file
+from helpers import free_port
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def get_json(url: str) -> dict:
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_merge_snapshots():
+    """Contadores e histogramas se suman; los gauges quedan por worker"""
+    print("🧪 Test 1: Métricas de varios procesos")
+    
+    snapshots = []
+    for worker in range(2):
+        registry = MetricsRegistry()
+        registry.counter('requests_total', 'Requests', ('route',)).inc(worker + 1, route='/scrape')
+        registry.histogram('latency_seconds', 'Latencia').observe(0.02)
+        registry.gauge('in_flight', 'En vuelo').set(worker)
+        registry.gauge_callback('healthy', 'Sano', lambda: {('b1',): 1}, ('node',))
+        # Ida y vuelta por JSON como entre workers
+        snapshots.append((str(worker), json.loads(json.dumps(registry.snapshot()))))
+    
+    text = merge_snapshots(snapshots).render().decode()
+    
+    assert 'requests_total{route="/scrape"} 3' in text
+    assert 'latency_seconds_bucket{le="0.025"} 2' in text
+    assert 'latency_seconds_count 2' in text
+    assert 'in_flight{worker="0"} 0' in text and 'in_flight{worker="1"} 1' in text
+    assert 'healthy{node="b1",worker="1"} 1' in text
+    assert text.count('# TYPE requests_total counter') == 1
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_retired_worker_metrics():
+    """Los contadores de un worker que terminó se siguen sumando; sus gauges no"""
+    print("🧪 Test 2: Métricas de workers retirados")
+    
+    run_dir = tempfile.mkdtemp()
+    
+    def answer(slot, pid, requests, in_flight):
+        registry = MetricsRegistry()
+        registry.counter('requests_total', 'Requests').inc(requests)
+        registry.gauge('in_flight', 'En vuelo').set(in_flight)
+        return {'worker': str(slot), 'pid': pid, 'metrics': json.loads(json.dumps(registry.snapshot()))}
+    
+    old = answer(0, 100, 5, 2)
+    
+    # El worker deja su snapshot (solo contadores) cada vez que responde
+    save_worker_metrics(run_dir, 0, old['metrics'], pid=100)
+    with open(worker_metrics_file(run_dir, 0, 100)) as f:
+        assert [data['name'] for data in json.load(f)] == ['requests_total']
+    
+    # Reemplazo en curso: viejo y nuevo del mismo slot no se pisan
+    new = answer(0, 200, 1, 0)
+    text = aggregate_metrics(run_dir, [old, new]).render().decode()
+    assert 'requests_total 6' in text
+    assert 'in_flight{worker="0",pid="100"} 2' in text and 'in_flight{worker="0",pid="200"} 0' in text
+    
+    # El viejo ya no responde y el supervisor todavía no lo retiró: su archivo
+    text = aggregate_metrics(run_dir, [new]).render().decode()
+    assert 'requests_total 6' in text and 'pid="100"' not in text
+    
+    # Retirado: queda en el total aunque siga llegando una respuesta vieja
+    retire_worker_metrics(run_dir, 0, 100)
+    assert not os.path.exists(worker_metrics_file(run_dir, 0, 100))
+    assert 'requests_total 6' in aggregate_metrics(run_dir, [new]).render().decode()
+    assert 'requests_total 6' in aggregate_metrics(run_dir, [old, new]).render().decode()
+    
+    # Un segundo reemplazo se acumula
+    newer = answer(0, 300, 4, 0)
+    save_worker_metrics(run_dir, 0, new['metrics'], pid=200)
+    retire_worker_metrics(run_dir, 0, 200)
+    assert 'requests_total 10' in aggregate_metrics(run_dir, [newer]).render().decode()
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_prefork_server():
+    """Dos workers en el mismo puerto, estado agregado y SIGHUP sin cerrar el puerto"""
+    print("🧪 Test 3: Servidor A con --workers 2")
+    
+    fixtures = Fixtures({'processing_latency': 0.05, 'processing_jitter': 0, 'slow_delay': 0})
+    info = fixtures.start()
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    
+    process = subprocess.Popen(
+        [
+            sys.executable, str(PROJECT_ROOT / 'server_scraping.py'),
+            '--ip', '127.0.0.1', '--port', str(port), '--workers', '2',
+            '--processing-port', str(info['processing_port']),
+            '--redis-port', str(info['redis_port']),
+            '--max-requests', '100000', '--shutdown-timeout', '5'
+        ],
+        cwd=str(PROJECT_ROOT),
+        stdout=open(os.path.join(tempfile.mkdtemp(), 'server.log'), 'w'),
+        stderr=subprocess.STDOUT
+    )
+    
+    try:
+        wait_ready(f'{base}/health', process, timeout=60)
+        
+        # Los dos workers ya registraron su socket de control
+        for _ in range(50):
+            health = get_json(f'{base}/health')
+            if len(health['workers']) == 2:
+                break
+            time.sleep(0.2)
+        
+        assert health['status'] == 'healthy'
+        pids = {state['pid'] for state in health['workers']}
+        assert len(pids) == 2 and process.pid not in pids
+        assert {state['worker'] for state in health['workers']} == {0, 1}
+        
+        page = f"http://127.0.0.1:{info['origin_port']}/pages/small"
+        for i in range(10):
+            get_json(f'{base}/scrape?url={page}?v={i}')
+        
+        with urllib.request.urlopen(f'{base}/metrics', timeout=10) as response:
+            metrics = response.read().decode()
+        assert 'scraper_http_requests_total{route="/scrape",status="200"} 10' in metrics
+        for state in health['workers']:
+            assert f'scraper_http_requests_in_flight{{worker="{state["worker"]}",pid="{state["pid"]}"}}' in metrics
+        
+        # Reinicio escalonado: PIDs nuevos, el puerto siguió atendiendo
+        process.send_signal(signal.SIGHUP)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            health = get_json(f'{base}/health')
+            current = {state['pid'] for state in health['workers']}
+            if len(current) == 2 and not current & pids:
+                break
+            time.sleep(0.3)
+        
+        assert len(current) == 2 and not current & pids, (pids, current)
+        assert get_json(f'{base}/scrape?url={page}?v=after')['status'] == 'success'
+        
+        # Los contadores de los workers reemplazados siguen sumando
+        with urllib.request.urlopen(f'{base}/metrics', timeout=10) as response:
+            metrics = response.read().decode()
+        assert 'scraper_http_requests_total{route="/scrape",status="200"} 11' in metrics
+        
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+        fixtures.stop()
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_merge_snapshots()
+    test_retired_worker_metrics()
+    test_prefork_server()
+    print("✅ Todos los tests de pre-fork pasaron")
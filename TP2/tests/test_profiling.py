@@ -0,0 +1,278 @@
+"""
+Tests de perfilado: cProfile por request (?profile=1), tareas perfiladas y registro de requests lentas
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.profiling import (
+    ProfiledTask, RequestProfile, SlowRequestRecorder, current_request, replay, track_request
+)
+from common.protocol import Protocol, MessageType, TaskType
+from server_scraping import ScrapingServer
+from server_processing import ProcessingServer
+
+HTML = '<html><head><title>Perfil</title></head><body><h1>Hola</h1><a href="/a">a</a></body></html>'
+
+
+def busy_loop(n):
+    return sum(i * i for i in range(n))
+
+
+def test_profiled_task_and_request():
+    """ProfiledTask devuelve resultado y perfil; track_request deja la request actual"""
+    print("🧪 Test 1: ProfiledTask y RequestProfile")
+    
+    task = ProfiledTask(busy_loop)
+    assert task.__name__ == 'busy_loop'
+    
+    output = task(10000)
+    assert output['result'] == busy_loop(10000)
+    assert output['profile']['total_calls'] > 0
+    assert any('busy_loop' in row['function'] for row in output['profile']['functions'])
+    
+    record = RequestProfile('https://example.com', profile=True)
+    assert current_request() is None
+    
+    with track_request(record):
+        assert current_request() is record
+        busy_loop(1000)
+        record.add_timing('parse', 0.25)
+        record.add_timing('parse', 0.25)
+    
+    assert current_request() is None
+    assert record.elapsed is not None
+    
+    report = record.report()
+    assert report['stages_ms'] == {'parse': 500.0}
+    assert any('busy_loop' in row['function'] for row in report['cpu']['functions'])
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_slow_request_recorder():
+    """Una request lenta se guarda con HTML, tiempos y muestras de stack; el buffer se recorta"""
+    print("🧪 Test 2: Registro de requests lentas")
+    
+    directory = tempfile.mkdtemp()
+    recorder = SlowRequestRecorder(directory, threshold_ms=50, max_entries=2, sample_interval=0.01)
+    
+    # Rápida: no se guarda
+    with recorder.watch(RequestProfile('https://rapida.com')):
+        pass
+    
+    for i in range(3):
+        record = RequestProfile(f'https://lenta.com/{i}')
+        record.html = HTML.encode('utf-8')
+        record.encoding = 'utf-8'
+        
+        with recorder.watch(record):
+            record.add_timing('fetch', 0.2)
+            time.sleep(0.2)
+        
+        time.sleep(0.01)
+    
+    deadline = time.time() + 5
+    while recorder.recorded < 3 and time.time() < deadline:
+        time.sleep(0.05)
+    
+    assert recorder.recorded == 3
+    
+    entries = recorder.entries()
+    assert [entry['url'] for entry in entries] == ['https://lenta.com/2', 'https://lenta.com/1']
+    assert len([name for name in os.listdir(directory) if name.endswith('.html')]) == 2
+    
+    with open(os.path.join(directory, entries[0]['entry'])) as f:
+        entry = json.load(f)
+    
+    assert entry['elapsed_ms'] >= 200
+    assert entry['stages_ms'] == {'fetch': 200.0}
+    assert any('test_slow_request_recorder' in stack for stack in entry['stack_samples'])
+    
+    result = replay(os.path.join(directory, entries[0]['entry']))
+    assert result['url'] == 'https://lenta.com/2'
+    assert result['profile']['total_calls'] > 0
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_processing_server_profile():
+    """Con params 'profile' el Servidor B devuelve el cProfile de cada tarea"""
+    print("🧪 Test 3: Perfil de tareas en el Servidor B")
+    
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    try:
+        message = Protocol.create_request(
+            TaskType.SEO,
+            'https://example.com',
+            {'html_encoding': 'utf-8', 'profile': True}
+        )
+        
+        with socket.create_connection(server.server_address, timeout=30) as sock:
+            sock.sendall(Protocol.encode_message(message, {'html': HTML.encode('utf-8')}))
+            response = Protocol.decode_message(sock)
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    assert response['type'] == MessageType.RESPONSE.value
+    
+    profile = response['result']['profile']['seo']
+    assert profile['total_calls'] > 0
+    assert any('process_seo_task' in row['function'] for row in profile['functions'])
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_scraping_server_profile():
+    """?profile=1 exige X-Admin-Token y devuelve etapas y cProfile; las lentas se listan"""
+    print("🧪 Test 4: ?profile=1 y /debug/slow-requests")
+    
+    directory = tempfile.mkdtemp()
+    
+    async def origin(request):
+        await asyncio.sleep(0.1)
+        return web.Response(text=HTML, content_type='text/html')
+    
+    async def run():
+        origin_app = web.Application()
+        origin_app.router.add_get('/', origin)
+        origin_runner = web.AppRunner(origin_app)
+        await origin_runner.setup()
+        await web.TCPSite(origin_runner, '127.0.0.1', 0).start()
+        
+        server = ScrapingServer(
+            enable_cache=False,
+            enable_rate_limit=False,
+            admin_token='secreto',
+            slow_request_ms=50,
+            slow_request_dir=directory
+        )
+        server.session = aiohttp.ClientSession()
+        
+        app = web.Application(middlewares=[server._metrics_middleware, server._tracing_middleware])
+        app.router.add_get('/scrape', server.scrape_handler)
+        app.router.add_get('/debug/slow-requests', server.slow_requests_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        base = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        params = {'url': f'http://127.0.0.1:{origin_runner.addresses[0][1]}/', 'profile': '1'}
+        
+        try:
+            async with aiohttp.ClientSession() as client:
+                async with client.get(f'{base}/scrape', params=params) as r:
+                    assert r.status == 403
+                
+                async with client.get(f'{base}/scrape', params=params, headers={'X-Admin-Token': 'otro'}) as r:
+                    assert r.status == 403
+                
+                async with client.get(f'{base}/scrape', params=params, headers={'X-Admin-Token': 'secreto'}) as r:
+                    assert r.status == 200
+                    profile = (await r.json())['profile']
+                
+                deadline = time.time() + 5
+                while server.slow_requests.recorded < 1 and time.time() < deadline:
+                    await asyncio.sleep(0.05)
+                
+                async with client.get(f'{base}/debug/slow-requests') as r:
+                    assert r.status == 403
+                
+                async with client.get(f'{base}/debug/slow-requests', headers={'X-Admin-Token': 'secreto'}) as r:
+                    slow = await r.json()
+        finally:
+            await server.session.close()
+            await runner.cleanup()
+            await origin_runner.cleanup()
+        
+        return profile, slow
+    
+    profile, slow = asyncio.run(run())
+    
+    # 'serialize' corre después de armar el perfil
+    for stage in ('fetch', 'parse'):
+        assert stage in profile['stages_ms'], stage
+    assert profile['stages_ms']['fetch'] >= 100
+    assert profile['cpu']['total_calls'] > 0
+    
+    # Solo la request perfilada llegó al origen (tarda 100 ms); los 403 son inmediatos
+    assert len(slow['entries']) == 1
+    assert slow['entries'][0]['trace_id'] is not None
+    
+    entry_path = os.path.join(directory, slow['entries'][0]['entry'])
+    with open(entry_path) as f:
+        entry = json.load(f)
+    
+    assert entry['html_file'] and entry['stages_ms']['fetch'] >= 100
+    assert replay(entry_path)['profile']['total_calls'] > 0
+    
+    print("✅ Test 4 PASSED\n")
+
+
+def test_slow_request_task_samples():
+    """En el event loop se muestrea la tarea de la request, no lo que esté corriendo el loop"""
+    print("🧪 Test 5: Muestras por asyncio.Task")
+    
+    directory = tempfile.mkdtemp()
+    recorder = SlowRequestRecorder(directory, threshold_ms=20, sample_interval=0.01)
+    
+    async def wait_for_origin():
+        await asyncio.sleep(0.3)
+    
+    def parse_page():
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end:
+            busy_loop(1000)
+    
+    async def request(record):
+        with recorder.watch(record):
+            await wait_for_origin()
+            parse_page()
+    
+    async def other_request():
+        # Otra request ocupa el loop mientras la vigilada espera
+        end = time.perf_counter() + 0.3
+        while time.perf_counter() < end:
+            busy_loop(1000)
+            await asyncio.sleep(0)
+    
+    async def run():
+        record = RequestProfile('https://lenta.com/')
+        await asyncio.gather(request(record), other_request())
+        return record
+    
+    record = asyncio.run(run())
+    
+    assert record.task is not None
+    assert record.samples
+    assert not any('other_request' in stack for stack in record.samples), record.samples
+    assert 'test_profiling.py:request;test_profiling.py:wait_for_origin;tasks.py:sleep' in record.samples, record.samples
+    assert any('parse_page' in stack for stack in record.samples), record.samples
+    
+    # Todas las muestras arrancan en el coroutine de la request
+    assert all(stack.startswith('test_profiling.py:request') for stack in record.samples), record.samples
+    
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_profiled_task_and_request()
+    test_slow_request_recorder()
+    test_processing_server_profile()
+    test_scraping_server_profile()
+    test_slow_request_task_samples()
+    print("✅ Todos los tests de perfilado pasaron")
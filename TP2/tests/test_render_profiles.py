@@ -0,0 +1,80 @@
+"""
+Tests de los perfiles de render (bloqueo de recursos vía CDP)
+"""
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from processor.render_profiles import RenderProfile, resolve_render_profile
+
+
+class FakeDriver:
+    """Registra los comandos CDP enviados"""
+    
+    def __init__(self):
+        self.commands = []
+    
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((cmd, params))
+        return {}
+
+
+def test_patterns():
+    """Test: patrones bloqueados por perfil"""
+    print("\n🧪 Test 1: Patrones por perfil")
+    
+    assert RenderProfile('performance-faithful').blocked_url_patterns() == []
+    
+    fast = RenderProfile('screenshot-fast').blocked_url_patterns()
+    assert '*://*.doubleclick.net*' in fast
+    assert '*.woff2' in fast and '*.mp4?*' in fast
+    assert '*.css' not in fast
+    
+    text = RenderProfile('text-only').blocked_url_patterns()
+    assert '*.css' in text and '*.js' in text and '*.png' in text
+    
+    print(f"   screenshot-fast: {len(fast)} patrones, text-only: {len(text)} patrones")
+    print("✅ Test 1 PASSED")
+
+
+def test_apply_and_resolve():
+    """Test: aplicar al driver y resolver desde params"""
+    print("\n🧪 Test 2: Aplicar y resolver perfiles")
+    
+    driver = FakeDriver()
+    RenderProfile('performance-faithful').apply_to_driver(driver)
+    assert driver.commands == []
+    
+    RenderProfile('screenshot-fast', extra_blocked_domains=['ads.example']).apply_to_driver(driver)
+    assert driver.commands[-1][0] == 'Network.setBlockedURLs'
+    assert '*://ads.example*' in driver.commands[-1][1]['urls']
+    
+    assert resolve_render_profile({}, 'screenshot').name == 'screenshot-fast'
+    assert resolve_render_profile({}, 'performance').name == 'performance-faithful'
+    assert resolve_render_profile({'render_profile': 'text-only'}, 'performance').name == 'text-only'
+    
+    params = {'render_profile': 'text-only', 'render_profiles': {'screenshot': 'performance-faithful'}}
+    assert resolve_render_profile(params, 'screenshot').name == 'performance-faithful'
+    
+    try:
+        RenderProfile('inexistente')
+        assert False, "Debería fallar con un perfil desconocido"
+    except ValueError:
+        pass
+    
+    print("✅ Test 2 PASSED")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🧪 TESTS DE PERFILES DE RENDER")
+    print("=" * 60)
+    
+    test_patterns()
+    test_apply_and_resolve()
+    
+    print("\n" + "=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
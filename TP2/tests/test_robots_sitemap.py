@@ -0,0 +1,205 @@
+"""
+Tests de robots.txt (matcher compilado) y del parser de sitemaps en streaming
+"""
+import asyncio
+import gzip
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scraper.robots import RobotsCache, RobotsPolicy, UNREACHABLE_TTL, agent_matches, parse_robots
+from scraper.sitemap import SitemapStreamParser
+from helpers import free_port
+
+
+ROBOTS = """
+User-agent: Googlebot
+Disallow: /
+
+User-agent: *
+Disallow: /admin
+Disallow: /*.json$
+Allow: /admin/public
+Crawl-delay: 2.5
+
+Sitemap: https://example.com/sitemap_index.xml
+"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml.gz</loc></sitemap>
+  <sitemap><loc>https://example.com/sitemap-2.xml.gz</loc></sitemap>
+</sitemapindex>"""
+
+
+def _urlset(count):
+    entries = ''.join(
+        f'<url><loc>https://example.com/p/{i}</loc><lastmod>2024-01-01</lastmod></url>'
+        for i in range(count)
+    )
+    return (
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + entries + '</urlset>'
+    ).encode()
+
+
+def test_robots_policy():
+    """Test: grupo '*', longest match, comodines y Crawl-delay"""
+    print("\n🧪 Test 1: robots.txt")
+    
+    policy = parse_robots(ROBOTS)
+    
+    assert policy.crawl_delay == 2.5
+    assert policy.sitemaps == ['https://example.com/sitemap_index.xml']
+    assert policy.can_fetch('https://example.com/')
+    assert not policy.can_fetch('https://example.com/admin/users')
+    assert policy.can_fetch('https://example.com/admin/public/logo.png')
+    assert not policy.can_fetch('https://example.com/api/data.json')
+    assert policy.can_fetch('https://example.com/api/data.json?x=1')
+    
+    # Roundtrip (formato guardado en Redis)
+    restored = RobotsPolicy.from_dict(policy.to_dict())
+    assert not restored.can_fetch('https://example.com/admin')
+    
+    assert not RobotsPolicy.disallow_all().can_fetch('https://example.com/x')
+    assert not parse_robots(ROBOTS, user_agent='googlebot').can_fetch('https://example.com/')
+    
+    print("✅ Test 1 PASSED")
+
+
+class MemoryBlobs:
+    """Blobs en memoria con la interfaz de RedisCache que usa RobotsCache"""
+    
+    def __init__(self):
+        self.blobs = {}
+    
+    def get_blob(self, name):
+        return self.blobs.get(name)
+    
+    def set_blob(self, name, data, ttl=None):
+        self.blobs[name] = data
+        return True
+
+
+def test_robots_user_agent_groups():
+    """Test: el grupo se elige por token de producto, no por substring"""
+    print("\n🧪 Test 2: Grupos por user-agent")
+    
+    assert agent_matches('tp2-scraper', 'tp2-scraper')
+    assert agent_matches('TP2-Scraper/1.0', 'tp2-scraper')
+    assert agent_matches('tp2', 'tp2-scraper')
+    assert not agent_matches('bot', 'tp2-scraper')
+    assert not agent_matches('scraper', 'tp2-scraper')
+    assert not agent_matches('', 'tp2-scraper')
+    assert not agent_matches('tp2-scraper-news', 'tp2-scraper')
+    
+    robots = """
+User-agent: bot
+Disallow: /
+
+User-agent:
+Disallow: /
+
+User-agent: tp2
+Disallow: /privado
+
+User-agent: tp2-scraper
+Disallow: /borradores
+
+User-agent: *
+Disallow: /admin
+"""
+    policy = parse_robots(robots)
+    
+    # El grupo más específico ('tp2-scraper') gana; los genéricos no aplican
+    assert policy.can_fetch('https://example.com/')
+    assert policy.can_fetch('https://example.com/privado')
+    assert not policy.can_fetch('https://example.com/borradores/1')
+    
+    # Sin grupo específico, 'bot' no nos bloquea: queda '*'
+    policy = parse_robots("User-agent: bot\nDisallow: /\n\nUser-agent: *\nDisallow: /admin\n")
+    assert policy.can_fetch('https://example.com/') and not policy.can_fetch('https://example.com/admin')
+    
+    print("✅ Test 2 PASSED")
+
+
+def test_robots_cache_ttl():
+    """Test: otro proceso recuerda la política de Redis solo lo que le queda"""
+    print("\n🧪 Test 3: TTL de la política compartida")
+    
+    origin = f'http://127.0.0.1:{free_port()}'
+    blobs = MemoryBlobs()
+    
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            # Sin respuesta: disallow temporal (UNREACHABLE_TTL)
+            first = RobotsCache(session, cache=blobs)
+            policy = await first.get_policy(origin + '/pagina')
+            assert not policy.can_fetch(origin + '/pagina')
+            assert first._memory[origin][1] - time.time() <= UNREACHABLE_TTL
+            
+            # Otro worker lo lee de Redis: no lo guarda por el TTL de 24h
+            second = RobotsCache(session, cache=blobs)
+            await second.get_policy(origin + '/')
+            remaining = second._memory[origin][1] - time.time()
+            assert 0 < remaining <= UNREACHABLE_TTL, remaining
+            
+            # Vencida (o en el formato viejo, sin vencimiento): se descarga de nuevo
+            blobs.blobs[f'robots:{origin}'] = b'{"rules": [], "status": 200}'
+            third = RobotsCache(session, cache=blobs)
+            assert not (await third.get_policy(origin + '/')).can_fetch(origin + '/x')
+    
+    asyncio.run(run())
+    
+    print("✅ Test 3 PASSED")
+
+
+def test_sitemap_stream():
+    """Test: índice + urlset gzip en chunks chicos"""
+    print("\n🧪 Test 4: Sitemaps en streaming")
+    
+    index = SitemapStreamParser()
+    index.feed(SITEMAP_INDEX)
+    index.close()
+    
+    assert index.sitemaps == [
+        'https://example.com/sitemap-1.xml.gz',
+        'https://example.com/sitemap-2.xml.gz'
+    ]
+    
+    data = gzip.compress(_urlset(2000))
+    parser = SitemapStreamParser()
+    urls = []
+    
+    for i in range(0, len(data), 1024):
+        parser.feed(data[i:i + 1024])
+        urls.extend(parser.take_urls())
+    
+    parser.close()
+    urls.extend(parser.take_urls())
+    
+    assert len(urls) == 2000
+    assert urls[0] == {'loc': 'https://example.com/p/0', 'lastmod': '2024-01-01'}
+    assert len(parser._root) == 0
+    
+    print(f"   {len(urls)} URLs desde {len(data)} bytes gzip")
+    print("✅ Test 4 PASSED")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🧪 TESTS DE ROBOTS.TXT Y SITEMAPS")
+    print("=" * 60)
+    
+    test_robots_policy()
+    test_robots_user_agent_groups()
+    test_robots_cache_ttl()
+    test_sitemap_stream()
+    
+    print("\n" + "=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
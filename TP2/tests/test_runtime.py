@@ -0,0 +1,103 @@
+"""
+Tests del modo performance: logging asíncrono, uvloop opcional y ajustes del servidor HTTP
+"""
+import asyncio
+import io
+import logging
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common import runtime
+from server_scraping import parse_arguments
+
+
+class Mutable:
+    """Objeto cuyo str() cambia: muestra en qué momento se formatea el mensaje"""
+    
+    def __init__(self):
+        self.value = 'antes'
+    
+    def __str__(self):
+        return self.value
+
+
+def test_async_logging():
+    """Los handlers pasan a un thread y el mensaje se arma allá"""
+    print("🧪 Test 1: Logging asíncrono")
+    
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    stream = io.StringIO()
+    
+    root.handlers = [logging.StreamHandler(stream)]
+    listener = runtime.setup_async_logging(logging.INFO)
+    
+    try:
+        assert len(root.handlers) == 1
+        assert isinstance(root.handlers[0], runtime.DeferredQueueHandler)
+        
+        # Con el listener frenado el record queda en la cola sin formatear
+        listener.stop()
+        value = Mutable()
+        logging.getLogger('test.runtime').info("valor: %s", value)
+        logging.getLogger('test.runtime').debug("no pasa el nivel: %s", value)
+        value.value = 'después'
+        
+        listener.start()
+        listener.stop()
+        assert stream.getvalue() == 'valor: después\n', stream.getvalue()
+    finally:
+        root.handlers, root.level = saved_handlers, saved_level
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_event_loop():
+    """run() usa uvloop solo si está instalado"""
+    print("🧪 Test 2: Event loop")
+    
+    async def loop_module():
+        return type(asyncio.get_event_loop()).__module__
+    
+    try:
+        module = runtime.run(loop_module(), use_uvloop=True)
+    finally:
+        asyncio.set_event_loop_policy(None)
+    
+    if runtime.UVLOOP_AVAILABLE:
+        assert module.startswith('uvloop') and runtime.loop_name(True) == 'uvloop'
+    else:
+        assert module.startswith('asyncio') and runtime.loop_name(True) == 'asyncio'
+    
+    assert runtime.run(loop_module()).startswith('asyncio')
+    assert runtime.loop_name(False) == 'asyncio'
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_performance_mode_arguments():
+    """--performance-mode cambia los defaults pero respeta lo explícito"""
+    print("🧪 Test 3: Argumentos del modo performance")
+    
+    standard = parse_arguments([])
+    assert (standard.uvloop, standard.async_logging, standard.log_level, standard.backlog) == (False, False, 'INFO', 128)
+    assert standard.keepalive_timeout == 75.0 and not standard.no_access_log
+    
+    performance = parse_arguments(['--performance-mode'])
+    assert (performance.uvloop, performance.async_logging, performance.log_level) == (True, True, 'WARNING')
+    assert performance.backlog == 2048
+    
+    tuned = parse_arguments(['--performance-mode', '--log-level', 'INFO', '--backlog', '512', '--keepalive-timeout', '5'])
+    assert tuned.log_level == 'INFO' and tuned.backlog == 512 and tuned.keepalive_timeout == 5
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_async_logging()
+    test_event_loop()
+    test_performance_mode_arguments()
+    print("✅ Todos los tests del modo performance pasaron")
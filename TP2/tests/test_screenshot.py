@@ -0,0 +1,165 @@
+"""
+Tests del generador de screenshots (tiles, thumbnail con clip.scale y tamaños base64) con un driver falso
+"""
+import base64
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from processor.screenshot import ScreenshotGenerator
+
+
+class FakeDriver:
+    """Responde los comandos CDP que usa ScreenshotGenerator"""
+    
+    def __init__(self, width: int = 1280, viewport_height: int = 720, content_height: int = 720):
+        self.width = width
+        self.viewport_height = viewport_height
+        self.content_height = content_height
+        self.captures = []
+        self.quit_called = False
+    
+    def execute_cdp_cmd(self, cmd: str, params: dict) -> dict:
+        if cmd == 'Page.getLayoutMetrics':
+            return {
+                'cssLayoutViewport': {'clientWidth': self.width, 'clientHeight': self.viewport_height},
+                'cssContentSize': {'width': self.width, 'height': self.content_height}
+            }
+        
+        if cmd == 'Page.captureScreenshot':
+            self.captures.append(params)
+            clip = params['clip']
+            # Un byte por fila capturada: el tamaño delata qué región se pidió
+            size = int(round(clip['height'] * clip['scale']))
+            return {'data': base64.b64encode(b'\x89' * size).decode('ascii')}
+        
+        raise AssertionError(f"Comando CDP inesperado: {cmd}")
+    
+    def quit(self):
+        self.quit_called = True
+
+
+def generator_with(driver: FakeDriver, **kwargs) -> ScreenshotGenerator:
+    """Generador que usa el driver falso en lugar de abrir Chrome"""
+    generator = ScreenshotGenerator(**kwargs)
+    generator._create_driver = lambda: driver
+    generator._load = lambda driver, url, wait_time: 0.5
+    return generator
+
+
+def test_b64_size():
+    """El tamaño decodificado sale del largo y el padding, sin decodificar"""
+    print("🧪 Test 1: Tamaño de payloads base64")
+    
+    for n in range(0, 10):
+        data = base64.b64encode(b'a' * n).decode('ascii')
+        assert ScreenshotGenerator._b64_size(data) == n, (n, data)
+    
+    # Con uno y dos caracteres de padding
+    assert ScreenshotGenerator._b64_size('YQ==') == 1
+    assert ScreenshotGenerator._b64_size('YWI=') == 2
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_tile_planning():
+    """Tiles de tile_height px, el último parcial, y a lo sumo max_tiles"""
+    print("🧪 Test 2: Planificación de tiles")
+    
+    generator = ScreenshotGenerator(tile_height=1000, max_tiles=3)
+    
+    # 2500 px: dos tiles completos y uno de 500
+    driver = FakeDriver(content_height=2500)
+    tiles = generator._capture_tiles(driver, generator._page_size(driver), 'png', None)
+    
+    assert [tile['y'] for tile in tiles] == [0, 1000, 2000]
+    assert [capture['clip']['height'] for capture in driver.captures] == [1000, 1000, 500]
+    assert all(capture['clip']['width'] == 1280 and capture['clip']['y'] == tile['y']
+               for capture, tile in zip(driver.captures, tiles))
+    assert [tile['size_bytes'] for tile in tiles] == [1000, 1000, 500]
+    assert tiles[-1]['dimensions'] == {'width': 1280, 'height': 500}
+    
+    # Alto exacto: sin tile vacío al final
+    driver = FakeDriver(content_height=2000)
+    tiles = generator._capture_tiles(driver, generator._page_size(driver), 'png', None)
+    assert [tile['y'] for tile in tiles] == [0, 1000]
+    
+    # Más alto que max_tiles * tile_height: se corta
+    driver = FakeDriver(content_height=9000)
+    tiles = generator._capture_tiles(driver, generator._page_size(driver), 'png', None)
+    assert len(tiles) == 3 and tiles[-1]['dimensions']['height'] == 1000
+    
+    # Documento más corto que el viewport: un tile del alto del viewport
+    driver = FakeDriver(content_height=300)
+    tiles = generator._capture_tiles(driver, generator._page_size(driver), 'png', None)
+    assert len(tiles) == 1 and tiles[0]['dimensions']['height'] == 720
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_thumbnail_scale():
+    """clip.scale = ancho del thumbnail / ancho del viewport, nunca mayor a 1"""
+    print("🧪 Test 3: Thumbnail con clip.scale")
+    
+    generator = ScreenshotGenerator()
+    viewport_clip = {'x': 0, 'y': 0, 'width': 1280, 'height': 720, 'scale': 1}
+    
+    driver = FakeDriver()
+    thumb = generator._capture_thumbnail(driver, viewport_clip, 320, 'jpeg', 70)
+    
+    clip = driver.captures[0]['clip']
+    assert clip['scale'] == 0.25 and clip['width'] == 1280 and clip['height'] == 720
+    assert viewport_clip['scale'] == 1
+    assert thumb['dimensions'] == {'width': 320, 'height': 180}
+    assert thumb['size_bytes'] == 180
+    assert driver.captures[0]['quality'] == 70 and driver.captures[0]['format'] == 'jpeg'
+    
+    # Más ancho que el viewport: no se agranda
+    driver = FakeDriver()
+    thumb = generator._capture_thumbnail(driver, viewport_clip, 4000, 'png', 70)
+    assert driver.captures[0]['clip']['scale'] == 1.0
+    assert thumb['dimensions'] == {'width': 1280, 'height': 720}
+    # png no lleva quality
+    assert 'quality' not in driver.captures[0]
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_capture_full_page_with_thumbnail():
+    """capture() arma tiles, thumbnail y metadatos en una sola carga y cierra el driver"""
+    print("🧪 Test 4: capture() completo")
+    
+    driver = FakeDriver(width=1000, viewport_height=800, content_height=5000)
+    generator = generator_with(driver, tile_height=2000, max_tiles=2)
+    
+    result = generator.capture('https://example.com/', fmt='webp', quality=80, full_page=True, thumbnail_width=250)
+    
+    assert driver.quit_called
+    assert result['format'] == 'webp' and result['load_time_seconds'] == 0.5
+    assert result['page_height'] == 5000 and result['truncated'] is True
+    assert [tile['y'] for tile in result['tiles']] == [0, 2000]
+    assert result['screenshot_base64'] == result['tiles'][0]['screenshot_base64']
+    assert result['thumbnail']['dimensions'] == {'width': 250, 'height': 200}
+    assert all(capture['captureBeyondViewport'] for capture in driver.captures)
+    assert len(driver.captures) == 3
+    
+    # Formato no soportado: error antes de abrir el navegador
+    driver = FakeDriver()
+    try:
+        generator_with(driver).capture('https://example.com/', fmt='gif')
+        assert False
+    except ValueError:
+        pass
+    assert driver.captures == [] and not driver.quit_called
+    
+    print("✅ Test 4 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_b64_size()
+    test_tile_planning()
+    test_thumbnail_scale()
+    test_capture_full_page_with_thumbnail()
+    print("✅ Todos los tests de screenshots pasaron")
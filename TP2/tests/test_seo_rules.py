@@ -0,0 +1,95 @@
+"""
+Tests del motor de reglas SEO (recorrido único, pesos y reglas por request)
+"""
+import sys
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from processor.seo_analyzer import SEOAnalyzer
+from processor.seo_rules import SEORule
+
+
+HTML = """
+<html><head>
+<title>Página de prueba</title>
+<meta name="description" content="corta">
+<meta property="og:title" content="Prueba">
+<link rel="canonical" href="https://example.com/">
+</head><body>
+<h1>Uno</h1><h1>Dos</h1><h3>Tres</h3>
+<img src="a.png"><img src="b.png" alt="b">
+<a href="/interno">i</a><a href="https://otro.com">e</a><a href="#top">t</a>
+</body></html>
+"""
+
+
+def test_default_rules():
+    """Test: resultado de las reglas por defecto"""
+    print("\n🧪 Test 1: Reglas por defecto")
+    
+    result = SEOAnalyzer().analyze(HTML, 'https://example.com/')
+    
+    assert result['title']['length'] == len('Página de prueba')
+    assert result['headers']['hierarchy']['h1'] == 2
+    assert result['headers']['hierarchy']['h3'] == 1
+    assert result['images']['images_without_alt'] == 1
+    assert result['links']['internal_links'] == 1
+    assert result['links']['external_links'] == 1
+    assert result['open_graph']['missing_required'] == ['description', 'image', 'url']
+    assert result['canonical']['exists'] is True
+    
+    # title corto (10) + description corta (5) + 2 H1 (10) + 1 sin alt (2)
+    assert result['score'] == 73
+    assert set(result['rules']) >= {'title', 'headers', 'links'}
+    
+    print(f"   Score: {result['score']} ({result['grade']})")
+    print("✅ Test 1 PASSED")
+
+
+def test_weights_and_selection():
+    """Test: pesos, reglas deshabilitadas y reglas propias"""
+    print("\n🧪 Test 2: Pesos y selección de reglas")
+    
+    class NoIframesRule(SEORule):
+        name = 'iframes'
+        tags = ('iframe',)
+        
+        def finalize(self, state, report, context):
+            if state['elements']:
+                report.penalize(5)
+            return {'count': len(state['elements'])}
+    
+    analyzer = SEOAnalyzer()
+    analyzer.register_rule(NoIframesRule())
+    
+    result = analyzer.analyze(
+        HTML + '<iframe></iframe>',
+        'https://example.com/',
+        disabled=['title'],
+        weights={'headers': 2}
+    )
+    
+    assert 'title' not in result
+    assert result['iframes'] == {'count': 1}
+    assert result['rules']['headers']['penalty'] == 20
+    
+    only = analyzer.analyze(HTML, 'https://example.com/', enabled=['images'])
+    assert list(only['rules']) == ['images']
+    assert only['score'] == 98
+    
+    print("✅ Test 2 PASSED")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🧪 TESTS DEL MOTOR DE REGLAS SEO")
+    print("=" * 60)
+    
+    test_default_rules()
+    test_weights_and_selection()
+    
+    print("\n" + "=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
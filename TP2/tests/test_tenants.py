@@ -0,0 +1,271 @@
+"""
+Tests de tenants: API keys, cuotas en Redis y weighted fair queuing del Servidor B
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.protocol import Protocol, MessageType, TaskType
+from common.tenants import TenantQuotas, API_KEY_HEADER
+from helpers import start_fake_redis
+from processor.worker_pool import FairQueue, WorkerPool
+from server_processing import ProcessingServer
+from server_scraping import ScrapingServer
+
+
+def sleep_task(seconds):
+    time.sleep(seconds)
+    return time.time()
+
+
+def write_tenants(tenants: dict) -> str:
+    path = os.path.join(tempfile.mkdtemp(), 'tenants.json')
+    with open(path, 'w') as f:
+        json.dump({'tenants': tenants}, f)
+    return path
+
+
+def test_fair_queue():
+    """Un tenant nuevo no espera detrás del lote de otro y los pesos reparten"""
+    print("🧪 Test 1: Weighted fair queuing")
+    
+    fair = FairQueue()
+    for i in range(100):
+        fair.put(('batch', i), 'batch')
+    for i in range(3):
+        fair.put(('interactive', i), 'interactive')
+    
+    order = [fair.get() for _ in range(10)]
+    assert [item for item in order if item[0] == 'interactive'] == [('interactive', i) for i in range(3)]
+    assert order.index(('interactive', 2)) < 7
+    assert fair.depths() == {'batch': 93} and fair.qsize() == 93
+    
+    # Con los dos ocupados, el doble de peso recibe el doble de lugares
+    weighted = FairQueue()
+    for i in range(60):
+        weighted.put('a', 'a', weight=2)
+        weighted.put('b', 'b', weight=1)
+    
+    first = [weighted.get() for _ in range(30)]
+    assert first.count('a') == 20 and first.count('b') == 10, first
+    
+    # Cerrada: entrega lo que queda y después None
+    weighted.close()
+    assert len([weighted.get() for _ in range(90)]) == 90
+    assert weighted.get() is None
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_tenant_quotas():
+    """API keys y cuotas de requests por minuto y de concurrencia en Redis"""
+    print("🧪 Test 2: Cuotas de tenants")
+    
+    port = start_fake_redis().port
+    path = write_tenants({
+        'equipo-a': {'api_keys': ['key-a'], 'weight': 2, 'requests_per_minute': 3},
+        'equipo-b': {'api_keys': ['key-b1', 'key-b2'], 'max_concurrent': 2}
+    })
+    
+    quotas = TenantQuotas(redis_port=port)
+    assert quotas.load_file(path) == 2
+    
+    a = quotas.identify('key-a')
+    assert a.name == 'equipo-a' and a.weight == 2.0
+    assert quotas.identify('key-b2').name == 'equipo-b'
+    assert quotas.identify('otra') is None and quotas.identify(None) is None
+    assert [tenant.name for tenant in quotas.tenants()] == ['equipo-a', 'equipo-b']
+    
+    # La key no se guarda en Redis
+    assert 'key-a' not in json.dumps(quotas.redis_client.hgetall('tenants:keys'))
+    
+    # Requests por minuto
+    leases = [quotas.acquire(a)[0] for _ in range(3)]
+    assert all(leases)
+    lease, info = quotas.acquire(a)
+    assert lease is None and info['reason'] == 'rate' and 0 < info['retry_after'] <= 60
+    assert quotas.usage(a)['requests_in_window'] == 3
+    
+    # Concurrencia: se libera al terminar
+    b = quotas.identify('key-b1')
+    first, second = quotas.acquire(b)[0], quotas.acquire(b)[0]
+    assert first and second and first != second
+    lease, info = quotas.acquire(b)
+    assert lease is None and info['reason'] == 'concurrency' and info['in_flight'] == 2
+    
+    quotas.release(b, first)
+    assert quotas.usage(b)['in_flight'] == 1
+    assert quotas.acquire(b)[0] is not None
+    
+    # Otro proceso (otro worker del Servidor A) ve las mismas cuotas
+    other = TenantQuotas(redis_port=port)
+    assert other.acquire(other.identify('key-b2'))[0] is None
+    
+    # Un lease que nunca se libera vence
+    quotas.reset(b)
+    short = TenantQuotas(redis_port=port, lease_seconds=0.2)
+    short.acquire(b)
+    short.acquire(b)
+    assert short.acquire(b)[0] is None
+    time.sleep(0.3)
+    assert short.acquire(b)[0] is not None
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_scrape_with_tenants():
+    """/scrape pide API key, devuelve 429 al agotar la cuota y cuenta por tenant"""
+    print("🧪 Test 3: /scrape con tenants")
+    
+    redis_port = start_fake_redis().port
+    path = write_tenants({
+        'equipo-a': {'api_keys': ['key-a'], 'requests_per_minute': 2},
+        'equipo-b': {'api_keys': ['key-b']}
+    })
+    
+    async def origin(request):
+        return web.Response(text='<html><head><title>Tenants</title></head></html>', content_type='text/html')
+    
+    async def run():
+        origin_app = web.Application()
+        origin_app.router.add_get('/', origin)
+        origin_runner = web.AppRunner(origin_app)
+        await origin_runner.setup()
+        await web.TCPSite(origin_runner, '127.0.0.1', 0).start()
+        url = f'http://127.0.0.1:{origin_runner.addresses[0][1]}/'
+        
+        server = ScrapingServer(
+            redis_port=redis_port,
+            enable_rate_limit=False,
+            enable_cache=False,
+            tenants_file=path,
+            admin_token='secreto'
+        )
+        await server._init_tenants()
+        server.session = aiohttp.ClientSession()
+        
+        app = web.Application(middlewares=[server._tenant_middleware])
+        app.router.add_get('/scrape', server.scrape_handler)
+        app.router.add_get('/tenants/usage', server.tenant_usage_handler)
+        app.router.add_get('/health', server.health_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        base = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        
+        try:
+            async with aiohttp.ClientSession() as client:
+                async with client.get(f'{base}/scrape', params={'url': url}) as r:
+                    assert r.status == 401
+                async with client.get(f'{base}/scrape', params={'url': url}, headers={API_KEY_HEADER: 'mala'}) as r:
+                    assert r.status == 401
+                
+                # Las rutas fuera de TENANT_ROUTES no piden key
+                async with client.get(f'{base}/health') as r:
+                    assert r.status == 200 and (await r.json())['services']['tenants'] == 'enabled'
+                
+                for remaining in ('1', '0'):
+                    async with client.get(f'{base}/scrape', params={'url': url}, headers={API_KEY_HEADER: 'key-a'}) as r:
+                        assert r.status == 200
+                        assert r.headers['X-Tenant'] == 'equipo-a'
+                        assert r.headers['X-Tenant-Remaining'] == remaining
+                
+                async with client.get(f'{base}/scrape', params={'url': url}, headers={API_KEY_HEADER: 'key-a'}) as r:
+                    assert r.status == 429
+                    assert int(r.headers['Retry-After']) >= 1
+                    assert (await r.json())['quota']['reason'] == 'rate'
+                
+                # El otro tenant no se ve afectado
+                async with client.get(f'{base}/scrape', params={'url': url}, headers={API_KEY_HEADER: 'key-b'}) as r:
+                    assert r.status == 200 and 'X-Tenant-Remaining' not in r.headers
+                
+                async with client.get(f'{base}/tenants/usage', headers={API_KEY_HEADER: 'key-a'}) as r:
+                    usage = (await r.json())['tenants']
+                    assert [(t['name'], t['requests_in_window'], t['in_flight']) for t in usage] == [('equipo-a', 2, 0)]
+                
+                async with client.get(f'{base}/tenants/usage', headers={'X-Admin-Token': 'secreto'}) as r:
+                    assert [t['name'] for t in (await r.json())['tenants']] == ['equipo-a', 'equipo-b']
+            
+            assert server.tenant_requests.value(tenant='equipo-a', status='200') == 2
+            assert server.tenant_rejections.value(tenant='equipo-a', reason='rate') == 1
+            assert server.tenant_rejections.value(tenant='unknown', reason='unauthorized') == 2
+            assert server.tenant_in_flight.value(tenant='equipo-a') == 0
+            assert b'scraper_tenant_request_seconds_count{tenant="equipo-b"} 1' in server.metrics.render()
+        finally:
+            await server.session.close()
+            await runner.cleanup()
+            await origin_runner.cleanup()
+    
+    asyncio.run(run())
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_processing_fair_share():
+    """B: las tareas de un tenant chico pasan antes que el lote de otro"""
+    print("🧪 Test 4: Reparto del pool entre tenants")
+    
+    done = []
+    pool = WorkerPool(processes=1, on_task_done=lambda *args: done.append(args[5]))
+    
+    try:
+        batch = [pool.apply_async(sleep_task, (0.05,), tenant='batch') for _ in range(20)]
+        interactive = [pool.apply_async(sleep_task, (0.05,), tenant='interactive', weight=1) for _ in range(2)]
+        assert pool.queue_depths().get('batch', 0) >= 19
+        
+        last_interactive = max(future.result(timeout=30) for future in interactive)
+        finished_before = sum(1 for future in batch if future.done() and future.result() < last_interactive)
+        assert finished_before <= 4, finished_before
+        
+        for future in batch:
+            future.result(timeout=30)
+        assert done.count('batch') == 20 and done.count('interactive') == 2
+    finally:
+        pool.terminate()
+    
+    # El tenant y el peso viajan en el mensaje y llegan a las métricas de B
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    try:
+        with socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=30) as sock:
+            sock.sendall(Protocol.encode_message(Protocol.create_request(
+                TaskType.SEO, 'https://example.com/', {'html_content': '<html><title>B</title></html>'},
+                tenant='equipo-a', weight=2
+            )))
+            response = Protocol.decode_message(sock)
+        
+        assert response['type'] == MessageType.RESPONSE.value, response
+        assert server.tenant_tasks.value(tenant='equipo-a', outcome='ok') == 1
+        assert b'processor_tenant_worker_seconds_total{tenant="equipo-a"}' in server.metrics.render()
+        
+        try:
+            Protocol.validate_message(Protocol.create_request(TaskType.SEO, 'https://example.com/', weight=0))
+            assert False
+        except ValueError:
+            pass
+    finally:
+        server.shutdown(timeout=5)
+        server.server_close()
+    
+    print("✅ Test 4 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_fair_queue()
+    test_tenant_quotas()
+    test_scrape_with_tenants()
+    test_processing_fair_share()
+    print("✅ Todos los tests de tenants pasaron")
@@ -0,0 +1,256 @@
+"""
+Tests de trazas: traceparent, muestreo, exportadores y propagación entre servidores
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.tracing import Tracer, SpanContext, FileSpanExporter, OTLPHttpExporter
+from common.protocol import Protocol, MessageType, TaskType
+from server_scraping import ScrapingServer
+from server_processing import ProcessingServer
+
+PARENT = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+
+def read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_traceparent_and_sampling():
+    """Formato W3C y muestreo decidido en la raíz"""
+    print("🧪 Test 1: traceparent y muestreo")
+    
+    context = SpanContext.from_traceparent(PARENT)
+    assert context.trace_id == '0af7651916cd43dd8448eb211c80319c'
+    assert context.span_id == 'b7ad6b7169203331'
+    assert context.sampled and context.to_traceparent() == PARENT
+    
+    for invalid in (None, '', 'basura', '00-' + '0' * 32 + '-b7ad6b7169203331-01', '00-xyz-abc-01'):
+        assert SpanContext.from_traceparent(invalid) is None
+    
+    path = os.path.join(tempfile.mkdtemp(), 'spans.jsonl')
+    tracer = Tracer('test', FileSpanExporter(path), sample_rate=0.0)
+    
+    # Traza nueva con muestreo 0: se propaga pero no se registra
+    with tracer.span('raiz') as root:
+        assert not root.context.sampled
+        with tracer.span('hija') as child:
+            assert child.context.trace_id == root.context.trace_id
+    
+    # Padre muestreado (ej: Servidor A): se respeta aunque el muestreo local sea 0
+    with tracer.span('remota', parent=PARENT) as remote:
+        assert remote.context.sampled
+        assert remote.parent_span_id == 'b7ad6b7169203331'
+    
+    tracer.shutdown()
+    
+    spans = read_spans(path)
+    assert [span['name'] for span in spans] == ['remota']
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_file_exporter_and_nesting():
+    """Spans anidados a través de await y errores registrados"""
+    print("🧪 Test 2: Exportador a archivo")
+    
+    path = os.path.join(tempfile.mkdtemp(), 'spans.jsonl')
+    tracer = Tracer('test', FileSpanExporter(path), flush_interval=0.1)
+    
+    async def run():
+        with tracer.span('request'):
+            async def stage(name):
+                with tracer.span(name):
+                    await asyncio.sleep(0.01)
+            
+            await asyncio.gather(stage('fetch'), stage('parse'))
+            
+            try:
+                with tracer.span('falla'):
+                    raise ValueError("boom")
+            except ValueError:
+                pass
+    
+    asyncio.run(run())
+    tracer.shutdown()
+    
+    spans = {span['name']: span for span in read_spans(path)}
+    root = spans['request']
+    
+    assert root['parent_span_id'] is None
+    for name in ('fetch', 'parse', 'falla'):
+        assert spans[name]['parent_span_id'] == root['span_id']
+        assert spans[name]['trace_id'] == root['trace_id']
+    
+    assert spans['fetch']['duration_ms'] >= 10
+    assert spans['falla']['error'] == 'boom'
+    assert tracer.exported == 4
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_otlp_exporter():
+    """POST OTLP/HTTP JSON a un collector"""
+    print("🧪 Test 3: Exportador OTLP")
+    
+    received = []
+    
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append((self.path, json.loads(self.rfile.read(int(self.headers['Content-Length'])))))
+            self.send_response(200)
+            self.end_headers()
+        
+        def log_message(self, *args):
+            pass
+    
+    collector = ThreadingHTTPServer(('127.0.0.1', 0), Collector)
+    threading.Thread(target=collector.serve_forever, daemon=True).start()
+    
+    try:
+        endpoint = f'http://127.0.0.1:{collector.server_address[1]}/v1/traces'
+        tracer = Tracer('scraping-server', OTLPHttpExporter(endpoint), flush_interval=0.1)
+        
+        with tracer.span('GET /scrape', parent=PARENT, attributes={'http.status_code': 200, 'ok': True}):
+            pass
+        
+        tracer.shutdown()
+    finally:
+        collector.shutdown()
+    
+    path, body = received[0]
+    assert path == '/v1/traces'
+    
+    resource = body['resourceSpans'][0]
+    assert resource['resource']['attributes'][0]['value']['stringValue'] == 'scraping-server'
+    
+    span = resource['scopeSpans'][0]['spans'][0]
+    assert span['traceId'] == '0af7651916cd43dd8448eb211c80319c'
+    assert span['parentSpanId'] == 'b7ad6b7169203331'
+    assert int(span['endTimeUnixNano']) >= int(span['startTimeUnixNano'])
+    assert {'key': 'http.status_code', 'value': {'intValue': '200'}} in span['attributes']
+    assert {'key': 'ok', 'value': {'boolValue': True}} in span['attributes']
+    
+    print("✅ Test 3 PASSED\n")
+
+
+def test_scraping_server_spans():
+    """Span raíz por request HTTP con hijos por etapa y X-Trace-Id"""
+    print("🧪 Test 4: Spans del Servidor A")
+    
+    path = os.path.join(tempfile.mkdtemp(), 'spans.jsonl')
+    tracer = Tracer('scraping-server', FileSpanExporter(path))
+    
+    async def origin(request):
+        return web.Response(text='<html><head><title>Traza</title></head></html>', content_type='text/html')
+    
+    async def run():
+        origin_app = web.Application()
+        origin_app.router.add_get('/', origin)
+        origin_runner = web.AppRunner(origin_app)
+        await origin_runner.setup()
+        await web.TCPSite(origin_runner, '127.0.0.1', 0).start()
+        
+        server = ScrapingServer(enable_cache=False, enable_rate_limit=False, tracer=tracer)
+        server.session = aiohttp.ClientSession()
+        
+        app = web.Application(middlewares=[server._metrics_middleware, server._tracing_middleware])
+        app.router.add_get('/scrape', server.scrape_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        
+        try:
+            async with aiohttp.ClientSession() as client:
+                async with client.get(
+                    f'http://127.0.0.1:{runner.addresses[0][1]}/scrape',
+                    params={'url': f'http://127.0.0.1:{origin_runner.addresses[0][1]}/'},
+                    headers={'traceparent': PARENT}
+                ) as r:
+                    assert r.status == 200
+                    return r.headers['X-Trace-Id']
+        finally:
+            await server.session.close()
+            await runner.cleanup()
+            await origin_runner.cleanup()
+    
+    trace_id = asyncio.run(run())
+    tracer.shutdown()
+    
+    assert trace_id == '0af7651916cd43dd8448eb211c80319c'
+    
+    spans = {span['name']: span for span in read_spans(path)}
+    root = spans['GET /scrape']
+    assert root['parent_span_id'] == 'b7ad6b7169203331'
+    assert root['attributes']['http.status_code'] == 200
+    
+    for stage in ('fetch', 'parse', 'serialize'):
+        assert spans[stage]['parent_span_id'] == root['span_id'], stage
+        assert spans[stage]['trace_id'] == trace_id
+    
+    print("✅ Test 4 PASSED\n")
+
+
+def test_processing_server_spans():
+    """El Servidor B continúa la traza del mensaje y registra cola y ejecución por tarea"""
+    print("🧪 Test 5: Spans del Servidor B")
+    
+    path = os.path.join(tempfile.mkdtemp(), 'spans.jsonl')
+    tracer = Tracer('processing-server', FileSpanExporter(path))
+    server = ProcessingServer(('127.0.0.1', 0), num_processes=1, tracer=tracer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    try:
+        message = Protocol.create_request(
+            TaskType.SEO,
+            'https://example.com',
+            {'html_encoding': 'utf-8'},
+            traceparent=PARENT
+        )
+        html = b'<html><head><title>SEO</title></head><body><h1>Hola</h1></body></html>'
+        
+        with socket.create_connection(server.server_address, timeout=30) as sock:
+            sock.sendall(Protocol.encode_message(message, {'html': html}))
+            response = Protocol.decode_message(sock)
+        
+        assert response['type'] == MessageType.RESPONSE.value
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    spans = {span['name']: span for span in read_spans(path)}
+    request_span = spans['processing.request']
+    
+    assert request_span['trace_id'] == '0af7651916cd43dd8448eb211c80319c'
+    assert request_span['parent_span_id'] == 'b7ad6b7169203331'
+    assert request_span['attributes']['task_type'] == 'seo'
+    
+    wait, execute = spans['pool.wait seo'], spans['pool.execute seo']
+    assert wait['parent_span_id'] == execute['parent_span_id'] == request_span['span_id']
+    assert wait['start_time'] <= execute['start_time']
+    assert execute['attributes']['outcome'] == 'ok' and execute['error'] is None
+    
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_traceparent_and_sampling()
+    test_file_exporter_and_nesting()
+    test_otlp_exporter()
+    test_scraping_server_spans()
+    test_processing_server_spans()
+    print("✅ Todos los tests de trazas pasaron")
@@ -0,0 +1,145 @@
+"""
+Tests del pool de workers administrado (reciclado, caídas, reintentos y timeout)
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar proyecto al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from processor.worker_pool import WorkerPool, WorkerCrashed, TaskTimeout
+
+
+def square(x):
+    return x * x
+
+
+def whoami(_):
+    return os.getpid()
+
+
+def crash_once(marker):
+    """Se cae la primera vez (como un segfault), funciona la segunda"""
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return 'ok'
+
+
+def always_crash(_):
+    os._exit(1)
+
+
+def hold_memory(mb):
+    global _ballast
+    _ballast = bytearray(mb * 1024 * 1024)
+    for i in range(0, len(_ballast), 4096):
+        _ballast[i] = 1
+    return os.getpid()
+
+
+def fail(_):
+    raise ValueError("error de la tarea")
+
+
+def test_results_and_recycling_by_tasks():
+    """Resultados normales y reciclado cada max_tasks tareas"""
+    print("🧪 Test 1: Reciclado por cantidad de tareas")
+    
+    pool = WorkerPool(processes=1, max_tasks=2)
+    
+    try:
+        assert [pool.apply(square, (i,)) for i in range(3)] == [0, 1, 4]
+        
+        # Tareas 4 a 7: el worker cambia después de la 4 y de la 6
+        pids = [pool.apply(whoami, (None,)) for _ in range(4)]
+        assert pids[1] == pids[2] and len(set(pids)) == 3, pids
+        
+        stats = pool.stats()[0]
+        assert stats['total_tasks'] == 7
+        assert stats['recycled'] == 3 and stats['restarts'] == 3
+        
+        # Las excepciones de la tarea llegan tal cual (sin reiniciar el worker)
+        try:
+            pool.apply(fail, (None,))
+            assert False
+        except ValueError as e:
+            assert 'error de la tarea' in str(e)
+    finally:
+        pool.close()
+        pool.join()
+    
+    print("✅ Test 1 PASSED\n")
+
+
+def test_crash_fails_fast_and_retries():
+    """Un worker que muere se detecta enseguida y la tarea se reintenta"""
+    print("🧪 Test 2: Caídas y reintentos")
+    
+    pool = WorkerPool(processes=1, max_tasks=None, retries=1)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            assert pool.apply(crash_once, (os.path.join(tmp, 'marker'),)) == 'ok'
+        
+        start = time.time()
+        try:
+            pool.apply(always_crash, (None,))
+            assert False
+        except WorkerCrashed:
+            pass
+        assert time.time() - start < 10
+        
+        # Sin reintento: falla al primer intento
+        try:
+            pool.apply(always_crash, (None,), retry=False)
+            assert False
+        except WorkerCrashed:
+            pass
+        
+        stats = pool.stats()[0]
+        assert stats['crashes'] == 4, stats
+        
+        # El pool sigue funcionando
+        assert pool.apply(square, (3,)) == 9
+    finally:
+        pool.close()
+        pool.join()
+    
+    print("✅ Test 2 PASSED\n")
+
+
+def test_recycling_by_rss_and_timeout():
+    """Reciclado por memoria y worker terminado al exceder el timeout"""
+    print("🧪 Test 3: Reciclado por RSS y timeout")
+    
+    pool = WorkerPool(processes=1, max_tasks=None, max_rss_mb=100, task_timeout=1)
+    
+    try:
+        first = pool.apply(hold_memory, (200,))
+        assert pool.stats()[0]['recycled'] == 1
+        assert pool.apply(whoami, (None,)) != first
+        
+        try:
+            pool.apply(time.sleep, (5,))
+            assert False
+        except TaskTimeout:
+            pass
+        
+        assert pool.stats()[0]['timeouts'] == 1
+        assert pool.apply(square, (4,)) == 16
+    finally:
+        pool.close()
+        pool.join()
+    
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == '__main__':
+    test_results_and_recycling_by_tasks()
+    test_crash_fails_fast_and_retries()
+    test_recycling_by_rss_and_timeout()
+    print("✅ Todos los tests del pool de workers pasaron")